@@ -1,16 +1,25 @@
 from __future__ import annotations
 
-from fastapi import APIRouter, Depends, Query
+from fastapi import APIRouter, Depends, Header, Query, Response
 
 from app.core.exceptions import ArchCADError
 from app.core.settings import Settings, get_settings
-from app.schemas.api import ArchCADDownloadRequest, ArchCADIndexRequest
-from app.services.archcad_downloader import ArchCADDownloader
-from app.services.archcad_indexer import ArchCADIndexer
+from app.schemas.api import (
+    DEFAULT_MASK_RESOLUTION,
+    MASK_RESOLUTION_RANGE,
+    POINTCLOUD_MAX_LOD,
+    ArchCADDownloadRequest,
+    ArchCADIndexRequest,
+)
 from app.services.archcad_search import ArchCADSearchService
+from app.utils.polyline_lod import POLYLINE_MAX_LOD
+
+# Services other than search are imported inside their endpoints so that
+# startup (and every worker process) only pays for what it serves.
 
 router = APIRouter(prefix="/datasets/archcad", tags=["archcad"])
 VALID_MODALITIES = {"image", "svg", "json", "qa", "pointcloud"}
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
 
 
 def _modalities_from_query(raw_modalities: str | None) -> list[str]:
@@ -26,11 +35,28 @@ def _modalities_from_query(raw_modalities: str | None) -> list[str]:
     return values
 
 
+def _bbox_from_query(raw_bbox: str | None) -> tuple[float, ...] | None:
+    if not raw_bbox:
+        return None
+    try:
+        values = tuple(float(item) for item in raw_bbox.split(","))
+    except ValueError as exc:
+        raise ArchCADError("Invalid bbox filter", context={"bbox": raw_bbox}) from exc
+    if len(values) not in {4, 6}:
+        raise ArchCADError(
+            "Invalid bbox filter",
+            context={"bbox": raw_bbox, "expected": "4 values (2D) or 6 values (3D)"},
+        )
+    return values
+
+
 @router.post("/download")
 async def download_archcad(
     request: ArchCADDownloadRequest,
     settings: Settings = Depends(get_settings),
 ) -> dict[str, object]:
+    from app.services.archcad_downloader import ArchCADDownloader
+
     downloader = ArchCADDownloader(settings)
     return downloader.download(force=request.force, strategy=request.strategy)
 
@@ -46,8 +72,17 @@ async def index_archcad(
     request: ArchCADIndexRequest,
     settings: Settings = Depends(get_settings),
 ) -> dict[str, object]:
+    from app.services.archcad_indexer import ArchCADIndexer
+
     indexer = ArchCADIndexer(settings)
-    return indexer.build_index(force_reindex=request.force_reindex, limit=request.limit)
+    return indexer.build_index(
+        force_reindex=request.force_reindex,
+        limit=request.limit,
+        generate_thumbnails=request.generate_thumbnails,
+        split=request.split,
+        profile_memory=request.profile_memory,
+        profile_slowest=request.profile_slowest,
+    )
 
 
 @router.get("/samples")
@@ -71,22 +106,15 @@ async def list_archcad_samples(
     )
 
 
-@router.get("/samples/{sample_id}")
-async def get_archcad_sample(
-    sample_id: str,
-    settings: Settings = Depends(get_settings),
-) -> dict[str, object]:
-    search_service = ArchCADSearchService(settings)
-    return search_service.get_sample(sample_id)
-
-
-@router.get("/samples/{sample_id}/elements")
+@router.get("/samples/{sample_id:path}/elements")
 async def get_archcad_elements(
     sample_id: str,
     offset: int = Query(default=0, ge=0),
     limit: int = Query(default=200, ge=1, le=1000),
     semantic: str | None = Query(default=None),
     instance: str | None = Query(default=None),
+    lod: int | None = Query(default=None, ge=0, le=POLYLINE_MAX_LOD, description="Polyline level of detail"),
+    tolerance: float | None = Query(default=None, gt=0, description="Max polyline simplification error"),
     settings: Settings = Depends(get_settings),
 ) -> dict[str, object]:
     search_service = ArchCADSearchService(settings)
@@ -96,10 +124,12 @@ async def get_archcad_elements(
         limit=limit,
         semantic=semantic,
         instance=instance,
+        lod=lod,
+        tolerance=tolerance,
     )
 
 
-@router.get("/samples/{sample_id}/qa")
+@router.get("/samples/{sample_id:path}/qa")
 async def get_archcad_qa(
     sample_id: str,
     offset: int = Query(default=0, ge=0),
@@ -110,14 +140,190 @@ async def get_archcad_qa(
     return search_service.get_qa(sample_id=sample_id, offset=offset, limit=limit)
 
 
+@router.get("/samples/{sample_id:path}/pointcloud")
+async def get_archcad_pointcloud(
+    sample_id: str,
+    lod: int = Query(default=0, ge=0, le=POINTCLOUD_MAX_LOD),
+    bbox: str | None = Query(default=None, description="min_x,min_y,max_x,max_y or min_x,min_y,min_z,max_x,max_y,max_z"),
+    encoding: str = Query(default="int16", description="int16 or float16"),
+    settings: Settings = Depends(get_settings),
+) -> Response:
+    from app.services.archcad_pointcloud import ArchCADPointCloudService
+
+    pointcloud_service = ArchCADPointCloudService(settings)
+    level = pointcloud_service.get_level(
+        sample_id,
+        lod=lod,
+        bbox=_bbox_from_query(bbox),
+        encoding=encoding,
+    )
+    return Response(
+        content=level["payload"],
+        media_type="application/octet-stream",
+        headers={
+            "X-Point-Count": str(level["point_count"]),
+            "X-Point-Source-Count": str(level["source_point_count"]),
+            "X-Point-Lod": str(level["lod"]),
+            "X-Point-Max-Lod": str(level["max_lod"]),
+            "X-Point-Encoding": level["encoding"],
+            "X-Point-Scale": ",".join(str(value) for value in level["scale"]),
+            "X-Point-Offset": ",".join(str(value) for value in level["offset"]),
+            "X-Point-Bounds": ",".join(str(value) for value in level["bounds"]),
+        },
+    )
+
+
+@router.get("/samples/{sample_id:path}/image")
+async def get_archcad_image(
+    sample_id: str,
+    size: int = Query(default=512, description="Thumbnail size: 128, 512 or 2048"),
+    format: str = Query(default="webp", description="webp or png"),
+    if_none_match: str | None = Header(default=None),
+    settings: Settings = Depends(get_settings),
+) -> Response:
+    from app.services.archcad_images import ArchCADImageService
+
+    image_service = ArchCADImageService(settings)
+    thumbnail = image_service.get_thumbnail(
+        sample_id,
+        size=size,
+        fmt=format,
+        if_none_match=if_none_match,
+    )
+    headers = {"ETag": thumbnail["etag"], "Cache-Control": IMMUTABLE_CACHE_CONTROL}
+    if thumbnail["payload"] is None:
+        return Response(status_code=304, headers=headers)
+    return Response(content=thumbnail["payload"], media_type=thumbnail["media_type"], headers=headers)
+
+
+@router.get("/samples/{sample_id:path}/mask")
+async def get_archcad_mask(
+    sample_id: str,
+    resolution: int = Query(
+        default=DEFAULT_MASK_RESOLUTION,
+        ge=MASK_RESOLUTION_RANGE[0],
+        le=MASK_RESOLUTION_RANGE[1],
+    ),
+    thickness: int = Query(default=1, ge=1, le=15),
+    settings: Settings = Depends(get_settings),
+) -> Response:
+    from app.services.archcad_masks import ArchCADMaskService
+
+    mask_service = ArchCADMaskService(settings)
+    mask = mask_service.get_mask(sample_id, resolution=resolution, thickness=thickness)
+    return Response(
+        content=mask["payload"],
+        media_type="application/octet-stream",
+        headers={
+            "X-Mask-Width": str(mask["width"]),
+            "X-Mask-Height": str(mask["height"]),
+            "X-Mask-Extent": ",".join(str(value) for value in mask["extent"]),
+        },
+    )
+
+
+@router.get("/samples/{sample_id:path}/tiles/{z}/{x}/{y}")
+async def get_archcad_tile(
+    sample_id: str,
+    z: int,
+    x: int,
+    y: int,
+    if_none_match: str | None = Header(default=None),
+    settings: Settings = Depends(get_settings),
+) -> Response:
+    from app.services.archcad_tiles import TILE_MEDIA_TYPE, ArchCADTileService
+
+    tile_service = ArchCADTileService(settings)
+    tile = tile_service.get_tile(sample_id, z, x, y, if_none_match=if_none_match)
+    headers = {"ETag": tile["etag"], "Cache-Control": IMMUTABLE_CACHE_CONTROL}
+    if tile["payload"] is None:
+        return Response(status_code=304, headers=headers)
+    headers.update(
+        {
+            "X-Tile-Bounds": ",".join(str(value) for value in tile["bounds"]),
+            "X-Tile-Features": str(tile["feature_count"]),
+            "X-Tile-Vertices": str(tile["vertex_count"]),
+        }
+    )
+    return Response(content=tile["payload"], media_type=TILE_MEDIA_TYPE, headers=headers)
+
+
+@router.get("/samples/{sample_id:path}/alignment")
+async def get_archcad_alignment(
+    sample_id: str,
+    settings: Settings = Depends(get_settings),
+) -> dict[str, object]:
+    from app.services.archcad_alignment import ArchCADAlignmentService
+
+    alignment_service = ArchCADAlignmentService(settings)
+    return alignment_service.get_alignment(sample_id)
+
+
+@router.get("/samples/{sample_id:path}/topology")
+async def get_archcad_topology(
+    sample_id: str,
+    semantic: str | None = Query(default=None, description="Only line work with this semantic, e.g. wall"),
+    snap: float = Query(default=1e-3, gt=0, lt=1, description="Snap distance as a fraction of the diagonal"),
+    settings: Settings = Depends(get_settings),
+) -> dict[str, object]:
+    from app.services.archcad_topology import ArchCADTopologyService
+
+    topology_service = ArchCADTopologyService(settings)
+    return topology_service.get_topology(sample_id, semantic=semantic, snap=snap)
+
+
+@router.get("/samples/{sample_id:path}/duplicates")
+async def get_archcad_sample_duplicates(
+    sample_id: str,
+    settings: Settings = Depends(get_settings),
+) -> dict[str, object]:
+    from app.services.archcad_duplicates import ArchCADDuplicateService
+
+    duplicate_service = ArchCADDuplicateService(settings)
+    return duplicate_service.get_sample_duplicates(sample_id)
+
+
+@router.get("/samples/{sample_id:path}/instances")
+async def get_archcad_instances(
+    sample_id: str,
+    semantic: str | None = Query(default=None, description="Dominant semantic of the instance"),
+    bbox: str | None = Query(default=None, description="min_x,min_y,max_x,max_y the instance bbox must intersect"),
+    offset: int = Query(default=0, ge=0),
+    limit: int = Query(default=200, ge=1, le=1000),
+    settings: Settings = Depends(get_settings),
+) -> dict[str, object]:
+    search_service = ArchCADSearchService(settings)
+    return search_service.get_instances(
+        sample_id=sample_id,
+        offset=offset,
+        limit=limit,
+        semantic=semantic,
+        bbox=_bbox_from_query(bbox),
+    )
+
+
+# Sample ids carry their split prefix ("train/0001"), hence the path converters;
+# this catch-all must stay after the sub-resource routes above.
+@router.get("/samples/{sample_id:path}")
+async def get_archcad_sample(
+    sample_id: str,
+    settings: Settings = Depends(get_settings),
+) -> dict[str, object]:
+    search_service = ArchCADSearchService(settings)
+    return search_service.get_sample(sample_id)
+
+
 @router.get("/search")
 async def search_archcad(
-    semantic: str | None = Query(default=None),
-    instance: str | None = Query(default=None),
+    semantic: str | None = Query(default=None, description="Comma-separated semantic labels"),
+    instance: str | None = Query(default=None, description="Comma-separated instance labels"),
+    op: str | None = Query(default=None, description="Combine labels with and, or, or not"),
     modalities: str | None = Query(default=None, description="Comma-separated modalities"),
     split: str | None = Query(default=None),
     min_count: int | None = Query(default=None, ge=1),
     max_count: int | None = Query(default=None, ge=1),
+    min_alignment: float | None = Query(default=None, ge=0, le=1, description="Min JSON/SVG alignment score"),
+    exclude_duplicates: bool = Query(default=False, description="Keep one sample per near-duplicate cluster"),
     offset: int = Query(default=0, ge=0),
     limit: int = Query(default=50, ge=1, le=500),
     settings: Settings = Depends(get_settings),
@@ -132,10 +338,91 @@ async def search_archcad(
         max_count=max_count,
         offset=offset,
         limit=limit,
+        op=op,
+        min_alignment=min_alignment,
+        exclude_duplicates=exclude_duplicates,
     )
 
 
+@router.get("/instances")
+async def search_archcad_instances(
+    semantic: str | None = Query(default=None, description="Dominant semantic of the instance"),
+    instance: str | None = Query(default=None),
+    split: str | None = Query(default=None),
+    bbox: str | None = Query(default=None, description="min_x,min_y,max_x,max_y the instance bbox must intersect"),
+    min_elements: int | None = Query(default=None, ge=1),
+    max_elements: int | None = Query(default=None, ge=1),
+    offset: int = Query(default=0, ge=0),
+    limit: int = Query(default=50, ge=1, le=500),
+    settings: Settings = Depends(get_settings),
+) -> dict[str, object]:
+    search_service = ArchCADSearchService(settings)
+    return search_service.search_instances(
+        offset=offset,
+        limit=limit,
+        semantic=semantic,
+        instance=instance,
+        split=split,
+        bbox=_bbox_from_query(bbox),
+        min_elements=min_elements,
+        max_elements=max_elements,
+    )
+
+
+@router.get("/sample")
+async def sample_archcad(
+    n: int = Query(default=32, ge=1, le=1000, description="Number of samples to draw"),
+    seed: int | None = Query(default=None, ge=0, description="Seed for a reproducible draw"),
+    split: str | None = Query(default=None),
+    semantic: str | None = Query(default=None, description="Comma-separated semantic labels (any of)"),
+    stratify: str | None = Query(default=None, description="Balance the draw across split or semantic"),
+    min_alignment: float | None = Query(default=None, ge=0, le=1, description="Min JSON/SVG alignment score"),
+    exclude_duplicates: bool = Query(default=False, description="Keep one sample per near-duplicate cluster"),
+    settings: Settings = Depends(get_settings),
+) -> dict[str, object]:
+    from app.services.archcad_sampling import ArchCADSamplingService
+
+    sampling_service = ArchCADSamplingService(settings)
+    return sampling_service.sample(
+        n=n,
+        seed=seed,
+        split=split,
+        semantic=semantic,
+        stratify=stratify,
+        min_alignment=min_alignment,
+        exclude_duplicates=exclude_duplicates,
+    )
+
+
+@router.get("/duplicates")
+async def list_archcad_duplicates(
+    cross_split: bool = Query(default=False, description="Only clusters spanning more than one split"),
+    offset: int = Query(default=0, ge=0),
+    limit: int = Query(default=50, ge=1, le=500),
+    settings: Settings = Depends(get_settings),
+) -> dict[str, object]:
+    from app.services.archcad_duplicates import ArchCADDuplicateService
+
+    duplicate_service = ArchCADDuplicateService(settings)
+    return duplicate_service.list_clusters(offset=offset, limit=limit, cross_split=cross_split)
+
+
 @router.get("/stats/semantics")
 async def semantic_stats(settings: Settings = Depends(get_settings)) -> dict[str, object]:
     search_service = ArchCADSearchService(settings)
     return search_service.semantic_stats()
+
+
+@router.get("/admin/slow-queries")
+async def slow_queries(
+    limit: int | None = Query(default=None, ge=1, le=500),
+    settings: Settings = Depends(get_settings),
+) -> dict[str, object]:
+    search_service = ArchCADSearchService(settings)
+    return search_service.slow_queries(limit=limit)
+
+
+@router.delete("/admin/slow-queries")
+async def reset_slow_queries(settings: Settings = Depends(get_settings)) -> dict[str, object]:
+    search_service = ArchCADSearchService(settings)
+    return search_service.reset_slow_queries()
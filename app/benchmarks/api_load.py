@@ -0,0 +1,283 @@
+from __future__ import annotations
+
+import argparse
+import asyncio
+import http.client
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable
+from urllib.parse import quote, urlsplit
+
+import numpy as np
+
+from app.core.settings import Settings, get_settings
+from app.models.sharded_index_store import open_index_store
+from app.services.archcad_indexer import ArchCADIndexer
+from app.services.archcad_synthetic import ArchCADSyntheticGenerator
+from app.services.archcad_warmup import asgi_get
+
+API_PREFIX = "/datasets/archcad"
+# Route name -> share of the mixed workload.
+WORKLOAD_MIX = {"samples": 0.3, "search": 0.3, "elements": 0.3, "stats_semantics": 0.1}
+PERCENTILES = (50, 95, 99)
+
+
+def prepare_index(dataset_dir: Path, processed_dir: Path, *, samples: int, seed: int) -> Settings:
+    """Generate (if missing) and index a synthetic dataset; reuse an existing index."""
+    settings = Settings(ARCHCAD_LOCAL_DIR=dataset_dir, ARCHCAD_PROCESSED_DIR=processed_dir)
+    settings.ensure_directories()
+    if not (dataset_dir / "data").exists():
+        ArchCADSyntheticGenerator(dataset_dir, samples=samples, seed=seed).generate()
+    if not open_index_store(settings).exists():
+        ArchCADIndexer(settings).build_index(force_reindex=True)
+    return settings
+
+
+def build_workload(settings: Settings, *, seed: int) -> Callable[[], tuple[str, str]]:
+    """Return a generator of ``(route, path)`` pairs following ``WORKLOAD_MIX``."""
+    store = open_index_store(settings)
+    sample_ids = store.sample_ids()
+    semantics = [row["semantic"] for row in store.semantic_stats()]
+    splits = sorted({sample_id.split("/", 1)[0] for sample_id in sample_ids if "/" in sample_id})
+    routes = list(WORKLOAD_MIX)
+    weights = list(WORKLOAD_MIX.values())
+    rng = random.Random(seed)
+    lock = threading.Lock()
+
+    def next_request() -> tuple[str, str]:
+        with lock:
+            route = rng.choices(routes, weights)[0]
+            split_filter = f"&split={rng.choice(splits)}" if splits and rng.random() < 0.5 else ""
+            if route == "samples":
+                offset = rng.randrange(max(1, len(sample_ids) - 50))
+                return route, f"{API_PREFIX}/samples?offset={offset}&limit=50{split_filter}"
+            if route == "search":
+                count_filter = "&min_count=2" if rng.random() < 0.3 else ""
+                semantic = rng.choice(semantics)
+                return route, f"{API_PREFIX}/search?semantic={quote(semantic)}&limit=50{split_filter}{count_filter}"
+            if route == "elements":
+                sample_id = quote(rng.choice(sample_ids))
+                return route, f"{API_PREFIX}/samples/{sample_id}/elements?limit=200"
+            return route, f"{API_PREFIX}/stats/semantics"
+
+    return next_request
+
+
+def run_in_process(
+    settings: Settings,
+    next_request: Callable[[], tuple[str, str]],
+    *,
+    concurrency: int,
+    requests: int,
+    warmup: int,
+) -> tuple[list[tuple[str, float, int]], float]:
+    """Drive the ASGI app directly with ``concurrency`` concurrent clients."""
+    from app.main import create_app
+
+    application = create_app()
+    application.dependency_overrides[get_settings] = lambda: settings
+
+    async def drive() -> tuple[list[tuple[str, float, int]], float]:
+        async with application.router.lifespan_context(application):
+            for _ in range(warmup):
+                await asgi_get(application, next_request()[1])
+            results: list[tuple[str, float, int]] = []
+            remaining = requests
+
+            async def client() -> None:
+                nonlocal remaining
+                while remaining > 0:
+                    remaining -= 1
+                    route, target = next_request()
+                    started = time.perf_counter()
+                    status = await asgi_get(application, target)
+                    results.append((route, time.perf_counter() - started, status))
+
+            started = time.perf_counter()
+            await asyncio.gather(*(client() for _ in range(concurrency)))
+            return results, time.perf_counter() - started
+
+    return asyncio.run(drive())
+
+
+def run_over_http(
+    base_url: str,
+    next_request: Callable[[], tuple[str, str]],
+    *,
+    concurrency: int,
+    requests: int,
+    warmup: int,
+) -> tuple[list[tuple[str, float, int]], float]:
+    """Drive a running server with ``concurrency`` keep-alive connections."""
+    location = urlsplit(base_url)
+    results: list[tuple[str, float, int]] = []
+    results_lock = threading.Lock()
+    remaining = [requests]
+
+    def fetch(connection: http.client.HTTPConnection, target: str) -> int:
+        connection.request("GET", target)
+        response = connection.getresponse()
+        response.read()
+        return response.status
+
+    warm_connection = http.client.HTTPConnection(location.hostname, location.port, timeout=60)
+    for _ in range(warmup):
+        fetch(warm_connection, next_request()[1])
+    warm_connection.close()
+
+    def client() -> None:
+        connection = http.client.HTTPConnection(location.hostname, location.port, timeout=60)
+        local: list[tuple[str, float, int]] = []
+        try:
+            while True:
+                with results_lock:
+                    if remaining[0] <= 0:
+                        break
+                    remaining[0] -= 1
+                route, target = next_request()
+                started = time.perf_counter()
+                try:
+                    status = fetch(connection, target)
+                except (OSError, http.client.HTTPException):
+                    connection.close()
+                    connection = http.client.HTTPConnection(location.hostname, location.port, timeout=60)
+                    status = 0
+                local.append((route, time.perf_counter() - started, status))
+        finally:
+            connection.close()
+            with results_lock:
+                results.extend(local)
+
+    threads = [threading.Thread(target=client) for _ in range(concurrency)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results, time.perf_counter() - started
+
+
+def start_uvicorn(settings: Settings, *, workers: int) -> tuple[subprocess.Popen[bytes], str]:
+    """Start ``uvicorn app.main:app`` on a free local port against ``settings``' data."""
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        port = probe.getsockname()[1]
+    environment = {
+        **os.environ,
+        "ARCHCAD_LOCAL_DIR": str(settings.archcad_local_dir),
+        "ARCHCAD_PROCESSED_DIR": str(settings.archcad_processed_dir),
+    }
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port), "--workers", str(workers), "--log-level", "warning"],
+        env=environment,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    base_url = f"http://127.0.0.1:{port}"
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        try:
+            connection = http.client.HTTPConnection("127.0.0.1", port, timeout=1)
+            connection.request("GET", "/health")
+            if connection.getresponse().status == 200:
+                return process, base_url
+        except OSError:
+            time.sleep(0.2)
+    process.terminate()
+    raise RuntimeError(f"uvicorn did not become healthy on {base_url}")
+
+
+def summarize(results: list[tuple[str, float, int]], wall_seconds: float) -> dict[str, Any]:
+    routes: dict[str, Any] = {}
+    for route in sorted({route for route, _, _ in results}) + ["all"]:
+        latencies = np.array([latency for name, latency, _ in results if route in {"all", name}]) * 1000
+        errors = sum(1 for name, _, status in results if route in {"all", name} and not 200 <= status < 400)
+        percentiles = np.percentile(latencies, PERCENTILES) if len(latencies) else [0.0] * len(PERCENTILES)
+        routes[route] = {
+            "requests": int(len(latencies)),
+            "errors": errors,
+            "rps": round(len(latencies) / wall_seconds, 2) if wall_seconds else 0.0,
+            "mean_ms": round(float(latencies.mean()), 3) if len(latencies) else 0.0,
+            **{f"p{value}_ms": round(float(result), 3) for value, result in zip(PERCENTILES, percentiles)},
+        }
+    return {"wall_seconds": round(wall_seconds, 3), "routes": routes}
+
+
+def compare(report: dict[str, Any], baseline: dict[str, Any], *, tolerance: float) -> list[dict[str, Any]]:
+    """List routes whose p95 latency rose or throughput fell by more than ``tolerance``."""
+    regressions = []
+    for route, current in report["routes"].items():
+        previous = baseline.get("routes", {}).get(route)
+        if not previous:
+            continue
+        if previous["p95_ms"] and current["p95_ms"] > previous["p95_ms"] * (1 + tolerance):
+            regressions.append({"route": route, "metric": "p95_ms", "baseline": previous["p95_ms"], "current": current["p95_ms"]})
+        if previous["rps"] and current["rps"] < previous["rps"] * (1 - tolerance):
+            regressions.append({"route": route, "metric": "rps", "baseline": previous["rps"], "current": current["rps"]})
+    return regressions
+
+
+def main() -> None:
+    """Mixed-workload API load benchmark with per-route latency percentiles."""
+    parser = argparse.ArgumentParser(description=main.__doc__)
+    parser.add_argument("--dataset-dir", type=Path, default=None, help="Synthetic dataset root (generated if missing)")
+    parser.add_argument("--processed-dir", type=Path, default=None)
+    parser.add_argument("--samples", type=int, default=1000)
+    parser.add_argument("--mode", choices=("asgi", "uvicorn", "url"), default="asgi")
+    parser.add_argument("--url", default=None, help="Base URL of a running server for --mode url")
+    parser.add_argument("--uvicorn-workers", type=int, default=1)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--warmup", type=int, default=50)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--baseline", type=Path, default=None, help="Compare against this JSON report")
+    parser.add_argument("--save-baseline", type=Path, default=None, help="Write this run's report as a baseline")
+    parser.add_argument("--tolerance", type=float, default=0.15)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="archcad-api-bench-") as workdir:
+        dataset_dir = args.dataset_dir or Path(workdir) / "raw"
+        processed_dir = args.processed_dir or dataset_dir.parent / f"{dataset_dir.name}-processed"
+        settings = prepare_index(dataset_dir, processed_dir, samples=args.samples, seed=args.seed)
+        next_request = build_workload(settings, seed=args.seed)
+        options = {"concurrency": args.concurrency, "requests": args.requests, "warmup": args.warmup}
+
+        if args.mode == "asgi":
+            results, wall_seconds = run_in_process(settings, next_request, **options)
+        elif args.mode == "url":
+            if not args.url:
+                parser.error("--mode url requires --url")
+            results, wall_seconds = run_over_http(args.url, next_request, **options)
+        else:
+            process, base_url = start_uvicorn(settings, workers=args.uvicorn_workers)
+            try:
+                results, wall_seconds = run_over_http(base_url, next_request, **options)
+            finally:
+                process.terminate()
+                process.wait(timeout=10)
+
+    report = {
+        "mode": args.mode,
+        "samples": args.samples,
+        "concurrency": args.concurrency,
+        **summarize(results, wall_seconds),
+    }
+    if args.baseline:
+        report["regressions"] = compare(report, json.loads(args.baseline.read_text()), tolerance=args.tolerance)
+    if args.save_baseline:
+        args.save_baseline.write_text(json.dumps(report, indent=2))
+    print(json.dumps(report, indent=2))
+    if report.get("regressions"):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+from __future__ import annotations
+
+import argparse
+import json
+import random
+import statistics
+import tempfile
+import time
+from itertools import islice
+from pathlib import Path
+from typing import Any
+
+from app.benchmarks.api_load import prepare_index
+from app.models.index_store import ArchCADIndexStore
+from app.models.payload_codec import zstd_module
+from app.schemas.archcad import ArchCADSample
+
+# name -> (codec, train a dictionary)
+VARIANTS = {
+    "json": ("json", False),
+    "zlib": ("zlib", False),
+    "zlib+dict": ("zlib", True),
+    "zstd": ("zstd", False),
+    "zstd+dict": ("zstd", True),
+}
+
+
+def _load_samples(jsonl_path: Path, limit: int) -> list[ArchCADSample]:
+    with jsonl_path.open("r", encoding="utf-8") as handle:
+        return [ArchCADSample.model_validate_json(line) for line in islice(handle, limit) if line.strip()]
+
+
+def run_variant(
+    workdir: Path,
+    name: str,
+    samples: list[ArchCADSample],
+    *,
+    dict_size: int,
+    dict_samples: int,
+    reads: int,
+    seed: int,
+) -> dict[str, Any]:
+    codec, use_dictionary = VARIANTS[name]
+    store = ArchCADIndexStore(
+        workdir / f"{name.replace('+', '_')}.sqlite3",
+        payload_codec=codec,
+        dict_size=dict_size,
+        # Without a dictionary the training threshold is never reached.
+        dict_samples=dict_samples if use_dictionary else len(samples) + 1,
+    )
+    store.initialize(reset=True)
+    started = time.perf_counter()
+    for sample in samples:
+        store.upsert_sample(sample)
+    if use_dictionary:
+        store.compress_payloads()
+    ingest_seconds = time.perf_counter() - started
+    store.vacuum()
+
+    rng = random.Random(seed)
+    sample_ids = [sample.sample_id for sample in samples]
+    latencies = []
+    for _ in range(reads):
+        sample_id = rng.choice(sample_ids)
+        read_started = time.perf_counter()
+        store.get_sample(sample_id)
+        latencies.append((time.perf_counter() - read_started) * 1000)
+    latencies.sort()
+
+    storage = store.payload_storage_stats()
+    return {
+        "payload_bytes": storage["stored_bytes"],
+        "dictionary_bytes": storage["dictionary_bytes"],
+        "db_bytes": store.db_path.stat().st_size,
+        "ingest_seconds": round(ingest_seconds, 3),
+        "read_p50_ms": round(statistics.median(latencies), 4),
+        "read_p95_ms": round(latencies[int(len(latencies) * 0.95) - 1], 4),
+    }
+
+
+def run(jsonl_path: Path, *, limit: int, dict_size: int, dict_samples: int, reads: int, seed: int) -> dict[str, Any]:
+    samples = _load_samples(jsonl_path, limit)
+    variants = [name for name, (codec, _) in VARIANTS.items() if codec != "zstd" or zstd_module() is not None]
+    results: dict[str, Any] = {}
+    with tempfile.TemporaryDirectory(prefix="archcad-payload-bench-") as workdir:
+        for name in variants:
+            results[name] = run_variant(
+                Path(workdir),
+                name,
+                samples,
+                dict_size=dict_size,
+                dict_samples=dict_samples,
+                reads=reads,
+                seed=seed,
+            )
+    baseline = results["json"]["payload_bytes"] or 1
+    for result in results.values():
+        result["ratio"] = round(baseline / max(result["payload_bytes"], 1), 2)
+    return {"samples": len(samples), "reads": reads, "variants": results}
+
+
+def main() -> None:
+    """Compare payload codecs by stored size against get_sample latency."""
+    parser = argparse.ArgumentParser(description=main.__doc__)
+    parser.add_argument("--jsonl", type=Path, default=None, help="normalized_samples.jsonl to read payloads from")
+    parser.add_argument("--dataset-dir", type=Path, default=None, help="Synthetic dataset root when --jsonl is omitted")
+    parser.add_argument("--samples", type=int, default=1000)
+    parser.add_argument("--dict-size", type=int, default=32 * 1024)
+    parser.add_argument("--dict-samples", type=int, default=256)
+    parser.add_argument("--reads", type=int, default=2000)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    options = {
+        "limit": args.samples,
+        "dict_size": args.dict_size,
+        "dict_samples": args.dict_samples,
+        "reads": args.reads,
+        "seed": args.seed,
+    }
+    if args.jsonl:
+        report = run(args.jsonl, **options)
+    else:
+        with tempfile.TemporaryDirectory(prefix="archcad-payload-data-") as workdir:
+            dataset_dir = args.dataset_dir or Path(workdir) / "raw"
+            settings = prepare_index(
+                dataset_dir,
+                dataset_dir.parent / f"{dataset_dir.name}-processed",
+                samples=args.samples,
+                seed=args.seed,
+            )
+            report = run(settings.archcad_jsonl_path, **options)
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+from __future__ import annotations
+
+import argparse
+import json
+import random
+import statistics
+import tempfile
+import time
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+
+from app.models.index_store import ArchCADIndexStore
+from app.schemas.archcad import ArchCADElement, ArchCADSample
+from app.utils.polyline_lod import POLYLINE_MAX_LOD
+
+
+def dense_polyline(rng: np.random.Generator, vertices: int) -> dict[str, Any]:
+    """A closed, wobbly contour: what traced walls and curved furniture look like."""
+    angles = np.linspace(0, 2 * np.pi, vertices, endpoint=False)
+    radius = 200 + np.cumsum(rng.normal(0, 0.6, vertices))
+    radius -= np.linspace(0, radius[-1] - radius[0], vertices)
+    center = rng.uniform(500, 9500, 2)
+    points = np.column_stack([center[0] + radius * np.cos(angles), center[1] + radius * np.sin(angles)])
+    points = np.vstack([points, points[:1]]).round(3)
+    return {"points": [{"x": x, "y": y} for x, y in points.tolist()]}
+
+
+def build_samples(samples: int, polylines: int, min_vertices: int, max_vertices: int, seed: int) -> list[ArchCADSample]:
+    rng = np.random.default_rng(seed)
+    return [
+        ArchCADSample(
+            sample_id=f"bench/{index:05d}",
+            split="bench",
+            elements=[
+                ArchCADElement(
+                    element_id=f"p{position}",
+                    type="POLYLINE",
+                    semantic="wall",
+                    geometry=dense_polyline(rng, int(rng.integers(min_vertices, max_vertices + 1))),
+                )
+                for position in range(polylines)
+            ],
+        )
+        for index in range(samples)
+    ]
+
+
+def run(
+    workdir: Path,
+    *,
+    samples: int,
+    polylines: int,
+    min_vertices: int,
+    max_vertices: int,
+    reads: int,
+    seed: int,
+) -> dict[str, Any]:
+    corpus = build_samples(samples, polylines, min_vertices, max_vertices, seed)
+    store = ArchCADIndexStore(workdir / "lod.sqlite3")
+    store.initialize(reset=True)
+    started = time.perf_counter()
+    for sample in corpus:
+        store.upsert_sample(sample)
+    ingest_seconds = time.perf_counter() - started
+
+    rng = random.Random(seed)
+    sample_ids = [sample.sample_id for sample in corpus]
+    levels: dict[str, Any] = {}
+    for lod in range(POLYLINE_MAX_LOD + 1):
+        latencies, payload_bytes, vertex_counts = [], [], []
+        for _ in range(reads):
+            sample_id = rng.choice(sample_ids)
+            read_started = time.perf_counter()
+            result = store.get_elements(sample_id, offset=0, limit=polylines, lod=lod)
+            body = json.dumps(result["items"])
+            latencies.append((time.perf_counter() - read_started) * 1000)
+            payload_bytes.append(len(body))
+            vertex_counts.append(sum(len(item["geometry"]["points"]) for item in result["items"]))
+        latencies.sort()
+        levels[str(lod)] = {
+            "vertices_per_sample": round(statistics.mean(vertex_counts)),
+            "payload_kb": round(statistics.mean(payload_bytes) / 1024, 1),
+            "p50_ms": round(statistics.median(latencies), 3),
+            "p95_ms": round(latencies[max(0, int(len(latencies) * 0.95) - 1)], 3),
+        }
+    full = levels["0"]["payload_kb"] or 1
+    for level in levels.values():
+        level["payload_ratio"] = round(full / max(level["payload_kb"], 0.1), 1)
+
+    stats = store.geometry_stats()
+    return {
+        "samples": samples,
+        "polylines_per_sample": polylines,
+        "ingest_seconds": round(ingest_seconds, 2),
+        "geometry_kb": round(stats["geometry_bytes_stored"] / 1024, 1),
+        "lod_kb": round(stats["lod_bytes_stored"] / 1024, 1),
+        "levels": levels,
+    }
+
+
+def main() -> None:
+    """Payload size and read latency of /elements at each polyline level of detail."""
+    parser = argparse.ArgumentParser(description=main.__doc__)
+    parser.add_argument("--samples", type=int, default=50)
+    parser.add_argument("--polylines", type=int, default=20, help="Polylines per sample")
+    parser.add_argument("--min-vertices", type=int, default=200)
+    parser.add_argument("--max-vertices", type=int, default=5000)
+    parser.add_argument("--reads", type=int, default=200, help="get_elements calls per level")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="archcad-lod-bench-") as workdir:
+        report = run(
+            Path(workdir),
+            samples=args.samples,
+            polylines=args.polylines,
+            min_vertices=args.min_vertices,
+            max_vertices=args.max_vertices,
+            reads=args.reads,
+            seed=args.seed,
+        )
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
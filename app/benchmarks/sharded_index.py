@@ -0,0 +1,129 @@
+from __future__ import annotations
+
+import argparse
+import json
+import random
+import statistics
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Callable
+
+from app.models.index_store import ArchCADIndexStore
+from app.models.sharded_index_store import ArchCADShardedIndexStore
+from app.schemas.archcad import ArchCADElement, ArchCADSample, ArchCADSampleStats
+
+SPLITS = (("train", 0.8), ("val", 0.1), ("test", 0.1))
+SEMANTICS = ("wall", "single_door", "double_door", "window", "column", "stair", "elevator", "toilet")
+
+
+def _synthetic_samples(sample_count: int, elements_per_sample: int, seed: int) -> list[ArchCADSample]:
+    rng = random.Random(seed)
+    samples: list[ArchCADSample] = []
+    for index in range(sample_count):
+        split = rng.choices([name for name, _ in SPLITS], weights=[weight for _, weight in SPLITS])[0]
+        elements = []
+        for element_index in range(elements_per_sample):
+            semantic = rng.choice(SEMANTICS)
+            x, y = rng.uniform(0, 1000), rng.uniform(0, 1000)
+            elements.append(
+                ArchCADElement(
+                    type="LINE",
+                    semantic=semantic,
+                    instance=f"{semantic}_{element_index % 7}",
+                    geometry={"start": {"x": x, "y": y}, "end": {"x": x + 10, "y": y}},
+                )
+            )
+        semantic_counts: dict[str, int] = {}
+        for element in elements:
+            semantic_counts[element.semantic or ""] = semantic_counts.get(element.semantic or "", 0) + 1
+        samples.append(
+            ArchCADSample(
+                sample_id=f"{split}/sample-{index:07d}",
+                split=split,
+                elements=elements,
+                stats=ArchCADSampleStats(element_count=len(elements), semantic_counts=semantic_counts),
+            )
+        )
+    return samples
+
+
+def _time(operation: Callable[[], Any], repeat: int) -> dict[str, float]:
+    durations = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        operation()
+        durations.append((time.perf_counter() - started) * 1000)
+    return {
+        "median_ms": round(statistics.median(durations), 3),
+        "min_ms": round(min(durations), 3),
+    }
+
+
+def run(sample_count: int, elements_per_sample: int, repeat: int, seed: int) -> dict[str, Any]:
+    samples = _synthetic_samples(sample_count, elements_per_sample, seed)
+    with tempfile.TemporaryDirectory(prefix="archcad-shard-bench-") as workdir:
+        monolithic = ArchCADIndexStore(Path(workdir) / "archcad_index.sqlite3")
+        sharded = ArchCADShardedIndexStore(Path(workdir) / "shards")
+        monolithic.initialize()
+        sharded.initialize()
+        for sample in samples:
+            monolithic.upsert_sample(sample)
+            sharded.upsert_sample(sample)
+
+        queries: dict[str, Callable[[Any], Any]] = {
+            "list_train": lambda store: store.list_samples(offset=0, limit=50, split="train"),
+            "list_all": lambda store: store.list_samples(offset=0, limit=50),
+            "search_semantic_train": lambda store: store.search(
+                semantic="window",
+                instance=None,
+                modalities=None,
+                split="train",
+                min_count=2,
+                max_count=None,
+                offset=0,
+                limit=50,
+            ),
+            "search_semantic_all": lambda store: store.search(
+                semantic="window",
+                instance=None,
+                modalities=None,
+                split=None,
+                min_count=2,
+                max_count=None,
+                offset=0,
+                limit=50,
+            ),
+            "semantic_stats": lambda store: store.semantic_stats(),
+        }
+        results: dict[str, Any] = {}
+        for name, query in queries.items():
+            results[name] = {
+                "monolithic": _time(lambda: query(monolithic), repeat),
+                "sharded": _time(lambda: query(sharded), repeat),
+            }
+            results[name]["speedup"] = round(
+                results[name]["monolithic"]["median_ms"] / max(results[name]["sharded"]["median_ms"], 1e-9),
+                2,
+            )
+    return {
+        "sample_count": sample_count,
+        "elements_per_sample": elements_per_sample,
+        "repeat": repeat,
+        "queries": results,
+    }
+
+
+def main() -> None:
+    """Compare split-sharded and monolithic SQLite query latency."""
+    parser = argparse.ArgumentParser(description=main.__doc__)
+    parser.add_argument("--samples", type=int, default=5000)
+    parser.add_argument("--elements-per-sample", type=int, default=40)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=13)
+    args = parser.parse_args()
+    print(json.dumps(run(args.samples, args.elements_per_sample, args.repeat, args.seed), indent=2))
+
+
+if __name__ == "__main__":
+    main()
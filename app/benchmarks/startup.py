@@ -0,0 +1,177 @@
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any
+from urllib.parse import quote
+
+# Optional or heavy modules that should stay out of ``import app.main``.
+LAZY_MODULES = ("huggingface_hub", "PIL", "torch", "zstandard", "numpy", "app.services.archcad_indexer")
+API_PREFIX = "/datasets/archcad"
+
+
+def parse_importtime(stderr: str) -> list[dict[str, Any]]:
+    """Parse ``python -X importtime`` output into per-module rows (microseconds)."""
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:") :].split("|", 2)
+        rows.append(
+            {
+                "module": name.strip(),
+                "depth": (len(name) - len(name.lstrip()) - 1) // 2,
+                "self_us": int(self_us),
+                "cumulative_us": int(cumulative_us),
+            }
+        )
+    return rows
+
+
+def import_report(module: str = "app.main", *, top: int = 15) -> dict[str, Any]:
+    """Import ``module`` in a fresh interpreter and report where the time went."""
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+        check=True,
+        env={**os.environ, "ARCHCAD_WARMUP": "false"},
+    )
+    rows = parse_importtime(completed.stderr)
+    loaded = {row["module"] for row in rows}
+    target = next((row for row in rows if row["module"] == module), None)
+    return {
+        "module": module,
+        "total_ms": round(target["cumulative_us"] / 1000, 1) if target else None,
+        "modules_imported": len(rows),
+        # Direct imports of the target, the usual place to cut.
+        "top_level": [
+            {"module": row["module"], "cumulative_ms": round(row["cumulative_us"] / 1000, 1)}
+            for row in sorted((row for row in rows if row["depth"] == 1), key=lambda row: -row["cumulative_us"])[:top]
+        ],
+        "top_self": [
+            {"module": row["module"], "self_ms": round(row["self_us"] / 1000, 1)}
+            for row in sorted(rows, key=lambda row: -row["self_us"])[:top]
+        ],
+        "lazy_modules_loaded": sorted(name for name in LAZY_MODULES if name in loaded),
+    }
+
+
+def startup_targets(settings: Any) -> dict[str, str]:
+    """One request per main read route, built from the indexed data."""
+    from app.models.sharded_index_store import open_index_store
+
+    store = open_index_store(settings)
+    sample_id = quote(store.sample_ids()[0])
+    semantics = [row["semantic"] for row in store.semantic_stats()]
+    labels = quote(",".join(semantics[:2]))
+    return {
+        "samples": f"{API_PREFIX}/samples?limit=50",
+        "sample": f"{API_PREFIX}/samples/{sample_id}",
+        "elements": f"{API_PREFIX}/samples/{sample_id}/elements?limit=200",
+        "search": f"{API_PREFIX}/search?semantic={quote(semantics[0])}&limit=50",
+        "search_posting": f"{API_PREFIX}/search?semantic={labels}&op=or&limit=50",
+        "stats_semantics": f"{API_PREFIX}/stats/semantics",
+    }
+
+
+def _child(targets: dict[str, str], rounds: int) -> dict[str, Any]:
+    # Runs in a fresh interpreter: everything below is first-time work.
+    started = time.perf_counter()
+    from app.main import create_app
+    from app.services.archcad_warmup import asgi_get
+
+    imported = time.perf_counter()
+    application = create_app()
+
+    async def drive() -> dict[str, Any]:
+        async with application.router.lifespan_context(application):
+            ready = time.perf_counter()
+            latencies: dict[str, list[float]] = {route: [] for route in targets}
+            for _ in range(rounds):
+                for route, target in targets.items():
+                    request_started = time.perf_counter()
+                    status = await asgi_get(application, target)
+                    if status != 200:
+                        raise RuntimeError(f"{target} returned {status}")
+                    latencies[route].append((time.perf_counter() - request_started) * 1000)
+        return {
+            "import_ms": round((imported - started) * 1000, 1),
+            "startup_ms": round((ready - imported) * 1000, 1),
+            "routes": {
+                route: {
+                    "first_ms": round(values[0], 2),
+                    "steady_p50_ms": round(statistics.median(values[1:]), 2),
+                }
+                for route, values in latencies.items()
+            },
+        }
+
+    return asyncio.run(drive())
+
+
+def cold_start(settings: Any, targets: dict[str, str], *, warmup: bool, rounds: int) -> dict[str, Any]:
+    """Start a fresh process against ``settings``' data and time its first requests."""
+    env = {
+        **os.environ,
+        "ARCHCAD_LOCAL_DIR": str(settings.archcad_local_dir),
+        "ARCHCAD_PROCESSED_DIR": str(settings.archcad_processed_dir),
+        "ARCHCAD_WARMUP": "true" if warmup else "false",
+    }
+    completed = subprocess.run(
+        [sys.executable, "-m", "app.benchmarks.startup", "--child", json.dumps(targets), "--rounds", str(rounds)],
+        capture_output=True,
+        text=True,
+        check=True,
+        env=env,
+    )
+    result = json.loads(completed.stdout.strip().splitlines()[-1])
+    first = sum(route["first_ms"] for route in result["routes"].values())
+    steady = sum(route["steady_p50_ms"] for route in result["routes"].values())
+    result["first_round_ms"] = round(first, 2)
+    result["steady_round_ms"] = round(steady, 2)
+    result["first_over_steady"] = round(first / steady, 2) if steady else None
+    return result
+
+
+def main() -> None:
+    """Report import time of app.main and first-request latency with and without warm-up."""
+    parser = argparse.ArgumentParser(description=main.__doc__)
+    parser.add_argument("--dataset-dir", type=Path, default=None, help="Synthetic dataset root (generated if missing)")
+    parser.add_argument("--processed-dir", type=Path, default=None)
+    parser.add_argument("--samples", type=int, default=1000)
+    parser.add_argument("--rounds", type=int, default=20)
+    parser.add_argument("--top", type=int, default=15)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--imports-only", action="store_true", help="Skip the cold-start request timings")
+    parser.add_argument("--child", default=None, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(_child(json.loads(args.child), max(2, args.rounds))))
+        return
+
+    report: dict[str, Any] = {"imports": import_report(top=args.top)}
+    if not args.imports_only:
+        from app.benchmarks.api_load import prepare_index
+
+        with tempfile.TemporaryDirectory(prefix="archcad-startup-bench-") as workdir:
+            dataset_dir = args.dataset_dir or Path(workdir) / "raw"
+            processed_dir = args.processed_dir or dataset_dir.parent / f"{dataset_dir.name}-processed"
+            settings = prepare_index(dataset_dir, processed_dir, samples=args.samples, seed=args.seed)
+            targets = startup_targets(settings)
+            report["cold"] = cold_start(settings, targets, warmup=False, rounds=args.rounds)
+            report["warm"] = cold_start(settings, targets, warmup=True, rounds=args.rounds)
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
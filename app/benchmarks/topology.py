@@ -0,0 +1,103 @@
+from __future__ import annotations
+
+import argparse
+import json
+import time
+from typing import Any
+
+import numpy as np
+
+from app.utils.planar_graph import build_planar_graph
+from app.utils.profiling import StageProfiler
+
+# The quadratic reference needs n * n float matrices, so it only runs on small plans.
+NAIVE_MAX_SEGMENTS = 2500
+
+
+def floor_plan(segment_count: int, rng: np.random.Generator, *, room: float = 100.0, noise: float = 0.02) -> np.ndarray:
+    """Walls of a square lattice of rooms, drawn the way CAD exports draw them.
+
+    Most walls span one room, some run across several rooms (so they must be
+    split at the T-junctions they pass), and endpoints are jittered, over- or
+    undershot by up to ``noise`` times the room size.
+    """
+    # Walls average 1.8 rooms long, so 2 * side**2 / 1.8 segments in all.
+    side = max(2, round(np.sqrt(segment_count * 0.9)))
+    segments: list[list[float]] = []
+    for line in range(side + 1):
+        column = 0
+        while column < side:
+            run = int(rng.choice([1, 1, 1, 2, 4]))
+            run = min(run, side - column)
+            start, end = column * room, (column + run) * room
+            start += rng.uniform(-noise, noise) * room
+            end += rng.uniform(-noise, noise) * room
+            offset = line * room + rng.uniform(-noise, noise) * room / 10
+            segments.append([start, offset, end, offset])
+            segments.append([offset, start, offset, end])
+            column += run
+    return np.asarray(segments, dtype=np.float64)
+
+
+def naive_graph(segments: np.ndarray, tolerance: float) -> int:
+    """Quadratic reference: test every segment pair, then snap every point against all others. Returns nodes."""
+    start, direction = segments[:, None, :2], segments[:, 2:] - segments[:, :2]
+    offset = segments[None, :, :2] - start
+    denominator = direction[:, None, 0] * direction[None, :, 1] - direction[:, None, 1] * direction[None, :, 0]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        t = (offset[..., 0] * direction[None, :, 1] - offset[..., 1] * direction[None, :, 0]) / denominator
+        u = (offset[..., 0] * direction[:, None, 1] - offset[..., 1] * direction[:, None, 0]) / denominator
+    crossing = (t >= 0) & (t <= 1) & (u >= 0) & (u <= 1)
+    rows, columns = np.nonzero(np.triu(crossing, 1))
+    points = np.vstack(
+        (segments[:, :2], segments[:, 2:], segments[rows, :2] + t[rows, columns, None] * direction[rows])
+    )
+    labels = np.arange(len(points))
+    for index in range(len(points)):
+        close = np.hypot(*(points - points[index]).T) <= tolerance
+        labels[close] = labels[close].min()
+    return len(np.unique(labels))
+
+
+def run(sizes: list[int], *, tolerance: float, seed: int) -> dict[str, Any]:
+    rng = np.random.default_rng(seed)
+    report: dict[str, Any] = {"tolerance": tolerance, "sizes": {}}
+    for size in sizes:
+        segments = floor_plan(size, rng)
+        profiler = StageProfiler()
+        started = time.perf_counter()
+        graph = build_planar_graph(segments, tolerance, profiler=profiler)
+        seconds = time.perf_counter() - started
+        entry: dict[str, Any] = {
+            "segments": len(segments),
+            "seconds": round(seconds, 4),
+            "segments_per_second": round(len(segments) / seconds),
+            "intersections": graph.intersection_count,
+            "nodes": len(graph.nodes),
+            "edges": len(graph.edges),
+            "faces": len(graph.faces),
+            "stages": {name: stage["seconds"] for name, stage in profiler.summary().items()},
+        }
+        if len(segments) <= NAIVE_MAX_SEGMENTS:
+            started = time.perf_counter()
+            naive_graph(segments, tolerance)
+            naive_seconds = time.perf_counter() - started
+            entry["naive_seconds"] = round(naive_seconds, 4)
+            entry["speedup"] = round(naive_seconds / seconds, 1)
+        report["sizes"][str(size)] = entry
+    return report
+
+
+def main() -> None:
+    """Wall graph extraction time against segment count, with a quadratic reference for small plans."""
+    parser = argparse.ArgumentParser(description=main.__doc__)
+    parser.add_argument("--sizes", default="1000,2000,5000,20000,50000", help="Comma-separated segment counts")
+    parser.add_argument("--tolerance", type=float, default=5.0, help="Snap distance in drawing units")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+    sizes = [int(size) for size in args.sizes.split(",") if size]
+    print(json.dumps(run(sizes, tolerance=args.tolerance, seed=args.seed), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,24 @@
 from __future__ import annotations
 
+import atexit
+import copy
 import json
 import logging
+import os
+import queue
+import threading
+import time
 from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+from typing import Any
+
+from app.core.metrics import LOG_RECORDS_DROPPED
+
+# Records queued for the background writer; beyond this they are dropped, not blocked on.
+DEFAULT_QUEUE_SIZE = 10000
+# Per (logger, message) token bucket for WARNING and below: sustained records/s and burst.
+DEFAULT_RATE = 5.0
+DEFAULT_BURST = 20
 
 
 class JsonLogFormatter(logging.Formatter):
@@ -10,7 +26,8 @@ class JsonLogFormatter(logging.Formatter):
 
     def format(self, record: logging.LogRecord) -> str:
         payload = {
-            "timestamp": datetime.now(timezone.utc).isoformat(),
+            # Formatting happens on the listener thread; stamp with the emit time.
+            "timestamp": datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
             "level": record.levelname,
             "logger": record.name,
             "message": record.getMessage(),
@@ -19,19 +36,128 @@ class JsonLogFormatter(logging.Formatter):
             payload["context"] = getattr(record, "context")
         if record.exc_info:
             payload["exception"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            payload["exception"] = record.exc_text
         return json.dumps(payload, default=str)
 
 
-def configure_logging(level: int = logging.INFO) -> None:
-    """Configure root logging once."""
+class RateLimitFilter(logging.Filter):
+    """Token-bucket sampling of repetitive records, keyed by logger and message template.
+
+    ERROR and above always pass. When a key recovers after being throttled,
+    the next record carries ``context["suppressed"]`` with the number dropped.
+    """
+
+    def __init__(self, *, rate: float = DEFAULT_RATE, burst: int = DEFAULT_BURST) -> None:
+        super().__init__()
+        self.rate = rate
+        self.burst = max(1, burst)
+        # key -> [tokens, last refill time, suppressed since last pass]
+        self._buckets: dict[tuple[str, Any], list[float]] = {}
+        self._lock = threading.Lock()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.ERROR or self.rate <= 0:
+            return True
+        key = (record.name, record.msg)
+        now = time.monotonic()
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                if len(self._buckets) >= 4096:
+                    self._buckets.clear()
+                bucket = self._buckets[key] = [float(self.burst), now, 0]
+            bucket[0] = min(float(self.burst), bucket[0] + (now - bucket[1]) * self.rate)
+            bucket[1] = now
+            if bucket[0] < 1:
+                bucket[2] += 1
+                LOG_RECORDS_DROPPED.inc(logger=record.name, reason="rate_limited")
+                return False
+            bucket[0] -= 1
+            suppressed, bucket[2] = int(bucket[2]), 0
+        if suppressed:
+            context = getattr(record, "context", None)
+            record.context = {**context, "suppressed": suppressed} if isinstance(context, dict) else {"suppressed": suppressed}
+        return True
+
+
+class ArchCADQueueHandler(QueueHandler):
+    """Non-blocking handler: callers enqueue, a ``QueueListener`` thread formats and writes.
+
+    A full queue drops the record (counted) instead of stalling the caller.
+    """
+
+    def __init__(self, *, queue_size: int, target: logging.Handler) -> None:
+        super().__init__(queue.Queue(maxsize=queue_size))
+        self.queue_size = queue_size
+        self.target = target
+        self._pid = os.getpid()
+        self.listener: QueueListener | None = self._start_listener()
+
+    def _start_listener(self) -> QueueListener:
+        listener = QueueListener(self.queue, self.target, respect_handler_level=True)
+        listener.start()
+        return listener
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Merge args and render tracebacks now; JSON encoding is left to the listener.
+        prepared = copy.copy(record)
+        prepared.msg = record.getMessage()
+        prepared.args = None
+        if record.exc_info:
+            prepared.exc_text = logging.Formatter().formatException(record.exc_info)
+            prepared.exc_info = None
+        return prepared
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        if os.getpid() != self._pid:
+            # Forked pool workers have no listener thread and exit without running
+            # atexit hooks, so they write synchronously rather than risk losing records.
+            self.target.handle(record)
+            return
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            LOG_RECORDS_DROPPED.inc(logger=record.name, reason="queue_full")
+
+    def stop(self) -> None:
+        """Drain queued records and stop the listener thread."""
+        if os.getpid() == self._pid and self.listener is not None:
+            self.listener.stop()
+            self.listener = None
+
+
+def configure_logging(
+    level: int = logging.INFO,
+    *,
+    queue_size: int | None = None,
+    rate: float | None = None,
+    burst: int | None = None,
+) -> None:
+    """Configure root logging once.
+
+    Limits default to ``ARCHCAD_LOG_QUEUE_SIZE``, ``ARCHCAD_LOG_RATE`` and
+    ``ARCHCAD_LOG_BURST`` (logging is set up before settings are loaded).
+    """
     root_logger = logging.getLogger()
-    if any(isinstance(getattr(handler, "formatter", None), JsonLogFormatter) for handler in root_logger.handlers):
+    if any(isinstance(handler, ArchCADQueueHandler) for handler in root_logger.handlers):
         return
 
-    handler = logging.StreamHandler()
-    handler.setFormatter(JsonLogFormatter())
+    stream_handler = logging.StreamHandler()
+    stream_handler.setFormatter(JsonLogFormatter())
+    handler = ArchCADQueueHandler(
+        queue_size=queue_size or int(os.getenv("ARCHCAD_LOG_QUEUE_SIZE", DEFAULT_QUEUE_SIZE)),
+        target=stream_handler,
+    )
+    handler.addFilter(
+        RateLimitFilter(
+            rate=rate if rate is not None else float(os.getenv("ARCHCAD_LOG_RATE", DEFAULT_RATE)),
+            burst=burst or int(os.getenv("ARCHCAD_LOG_BURST", DEFAULT_BURST)),
+        )
+    )
     root_logger.handlers = [handler]
     root_logger.setLevel(level)
+    atexit.register(handler.stop)
 
 
 def get_logger(name: str) -> logging.Logger:
@@ -30,6 +30,19 @@ class Settings(BaseModel):
         default=Path("./data/archcad/processed"),
         alias="ARCHCAD_PROCESSED_DIR",
     )
+    archcad_pointcloud_cache_max_mb: int = Field(default=512, alias="ARCHCAD_POINTCLOUD_CACHE_MAX_MB")
+    archcad_image_cache_max_mb: int = Field(default=1024, alias="ARCHCAD_IMAGE_CACHE_MAX_MB")
+    archcad_mask_cache_max_mb: int = Field(default=2048, alias="ARCHCAD_MASK_CACHE_MAX_MB")
+    archcad_tile_cache_max_mb: int = Field(default=512, alias="ARCHCAD_TILE_CACHE_MAX_MB")
+    archcad_image_tensor_size: int = Field(default=256, alias="ARCHCAD_IMAGE_TENSOR_SIZE")
+    archcad_index_memory_sample_every: int = Field(default=100, alias="ARCHCAD_INDEX_MEMORY_SAMPLE_EVERY")
+    archcad_payload_codec: str = Field(default="json", alias="ARCHCAD_PAYLOAD_CODEC")
+    archcad_payload_dict_size: int = Field(default=32 * 1024, alias="ARCHCAD_PAYLOAD_DICT_SIZE")
+    archcad_payload_dict_samples: int = Field(default=256, alias="ARCHCAD_PAYLOAD_DICT_SAMPLES")
+    archcad_slow_query_ms: float | None = Field(default=None, alias="ARCHCAD_SLOW_QUERY_MS")
+    archcad_slow_query_top_n: int = Field(default=20, alias="ARCHCAD_SLOW_QUERY_TOP_N")
+    archcad_shard_by_split: bool = Field(default=False, alias="ARCHCAD_SHARD_BY_SPLIT")
+    archcad_warmup: bool = Field(default=False, alias="ARCHCAD_WARMUP")
 
     model_config = ConfigDict(extra="ignore", populate_by_name=True)
 
@@ -41,6 +54,22 @@ class Settings(BaseModel):
     def archcad_cache_dir(self) -> Path:
         return self.archcad_root_dir / "cache"
 
+    @property
+    def archcad_pointcloud_cache_dir(self) -> Path:
+        return self.archcad_cache_dir / "pointcloud"
+
+    @property
+    def archcad_image_cache_dir(self) -> Path:
+        return self.archcad_cache_dir / "images"
+
+    @property
+    def archcad_mask_cache_dir(self) -> Path:
+        return self.archcad_cache_dir / "masks"
+
+    @property
+    def archcad_tile_cache_dir(self) -> Path:
+        return self.archcad_cache_dir / "tiles"
+
     @property
     def archcad_manifest_dir(self) -> Path:
         return self.archcad_root_dir / "manifests"
@@ -57,6 +86,14 @@ class Settings(BaseModel):
     def archcad_semantic_index_path(self) -> Path:
         return self.archcad_processed_dir / "semantic_inverted_index.json"
 
+    @property
+    def archcad_posting_lists_path(self) -> Path:
+        return self.archcad_processed_dir / "posting_lists.bin"
+
+    @property
+    def archcad_posting_directory_path(self) -> Path:
+        return self.archcad_processed_dir / "posting_lists.json"
+
     @property
     def archcad_stats_path(self) -> Path:
         return self.archcad_processed_dir / "stats_cache.json"
@@ -69,6 +106,22 @@ class Settings(BaseModel):
     def archcad_db_path(self) -> Path:
         return self.archcad_processed_dir / "archcad_index.sqlite3"
 
+    @property
+    def archcad_shard_export_dir(self) -> Path:
+        return self.archcad_processed_dir / "webdataset"
+
+    @property
+    def archcad_image_tensor_dir(self) -> Path:
+        return self.archcad_processed_dir / "image_tensors"
+
+    @property
+    def archcad_profile_dir(self) -> Path:
+        return self.archcad_processed_dir / "profiles"
+
+    @property
+    def archcad_shard_dir(self) -> Path:
+        return self.archcad_processed_dir / "shards"
+
     def ensure_directories(self) -> None:
         """Create managed directories if they do not exist yet."""
         for directory in (
@@ -92,6 +145,19 @@ class Settings(BaseModel):
             ARCHCAD_DATASET_ID=resolve("ARCHCAD_DATASET_ID", "jackluoluo/ArchCAD"),
             ARCHCAD_LOCAL_DIR=resolve("ARCHCAD_LOCAL_DIR", "./data/archcad/raw"),
             ARCHCAD_PROCESSED_DIR=resolve("ARCHCAD_PROCESSED_DIR", "./data/archcad/processed"),
+            ARCHCAD_POINTCLOUD_CACHE_MAX_MB=resolve("ARCHCAD_POINTCLOUD_CACHE_MAX_MB", "512"),
+            ARCHCAD_IMAGE_CACHE_MAX_MB=resolve("ARCHCAD_IMAGE_CACHE_MAX_MB", "1024"),
+            ARCHCAD_MASK_CACHE_MAX_MB=resolve("ARCHCAD_MASK_CACHE_MAX_MB", "2048"),
+            ARCHCAD_TILE_CACHE_MAX_MB=resolve("ARCHCAD_TILE_CACHE_MAX_MB", "512"),
+            ARCHCAD_IMAGE_TENSOR_SIZE=resolve("ARCHCAD_IMAGE_TENSOR_SIZE", "256"),
+            ARCHCAD_INDEX_MEMORY_SAMPLE_EVERY=resolve("ARCHCAD_INDEX_MEMORY_SAMPLE_EVERY", "100"),
+            ARCHCAD_PAYLOAD_CODEC=resolve("ARCHCAD_PAYLOAD_CODEC", "json"),
+            ARCHCAD_PAYLOAD_DICT_SIZE=resolve("ARCHCAD_PAYLOAD_DICT_SIZE", "32768"),
+            ARCHCAD_PAYLOAD_DICT_SAMPLES=resolve("ARCHCAD_PAYLOAD_DICT_SAMPLES", "256"),
+            ARCHCAD_SLOW_QUERY_MS=resolve("ARCHCAD_SLOW_QUERY_MS") or None,
+            ARCHCAD_SLOW_QUERY_TOP_N=resolve("ARCHCAD_SLOW_QUERY_TOP_N", "20"),
+            ARCHCAD_SHARD_BY_SPLIT=resolve("ARCHCAD_SHARD_BY_SPLIT", "false"),
+            ARCHCAD_WARMUP=resolve("ARCHCAD_WARMUP", "false"),
         )
 
 
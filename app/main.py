@@ -1,10 +1,32 @@
 from __future__ import annotations
 
+from contextlib import asynccontextmanager
+from typing import AsyncIterator
+
 from fastapi import FastAPI
+from fastapi.responses import Response
 
 from app.api.router import api_router
 from app.core.exceptions import register_exception_handlers
-from app.core.logging import configure_logging
+from app.core.logging import configure_logging, get_logger
+from app.core.metrics import PROMETHEUS_CONTENT_TYPE, REGISTRY, MetricsMiddleware
+from app.core.settings import get_settings
+
+logger = get_logger(__name__)
+
+
+@asynccontextmanager
+async def lifespan(application: FastAPI) -> AsyncIterator[None]:
+    """With ``ARCHCAD_WARMUP`` set, pay the first-request costs before serving."""
+    settings = application.dependency_overrides.get(get_settings, get_settings)()
+    if settings.archcad_warmup:
+        from app.services.archcad_warmup import warm_up
+
+        # Runs on the event-loop thread, like the async endpoints, so the
+        # pooled SQLite connection it opens is the one they reuse.
+        timings = await warm_up(application, settings)
+        logger.info("ArchCAD warm-up finished", extra={"context": {"routes": timings}})
+    yield
 
 
 def create_app() -> FastAPI:
@@ -15,7 +37,9 @@ def create_app() -> FastAPI:
         title="ArchiAI ArchCAD Backend",
         version="0.1.0",
         summary="ArchCAD ingestion, indexing, and retrieval services for ArchiAI",
+        lifespan=lifespan,
     )
+    application.add_middleware(MetricsMiddleware)
     application.include_router(api_router)
     register_exception_handlers(application)
 
@@ -23,6 +47,10 @@ def create_app() -> FastAPI:
     async def healthcheck() -> dict[str, str]:
         return {"status": "ok"}
 
+    @application.get("/metrics", tags=["health"], include_in_schema=False)
+    async def metrics() -> Response:
+        return Response(content=REGISTRY.render(), media_type=PROMETHEUS_CONTENT_TYPE)
+
     return application
 
 
@@ -1,27 +1,253 @@
 from __future__ import annotations
 
 import json
+import os
 import sqlite3
+import threading
+import time
+from collections import Counter, OrderedDict
+from datetime import datetime, timezone
+from itertools import groupby
 from pathlib import Path
 from typing import Any, Iterable
 
 from app.core.exceptions import ArchCADError
+from app.core.metrics import SQLITE_QUERIES, SQLITE_QUERY_DURATION
+from app.models.payload_codec import compress, decompress, resolve_codec, train_dictionary
+from app.models.query_log import SLOW_QUERY_LOG
 from app.schemas.archcad import ArchCADSample
+from app.utils.geometry_hash import canonical_geometry, geometry_hash
+from app.utils.polyline_lod import POLYLINE_LOD_MIN_POINTS, POLYLINE_MAX_LOD, polyline_lods
 
 VALID_MODALITIES = {"image", "svg", "json", "qa", "pointcloud"}
+ALIGNMENT_COLUMNS = (
+    "sample_id",
+    "fingerprint",
+    "tolerance",
+    "radius",
+    "json_primitives",
+    "svg_primitives",
+    "json_matched",
+    "svg_matched",
+    "semantic_pairs",
+    "semantic_agreed",
+    "mean_error",
+    "score",
+)
+# Open connections kept per thread; beyond this the least recently used is closed.
+POOL_CONNECTIONS_PER_THREAD = 16
+# Stored in ``PRAGMA user_version`` by ``initialize``; bump it with every new migration.
+SCHEMA_VERSION = 4
+MIGRATE_COMMAND = "python -m app.workers.migrate_archcad_index"
+_SCHEMA_CHECKED: set[str] = set()
+# Samples without a stored alignment check never pass a min_alignment filter.
+_MIN_ALIGNMENT_CONDITION = (
+    "EXISTS (SELECT 1 FROM sample_alignment a WHERE a.sample_id = s.sample_id AND a.score >= ?)"
+)
+# Keeps one representative per near-duplicate cluster, plus every unclustered sample.
+_EXCLUDE_DUPLICATES_CONDITION = (
+    "NOT EXISTS (SELECT 1 FROM duplicate_clusters d WHERE d.sample_id = s.sample_id AND d.representative = 0)"
+)
+
+
+def _instance_rows(
+    sample_id: str,
+    elements: Iterable[tuple[str, str | None, int, dict[str, float] | None]],
+) -> list[tuple[Any, ...]]:
+    """One row per labelled instance: its dominant semantic, element count and merged bbox.
+
+    ``elements`` are ``(instance, semantic, multiplicity, bbox)``. The dominant
+    semantic is the most frequent one (ties go to the smallest label); the
+    centroid is the mean of the element bbox centres. Instances whose elements
+    carry no bbox keep ``NULL`` extents and stay out of the R-tree.
+    """
+    grouped: dict[str, list[tuple[str | None, int, dict[str, float] | None]]] = {}
+    for instance, semantic, multiplicity, bbox in elements:
+        grouped.setdefault(instance, []).append((semantic, multiplicity, bbox))
+    rows: list[tuple[Any, ...]] = []
+    for instance, members in grouped.items():
+        semantics: Counter[str] = Counter()
+        for semantic, multiplicity, _ in members:
+            if semantic:
+                semantics[semantic] += multiplicity
+        semantic = min(semantics, key=lambda label: (-semantics[label], label)) if semantics else None
+        boxes = [(bbox, multiplicity) for _, multiplicity, bbox in members if bbox]
+        extent: tuple[float | None, ...] = (None,) * 6
+        if boxes:
+            weight = sum(multiplicity for _, multiplicity in boxes)
+            extent = (
+                min(box["min_x"] for box, _ in boxes),
+                min(box["min_y"] for box, _ in boxes),
+                max(box["max_x"] for box, _ in boxes),
+                max(box["max_y"] for box, _ in boxes),
+                sum((box["min_x"] + box["max_x"]) * multiplicity for box, multiplicity in boxes) / (2 * weight),
+                sum((box["min_y"] + box["max_y"]) * multiplicity for box, multiplicity in boxes) / (2 * weight),
+            )
+        rows.append((sample_id, instance, semantic, sum(multiplicity for _, multiplicity, _ in members), *extent))
+    return rows
+
+
+def _record_query(sql: str, elapsed: float) -> None:
+    operation = sql.lstrip().split(None, 1)[0].upper() if sql.strip() else "EMPTY"
+    SQLITE_QUERIES.inc(operation=operation)
+    SQLITE_QUERY_DURATION.observe(elapsed, operation=operation)
+
+
+class _InstrumentedConnection(sqlite3.Connection):
+    """sqlite3 connection that records statement counts and execution time.
+
+    When the slow-query log is enabled, statements over its threshold are also
+    reported with their query plan.
+    """
+
+    def execute(self, sql: str, parameters: Any = (), /) -> sqlite3.Cursor:
+        started = time.perf_counter()
+        try:
+            return super().execute(sql, parameters)
+        finally:
+            elapsed = time.perf_counter() - started
+            _record_query(sql, elapsed)
+            if SLOW_QUERY_LOG.is_slow(elapsed):
+                SLOW_QUERY_LOG.record(sql, elapsed, self._query_plan(sql, parameters))
+
+    def executemany(self, sql: str, parameters: Any, /) -> sqlite3.Cursor:
+        started = time.perf_counter()
+        try:
+            return super().executemany(sql, parameters)
+        finally:
+            elapsed = time.perf_counter() - started
+            _record_query(sql, elapsed)
+            if SLOW_QUERY_LOG.is_slow(elapsed):
+                SLOW_QUERY_LOG.record(sql, elapsed, None)
+
+    def executescript(self, sql_script: str, /) -> sqlite3.Cursor:
+        started = time.perf_counter()
+        try:
+            return super().executescript(sql_script)
+        finally:
+            _record_query("SCRIPT", time.perf_counter() - started)
+
+    def _query_plan(self, sql: str, parameters: Any) -> list[str] | None:
+        if sql.lstrip().split(None, 1)[0].upper() not in {"SELECT", "WITH"}:
+            return None
+        try:
+            rows = super().execute(f"EXPLAIN QUERY PLAN {sql}", parameters).fetchall()
+        except sqlite3.Error:
+            return None
+        # Rows are (id, parent, notused, detail); indent children under their parent.
+        depth: dict[int, int] = {0: 0}
+        plan = []
+        for row in rows:
+            depth[row[0]] = depth.get(row[1], 0) + 1
+            plan.append(f"{'  ' * (depth[row[0]] - 1)}{row[3]}")
+        return plan
+
+
+class _ConnectionPool:
+    """Per-thread sqlite connections, reused across calls instead of reopened.
+
+    ``invalidate`` (used when a database file is replaced) makes every thread
+    reopen on its next call. Connections inherited across ``fork`` are dropped.
+    """
+
+    def __init__(self, max_per_thread: int = POOL_CONNECTIONS_PER_THREAD) -> None:
+        self.max_per_thread = max_per_thread
+        self._local = threading.local()
+        self._generations: dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def _connections(self) -> OrderedDict[str, tuple[int, int, sqlite3.Connection]]:
+        connections = getattr(self._local, "connections", None)
+        if connections is None:
+            connections = self._local.connections = OrderedDict()
+        return connections
+
+    def get(self, key: str) -> sqlite3.Connection:
+        connections = self._connections()
+        generation = self._generations.get(key, 0)
+        cached = connections.get(key)
+        if cached is not None:
+            pid, cached_generation, connection = cached
+            if pid == os.getpid() and cached_generation == generation:
+                connections.move_to_end(key)
+                return connection
+            del connections[key]
+            if pid == os.getpid():
+                connection.close()
+        connection = sqlite3.connect(key, factory=_InstrumentedConnection)
+        connection.row_factory = sqlite3.Row
+        connections[key] = (os.getpid(), generation, connection)
+        while len(connections) > self.max_per_thread:
+            pid, _, evicted = connections.popitem(last=False)[1]
+            if pid == os.getpid():
+                evicted.close()
+        return connection
+
+    def invalidate(self, key: str) -> None:
+        with self._lock:
+            self._generations[key] = self._generations.get(key, 0) + 1
+        cached = self._connections().pop(key, None)
+        if cached is not None and cached[0] == os.getpid():
+            cached[2].close()
+
+    def size(self) -> int:
+        """Connections held by the calling thread."""
+        return len(self._connections())
+
+
+_POOL = _ConnectionPool()
 
 
 class ArchCADIndexStore:
-    """SQLite-backed sample and annotation index."""
+    """SQLite-backed sample and annotation index.
+
+    Element geometry is content-addressed: ``geometry_blobs`` stores each
+    canonical geometry once and ``elements`` rows reference it by hash.
+    Identical elements within a sample collapse into one row with a
+    ``multiplicity``. Long polylines also get Douglas-Peucker simplified
+    levels of detail in ``geometry_lods``, keyed by the same hash.
 
-    def __init__(self, db_path: Path) -> None:
+    ``payload_json`` holds plain JSON text, or with ``payload_codec`` set to
+    ``zlib`` / ``zstd`` a compressed blob. Once ``dict_samples`` payloads are
+    stored, a dictionary is trained on them (``compression_dicts``) and used
+    for every later payload; reads decompress transparently.
+    """
+
+    def __init__(
+        self,
+        db_path: Path,
+        *,
+        payload_codec: str = "json",
+        dict_size: int = 32 * 1024,
+        dict_samples: int = 256,
+    ) -> None:
         self.db_path = db_path
+        # Resolved once: keys both the schema check and the connection pool.
+        self._db_key = str(db_path.resolve())
+        self.payload_codec = resolve_codec(payload_codec)
+        self.dict_size = dict_size
+        self.dict_samples = max(1, dict_samples)
+        self._reset_payload_state()
+
+    def _reset_payload_state(self) -> None:
+        self._dictionaries: dict[int, bytes] = {}
+        # (dict_id, dictionary) for the configured codec; None = not looked up yet.
+        self._active_dictionary: tuple[int | None, bytes | None] | None = None
+        self._untrained_payloads = 0
+
+    def exists(self) -> bool:
+        return self.db_path.exists()
 
     def initialize(self, *, reset: bool = False) -> None:
+        if reset:
+            _POOL.invalidate(self._db_key)
+            self._reset_payload_state()
         if reset and self.db_path.exists():
             self.db_path.unlink()
         self.db_path.parent.mkdir(parents=True, exist_ok=True)
-        with self._connect() as connection:
+        # Creates the schema and runs the migrations, so it bypasses the check in _connect.
+        with _POOL.get(self._db_key) as connection:
+            previous_version = connection.execute("PRAGMA user_version").fetchone()[0]
             connection.executescript(
                 """
                 CREATE TABLE IF NOT EXISTS samples (
@@ -35,7 +261,17 @@ class ArchCADIndexStore:
                     modalities_json TEXT NOT NULL,
                     stats_json TEXT NOT NULL,
                     validation_json TEXT NOT NULL,
-                    payload_json TEXT NOT NULL
+                    payload_json TEXT NOT NULL,
+                    payload_codec TEXT NOT NULL DEFAULT 'json',
+                    payload_dict_id INTEGER
+                );
+
+                CREATE TABLE IF NOT EXISTS compression_dicts (
+                    dict_id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    codec TEXT NOT NULL,
+                    dictionary BLOB NOT NULL,
+                    sample_count INTEGER NOT NULL,
+                    created_at TEXT NOT NULL
                 );
 
                 CREATE TABLE IF NOT EXISTS elements (
@@ -46,11 +282,26 @@ class ArchCADIndexStore:
                     semantic TEXT,
                     instance TEXT,
                     source_modality TEXT NOT NULL,
-                    geometry_json TEXT NOT NULL,
+                    geometry_hash TEXT NOT NULL,
+                    multiplicity INTEGER NOT NULL DEFAULT 1,
                     style_json TEXT NOT NULL,
                     bbox_json TEXT
                 );
 
+                CREATE TABLE IF NOT EXISTS geometry_blobs (
+                    hash TEXT PRIMARY KEY,
+                    geometry_json TEXT NOT NULL
+                );
+
+                CREATE TABLE IF NOT EXISTS geometry_lods (
+                    hash TEXT NOT NULL,
+                    lod INTEGER NOT NULL,
+                    tolerance REAL NOT NULL,
+                    point_count INTEGER NOT NULL,
+                    geometry_json TEXT NOT NULL,
+                    PRIMARY KEY (hash, lod)
+                );
+
                 CREATE TABLE IF NOT EXISTS qa_pairs (
                     id INTEGER PRIMARY KEY AUTOINCREMENT,
                     sample_id TEXT NOT NULL,
@@ -59,23 +310,231 @@ class ArchCADIndexStore:
                     metadata_json TEXT NOT NULL
                 );
 
+                CREATE TABLE IF NOT EXISTS image_rows (
+                    sample_id TEXT NOT NULL,
+                    size INTEGER NOT NULL,
+                    row_index INTEGER NOT NULL,
+                    byte_offset INTEGER NOT NULL,
+                    fingerprint TEXT NOT NULL,
+                    width INTEGER NOT NULL,
+                    height INTEGER NOT NULL,
+                    PRIMARY KEY (sample_id, size)
+                );
+
+                CREATE TABLE IF NOT EXISTS sample_alignment (
+                    sample_id TEXT PRIMARY KEY,
+                    fingerprint TEXT NOT NULL,
+                    tolerance REAL NOT NULL,
+                    radius REAL,
+                    json_primitives INTEGER NOT NULL,
+                    svg_primitives INTEGER NOT NULL,
+                    json_matched INTEGER NOT NULL,
+                    svg_matched INTEGER NOT NULL,
+                    semantic_pairs INTEGER NOT NULL,
+                    semantic_agreed INTEGER NOT NULL,
+                    mean_error REAL,
+                    score REAL
+                );
+
+                CREATE TABLE IF NOT EXISTS sample_minhash (
+                    sample_id TEXT PRIMARY KEY,
+                    signature BLOB NOT NULL
+                );
+
+                CREATE TABLE IF NOT EXISTS duplicate_clusters (
+                    sample_id TEXT PRIMARY KEY,
+                    cluster_id TEXT NOT NULL,
+                    cluster_size INTEGER NOT NULL,
+                    similarity REAL NOT NULL,
+                    representative INTEGER NOT NULL
+                );
+
+                CREATE TABLE IF NOT EXISTS sample_topology (
+                    sample_id TEXT NOT NULL,
+                    semantic TEXT NOT NULL,
+                    fingerprint TEXT NOT NULL,
+                    summary_json TEXT NOT NULL,
+                    graph_json TEXT NOT NULL,
+                    PRIMARY KEY (sample_id, semantic)
+                );
+
+                CREATE TABLE IF NOT EXISTS instances (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    sample_id TEXT NOT NULL,
+                    instance TEXT NOT NULL,
+                    semantic TEXT,
+                    element_count INTEGER NOT NULL,
+                    min_x REAL,
+                    min_y REAL,
+                    max_x REAL,
+                    max_y REAL,
+                    centroid_x REAL,
+                    centroid_y REAL
+                );
+
+                CREATE VIRTUAL TABLE IF NOT EXISTS instances_rtree USING rtree(id, min_x, max_x, min_y, max_y);
+
+                CREATE TABLE IF NOT EXISTS index_meta (
+                    key TEXT PRIMARY KEY,
+                    value INTEGER NOT NULL
+                );
+
                 CREATE INDEX IF NOT EXISTS idx_elements_sample_id ON elements(sample_id);
                 CREATE INDEX IF NOT EXISTS idx_elements_semantic ON elements(semantic);
                 CREATE INDEX IF NOT EXISTS idx_elements_instance ON elements(instance);
                 CREATE INDEX IF NOT EXISTS idx_qa_sample_id ON qa_pairs(sample_id);
+                CREATE INDEX IF NOT EXISTS idx_sample_alignment_score ON sample_alignment(score);
+                CREATE INDEX IF NOT EXISTS idx_duplicate_clusters_cluster ON duplicate_clusters(cluster_id);
+                CREATE UNIQUE INDEX IF NOT EXISTS idx_instances_sample ON instances(sample_id, instance);
+                CREATE INDEX IF NOT EXISTS idx_instances_semantic ON instances(semantic);
                 """
             )
+            self._migrate_geometry(connection)
+            self._migrate_payload_columns(connection)
+            self._migrate_alignment_radius(connection)
+            connection.execute("CREATE INDEX IF NOT EXISTS idx_elements_geometry_hash ON elements(geometry_hash)")
+            self._backfill_polyline_lods(connection)
+            if previous_version < 3:
+                self._backfill_instances(connection)
+            # Seeded from the clock so that a recreated database never repeats a generation.
+            connection.execute(
+                "INSERT OR IGNORE INTO index_meta (key, value) VALUES ('generation', ?)",
+                (time.time_ns(),),
+            )
+            connection.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+        _SCHEMA_CHECKED.add(self._db_key)
+
+    def _migrate_geometry(self, connection: sqlite3.Connection) -> None:
+        """Move inline ``elements.geometry_json`` from older databases into ``geometry_blobs``."""
+        columns = {row["name"] for row in connection.execute("PRAGMA table_info(elements)")}
+        if "geometry_json" not in columns:
+            return
+        connection.execute("ALTER TABLE elements ADD COLUMN geometry_hash TEXT NOT NULL DEFAULT ''")
+        connection.execute("ALTER TABLE elements ADD COLUMN multiplicity INTEGER NOT NULL DEFAULT 1")
+        blobs: dict[str, str] = {}
+        updates: list[tuple[str, int]] = []
+        for row in connection.execute("SELECT id, element_type, geometry_json FROM elements"):
+            canonical = canonical_geometry(row["element_type"], json.loads(row["geometry_json"]))
+            digest = geometry_hash(canonical)
+            blobs[digest] = canonical
+            updates.append((digest, row["id"]))
+        connection.executemany("INSERT OR IGNORE INTO geometry_blobs (hash, geometry_json) VALUES (?, ?)", blobs.items())
+        connection.executemany("UPDATE elements SET geometry_hash = ? WHERE id = ?", updates)
+        # Existing duplicates keep multiplicity 1 until the sample is reindexed.
+        connection.execute("ALTER TABLE elements DROP COLUMN geometry_json")
+
+    def _migrate_payload_columns(self, connection: sqlite3.Connection) -> None:
+        columns = {row["name"] for row in connection.execute("PRAGMA table_info(samples)")}
+        if "payload_codec" not in columns:
+            connection.execute("ALTER TABLE samples ADD COLUMN payload_codec TEXT NOT NULL DEFAULT 'json'")
+            connection.execute("ALTER TABLE samples ADD COLUMN payload_dict_id INTEGER")
+
+    def generation(self) -> str:
+        """Token that changes whenever samples are written or deleted.
+
+        Derived files such as the posting lists record it when they are built
+        and are stale once it moves on.
+        """
+        with self._connect() as connection:
+            return str(connection.execute("SELECT value FROM index_meta WHERE key = 'generation'").fetchone()[0])
+
+    def _bump_generation(self, connection: sqlite3.Connection) -> None:
+        connection.execute("UPDATE index_meta SET value = value + 1 WHERE key = 'generation'")
+
+    def _migrate_alignment_radius(self, connection: sqlite3.Connection) -> None:
+        """Older checks stored the snap radius as ``tolerance``; drop them so the alignment job redoes them."""
+        columns = {row["name"] for row in connection.execute("PRAGMA table_info(sample_alignment)")}
+        if "radius" not in columns:
+            connection.execute("ALTER TABLE sample_alignment ADD COLUMN radius REAL")
+            connection.execute("DELETE FROM sample_alignment")
+
+    def delete_split(self, split: str | None) -> None:
+        """Remove every sample of one split (``None`` = samples without a split)."""
+        split_condition = "split = ?" if split else "split IS NULL"
+        split_params = (split,) if split else ()
+        with self._connect() as connection:
+            self._bump_generation(connection)
+            connection.execute(
+                "DELETE FROM instances_rtree WHERE id IN (SELECT id FROM instances WHERE sample_id IN "
+                f"(SELECT sample_id FROM samples WHERE {split_condition}))",
+                split_params,
+            )
+            for table in (
+                "elements",
+                "instances",
+                "qa_pairs",
+                "image_rows",
+                "sample_alignment",
+                "sample_topology",
+                "sample_minhash",
+                "duplicate_clusters",
+            ):
+                connection.execute(
+                    f"DELETE FROM {table} WHERE sample_id IN (SELECT sample_id FROM samples WHERE {split_condition})",
+                    split_params,
+                )
+            connection.execute(f"DELETE FROM samples WHERE {split_condition}", split_params)
+            self._prune_geometry_blobs(connection)
+
+    def prune_geometry_blobs(self) -> int:
+        """Delete geometry blobs no element references any more; returns the number removed."""
+        with self._connect() as connection:
+            return self._prune_geometry_blobs(connection)
+
+    def _prune_geometry_blobs(self, connection: sqlite3.Connection) -> int:
+        removed = connection.execute(
+            "DELETE FROM geometry_blobs WHERE hash NOT IN (SELECT geometry_hash FROM elements)"
+        ).rowcount
+        connection.execute("DELETE FROM geometry_lods WHERE hash NOT IN (SELECT hash FROM geometry_blobs)")
+        return removed
+
+    def geometry_stats(self) -> dict[str, int]:
+        """Element and geometry storage totals, with the bytes saved by deduplication."""
+        with self._connect() as connection:
+            elements = connection.execute(
+                """
+                SELECT COALESCE(SUM(e.multiplicity), 0) AS element_count,
+                       COUNT(*) AS element_rows,
+                       COALESCE(SUM(e.multiplicity * LENGTH(g.geometry_json)), 0) AS referenced_bytes
+                FROM elements e
+                JOIN geometry_blobs g ON g.hash = e.geometry_hash
+                """
+            ).fetchone()
+            blobs = connection.execute(
+                "SELECT COUNT(*) AS blob_count, COALESCE(SUM(LENGTH(geometry_json)), 0) AS blob_bytes FROM geometry_blobs"
+            ).fetchone()
+            lods = connection.execute(
+                """
+                SELECT COUNT(DISTINCT hash) AS polyline_count, COUNT(*) AS lod_rows,
+                       COALESCE(SUM(LENGTH(geometry_json)), 0) AS lod_bytes
+                FROM geometry_lods
+                """
+            ).fetchone()
+        return {
+            "element_count": elements["element_count"],
+            "element_rows": elements["element_rows"],
+            "duplicates_collapsed": elements["element_count"] - elements["element_rows"],
+            "geometry_blobs": blobs["blob_count"],
+            "geometry_bytes_referenced": elements["referenced_bytes"],
+            "geometry_bytes_stored": blobs["blob_bytes"],
+            "geometry_bytes_saved": elements["referenced_bytes"] - blobs["blob_bytes"],
+            "lod_polylines": lods["polyline_count"],
+            "lod_rows": lods["lod_rows"],
+            "lod_bytes_stored": lods["lod_bytes"],
+        }
 
     def upsert_sample(self, sample: ArchCADSample) -> None:
         payload = sample.model_dump(mode="json", by_alias=True)
         modalities = payload["modalities"]
         with self._connect() as connection:
+            self._bump_generation(connection)
+            payload_codec, payload_dict_id, stored_payload = self._encode_payload(connection, json.dumps(payload))
             connection.execute(
                 """
                 INSERT OR REPLACE INTO samples (
                     sample_id, split, has_image, has_svg, has_json, has_qa, has_pointcloud,
-                    modalities_json, stats_json, validation_json, payload_json
-                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                    modalities_json, stats_json, validation_json, payload_json, payload_codec, payload_dict_id
+                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
                 """,
                 (
                     sample.sample_id,
@@ -88,34 +547,54 @@ class ArchCADIndexStore:
                     json.dumps(modalities),
                     json.dumps(payload["stats"]),
                     json.dumps(payload["validation_flags"]),
-                    json.dumps(payload),
+                    stored_payload,
+                    payload_codec,
+                    payload_dict_id,
                 ),
             )
             connection.execute("DELETE FROM elements WHERE sample_id = ?", (sample.sample_id,))
             connection.execute("DELETE FROM qa_pairs WHERE sample_id = ?", (sample.sample_id,))
+            connection.execute("DELETE FROM sample_alignment WHERE sample_id = ?", (sample.sample_id,))
+            connection.execute("DELETE FROM sample_topology WHERE sample_id = ?", (sample.sample_id,))
+            connection.execute("DELETE FROM sample_minhash WHERE sample_id = ?", (sample.sample_id,))
+            connection.execute("DELETE FROM duplicate_clusters WHERE sample_id = ?", (sample.sample_id,))
+            connection.execute(
+                "DELETE FROM instances_rtree WHERE id IN (SELECT id FROM instances WHERE sample_id = ?)",
+                (sample.sample_id,),
+            )
+            connection.execute("DELETE FROM instances WHERE sample_id = ?", (sample.sample_id,))
+            blobs, element_rows, polylines = self._dedupe_elements(sample)
+            if polylines:
+                self._insert_polyline_lods(connection, polylines)
+            connection.executemany(
+                "INSERT OR IGNORE INTO geometry_blobs (hash, geometry_json) VALUES (?, ?)",
+                blobs.items(),
+            )
             connection.executemany(
                 """
                 INSERT INTO elements (
                     sample_id, element_id, element_type, semantic, instance,
-                    source_modality, geometry_json, style_json, bbox_json
-                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                    source_modality, geometry_hash, multiplicity, style_json, bbox_json
+                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
                 """,
-                (
-                    (
-                        sample.sample_id,
-                        element.element_id,
-                        element.type,
-                        element.semantic,
-                        element.instance,
-                        element.source_modality,
-                        json.dumps(element.geometry),
-                        json.dumps(element.style),
-                        json.dumps(element.bounding_box.model_dump())
-                        if element.bounding_box
-                        else None,
-                    )
-                    for element in sample.elements
-                ),
+                element_rows,
+            )
+            connection.executemany(
+                """
+                INSERT INTO instances (
+                    sample_id, instance, semantic, element_count,
+                    min_x, min_y, max_x, max_y, centroid_x, centroid_y
+                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                """,
+                self._aggregate_instances(sample),
+            )
+            connection.execute(
+                """
+                INSERT INTO instances_rtree (id, min_x, max_x, min_y, max_y)
+                SELECT id, min_x, max_x, min_y, max_y FROM instances
+                WHERE sample_id = ? AND min_x IS NOT NULL
+                """,
+                (sample.sample_id,),
             )
             connection.executemany(
                 """
@@ -132,6 +611,139 @@ class ArchCADIndexStore:
                     for qa in sample.qa_pairs
                 ),
             )
+            if payload_codec != "json" and payload_dict_id is None:
+                self._untrained_payloads += 1
+                if self._untrained_payloads >= self.dict_samples:
+                    self._compress_payloads(connection, retrain=True)
+
+    def _dedupe_elements(
+        self, sample: ArchCADSample
+    ) -> tuple[dict[str, str], list[tuple[Any, ...]], dict[str, dict[str, Any]]]:
+        """Hash each element's canonical geometry and collapse identical elements.
+
+        Elements are identical when type, labels, source modality, geometry and
+        style all match; the first occurrence keeps its ``element_id``. Also
+        returns the polylines long enough for levels of detail, by hash.
+        """
+        blobs: dict[str, str] = {}
+        polylines: dict[str, dict[str, Any]] = {}
+        rows: dict[tuple[Any, ...], list[Any]] = {}
+        for element in sample.elements:
+            canonical = canonical_geometry(element.type, element.geometry)
+            digest = geometry_hash(canonical)
+            blobs[digest] = canonical
+            if element.type == "POLYLINE" and len(element.geometry.get("points") or []) >= POLYLINE_LOD_MIN_POINTS:
+                polylines[digest] = element.geometry
+            style_json = json.dumps(element.style, sort_keys=True)
+            key = (element.type, element.semantic, element.instance, element.source_modality, digest, style_json)
+            row = rows.get(key)
+            if row is not None:
+                row[7] += 1
+                continue
+            rows[key] = [
+                sample.sample_id,
+                element.element_id,
+                element.type,
+                element.semantic,
+                element.instance,
+                element.source_modality,
+                digest,
+                1,
+                style_json,
+                json.dumps(element.bounding_box.model_dump()) if element.bounding_box else None,
+            ]
+        return blobs, [tuple(row) for row in rows.values()], polylines
+
+    def _aggregate_instances(self, sample: ArchCADSample) -> list[tuple[Any, ...]]:
+        return _instance_rows(
+            sample.sample_id,
+            (
+                (
+                    element.instance,
+                    element.semantic,
+                    1,
+                    element.bounding_box.model_dump() if element.bounding_box else None,
+                )
+                for element in sample.elements
+                if element.instance
+            ),
+        )
+
+    def _backfill_instances(self, connection: sqlite3.Connection) -> None:
+        """Aggregate ``instances`` from stored elements for databases indexed before the table existed."""
+        rows = connection.execute(
+            """
+            SELECT sample_id, instance, semantic, multiplicity, bbox_json FROM elements
+            WHERE instance IS NOT NULL AND instance != ''
+              AND sample_id NOT IN (SELECT sample_id FROM instances)
+            ORDER BY sample_id
+            """
+        )
+        for sample_id, sample_rows in groupby(rows, key=lambda row: row["sample_id"]):
+            connection.executemany(
+                """
+                INSERT INTO instances (
+                    sample_id, instance, semantic, element_count,
+                    min_x, min_y, max_x, max_y, centroid_x, centroid_y
+                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                """,
+                _instance_rows(
+                    sample_id,
+                    (
+                        (
+                            row["instance"],
+                            row["semantic"],
+                            row["multiplicity"],
+                            json.loads(row["bbox_json"]) if row["bbox_json"] else None,
+                        )
+                        for row in sample_rows
+                    ),
+                ),
+            )
+        connection.execute(
+            """
+            INSERT INTO instances_rtree (id, min_x, max_x, min_y, max_y)
+            SELECT id, min_x, max_x, min_y, max_y FROM instances
+            WHERE min_x IS NOT NULL AND id NOT IN (SELECT id FROM instances_rtree)
+            """
+        )
+
+    def _insert_polyline_lods(self, connection: sqlite3.Connection, polylines: dict[str, dict[str, Any]]) -> None:
+        # Levels are content-addressed too, so a hash that already has them keeps them.
+        placeholders = ", ".join("?" for _ in polylines)
+        stored = {
+            row["hash"]
+            for row in connection.execute(
+                f"SELECT DISTINCT hash FROM geometry_lods WHERE hash IN ({placeholders})", list(polylines)
+            )
+        }
+        self._write_polyline_lods(connection, {digest: polylines[digest] for digest in polylines.keys() - stored})
+
+    def _backfill_polyline_lods(self, connection: sqlite3.Connection) -> None:
+        """Add levels of detail to long polyline blobs stored without them, e.g. before ``geometry_lods`` existed."""
+        rows = connection.execute(
+            """
+            SELECT hash, geometry_json FROM geometry_blobs
+            WHERE hash IN (SELECT geometry_hash FROM elements WHERE element_type = 'POLYLINE')
+              AND hash NOT IN (SELECT hash FROM geometry_lods)
+              AND json_array_length(geometry_json, '$.points') >= ?
+            """,
+            (POLYLINE_LOD_MIN_POINTS,),
+        )
+        self._write_polyline_lods(connection, {row["hash"]: json.loads(row["geometry_json"]) for row in rows})
+
+    def _write_polyline_lods(self, connection: sqlite3.Connection, polylines: dict[str, dict[str, Any]]) -> None:
+        connection.executemany(
+            """
+            INSERT OR REPLACE INTO geometry_lods (hash, lod, tolerance, point_count, geometry_json)
+            VALUES (?, ?, ?, ?, ?)
+            """,
+            (
+                (digest, lod, tolerance, len(simplified["points"]), canonical_geometry("POLYLINE", simplified))
+                for digest, geometry in polylines.items()
+                for lod, tolerance, simplified in polyline_lods(geometry)
+            ),
+        )
 
     def list_samples(
         self,
@@ -142,12 +754,16 @@ class ArchCADIndexStore:
         instance: str | None = None,
         modalities: Iterable[str] | None = None,
         split: str | None = None,
+        min_alignment: float | None = None,
+        exclude_duplicates: bool = False,
     ) -> dict[str, Any]:
         conditions, params = self._sample_conditions(
             semantic=semantic,
             instance=instance,
             modalities=modalities,
             split=split,
+            min_alignment=min_alignment,
+            exclude_duplicates=exclude_duplicates,
         )
         where_clause = f" WHERE {' AND '.join(conditions)}" if conditions else ""
         with self._connect() as connection:
@@ -181,10 +797,157 @@ class ArchCADIndexStore:
     def get_sample(self, sample_id: str) -> dict[str, Any] | None:
         with self._connect() as connection:
             row = connection.execute(
-                "SELECT payload_json FROM samples WHERE sample_id = ?",
+                "SELECT payload_json, payload_codec, payload_dict_id FROM samples WHERE sample_id = ?",
                 (sample_id,),
             ).fetchone()
-        return json.loads(row["payload_json"]) if row else None
+            return json.loads(self._decode_payload(connection, row)) if row else None
+
+    def compress_payloads(self, *, retrain: bool = False) -> dict[str, Any]:
+        """Re-encode stored payloads with the configured codec and its current dictionary.
+
+        Trains a dictionary first when none exists (or ``retrain``). Also serves
+        as the migration for databases written before compression was enabled,
+        and with ``payload_codec="json"`` decompresses everything back to text.
+        """
+        with self._connect() as connection:
+            return self._compress_payloads(connection, retrain=retrain)
+
+    def payload_storage_stats(self) -> dict[str, Any]:
+        with self._connect() as connection:
+            rows = connection.execute(
+                """
+                SELECT payload_codec, COUNT(*) AS sample_count, COALESCE(SUM(LENGTH(payload_json)), 0) AS stored_bytes
+                FROM samples
+                GROUP BY payload_codec
+                """
+            ).fetchall()
+            dictionaries = connection.execute(
+                "SELECT COUNT(NULLIF(LENGTH(dictionary), 0)) AS dict_count, COALESCE(SUM(LENGTH(dictionary)), 0) AS dict_bytes "
+                "FROM compression_dicts"
+            ).fetchone()
+        return {
+            "codec": self.payload_codec,
+            "by_codec": {row["payload_codec"]: {"samples": row["sample_count"], "bytes": row["stored_bytes"]} for row in rows},
+            "stored_bytes": sum(row["stored_bytes"] for row in rows),
+            "dictionaries": dictionaries["dict_count"],
+            "dictionary_bytes": dictionaries["dict_bytes"],
+        }
+
+    def vacuum(self) -> None:
+        """Return pages freed by payload rewrites to the filesystem."""
+        self._connect().execute("VACUUM")
+
+    def _compress_payloads(self, connection: sqlite3.Connection, *, retrain: bool) -> dict[str, Any]:
+        codec = self.payload_codec
+        dict_id: int | None = None
+        if codec != "json":
+            active = self._load_active_dictionary(connection)
+            dict_id = active[0]
+            if retrain or dict_id is None:
+                dict_id = self._train_dictionary(connection) or dict_id
+        self._untrained_payloads = 0
+
+        stale = [
+            row["rowid"]
+            for row in connection.execute(
+                "SELECT rowid FROM samples WHERE payload_codec != ? OR payload_dict_id IS NOT ?",
+                (codec, dict_id),
+            )
+        ]
+        bytes_before = bytes_after = 0
+        for start in range(0, len(stale), 256):
+            batch = stale[start : start + 256]
+            rows = connection.execute(
+                f"""
+                SELECT rowid, payload_json, payload_codec, payload_dict_id FROM samples
+                WHERE rowid IN ({', '.join('?' for _ in batch)})
+                """,
+                batch,
+            ).fetchall()
+            updates = []
+            for row in rows:
+                text = self._decode_payload(connection, row)
+                new_codec, new_dict_id, stored = self._encode_payload(connection, text)
+                bytes_before += len(row["payload_json"])
+                bytes_after += len(stored)
+                updates.append((stored, new_codec, new_dict_id, row["rowid"]))
+            connection.executemany(
+                "UPDATE samples SET payload_json = ?, payload_codec = ?, payload_dict_id = ? WHERE rowid = ?",
+                updates,
+            )
+        connection.execute(
+            "DELETE FROM compression_dicts WHERE dict_id NOT IN "
+            "(SELECT DISTINCT payload_dict_id FROM samples WHERE payload_dict_id IS NOT NULL)"
+        )
+        return {
+            "codec": codec,
+            "dict_id": dict_id,
+            "rewritten": len(stale),
+            "bytes_before": bytes_before,
+            "bytes_after": bytes_after,
+        }
+
+    def _train_dictionary(self, connection: sqlite3.Connection) -> int | None:
+        rowids = [row["rowid"] for row in connection.execute("SELECT rowid FROM samples ORDER BY rowid")]
+        if not rowids:
+            return None
+        # Evenly spaced rows so every part of the index is represented.
+        step = max(1, len(rowids) // self.dict_samples)
+        chosen = rowids[::step][: self.dict_samples]
+        rows = connection.execute(
+            f"""
+            SELECT payload_json, payload_codec, payload_dict_id FROM samples
+            WHERE rowid IN ({', '.join('?' for _ in chosen)})
+            """,
+            chosen,
+        ).fetchall()
+        samples = [self._decode_payload(connection, row).encode("utf-8") for row in rows]
+        # An empty dictionary is stored too, as a marker that training found
+        # nothing to share; payloads then reference it instead of retraining.
+        dictionary = train_dictionary(self.payload_codec, samples, self.dict_size)
+        dict_id = connection.execute(
+            """
+            INSERT INTO compression_dicts (codec, dictionary, sample_count, created_at)
+            VALUES (?, ?, ?, ?)
+            """,
+            (self.payload_codec, dictionary, len(samples), datetime.now(timezone.utc).isoformat()),
+        ).lastrowid
+        self._dictionaries[dict_id] = dictionary
+        self._active_dictionary = (dict_id, dictionary)
+        return dict_id
+
+    def _load_active_dictionary(self, connection: sqlite3.Connection) -> tuple[int | None, bytes | None]:
+        if self._active_dictionary is None:
+            row = connection.execute(
+                "SELECT dict_id, dictionary FROM compression_dicts WHERE codec = ? ORDER BY dict_id DESC LIMIT 1",
+                (self.payload_codec,),
+            ).fetchone()
+            self._active_dictionary = (row["dict_id"], row["dictionary"]) if row else (None, None)
+            if row:
+                self._dictionaries[row["dict_id"]] = row["dictionary"]
+        return self._active_dictionary
+
+    def _encode_payload(self, connection: sqlite3.Connection, text: str) -> tuple[str, int | None, str | bytes]:
+        if self.payload_codec == "json":
+            return "json", None, text
+        dict_id, dictionary = self._load_active_dictionary(connection)
+        return self.payload_codec, dict_id, compress(self.payload_codec, text.encode("utf-8"), dictionary)
+
+    def _decode_payload(self, connection: sqlite3.Connection, row: sqlite3.Row) -> str:
+        codec = row["payload_codec"]
+        if codec == "json":
+            return row["payload_json"]
+        dict_id = row["payload_dict_id"]
+        dictionary = None
+        if dict_id is not None:
+            dictionary = self._dictionaries.get(dict_id)
+            if dictionary is None:
+                dictionary = connection.execute(
+                    "SELECT dictionary FROM compression_dicts WHERE dict_id = ?",
+                    (dict_id,),
+                ).fetchone()["dictionary"]
+                self._dictionaries[dict_id] = dictionary
+        return decompress(codec, row["payload_json"], dictionary).decode("utf-8")
 
     def get_elements(
         self,
@@ -194,32 +957,54 @@ class ArchCADIndexStore:
         limit: int,
         semantic: str | None = None,
         instance: str | None = None,
+        lod: int | None = None,
+        tolerance: float | None = None,
     ) -> dict[str, Any]:
-        conditions = ["sample_id = ?"]
+        """Page through a sample's elements.
+
+        With ``lod`` (1..``POLYLINE_MAX_LOD``) or ``tolerance`` (drawing units),
+        polylines are served at the coarsest stored level not exceeding it.
+        """
+        if lod is not None and tolerance is not None:
+            raise ArchCADError("Pass either lod or tolerance, not both", context={"lod": lod, "tolerance": tolerance})
+        if lod is not None and not 0 <= lod <= POLYLINE_MAX_LOD:
+            raise ArchCADError("Invalid polyline lod", context={"lod": lod, "allowed": [0, POLYLINE_MAX_LOD]})
+        conditions = ["e.sample_id = ?"]
         params: list[Any] = [sample_id]
         if semantic:
-            conditions.append("semantic = ?")
+            conditions.append("e.semantic = ?")
             params.append(semantic)
         if instance:
-            conditions.append("instance = ?")
+            conditions.append("e.instance = ?")
             params.append(instance)
         where_clause = f" WHERE {' AND '.join(conditions)}"
 
         with self._connect() as connection:
             total = connection.execute(
-                f"SELECT COUNT(*) AS total FROM elements{where_clause}",
+                f"SELECT COUNT(*) AS total FROM elements e{where_clause}",
                 params,
             ).fetchone()["total"]
+            lod_join = ""
+            lod_params: list[Any] = []
+            if lod or tolerance is not None:
+                level_condition = "lod <= ?" if tolerance is None else "tolerance <= ?"
+                lod_join = f"""
+                LEFT JOIN geometry_lods l ON l.hash = e.geometry_hash AND l.lod = (
+                    SELECT MAX(lod) FROM geometry_lods WHERE hash = e.geometry_hash AND {level_condition}
+                )"""
+                lod_params.append(lod if tolerance is None else tolerance)
             rows = connection.execute(
                 f"""
-                SELECT element_id, element_type, semantic, instance, source_modality,
-                       geometry_json, style_json, bbox_json
-                FROM elements
+                SELECT e.element_id, e.element_type, e.semantic, e.instance, e.source_modality,
+                       e.multiplicity, {"COALESCE(l.geometry_json, g.geometry_json)" if lod_join else "g.geometry_json"}
+                       AS geometry_json, {"COALESCE(l.lod, 0)" if lod_join else "0"} AS lod, e.style_json, e.bbox_json
+                FROM elements e
+                JOIN geometry_blobs g ON g.hash = e.geometry_hash{lod_join}
                 {where_clause}
-                ORDER BY id
+                ORDER BY e.id
                 LIMIT ? OFFSET ?
                 """,
-                [*params, limit, offset],
+                [*lod_params, *params, limit, offset],
             ).fetchall()
 
         items = [
@@ -229,7 +1014,9 @@ class ArchCADIndexStore:
                 "semantic": row["semantic"],
                 "instance": row["instance"],
                 "source_modality": row["source_modality"],
+                "multiplicity": row["multiplicity"],
                 "geometry": json.loads(row["geometry_json"]),
+                "lod": row["lod"],
                 "style": json.loads(row["style_json"]),
                 "bounding_box": json.loads(row["bbox_json"]) if row["bbox_json"] else None,
             }
@@ -264,6 +1051,91 @@ class ArchCADIndexStore:
         ]
         return {"items": items, "total": total}
 
+    def search_instances(
+        self,
+        *,
+        offset: int,
+        limit: int,
+        sample_id: str | None = None,
+        semantic: str | None = None,
+        instance: str | None = None,
+        split: str | None = None,
+        bbox: tuple[float, float, float, float] | None = None,
+        min_elements: int | None = None,
+        max_elements: int | None = None,
+    ) -> dict[str, Any]:
+        """Page through instance aggregates ordered by sample and instance.
+
+        ``bbox`` (``min_x, min_y, max_x, max_y``) keeps instances whose merged
+        bbox intersects it; the R-tree narrows the candidates and the stored
+        extents decide, since R-tree coordinates are rounded to 32-bit floats.
+        """
+        conditions: list[str] = []
+        params: list[Any] = []
+        source = "instances i"
+        if bbox is not None:
+            min_x, min_y, max_x, max_y = bbox
+            source = "instances_rtree r JOIN instances i ON i.id = r.id"
+            conditions.append("r.max_x >= ? AND r.min_x <= ? AND r.max_y >= ? AND r.min_y <= ?")
+            conditions.append("i.max_x >= ? AND i.min_x <= ? AND i.max_y >= ? AND i.min_y <= ?")
+            params.extend([min_x, max_x, min_y, max_y] * 2)
+        if sample_id:
+            conditions.append("i.sample_id = ?")
+            params.append(sample_id)
+        if semantic:
+            conditions.append("i.semantic = ?")
+            params.append(semantic)
+        if instance:
+            conditions.append("i.instance = ?")
+            params.append(instance)
+        if split:
+            conditions.append("s.split = ?")
+            params.append(split)
+        if min_elements is not None:
+            conditions.append("i.element_count >= ?")
+            params.append(min_elements)
+        if max_elements is not None:
+            conditions.append("i.element_count <= ?")
+            params.append(max_elements)
+        source += " JOIN samples s ON s.sample_id = i.sample_id"
+        where_clause = f" WHERE {' AND '.join(conditions)}" if conditions else ""
+
+        with self._connect() as connection:
+            total = connection.execute(
+                f"SELECT COUNT(*) AS total FROM {source}{where_clause}",
+                params,
+            ).fetchone()["total"]
+            rows = connection.execute(
+                f"""
+                SELECT i.sample_id, s.split, i.instance, i.semantic, i.element_count,
+                       i.min_x, i.min_y, i.max_x, i.max_y, i.centroid_x, i.centroid_y
+                FROM {source}{where_clause}
+                ORDER BY i.sample_id, i.instance
+                LIMIT ? OFFSET ?
+                """,
+                [*params, limit, offset],
+            ).fetchall()
+
+        items = [
+            {
+                "sample_id": row["sample_id"],
+                "split": row["split"],
+                "instance": row["instance"],
+                "semantic": row["semantic"],
+                "element_count": row["element_count"],
+                "bounding_box": (
+                    {"min_x": row["min_x"], "min_y": row["min_y"], "max_x": row["max_x"], "max_y": row["max_y"]}
+                    if row["min_x"] is not None
+                    else None
+                ),
+                "centroid": (
+                    {"x": row["centroid_x"], "y": row["centroid_y"]} if row["centroid_x"] is not None else None
+                ),
+            }
+            for row in rows
+        ]
+        return {"items": items, "total": total}
+
     def search(
         self,
         *,
@@ -275,6 +1147,8 @@ class ArchCADIndexStore:
         max_count: int | None,
         offset: int,
         limit: int,
+        min_alignment: float | None = None,
+        exclude_duplicates: bool = False,
     ) -> dict[str, Any]:
         if not semantic and not instance:
             return self.list_samples(
@@ -282,6 +1156,8 @@ class ArchCADIndexStore:
                 limit=limit,
                 modalities=modalities,
                 split=split,
+                min_alignment=min_alignment,
+                exclude_duplicates=exclude_duplicates,
             )
 
         conditions = []
@@ -297,15 +1173,20 @@ class ArchCADIndexStore:
             params.append(split)
         for modality in modalities or []:
             conditions.append(f"s.has_{modality} = 1")
+        if min_alignment is not None:
+            conditions.append(_MIN_ALIGNMENT_CONDITION)
+            params.append(min_alignment)
+        if exclude_duplicates:
+            conditions.append(_EXCLUDE_DUPLICATES_CONDITION)
 
         where_clause = f" WHERE {' AND '.join(conditions)}" if conditions else ""
         having_parts = []
         having_params: list[Any] = []
         if min_count is not None:
-            having_parts.append("COUNT(e.id) >= ?")
+            having_parts.append("SUM(e.multiplicity) >= ?")
             having_params.append(min_count)
         if max_count is not None:
-            having_parts.append("COUNT(e.id) <= ?")
+            having_parts.append("SUM(e.multiplicity) <= ?")
             having_params.append(max_count)
         having_clause = f" HAVING {' AND '.join(having_parts)}" if having_parts else ""
 
@@ -318,7 +1199,7 @@ class ArchCADIndexStore:
         )
         data_query = (
             "SELECT s.sample_id, s.split, s.modalities_json, s.stats_json, "
-            "COUNT(e.id) AS match_count "
+            "SUM(e.multiplicity) AS match_count "
             "FROM samples s "
             "JOIN elements e ON e.sample_id = s.sample_id "
             f"{where_clause} GROUP BY s.sample_id{having_clause} "
@@ -352,7 +1233,7 @@ class ArchCADIndexStore:
         with self._connect() as connection:
             rows = connection.execute(
                 """
-                SELECT semantic, COUNT(*) AS element_count, COUNT(DISTINCT sample_id) AS sample_count
+                SELECT semantic, SUM(multiplicity) AS element_count, COUNT(DISTINCT sample_id) AS sample_count
                 FROM elements
                 WHERE semantic IS NOT NULL AND semantic != ''
                 GROUP BY semantic
@@ -368,10 +1249,282 @@ class ArchCADIndexStore:
             for row in rows
         ]
 
+    def posting_rows(self) -> dict[str, Any]:
+        """Return ordered sample ids and ``field -> label -> sample ids`` for posting lists."""
+        postings: dict[str, dict[str, list[str]]] = {
+            "semantic": {},
+            "instance": {},
+            "split": {},
+            "modality": {},
+        }
+        with self._connect() as connection:
+            sample_rows = connection.execute(
+                """
+                SELECT sample_id, split, has_image, has_svg, has_json, has_qa, has_pointcloud
+                FROM samples
+                ORDER BY sample_id
+                """
+            ).fetchall()
+            for row in sample_rows:
+                if row["split"]:
+                    postings["split"].setdefault(row["split"], []).append(row["sample_id"])
+                for modality in sorted(VALID_MODALITIES):
+                    if row[f"has_{modality}"]:
+                        postings["modality"].setdefault(modality, []).append(row["sample_id"])
+            for field in ("semantic", "instance"):
+                for row in connection.execute(
+                    f"""
+                    SELECT DISTINCT sample_id, {field} AS label
+                    FROM elements
+                    WHERE {field} IS NOT NULL AND {field} != ''
+                    """
+                ):
+                    postings[field].setdefault(row["label"], []).append(row["sample_id"])
+        return {"sample_ids": [row["sample_id"] for row in sample_rows], "postings": postings}
+
+    def sample_ids(self, *, split: str | None = None) -> list[str]:
+        query = "SELECT sample_id FROM samples"
+        params: tuple[Any, ...] = ()
+        if split:
+            query += " WHERE split = ?"
+            params = (split,)
+        with self._connect() as connection:
+            rows = connection.execute(f"{query} ORDER BY sample_id", params).fetchall()
+        return [row["sample_id"] for row in rows]
+
+    def image_refs(self, *, split: str | None = None) -> list[dict[str, Any]]:
+        """Return ``sample_id`` / ``split`` / ``file_ref`` for samples with an image modality."""
+        query = "SELECT sample_id, split, modalities_json FROM samples WHERE has_image = 1"
+        params: tuple[Any, ...] = ()
+        if split:
+            query += " AND split = ?"
+            params = (split,)
+        with self._connect() as connection:
+            rows = connection.execute(f"{query} ORDER BY sample_id", params).fetchall()
+        return [
+            {
+                "sample_id": row["sample_id"],
+                "split": row["split"],
+                "file_ref": json.loads(row["modalities_json"])["image"],
+            }
+            for row in rows
+        ]
+
+    def replace_image_rows(self, size: int, rows: Iterable[dict[str, Any]]) -> None:
+        """Replace the ``sample_id -> row`` mapping of one decoded image tensor file."""
+        with self._connect() as connection:
+            connection.execute("DELETE FROM image_rows WHERE size = ?", (size,))
+            connection.executemany(
+                """
+                INSERT INTO image_rows (sample_id, size, row_index, byte_offset, fingerprint, width, height)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+                """,
+                (
+                    (
+                        row["sample_id"],
+                        size,
+                        row["row_index"],
+                        row["byte_offset"],
+                        row["fingerprint"],
+                        row["width"],
+                        row["height"],
+                    )
+                    for row in rows
+                ),
+            )
+
+    def image_rows(self, size: int, sample_ids: list[str] | None = None) -> dict[str, dict[str, Any]]:
+        query = "SELECT sample_id, row_index, byte_offset, fingerprint, width, height FROM image_rows WHERE size = ?"
+        params: list[Any] = [size]
+        if sample_ids is not None:
+            query += f" AND sample_id IN ({', '.join('?' for _ in sample_ids)})"
+            params.extend(sample_ids)
+        with self._connect() as connection:
+            rows = connection.execute(query, params).fetchall()
+        return {row["sample_id"]: dict(row) for row in rows}
+
+    def alignment_targets(self, *, split: str | None = None) -> list[dict[str, Any]]:
+        """Samples with both JSON and SVG modalities, with the fingerprint of their stored check (if any)."""
+        query = """
+            SELECT s.sample_id, s.split, s.modalities_json, a.fingerprint
+            FROM samples s
+            LEFT JOIN sample_alignment a ON a.sample_id = s.sample_id
+            WHERE s.has_json = 1 AND s.has_svg = 1
+        """
+        params: tuple[Any, ...] = ()
+        if split:
+            query += " AND s.split = ?"
+            params = (split,)
+        with self._connect() as connection:
+            rows = connection.execute(f"{query} ORDER BY s.sample_id", params).fetchall()
+        targets = []
+        for row in rows:
+            modalities = json.loads(row["modalities_json"])
+            targets.append(
+                {
+                    "sample_id": row["sample_id"],
+                    "split": row["split"],
+                    "json": modalities["json"],
+                    "svg": modalities["svg"],
+                    "fingerprint": row["fingerprint"],
+                }
+            )
+        return targets
+
+    def upsert_alignment(self, rows: Iterable[dict[str, Any]]) -> None:
+        with self._connect() as connection:
+            connection.executemany(
+                f"""
+                INSERT OR REPLACE INTO sample_alignment ({", ".join(ALIGNMENT_COLUMNS)})
+                VALUES ({", ".join("?" for _ in ALIGNMENT_COLUMNS)})
+                """,
+                ([row[column] for column in ALIGNMENT_COLUMNS] for row in rows),
+            )
+
+    def get_alignment(self, sample_id: str) -> dict[str, Any] | None:
+        with self._connect() as connection:
+            row = connection.execute(
+                "SELECT * FROM sample_alignment WHERE sample_id = ?",
+                (sample_id,),
+            ).fetchone()
+        return dict(row) if row else None
+
+    def aligned_sample_ids(self, min_alignment: float) -> list[str]:
+        with self._connect() as connection:
+            rows = connection.execute(
+                "SELECT sample_id FROM sample_alignment WHERE score >= ? ORDER BY sample_id",
+                (min_alignment,),
+            ).fetchall()
+        return [row["sample_id"] for row in rows]
+
+    def upsert_minhash(self, rows: Iterable[dict[str, Any]]) -> None:
+        with self._connect() as connection:
+            connection.executemany(
+                "INSERT OR REPLACE INTO sample_minhash (sample_id, signature) VALUES (?, ?)",
+                ((row["sample_id"], row["signature"]) for row in rows),
+            )
+
+    def minhash_signatures(self) -> list[dict[str, Any]]:
+        """Every stored MinHash signature with its sample's split, ordered by sample id."""
+        with self._connect() as connection:
+            rows = connection.execute(
+                """
+                SELECT m.sample_id, s.split, m.signature
+                FROM sample_minhash m
+                JOIN samples s ON s.sample_id = m.sample_id
+                ORDER BY m.sample_id
+                """
+            ).fetchall()
+        return [dict(row) for row in rows]
+
+    def replace_duplicate_clusters(self, rows: Iterable[dict[str, Any]]) -> None:
+        columns = ("sample_id", "cluster_id", "cluster_size", "similarity", "representative")
+        with self._connect() as connection:
+            connection.execute("DELETE FROM duplicate_clusters")
+            connection.executemany(
+                f"INSERT INTO duplicate_clusters ({', '.join(columns)}) VALUES ({', '.join('?' for _ in columns)})",
+                ([row[column] for column in columns] for row in rows),
+            )
+
+    def duplicate_rows(self, cluster_id: str | None = None) -> list[dict[str, Any]]:
+        """Cluster memberships with each member's split, ordered by cluster and sample id."""
+        query = """
+            SELECT d.sample_id, s.split, d.cluster_id, d.cluster_size, d.similarity, d.representative
+            FROM duplicate_clusters d
+            JOIN samples s ON s.sample_id = d.sample_id
+        """
+        params: tuple[Any, ...] = ()
+        if cluster_id is not None:
+            query += " WHERE d.cluster_id = ?"
+            params = (cluster_id,)
+        with self._connect() as connection:
+            rows = connection.execute(f"{query} ORDER BY d.cluster_id, d.sample_id", params).fetchall()
+        return [{**dict(row), "representative": bool(row["representative"])} for row in rows]
+
+    def get_duplicate(self, sample_id: str) -> dict[str, Any] | None:
+        with self._connect() as connection:
+            row = connection.execute(
+                "SELECT cluster_id FROM duplicate_clusters WHERE sample_id = ?",
+                (sample_id,),
+            ).fetchone()
+        return dict(row) if row else None
+
+    def duplicate_sample_ids(self) -> list[str]:
+        """Clustered samples other than their cluster's representative."""
+        with self._connect() as connection:
+            rows = connection.execute(
+                "SELECT sample_id FROM duplicate_clusters WHERE representative = 0 ORDER BY sample_id"
+            ).fetchall()
+        return [row["sample_id"] for row in rows]
+
+    def get_topology(self, sample_id: str, semantic: str) -> dict[str, Any] | None:
+        """Stored wall graph of one sample; ``semantic`` is ``""`` for the graph over all line work."""
+        with self._connect() as connection:
+            row = connection.execute(
+                "SELECT * FROM sample_topology WHERE sample_id = ? AND semantic = ?",
+                (sample_id, semantic),
+            ).fetchone()
+        if not row:
+            return None
+        return {
+            "fingerprint": row["fingerprint"],
+            "summary": json.loads(row["summary_json"]),
+            "graph": json.loads(row["graph_json"]),
+        }
+
+    def upsert_topology(
+        self,
+        sample_id: str,
+        semantic: str,
+        fingerprint: str,
+        summary: dict[str, Any],
+        graph: dict[str, Any],
+    ) -> None:
+        with self._connect() as connection:
+            connection.execute(
+                """
+                INSERT OR REPLACE INTO sample_topology (sample_id, semantic, fingerprint, summary_json, graph_json)
+                VALUES (?, ?, ?, ?, ?)
+                """,
+                (sample_id, semantic, fingerprint, json.dumps(summary), json.dumps(graph)),
+            )
+
+    def has_sample(self, sample_id: str) -> bool:
+        with self._connect() as connection:
+            return connection.execute("SELECT 1 FROM samples WHERE sample_id = ?", (sample_id,)).fetchone() is not None
+
+    def get_sample_summaries(self, sample_ids: list[str]) -> list[dict[str, Any]]:
+        """Return list-style summaries for ``sample_ids``, preserving their order."""
+        if not sample_ids:
+            return []
+        placeholders = ", ".join("?" for _ in sample_ids)
+        with self._connect() as connection:
+            rows = connection.execute(
+                f"""
+                SELECT sample_id, split, modalities_json, stats_json, validation_json
+                FROM samples
+                WHERE sample_id IN ({placeholders})
+                """,
+                sample_ids,
+            ).fetchall()
+        by_id = {
+            row["sample_id"]: {
+                "sample_id": row["sample_id"],
+                "split": row["split"],
+                "modalities": json.loads(row["modalities_json"]),
+                "stats": json.loads(row["stats_json"]),
+                "validation_flags": json.loads(row["validation_json"]),
+            }
+            for row in rows
+        }
+        return [by_id[sample_id] for sample_id in sample_ids if sample_id in by_id]
+
     def summary(self) -> dict[str, int]:
         with self._connect() as connection:
             sample_count = connection.execute("SELECT COUNT(*) AS total FROM samples").fetchone()["total"]
-            element_count = connection.execute("SELECT COUNT(*) AS total FROM elements").fetchone()["total"]
+            element_count = connection.execute(
+                "SELECT COALESCE(SUM(multiplicity), 0) AS total FROM elements"
+            ).fetchone()["total"]
             qa_count = connection.execute("SELECT COUNT(*) AS total FROM qa_pairs").fetchone()["total"]
         return {
             "sample_count": sample_count,
@@ -386,6 +1539,8 @@ class ArchCADIndexStore:
         instance: str | None,
         modalities: Iterable[str] | None,
         split: str | None,
+        min_alignment: float | None = None,
+        exclude_duplicates: bool = False,
     ) -> tuple[list[str], list[Any]]:
         conditions: list[str] = []
         params: list[Any] = []
@@ -409,9 +1564,37 @@ class ArchCADIndexStore:
                     context={"invalid_modality": modality, "allowed": sorted(VALID_MODALITIES)},
                 )
             conditions.append(f"s.has_{modality} = 1")
+        if min_alignment is not None:
+            conditions.append(_MIN_ALIGNMENT_CONDITION)
+            params.append(min_alignment)
+        if exclude_duplicates:
+            conditions.append(_EXCLUDE_DUPLICATES_CONDITION)
         return conditions, params
 
     def _connect(self) -> sqlite3.Connection:
-        connection = sqlite3.connect(self.db_path)
-        connection.row_factory = sqlite3.Row
+        connection = _POOL.get(self._db_key)
+        if self._db_key not in _SCHEMA_CHECKED:
+            self._check_schema(connection)
+            _SCHEMA_CHECKED.add(self._db_key)
         return connection
+
+    def _check_schema(self, connection: sqlite3.Connection) -> None:
+        """Refuse databases ``initialize`` has not brought up to ``SCHEMA_VERSION``.
+
+        Migrations rewrite tables, so they only run from the indexer and the
+        migration worker, never implicitly from a query.
+        """
+        version = connection.execute("PRAGMA user_version").fetchone()[0]
+        if version >= SCHEMA_VERSION:
+            return
+        built = connection.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'samples'").fetchone()
+        raise ArchCADError(
+            "ArchCAD index schema is out of date" if built else "ArchCAD index has not been built",
+            status_code=409,
+            context={
+                "db_path": str(self.db_path),
+                "schema_version": version,
+                "required_version": SCHEMA_VERSION,
+                "fix": MIGRATE_COMMAND if built else "POST /datasets/archcad/index",
+            },
+        )
@@ -0,0 +1,110 @@
+from __future__ import annotations
+
+import re
+import zlib
+from collections import Counter
+from functools import lru_cache
+from typing import Any
+
+from app.core.exceptions import ArchCADError
+from app.core.logging import get_logger
+
+logger = get_logger(__name__)
+
+PAYLOAD_CODECS = ("json", "zlib", "zstd")
+# zlib only looks back 32 KiB, so a longer preset dictionary is wasted.
+ZLIB_MAX_DICT_SIZE = 32 * 1024
+ZLIB_LEVEL = 9
+ZSTD_LEVEL = 10
+# JSON keys (with their colon) and short string values: the repetitive parts of a payload.
+_JSON_TOKEN = re.compile(rb'"[^"\\]{1,64}"\s*:\s*|"[^"\\]{1,64}"')
+
+
+def zstd_module() -> Any | None:
+    try:
+        import zstandard
+    except ImportError:
+        return None
+    return zstandard
+
+
+@lru_cache(maxsize=None)
+def resolve_codec(name: str) -> str:
+    """Validate a codec name, falling back from ``zstd`` to ``zlib`` when zstandard is missing."""
+    codec = (name or "json").strip().lower()
+    if codec not in PAYLOAD_CODECS:
+        raise ArchCADError(
+            "Unsupported payload codec",
+            context={"codec": name, "allowed": list(PAYLOAD_CODECS)},
+        )
+    if codec == "zstd" and zstd_module() is None:
+        logger.warning(
+            "zstandard is not installed; compressing payloads with zlib instead",
+            extra={"context": {"requested_codec": name}},
+        )
+        return "zlib"
+    return codec
+
+
+def _token_dictionary(samples: list[bytes], size: int) -> bytes:
+    """Preset dictionary from the JSON tokens that save the most bytes across ``samples``.
+
+    Highest-value tokens go last: both zlib and zstd reach the end of a
+    dictionary with the cheapest back-references.
+    """
+    counts: Counter[bytes] = Counter()
+    for sample in samples:
+        counts.update(_JSON_TOKEN.findall(sample))
+    ranked = sorted(
+        (token for token, count in counts.items() if count > 1),
+        key=lambda token: counts[token] * len(token),
+        reverse=True,
+    )
+    chosen: list[bytes] = []
+    used = 0
+    for token in ranked:
+        if used + len(token) > size:
+            continue
+        chosen.append(token)
+        used += len(token)
+    return b"".join(reversed(chosen))
+
+
+def train_dictionary(codec: str, samples: list[bytes], size: int) -> bytes:
+    if codec == "zstd":
+        zstandard = zstd_module()
+        try:
+            return zstandard.train_dictionary(size, samples).as_bytes()
+        except zstandard.ZstdError:
+            # Too few or too uniform samples for the COVER trainer.
+            return _token_dictionary(samples, size)
+    return _token_dictionary(samples, min(size, ZLIB_MAX_DICT_SIZE))
+
+
+def compress(codec: str, data: bytes, dictionary: bytes | None) -> bytes:
+    if codec == "zstd":
+        zstandard = zstd_module()
+        dict_data = zstandard.ZstdCompressionDict(dictionary) if dictionary else None
+        return zstandard.ZstdCompressor(level=ZSTD_LEVEL, dict_data=dict_data).compress(data)
+    if codec == "zlib":
+        compressor = (
+            zlib.compressobj(ZLIB_LEVEL, zdict=dictionary) if dictionary else zlib.compressobj(ZLIB_LEVEL)
+        )
+        return compressor.compress(data) + compressor.flush()
+    return data
+
+
+def decompress(codec: str, data: bytes, dictionary: bytes | None) -> bytes:
+    if codec == "zstd":
+        zstandard = zstd_module()
+        if zstandard is None:
+            raise ArchCADError(
+                "zstandard is not installed but the index stores zstd-compressed payloads",
+                status_code=501,
+            )
+        dict_data = zstandard.ZstdCompressionDict(dictionary) if dictionary else None
+        return zstandard.ZstdDecompressor(dict_data=dict_data).decompress(data)
+    if codec == "zlib":
+        decompressor = zlib.decompressobj(zdict=dictionary) if dictionary else zlib.decompressobj()
+        return decompressor.decompress(data) + decompressor.flush()
+    return data if isinstance(data, bytes) else data.encode("utf-8")
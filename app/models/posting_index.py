@@ -0,0 +1,273 @@
+from __future__ import annotations
+
+import json
+import os
+import threading
+from functools import lru_cache
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Iterable
+
+import numpy as np
+
+from app.core.exceptions import ArchCADError
+from app.core.logging import get_logger
+from app.utils.file_refs import write_json
+
+if TYPE_CHECKING:
+    from app.models.index_store import ArchCADIndexStore
+    from app.models.sharded_index_store import ArchCADShardedIndexStore
+
+POSTING_FIELDS = ("semantic", "instance", "split", "modality")
+POSTING_OPS = {"and", "or", "not"}
+
+_POPCOUNT = np.array([bin(value).count("1") for value in range(256)], dtype=np.uint8)
+_DELTA_DTYPES = (np.dtype("<u1"), np.dtype("<u2"), np.dtype("<u4"))
+_REBUILD_LOCK = threading.Lock()
+
+logger = get_logger(__name__)
+
+
+def popcount(bitmap: np.ndarray) -> int:
+    """Count set bits in a packed ``uint8`` bitmap."""
+    return int(_POPCOUNT[bitmap].sum(dtype=np.int64))
+
+
+class ArchCADPostingIndex:
+    """Compressed per-label posting lists over dense sample ordinals.
+
+    Each list is stored either as a packed bitmap over all ordinals or as
+    delta-encoded ordinals using the narrowest unsigned dtype that fits the
+    largest gap, whichever is smaller. Lists live back to back in one binary
+    file that is memory-mapped on first use; a JSON directory records offsets.
+    """
+
+    def __init__(self, data_path: Path, directory_path: Path) -> None:
+        self.data_path = data_path
+        self.directory_path = directory_path
+        self._directory: dict[str, Any] | None = None
+        self._data: np.ndarray | None = None
+        self._ordinals: dict[str, int] | None = None
+
+    @property
+    def available(self) -> bool:
+        return self.directory_path.exists() and self.data_path.exists()
+
+    @property
+    def sample_count(self) -> int:
+        return int(self.directory["sample_count"])
+
+    @property
+    def sample_ids(self) -> list[str]:
+        return self.directory["sample_ids"]
+
+    @property
+    def generation(self) -> str | None:
+        """Store generation the lists were built from (``None`` for older builds)."""
+        return self.directory.get("generation")
+
+    @property
+    def directory(self) -> dict[str, Any]:
+        if self._directory is None:
+            if not self.available:
+                raise ArchCADError(
+                    "Posting lists are not available; rebuild the ArchCAD index",
+                    status_code=409,
+                    context={"directory_path": str(self.directory_path)},
+                )
+            self._directory = json.loads(self.directory_path.read_text(encoding="utf-8"))
+        return self._directory
+
+    def labels(self, field: str) -> list[str]:
+        return sorted(self.directory["fields"].get(field, {}))
+
+    def build(
+        self,
+        sample_ids: list[str],
+        postings: dict[str, dict[str, Iterable[str]]],
+        *,
+        generation: str | None = None,
+    ) -> dict[str, Any]:
+        """Write posting lists for ``postings[field][label] -> sample ids`` at store ``generation``."""
+        ordinals = {sample_id: ordinal for ordinal, sample_id in enumerate(sample_ids)}
+        sample_count = len(sample_ids)
+        bitmap_bytes = (sample_count + 7) // 8
+        fields: dict[str, dict[str, dict[str, Any]]] = {}
+        offset = 0
+        encoded_bytes = 0
+        raw_bytes = 0
+
+        # Write beside the live file and swap it in so mapped readers keep a valid inode.
+        self.data_path.parent.mkdir(parents=True, exist_ok=True)
+        temp_path = self.data_path.with_name(f"{self.data_path.name}.{os.getpid()}.tmp")
+        with temp_path.open("wb") as handle:
+            for field, labels in postings.items():
+                field_entries: dict[str, dict[str, Any]] = {}
+                for label in sorted(labels):
+                    values = np.unique(
+                        np.fromiter((ordinals[sample_id] for sample_id in labels[label]), dtype=np.int64)
+                    )
+                    payload, encoding, dtype = self._encode(values, sample_count, bitmap_bytes)
+                    handle.write(payload)
+                    field_entries[label] = {
+                        "offset": offset,
+                        "length": len(payload),
+                        "encoding": encoding,
+                        "dtype": dtype,
+                        "count": int(len(values)),
+                    }
+                    offset += len(payload)
+                    encoded_bytes += len(payload)
+                    raw_bytes += int(len(values)) * 4
+                fields[field] = field_entries
+        os.replace(temp_path, self.data_path)
+
+        write_json(
+            self.directory_path,
+            {
+                "version": 1,
+                "generation": generation,
+                "sample_count": sample_count,
+                "sample_ids": sample_ids,
+                "fields": fields,
+            },
+        )
+        self._directory = None
+        self._data = None
+        self._ordinals = None
+        return {
+            "data_path": str(self.data_path),
+            "directory_path": str(self.directory_path),
+            "generation": generation,
+            "sample_count": sample_count,
+            "list_count": sum(len(entries) for entries in fields.values()),
+            "encoded_bytes": encoded_bytes,
+            "uncompressed_bytes": raw_bytes,
+        }
+
+    def bitmap(self, field: str, label: str) -> np.ndarray:
+        """Return the packed bitmap for one label (all zeros when unknown)."""
+        bitmap_bytes = (self.sample_count + 7) // 8
+        entry = self.directory["fields"].get(field, {}).get(label)
+        if entry is None or entry["count"] == 0:
+            return np.zeros(bitmap_bytes, dtype=np.uint8)
+        raw = self._mapped()[entry["offset"] : entry["offset"] + entry["length"]]
+        if entry["encoding"] == "bitmap":
+            return raw
+        ordinals = np.cumsum(raw.view(entry["dtype"]), dtype=np.int64)
+        dense = np.zeros(self.sample_count, dtype=bool)
+        dense[ordinals] = True
+        return np.packbits(dense)
+
+    def combine(self, field: str, labels: list[str], op: str) -> np.ndarray:
+        """Combine one field's label bitmaps with ``and``, ``or`` or ``not`` (none of)."""
+        if op not in POSTING_OPS:
+            raise ArchCADError("Invalid boolean operator", context={"op": op, "allowed": sorted(POSTING_OPS)})
+        bitmaps = [self.bitmap(field, label) for label in labels]
+        if op == "and":
+            return np.bitwise_and.reduce(bitmaps)
+        union = np.bitwise_or.reduce(bitmaps)
+        if op == "or":
+            return union
+        return self.complement(union)
+
+    def subset(self, sample_ids: Iterable[str]) -> np.ndarray:
+        """Bitmap of ``sample_ids``; ids missing from the index are ignored."""
+        if self._ordinals is None:
+            self._ordinals = {sample_id: ordinal for ordinal, sample_id in enumerate(self.sample_ids)}
+        ordinals = self._ordinals
+        dense = np.zeros(self.sample_count, dtype=bool)
+        dense[np.fromiter((ordinals[key] for key in sample_ids if key in ordinals), dtype=np.int64)] = True
+        return np.packbits(dense)
+
+    def complement(self, bitmap: np.ndarray) -> np.ndarray:
+        """Bitmap of every valid ordinal not set in ``bitmap``."""
+        return np.bitwise_and(np.invert(bitmap), self.universe())
+
+    def universe(self) -> np.ndarray:
+        """Bitmap with every valid ordinal set."""
+        return np.packbits(np.ones(self.sample_count, dtype=bool))
+
+    def ordinals(self, bitmap: np.ndarray) -> np.ndarray:
+        return np.flatnonzero(np.unpackbits(bitmap, count=self.sample_count))
+
+    def _mapped(self) -> np.ndarray:
+        if self._data is None:
+            if self.data_path.stat().st_size == 0:
+                self._data = np.zeros(0, dtype=np.uint8)
+            else:
+                self._data = np.memmap(self.data_path, dtype=np.uint8, mode="r")
+        return self._data
+
+    def _encode(self, values: np.ndarray, sample_count: int, bitmap_bytes: int) -> tuple[bytes, str, str | None]:
+        gaps = np.diff(values, prepend=0)
+        max_gap = int(gaps.max()) if len(gaps) else 0
+        dtype = next(
+            (candidate for candidate in _DELTA_DTYPES if max_gap <= np.iinfo(candidate).max),
+            _DELTA_DTYPES[-1],
+        )
+        if len(values) * dtype.itemsize < bitmap_bytes:
+            return gaps.astype(dtype).tobytes(), "delta", dtype.str
+        dense = np.zeros(sample_count, dtype=bool)
+        dense[values] = True
+        return np.packbits(dense).tobytes(), "bitmap", None
+
+
+@lru_cache(maxsize=4)
+def _cached_posting_index(data_path: Path, directory_path: Path, version: int) -> ArchCADPostingIndex:
+    return ArchCADPostingIndex(data_path, directory_path)
+
+
+def load_posting_index(data_path: Path, directory_path: Path) -> ArchCADPostingIndex:
+    """Return a process-wide posting index, reopened whenever the directory is rewritten."""
+    try:
+        version = directory_path.stat().st_mtime_ns
+    except FileNotFoundError:
+        return ArchCADPostingIndex(data_path, directory_path)
+    return _cached_posting_index(data_path, directory_path, version)
+
+
+def build_posting_index(
+    data_path: Path,
+    directory_path: Path,
+    store: ArchCADIndexStore | ArchCADShardedIndexStore,
+    *,
+    rows: dict[str, Any] | None = None,
+) -> dict[str, Any]:
+    """Rebuild the posting lists from every sample in ``store`` at its current generation.
+
+    ``rows`` reuses a ``store.posting_rows()`` result the caller already holds.
+    Runs from the indexer, never from a query, so no request waits on a full rebuild.
+    """
+    with _REBUILD_LOCK:
+        generation = store.generation()
+        rows = rows if rows is not None else store.posting_rows()
+        return ArchCADPostingIndex(data_path, directory_path).build(
+            rows["sample_ids"], rows["postings"], generation=generation
+        )
+
+
+def current_posting_index(
+    data_path: Path,
+    directory_path: Path,
+    store: ArchCADIndexStore | ArchCADShardedIndexStore,
+) -> ArchCADPostingIndex:
+    """Return the posting index, logging when ``store`` has changed since its build.
+
+    Upserts and split deletes move the store generation on. Lists built before
+    them keep being served, with a warning, until the indexer rebuilds them.
+    """
+    index = load_posting_index(data_path, directory_path)
+    if index.available:
+        generation = store.generation()
+        if index.generation != generation:
+            logger.warning(
+                "ArchCAD posting lists are older than the index; serving them until the next index build",
+                extra={
+                    "context": {
+                        "directory_path": str(directory_path),
+                        "built_generation": index.generation,
+                        "store_generation": generation,
+                    }
+                },
+            )
+    return index
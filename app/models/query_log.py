@@ -0,0 +1,107 @@
+from __future__ import annotations
+
+import hashlib
+import re
+import threading
+from datetime import datetime, timezone
+from typing import Any
+
+from app.core.logging import get_logger
+
+logger = get_logger(__name__)
+
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_LITERAL = re.compile(r"\b\d+(?:\.\d+)?\b")
+_PLACEHOLDER_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)*\s*\)")
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_sql(sql: str) -> str:
+    """Collapse literals, placeholder lists and whitespace so query shapes compare equal."""
+    normalized = _STRING_LITERAL.sub("?", sql)
+    normalized = _NUMBER_LITERAL.sub("?", normalized)
+    normalized = _PLACEHOLDER_LIST.sub("(...)", normalized)
+    return _WHITESPACE.sub(" ", normalized).strip()
+
+
+def sql_fingerprint(normalized_sql: str) -> str:
+    return hashlib.sha1(normalized_sql.encode("utf-8")).hexdigest()[:16]
+
+
+class SlowQueryLog:
+    """Process-wide, opt-in record of index statements slower than a threshold.
+
+    Disabled while ``threshold_ms`` is ``None``. Slow statements are logged as
+    JSON with their ``EXPLAIN QUERY PLAN`` and aggregated by fingerprint (the
+    SQL with literals and ``IN`` lists collapsed), keeping the ``top_n``
+    slowest shapes for the admin endpoint.
+    """
+
+    def __init__(self) -> None:
+        self.threshold_ms: float | None = None
+        self.top_n = 20
+        self._entries: dict[str, dict[str, Any]] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.threshold_ms is not None
+
+    def configure(self, *, threshold_ms: float | None, top_n: int) -> None:
+        self.threshold_ms = threshold_ms if threshold_ms and threshold_ms > 0 else None
+        self.top_n = max(1, top_n)
+
+    def is_slow(self, elapsed: float) -> bool:
+        return self.threshold_ms is not None and elapsed * 1000 >= self.threshold_ms
+
+    def record(self, sql: str, elapsed: float, plan: list[str] | None) -> None:
+        normalized = normalize_sql(sql)
+        fingerprint = sql_fingerprint(normalized)
+        duration_ms = round(elapsed * 1000, 3)
+        logger.warning(
+            "Slow ArchCAD index query",
+            extra={
+                "context": {
+                    "fingerprint": fingerprint,
+                    "duration_ms": duration_ms,
+                    "threshold_ms": self.threshold_ms,
+                    "sql": normalized,
+                    "plan": plan,
+                }
+            },
+        )
+        with self._lock:
+            entry = self._entries.get(fingerprint)
+            if entry is None:
+                entry = self._entries[fingerprint] = {
+                    "fingerprint": fingerprint,
+                    "sql": normalized,
+                    "count": 0,
+                    "total_ms": 0.0,
+                    "max_ms": 0.0,
+                }
+            entry["count"] += 1
+            entry["total_ms"] = round(entry["total_ms"] + duration_ms, 3)
+            entry["max_ms"] = max(entry["max_ms"], duration_ms)
+            entry["last_seen"] = datetime.now(timezone.utc).isoformat()
+            if plan is not None:
+                entry["plan"] = plan
+            # Keep some headroom beyond top_n so a shape can climb back in.
+            if len(self._entries) > self.top_n * 4:
+                for stale in self._ranked()[self.top_n * 2 :]:
+                    del self._entries[stale["fingerprint"]]
+
+    def top(self, limit: int | None = None) -> list[dict[str, Any]]:
+        with self._lock:
+            ranked = self._ranked()
+        return [dict(entry) for entry in ranked[: limit or self.top_n]]
+
+    def reset(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def _ranked(self) -> list[dict[str, Any]]:
+        return sorted(self._entries.values(), key=lambda entry: (-entry["total_ms"], entry["fingerprint"]))
+
+
+SLOW_QUERY_LOG = SlowQueryLog()
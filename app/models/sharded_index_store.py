@@ -0,0 +1,490 @@
+from __future__ import annotations
+
+import heapq
+import os
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+from pathlib import Path
+from typing import Any, Callable, Iterable, TypeVar
+
+from app.core.settings import Settings
+from app.models.index_store import ArchCADIndexStore
+from app.models.query_log import SLOW_QUERY_LOG
+from app.schemas.archcad import ArchCADSample
+
+UNSPLIT_SHARD = "unsplit"
+SHARD_PREFIX = "archcad_index."
+SHARD_SUFFIX = ".sqlite3"
+
+T = TypeVar("T")
+
+
+def shard_name(split: str | None) -> str:
+    if not split:
+        return UNSPLIT_SHARD
+    return re.sub(r"[^A-Za-z0-9_-]+", "_", split)
+
+
+class ArchCADShardedIndexStore:
+    """Split-sharded index: one SQLite database per split, queried in parallel.
+
+    Mirrors the ``ArchCADIndexStore`` query API. Queries that name a split hit a
+    single shard; the rest fan out over all shards on a thread pool (sqlite3
+    releases the GIL while stepping statements) and merge the partial results.
+    Reads never create shards: a split without one reads as empty. Only the
+    write paths (``upsert_sample``, ``replace_image_rows``, ``delete_split``)
+    create shard files.
+    """
+
+    def __init__(self, shard_dir: Path, **store_options: Any) -> None:
+        self.shard_dir = shard_dir
+        self.store_options = store_options
+        # Shard stores are reused so per-store payload dictionary state survives across calls.
+        self._stores: dict[str, ArchCADIndexStore] = {}
+        # One long-lived pool, so its threads keep their pooled shard connections between fan-outs.
+        self._executor: ThreadPoolExecutor | None = None
+        self._executor_key = (0, 0)
+        self._executor_lock = threading.Lock()
+
+    def shard_path(self, split: str | None) -> Path:
+        return self.shard_dir / f"{SHARD_PREFIX}{shard_name(split)}{SHARD_SUFFIX}"
+
+    def shard(self, split: str | None) -> ArchCADIndexStore:
+        return self._store(shard_name(split))
+
+    def shards(self) -> dict[str, ArchCADIndexStore]:
+        if not self.shard_dir.exists():
+            return {}
+        return {
+            name: self._store(name)
+            for name in (
+                path.name[len(SHARD_PREFIX) : -len(SHARD_SUFFIX)]
+                for path in sorted(self.shard_dir.glob(f"{SHARD_PREFIX}*{SHARD_SUFFIX}"))
+            )
+        }
+
+    def _store(self, name: str) -> ArchCADIndexStore:
+        store = self._stores.get(name)
+        if store is None:
+            store = self._stores[name] = ArchCADIndexStore(
+                self.shard_dir / f"{SHARD_PREFIX}{name}{SHARD_SUFFIX}",
+                **self.store_options,
+            )
+        return store
+
+    def exists(self) -> bool:
+        return bool(self.shards())
+
+    def initialize(self, *, reset: bool = False) -> None:
+        self.shard_dir.mkdir(parents=True, exist_ok=True)
+        for store in self.shards().values():
+            store.initialize(reset=reset)
+
+    def generation(self) -> str:
+        return "|".join(f"{name}={store.generation()}" for name, store in self.shards().items())
+
+    def delete_split(self, split: str | None) -> None:
+        """Drop one split's shard so it can be reindexed without touching the others."""
+        self.shard(split).initialize(reset=True)
+
+    def upsert_sample(self, sample: ArchCADSample) -> None:
+        store = self.shard(sample.split)
+        if not store.db_path.exists():
+            store.initialize()
+        store.upsert_sample(sample)
+
+    def list_samples(
+        self,
+        *,
+        offset: int,
+        limit: int,
+        semantic: str | None = None,
+        instance: str | None = None,
+        modalities: Iterable[str] | None = None,
+        split: str | None = None,
+        min_alignment: float | None = None,
+        exclude_duplicates: bool = False,
+    ) -> dict[str, Any]:
+        modality_list = list(modalities or [])
+        if split:
+            store = self._single(split)
+            if store is None:
+                return {"items": [], "total": 0}
+            return store.list_samples(
+                offset=offset,
+                limit=limit,
+                semantic=semantic,
+                instance=instance,
+                modalities=modality_list,
+                split=split,
+                min_alignment=min_alignment,
+                exclude_duplicates=exclude_duplicates,
+            )
+        partials = self._fan_out(
+            lambda store: store.list_samples(
+                offset=0,
+                limit=offset + limit,
+                semantic=semantic,
+                instance=instance,
+                modalities=modality_list,
+                min_alignment=min_alignment,
+                exclude_duplicates=exclude_duplicates,
+            )
+        )
+        return self._merge_pages(partials, offset, limit, key=lambda item: item["sample_id"])
+
+    def get_sample(self, sample_id: str) -> dict[str, Any] | None:
+        store = self._store_for_sample(sample_id)
+        return store.get_sample(sample_id) if store else None
+
+    def has_sample(self, sample_id: str) -> bool:
+        return self._store_for_sample(sample_id) is not None
+
+    def sample_ids(self, *, split: str | None = None) -> list[str]:
+        if split:
+            store = self._single(split)
+            return store.sample_ids(split=split) if store else []
+        return list(heapq.merge(*self._fan_out(lambda store: store.sample_ids())))
+
+    def image_refs(self, *, split: str | None = None) -> list[dict[str, Any]]:
+        if split:
+            store = self._single(split)
+            return store.image_refs(split=split) if store else []
+        partials = self._fan_out(lambda store: store.image_refs())
+        return list(heapq.merge(*partials, key=lambda item: item["sample_id"]))
+
+    def replace_image_rows(self, size: int, rows: Iterable[dict[str, Any]]) -> None:
+        by_shard: dict[str, list[dict[str, Any]]] = {name: [] for name in self.shards()}
+        for row in rows:
+            by_shard.setdefault(shard_name(row.get("split")), []).append(row)
+        for name, shard_rows in by_shard.items():
+            store = self._store(name)
+            if not store.db_path.exists():
+                store.initialize()
+            store.replace_image_rows(size, shard_rows)
+
+    def image_rows(self, size: int, sample_ids: list[str] | None = None) -> dict[str, dict[str, Any]]:
+        merged: dict[str, dict[str, Any]] = {}
+        for partial in self._fan_out(lambda store: store.image_rows(size, sample_ids)):
+            merged.update(partial)
+        return merged
+
+    def alignment_targets(self, *, split: str | None = None) -> list[dict[str, Any]]:
+        if split:
+            store = self._single(split)
+            return store.alignment_targets(split=split) if store else []
+        partials = self._fan_out(lambda store: store.alignment_targets())
+        return list(heapq.merge(*partials, key=lambda item: item["sample_id"]))
+
+    def upsert_alignment(self, rows: Iterable[dict[str, Any]]) -> None:
+        by_shard: dict[str, list[dict[str, Any]]] = {}
+        for row in rows:
+            by_shard.setdefault(shard_name(row.get("split")), []).append(row)
+        for name, shard_rows in by_shard.items():
+            self._store(name).upsert_alignment(shard_rows)
+
+    def get_alignment(self, sample_id: str) -> dict[str, Any] | None:
+        store = self._store_for_sample(sample_id)
+        return store.get_alignment(sample_id) if store else None
+
+    def aligned_sample_ids(self, min_alignment: float) -> list[str]:
+        return list(heapq.merge(*self._fan_out(lambda store: store.aligned_sample_ids(min_alignment))))
+
+    def upsert_minhash(self, rows: Iterable[dict[str, Any]]) -> None:
+        by_shard: dict[str, list[dict[str, Any]]] = {}
+        for row in rows:
+            by_shard.setdefault(shard_name(row.get("split")), []).append(row)
+        for name, shard_rows in by_shard.items():
+            self._store(name).upsert_minhash(shard_rows)
+
+    def minhash_signatures(self) -> list[dict[str, Any]]:
+        partials = self._fan_out(lambda store: store.minhash_signatures())
+        return list(heapq.merge(*partials, key=lambda item: item["sample_id"]))
+
+    def replace_duplicate_clusters(self, rows: Iterable[dict[str, Any]]) -> None:
+        # Clusters span shards; every shard is rewritten so emptied ones drop stale rows.
+        by_shard: dict[str, list[dict[str, Any]]] = {name: [] for name in self.shards()}
+        for row in rows:
+            by_shard.setdefault(shard_name(row.get("split")), []).append(row)
+        for name, shard_rows in by_shard.items():
+            self._store(name).replace_duplicate_clusters(shard_rows)
+
+    def duplicate_rows(self, cluster_id: str | None = None) -> list[dict[str, Any]]:
+        partials = self._fan_out(lambda store: store.duplicate_rows(cluster_id))
+        return list(heapq.merge(*partials, key=lambda item: (item["cluster_id"], item["sample_id"])))
+
+    def get_duplicate(self, sample_id: str) -> dict[str, Any] | None:
+        store = self._store_for_sample(sample_id)
+        return store.get_duplicate(sample_id) if store else None
+
+    def duplicate_sample_ids(self) -> list[str]:
+        return list(heapq.merge(*self._fan_out(lambda store: store.duplicate_sample_ids())))
+
+    def get_topology(self, sample_id: str, semantic: str) -> dict[str, Any] | None:
+        store = self._store_for_sample(sample_id)
+        return store.get_topology(sample_id, semantic) if store else None
+
+    def upsert_topology(
+        self,
+        sample_id: str,
+        semantic: str,
+        fingerprint: str,
+        summary: dict[str, Any],
+        graph: dict[str, Any],
+    ) -> None:
+        store = self._store_for_sample(sample_id)
+        if store:
+            store.upsert_topology(sample_id, semantic, fingerprint, summary, graph)
+
+    def get_sample_summaries(self, sample_ids: list[str]) -> list[dict[str, Any]]:
+        partials = self._fan_out(lambda store: store.get_sample_summaries(sample_ids))
+        by_id = {item["sample_id"]: item for partial in partials for item in partial}
+        return [by_id[sample_id] for sample_id in sample_ids if sample_id in by_id]
+
+    def get_elements(
+        self,
+        sample_id: str,
+        *,
+        offset: int,
+        limit: int,
+        semantic: str | None = None,
+        instance: str | None = None,
+        lod: int | None = None,
+        tolerance: float | None = None,
+    ) -> dict[str, Any]:
+        store = self._store_for_sample(sample_id)
+        if store is None:
+            return {"items": [], "total": 0}
+        return store.get_elements(
+            sample_id,
+            offset=offset,
+            limit=limit,
+            semantic=semantic,
+            instance=instance,
+            lod=lod,
+            tolerance=tolerance,
+        )
+
+    def get_qa(self, sample_id: str, *, offset: int, limit: int) -> dict[str, Any]:
+        store = self._store_for_sample(sample_id)
+        if store is None:
+            return {"items": [], "total": 0}
+        return store.get_qa(sample_id, offset=offset, limit=limit)
+
+    def search_instances(
+        self,
+        *,
+        offset: int,
+        limit: int,
+        sample_id: str | None = None,
+        semantic: str | None = None,
+        instance: str | None = None,
+        split: str | None = None,
+        bbox: tuple[float, float, float, float] | None = None,
+        min_elements: int | None = None,
+        max_elements: int | None = None,
+    ) -> dict[str, Any]:
+        filters = {
+            "semantic": semantic,
+            "instance": instance,
+            "bbox": bbox,
+            "min_elements": min_elements,
+            "max_elements": max_elements,
+        }
+        if sample_id:
+            store = self._store_for_sample(sample_id)
+            if store is None:
+                return {"items": [], "total": 0}
+            return store.search_instances(offset=offset, limit=limit, sample_id=sample_id, split=split, **filters)
+        if split:
+            store = self._single(split)
+            if store is None:
+                return {"items": [], "total": 0}
+            return store.search_instances(offset=offset, limit=limit, split=split, **filters)
+        partials = self._fan_out(lambda store: store.search_instances(offset=0, limit=offset + limit, **filters))
+        return self._merge_pages(partials, offset, limit, key=lambda item: (item["sample_id"], item["instance"]))
+
+    def search(
+        self,
+        *,
+        semantic: str | None,
+        instance: str | None,
+        modalities: Iterable[str] | None,
+        split: str | None,
+        min_count: int | None,
+        max_count: int | None,
+        offset: int,
+        limit: int,
+        min_alignment: float | None = None,
+        exclude_duplicates: bool = False,
+    ) -> dict[str, Any]:
+        modality_list = list(modalities or [])
+        if split:
+            store = self._single(split)
+            if store is None:
+                return {"items": [], "total": 0}
+            return store.search(
+                semantic=semantic,
+                instance=instance,
+                modalities=modality_list,
+                split=split,
+                min_count=min_count,
+                max_count=max_count,
+                offset=offset,
+                limit=limit,
+                min_alignment=min_alignment,
+                exclude_duplicates=exclude_duplicates,
+            )
+        partials = self._fan_out(
+            lambda store: store.search(
+                semantic=semantic,
+                instance=instance,
+                modalities=modality_list,
+                split=None,
+                min_count=min_count,
+                max_count=max_count,
+                offset=0,
+                limit=offset + limit,
+                min_alignment=min_alignment,
+                exclude_duplicates=exclude_duplicates,
+            )
+        )
+        if semantic or instance:
+            return self._merge_pages(
+                partials,
+                offset,
+                limit,
+                key=lambda item: (-item["match_count"], item["sample_id"]),
+            )
+        return self._merge_pages(partials, offset, limit, key=lambda item: item["sample_id"])
+
+    def semantic_stats(self) -> list[dict[str, Any]]:
+        merged: dict[str, dict[str, Any]] = {}
+        for partial in self._fan_out(lambda store: store.semantic_stats()):
+            for row in partial:
+                entry = merged.setdefault(
+                    row["semantic"],
+                    {"semantic": row["semantic"], "element_count": 0, "sample_count": 0},
+                )
+                entry["element_count"] += row["element_count"]
+                entry["sample_count"] += row["sample_count"]
+        return sorted(merged.values(), key=lambda row: (-row["sample_count"], row["semantic"]))
+
+    def posting_rows(self) -> dict[str, Any]:
+        partials = self._fan_out(lambda store: store.posting_rows())
+        postings: dict[str, dict[str, list[str]]] = {}
+        for partial in partials:
+            for field, labels in partial["postings"].items():
+                field_postings = postings.setdefault(field, {})
+                for label, sample_ids in labels.items():
+                    field_postings.setdefault(label, []).extend(sample_ids)
+        sample_ids = list(heapq.merge(*(partial["sample_ids"] for partial in partials)))
+        return {"sample_ids": sample_ids, "postings": postings}
+
+    def summary(self) -> dict[str, int]:
+        totals = {"sample_count": 0, "element_count": 0, "qa_count": 0}
+        for partial in self._fan_out(lambda store: store.summary()):
+            for key in totals:
+                totals[key] += partial[key]
+        return totals
+
+    def compress_payloads(self, *, retrain: bool = False) -> dict[str, Any]:
+        partials = self._fan_out(lambda store: store.compress_payloads(retrain=retrain))
+        return {
+            "codec": partials[0]["codec"] if partials else None,
+            "rewritten": sum(partial["rewritten"] for partial in partials),
+            "bytes_before": sum(partial["bytes_before"] for partial in partials),
+            "bytes_after": sum(partial["bytes_after"] for partial in partials),
+        }
+
+    def payload_storage_stats(self) -> dict[str, Any]:
+        shards = self.shards()
+        partials = dict(zip(shards, self._fan_out(lambda store: store.payload_storage_stats(), shards)))
+        return {
+            "stored_bytes": sum(partial["stored_bytes"] for partial in partials.values()),
+            "dictionary_bytes": sum(partial["dictionary_bytes"] for partial in partials.values()),
+            "shards": partials,
+        }
+
+    def vacuum(self) -> None:
+        self._fan_out(lambda store: store.vacuum())
+
+    def prune_geometry_blobs(self) -> int:
+        return sum(self._fan_out(lambda store: store.prune_geometry_blobs()))
+
+    def geometry_stats(self) -> dict[str, int]:
+        totals: dict[str, int] = {}
+        for partial in self._fan_out(lambda store: store.geometry_stats()):
+            for key, value in partial.items():
+                totals[key] = totals.get(key, 0) + value
+        return totals
+
+    def shard_summaries(self) -> dict[str, dict[str, int]]:
+        shards = self.shards()
+        return dict(zip(shards, self._fan_out(lambda store: store.summary(), shards)))
+
+    def _single(self, split: str) -> ArchCADIndexStore | None:
+        store = self.shard(split)
+        return store if store.db_path.exists() else None
+
+    def _store_for_sample(self, sample_id: str) -> ArchCADIndexStore | None:
+        shards = self.shards()
+        prefix = sample_id.split("/", 1)[0] if "/" in sample_id else UNSPLIT_SHARD
+        candidate = shards.get(shard_name(prefix))
+        if candidate is not None and candidate.has_sample(sample_id):
+            return candidate
+        for store in shards.values():
+            if store is not candidate and store.has_sample(sample_id):
+                return store
+        return None
+
+    def _fan_out(
+        self,
+        operation: Callable[[ArchCADIndexStore], T],
+        shards: dict[str, ArchCADIndexStore] | None = None,
+    ) -> list[T]:
+        stores = list((shards if shards is not None else self.shards()).values())
+        if len(stores) <= 1:
+            return [operation(store) for store in stores]
+        return list(self._pool(len(stores)).map(operation, stores))
+
+    def _pool(self, size: int) -> ThreadPoolExecutor:
+        """Return the fan-out pool, regrown when shards are added or after a fork."""
+        with self._executor_lock:
+            pid, workers = self._executor_key
+            if self._executor is None or pid != os.getpid() or workers < size:
+                if self._executor is not None and pid == os.getpid():
+                    self._executor.shutdown(wait=False)
+                self._executor = ThreadPoolExecutor(max_workers=size, thread_name_prefix="archcad-shard")
+                self._executor_key = (os.getpid(), size)
+            return self._executor
+
+    def _merge_pages(
+        self,
+        partials: list[dict[str, Any]],
+        offset: int,
+        limit: int,
+        *,
+        key: Callable[[dict[str, Any]], Any],
+    ) -> dict[str, Any]:
+        merged = heapq.merge(*(partial["items"] for partial in partials), key=key)
+        items = list(islice(merged, offset, offset + limit))
+        return {"items": items, "total": sum(partial["total"] for partial in partials)}
+
+
+def open_index_store(settings: Settings) -> ArchCADIndexStore | ArchCADShardedIndexStore:
+    """Return the configured monolithic or split-sharded index store."""
+    SLOW_QUERY_LOG.configure(
+        threshold_ms=settings.archcad_slow_query_ms,
+        top_n=settings.archcad_slow_query_top_n,
+    )
+    store_options = {
+        "payload_codec": settings.archcad_payload_codec,
+        "dict_size": settings.archcad_payload_dict_size,
+        "dict_samples": settings.archcad_payload_dict_samples,
+    }
+    if settings.archcad_shard_by_split:
+        return ArchCADShardedIndexStore(settings.archcad_shard_dir, **store_options)
+    return ArchCADIndexStore(settings.archcad_db_path, **store_options)
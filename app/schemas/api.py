@@ -4,6 +4,15 @@ from typing import Literal
 
 from pydantic import BaseModel, Field
 
+# Query bounds shared by the API routes and the services behind them; kept here
+# so the router can declare them without importing the (numpy-backed) services.
+DEFAULT_MASK_RESOLUTION = 512
+MASK_RESOLUTION_RANGE = (32, 4096)
+# Voxel cells along the longest axis for each level of detail. The last level
+# (``len(POINTCLOUD_LOD_GRID)``) serves the full cloud, quantized only.
+POINTCLOUD_LOD_GRID = (32, 128, 512, 2048)
+POINTCLOUD_MAX_LOD = len(POINTCLOUD_LOD_GRID)
+
 
 class ArchCADDownloadRequest(BaseModel):
     """Request body for dataset downloads."""
@@ -17,3 +26,7 @@ class ArchCADIndexRequest(BaseModel):
 
     force_reindex: bool = False
     limit: int | None = Field(default=None, ge=1)
+    generate_thumbnails: bool = False
+    split: str | None = None
+    profile_memory: bool = False
+    profile_slowest: int = Field(default=0, ge=0, le=50)
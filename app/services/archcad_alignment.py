@@ -0,0 +1,282 @@
+from __future__ import annotations
+
+import math
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Iterable
+
+import numpy as np
+
+from app.core.exceptions import ArchCADError, ArchCADNotFoundError
+from app.core.logging import get_logger
+from app.core.settings import Settings
+from app.models.sharded_index_store import open_index_store
+from app.services.archcad_masks import element_polylines
+from app.services.archcad_normalizer import ArchCADNormalizer
+from app.utils.disk_cache import cache_key
+from app.utils.file_refs import file_ref_fingerprint
+from app.utils.grid_hash import grid_candidates
+
+logger = get_logger(__name__)
+
+# Endpoint match radius as a fraction of the drawing diagonal.
+ALIGNMENT_TOLERANCE = 1e-3
+_ALIGNMENT_VERSION = 1
+
+
+def _arc_endpoints(element: dict[str, Any]) -> list[float] | None:
+    """Endpoints of a CIRCLE/ARC without flattening it, matching ``element_polylines``."""
+    geometry = element.get("geometry") or {}
+    center, radius = geometry.get("center"), geometry.get("radius")
+    if center is None or radius is None:
+        return None
+    if isinstance(center, dict):
+        if center.get("x") is None or center.get("y") is None:
+            return None
+        center_x, center_y = float(center["x"]), float(center["y"])
+    else:
+        center_x, center_y = float(center[0]), float(center[1])
+    radius = float(radius)
+    start, end = geometry.get("start_angle"), geometry.get("end_angle")
+    if str(element.get("type")).upper() == "ARC" and start is not None and end is not None:
+        if (float(end) - float(start)) % 360:
+            start, end = math.radians(float(start)), math.radians(float(end))
+            return [
+                center_x + radius * math.cos(start),
+                center_y + radius * math.sin(start),
+                center_x + radius * math.cos(end),
+                center_y + radius * math.sin(end),
+            ]
+    return [center_x - radius, center_y - radius, center_x + radius, center_y + radius]
+
+
+def primitive_endpoints(elements: Iterable[dict[str, Any]]) -> tuple[np.ndarray, np.ndarray]:
+    """Reduce elements to ``(N, 4)`` endpoint pairs and an ``(N,)`` semantic array.
+
+    Open chains contribute their first and last vertex; closed chains
+    (circles, rectangles, closed polylines) the corners of their bounding box,
+    so a primitive keys the same whichever vertex a modality starts it from.
+    Elements that cannot be flattened (SVG paths) are skipped; missing
+    semantics become ``""``.
+    """
+    endpoints: list[list[float]] = []
+    semantics: list[str] = []
+    for element in elements:
+        if str(element.get("type") or "").upper() in {"CIRCLE", "ARC"}:
+            pair = _arc_endpoints(element)
+        else:
+            chains = element_polylines(element)
+            pair = None
+            if chains:
+                chain = chains[0]
+                first, last = chain[0].tolist(), chain[-1].tolist()
+                pair = first + last if first != last else chain.min(axis=0).tolist() + chain.max(axis=0).tolist()
+        if pair is None:
+            continue
+        endpoints.append(pair)
+        semantics.append(element.get("semantic") or "")
+    if not endpoints:
+        return np.zeros((0, 4), dtype=np.float64), np.zeros(0, dtype=object)
+    return np.array(endpoints, dtype=np.float64), np.array(semantics, dtype=object)
+
+
+def match_endpoints(
+    json_endpoints: np.ndarray,
+    svg_endpoints: np.ndarray,
+    radius: float,
+) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Return ``(json index, svg index, error)`` for every primitive pair within ``radius``.
+
+    Both endpoints of every SVG primitive go into a spatial hash; each JSON
+    primitive probes it with its first endpoint and the candidates are
+    verified on both endpoints, in either orientation. The error is the
+    larger of the two endpoint distances.
+    """
+    empty = np.zeros(0, dtype=np.int64)
+    if not len(json_endpoints) or not len(svg_endpoints):
+        return empty, empty, np.zeros(0, dtype=np.float64)
+    points = np.vstack((svg_endpoints[:, :2], svg_endpoints[:, 2:]))
+    json_candidates, point_candidates = grid_candidates(json_endpoints[:, :2], points, radius)
+    if not len(json_candidates):
+        return empty, empty, np.zeros(0, dtype=np.float64)
+
+    svg_candidates = point_candidates % len(svg_endpoints)
+    pairs = np.unique(json_candidates * len(svg_endpoints) + svg_candidates)
+    json_index, svg_index = np.divmod(pairs, len(svg_endpoints))
+    left, right = json_endpoints[json_index], svg_endpoints[svg_index]
+    direct = np.maximum(
+        np.hypot(*(left[:, :2] - right[:, :2]).T),
+        np.hypot(*(left[:, 2:] - right[:, 2:]).T),
+    )
+    reversed_ = np.maximum(
+        np.hypot(*(left[:, :2] - right[:, 2:]).T),
+        np.hypot(*(left[:, 2:] - right[:, :2]).T),
+    )
+    errors = np.minimum(direct, reversed_)
+    within = errors <= radius
+    return json_index[within], svg_index[within], errors[within]
+
+
+def alignment_metrics(
+    json_elements: Iterable[dict[str, Any]],
+    svg_elements: Iterable[dict[str, Any]],
+    *,
+    tolerance: float = ALIGNMENT_TOLERANCE,
+) -> dict[str, Any]:
+    """Agreement between the JSON and SVG primitives of one sample.
+
+    ``score`` is the share of primitives, over both modalities, that have a
+    counterpart within the match radius (``tolerance`` times the drawing
+    diagonal, returned as ``radius`` in drawing units). ``semantic_agreed`` of ``semantic_pairs`` counts the labelled
+    JSON primitives whose nearest SVG match carries the same semantic.
+    """
+    json_endpoints, json_semantics = primitive_endpoints(json_elements)
+    svg_endpoints, svg_semantics = primitive_endpoints(svg_elements)
+    reference = json_endpoints if len(json_endpoints) else svg_endpoints
+    corners = reference.reshape(-1, 2)
+    diagonal = float(np.hypot(*(corners.max(axis=0) - corners.min(axis=0)))) if len(corners) else 0.0
+    radius = tolerance * diagonal or tolerance
+
+    json_index, svg_index, errors = match_endpoints(json_endpoints, svg_endpoints, radius)
+    # Nearest SVG match per JSON primitive: sort by (json index, error) and take each run's head.
+    order = np.lexsort((errors, json_index))
+    best_json, heads = np.unique(json_index[order], return_index=True)
+    best_svg, best_errors = svg_index[order][heads], errors[order][heads]
+    left, right = json_semantics[best_json], svg_semantics[best_svg]
+    labelled = (left != "") & (right != "")
+
+    primitives = len(json_endpoints) + len(svg_endpoints)
+    json_matched, svg_matched = len(best_json), len(np.unique(svg_index))
+    return {
+        "tolerance": tolerance,
+        "radius": radius,
+        "json_primitives": len(json_endpoints),
+        "svg_primitives": len(svg_endpoints),
+        "json_matched": json_matched,
+        "svg_matched": svg_matched,
+        "semantic_pairs": int(labelled.sum()),
+        "semantic_agreed": int((left[labelled] == right[labelled]).sum()),
+        "mean_error": float(best_errors.mean()) if len(best_errors) else None,
+        "score": (json_matched + svg_matched) / primitives if primitives else None,
+    }
+
+
+def alignment_fingerprint(target: dict[str, Any], tolerance: float) -> str:
+    return cache_key(
+        "alignment",
+        _ALIGNMENT_VERSION,
+        tolerance,
+        file_ref_fingerprint(target["json"]),
+        file_ref_fingerprint(target["svg"]),
+    )
+
+
+def element_dicts(elements: Iterable[Any]) -> list[dict[str, Any]]:
+    return [{"type": element.type, "semantic": element.semantic, "geometry": element.geometry} for element in elements]
+
+
+def _check_job(job: tuple[float, list[dict[str, Any]]]) -> dict[str, Any]:
+    tolerance, targets = job
+    normalizer = ArchCADNormalizer()
+    rows: list[dict[str, Any]] = []
+    failures: list[dict[str, str]] = []
+    for target in targets:
+        try:
+            metrics = alignment_metrics(
+                element_dicts(normalizer.parse_json_elements(target["json"])),
+                element_dicts(normalizer.parse_svg_elements(target["svg"])),
+                tolerance=tolerance,
+            )
+        except Exception as exc:
+            failures.append({"sample_id": target["sample_id"], "error": str(exc)})
+            continue
+        rows.append(
+            {
+                "sample_id": target["sample_id"],
+                "split": target["split"],
+                "fingerprint": target["fingerprint"],
+                **metrics,
+            }
+        )
+    return {"rows": rows, "failures": failures}
+
+
+class ArchCADAlignmentService:
+    """Check that the JSON and SVG modalities of each sample describe the same drawing.
+
+    The normalizer only reads SVG when JSON is empty, so nothing else compares
+    the two. Both are parsed, every element is reduced to an endpoint pair,
+    and pairs are matched through a spatial hash; the per-sample metrics live
+    in the index (``sample_alignment``) and back the ``min_alignment`` search
+    filter. Checks are keyed by the source files, so reruns skip samples
+    whose modalities have not changed.
+    """
+
+    def __init__(self, settings: Settings) -> None:
+        self.settings = settings
+        self.store = open_index_store(settings)
+
+    def get_alignment(self, sample_id: str) -> dict[str, Any]:
+        alignment = self.store.get_alignment(sample_id)
+        if alignment is None:
+            if not self.store.has_sample(sample_id):
+                raise ArchCADNotFoundError("Sample not found", context={"sample_id": sample_id})
+            raise ArchCADError(
+                "Sample has no alignment check; run the alignment job",
+                status_code=409,
+                context={"sample_id": sample_id},
+            )
+        return alignment
+
+    def check_samples(
+        self,
+        *,
+        sample_ids: list[str] | None = None,
+        split: str | None = None,
+        tolerance: float = ALIGNMENT_TOLERANCE,
+        workers: int | None = None,
+        chunk_size: int = 64,
+        force: bool = False,
+    ) -> dict[str, Any]:
+        """Check every sample with both modalities on a process pool and store the metrics."""
+        if not 0 < tolerance < 1:
+            raise ArchCADError("Invalid alignment tolerance", context={"tolerance": tolerance})
+        targets = self.store.alignment_targets(split=split)
+        if sample_ids is not None:
+            wanted = set(sample_ids)
+            targets = [target for target in targets if target["sample_id"] in wanted]
+        stale = []
+        for target in targets:
+            fingerprint = alignment_fingerprint(target, tolerance)
+            if force or target["fingerprint"] != fingerprint:
+                stale.append({**target, "fingerprint": fingerprint})
+
+        started = time.perf_counter()
+        jobs = [(tolerance, stale[start : start + chunk_size]) for start in range(0, len(stale), chunk_size)]
+        if workers == 1:
+            results = [_check_job(job) for job in jobs]
+        else:
+            with ProcessPoolExecutor(max_workers=workers or os.cpu_count() or 1) as executor:
+                results = list(executor.map(_check_job, jobs))
+        rows = [row for result in results for row in result["rows"]]
+        self.store.upsert_alignment(rows)
+        elapsed = time.perf_counter() - started
+
+        failures = [failure for result in results for failure in result["failures"]]
+        if failures:
+            logger.warning(
+                "ArchCAD alignment check skipped samples",
+                extra={"context": {"failed": len(failures), "first_failure": failures[0]}},
+            )
+        scores = [row["score"] for row in rows if row["score"] is not None]
+        return {
+            "tolerance": tolerance,
+            "target_count": len(targets),
+            "checked_count": len(rows),
+            "up_to_date_count": len(targets) - len(stale),
+            "failed_samples": len(failures),
+            "failures": failures[:100],
+            "mean_score": round(sum(scores) / len(scores), 4) if scores else None,
+            "seconds": round(elapsed, 2),
+        }
@@ -0,0 +1,248 @@
+from __future__ import annotations
+
+import json
+import os
+import pickle
+import queue
+import random
+import struct
+import threading
+from pathlib import Path
+from typing import Any, Iterable, Iterator
+
+import numpy as np
+
+from app.core.exceptions import ArchCADError
+from app.core.logging import get_logger
+from app.core.settings import Settings
+from app.utils.disk_cache import cache_key
+from app.utils.file_refs import read_json_if_exists, write_json
+
+logger = get_logger(__name__)
+
+_RECORD_HEADER = struct.Struct("<I")
+_CACHE_VERSION = 1
+_END_OF_STREAM = object()
+
+
+def _normalize_fields(fields: Iterable[str] | None) -> tuple[str, ...] | None:
+    """Sorted, deduplicated field names, so the cache key and header ignore caller order."""
+    return tuple(sorted(set(fields))) if fields else None
+
+
+def _worker_info() -> tuple[int, int]:
+    """Return ``(worker_id, num_workers)`` from a PyTorch DataLoader worker, if any."""
+    try:
+        from torch.utils.data import get_worker_info
+    except ImportError:
+        return 0, 1
+    info = get_worker_info()
+    if info is None:
+        return 0, 1
+    return info.id, info.num_workers
+
+
+class ArchCADIterableDataset:
+    """Stream normalized ArchCAD samples for training jobs.
+
+    Records come from ``normalized_samples.jsonl`` or, once :meth:`build_cache`
+    has run, from a binary cache of pre-projected pickled records with an offset
+    index. Records are sharded deterministically across hosts (``rank`` /
+    ``world_size``) and DataLoader workers before an optional bounded shuffle
+    buffer, and can be prefetched on a background thread.
+    """
+
+    def __init__(
+        self,
+        jsonl_path: Path,
+        *,
+        fields: Iterable[str] | None = None,
+        shuffle_buffer: int = 0,
+        seed: int = 0,
+        rank: int = 0,
+        world_size: int = 1,
+        worker_id: int | None = None,
+        num_workers: int | None = None,
+        prefetch: int = 0,
+        cache_path: Path | None = None,
+    ) -> None:
+        if world_size < 1 or not 0 <= rank < world_size:
+            raise ArchCADError("Invalid distributed rank", context={"rank": rank, "world_size": world_size})
+        self.jsonl_path = jsonl_path
+        self.fields = _normalize_fields(fields)
+        self.shuffle_buffer = shuffle_buffer
+        self.seed = seed
+        self.rank = rank
+        self.world_size = world_size
+        self.worker_id = worker_id
+        self.num_workers = num_workers
+        self.prefetch = prefetch
+        self.cache_path = cache_path
+        self.epoch = 0
+
+    @classmethod
+    def from_settings(cls, settings: Settings, **kwargs: Any) -> "ArchCADIterableDataset":
+        fields = _normalize_fields(kwargs.get("fields")) or ("*",)
+        kwargs.setdefault(
+            "cache_path",
+            settings.archcad_cache_dir / "dataset" / f"samples-{cache_key(*fields)[:16]}.bin",
+        )
+        return cls(settings.archcad_jsonl_path, **kwargs)
+
+    def set_epoch(self, epoch: int) -> None:
+        """Reseed the shuffle buffer for a new epoch."""
+        self.epoch = epoch
+
+    def __iter__(self) -> Iterator[dict[str, Any]]:
+        records = self._shuffled(self._sharded_records())
+        if self.prefetch > 0:
+            return self._prefetched(records)
+        return records
+
+    def cache_valid(self) -> bool:
+        if self.cache_path is None or not self.cache_path.exists() or not self.jsonl_path.exists():
+            return False
+        header = read_json_if_exists(self._cache_header_path())
+        return bool(
+            header
+            and header.get("version") == _CACHE_VERSION
+            and header.get("source") == self._source_fingerprint()
+            and header.get("fields") == (list(self.fields) if self.fields else None)
+        )
+
+    def build_cache(self) -> dict[str, Any]:
+        """Persist projected records as length-prefixed pickles plus an offset index."""
+        if self.cache_path is None:
+            raise ArchCADError("No cache_path configured for the ArchCAD dataset")
+        self.cache_path.parent.mkdir(parents=True, exist_ok=True)
+        temp_path = self.cache_path.with_name(f"{self.cache_path.name}.tmp")
+        offsets: list[int] = []
+        position = 0
+        with temp_path.open("wb") as handle:
+            for line in self._jsonl_lines():
+                payload = pickle.dumps(self._project(json.loads(line)), protocol=pickle.HIGHEST_PROTOCOL)
+                offsets.append(position)
+                handle.write(_RECORD_HEADER.pack(len(payload)))
+                handle.write(payload)
+                position += _RECORD_HEADER.size + len(payload)
+        os.replace(temp_path, self.cache_path)
+        np.save(self._cache_index_path(), np.asarray(offsets, dtype=np.int64))
+        write_json(
+            self._cache_header_path(),
+            {
+                "version": _CACHE_VERSION,
+                "source": self._source_fingerprint(),
+                "fields": list(self.fields) if self.fields else None,
+                "record_count": len(offsets),
+                "byte_size": position,
+            },
+        )
+        logger.info(
+            "ArchCAD dataset cache built",
+            extra={"context": {"cache_path": str(self.cache_path), "record_count": len(offsets)}},
+        )
+        return {"cache_path": str(self.cache_path), "record_count": len(offsets), "byte_size": position}
+
+    def _sharded_records(self) -> Iterator[dict[str, Any]]:
+        worker_id, num_workers = self._resolve_worker()
+        total_shards = self.world_size * num_workers
+        shard_index = self.rank * num_workers + worker_id
+
+        if self.cache_valid():
+            offsets = np.load(self._cache_index_path(), mmap_mode="r")
+            with self.cache_path.open("rb") as handle:
+                for offset in offsets[shard_index::total_shards]:
+                    handle.seek(int(offset))
+                    (length,) = _RECORD_HEADER.unpack(handle.read(_RECORD_HEADER.size))
+                    yield pickle.loads(handle.read(length))
+            return
+
+        for position, line in enumerate(self._jsonl_lines()):
+            # Skip other shards' lines before paying for JSON parsing.
+            if position % total_shards == shard_index:
+                yield self._project(json.loads(line))
+
+    def _shuffled(self, records: Iterator[dict[str, Any]]) -> Iterator[dict[str, Any]]:
+        if self.shuffle_buffer <= 1:
+            yield from records
+            return
+        worker_id, _ = self._resolve_worker()
+        rng = random.Random(f"{self.seed}:{self.epoch}:{self.rank}:{worker_id}")
+        buffer: list[dict[str, Any]] = []
+        for record in records:
+            if len(buffer) < self.shuffle_buffer:
+                buffer.append(record)
+                continue
+            index = rng.randrange(len(buffer))
+            yield buffer[index]
+            buffer[index] = record
+        rng.shuffle(buffer)
+        yield from buffer
+
+    def _prefetched(self, records: Iterator[dict[str, Any]]) -> Iterator[dict[str, Any]]:
+        buffer: queue.Queue[Any] = queue.Queue(maxsize=self.prefetch)
+        stop = threading.Event()
+
+        def put(item: Any) -> bool:
+            while not stop.is_set():
+                try:
+                    buffer.put(item, timeout=0.1)
+                    return True
+                except queue.Full:
+                    continue
+            return False
+
+        def produce() -> None:
+            try:
+                for record in records:
+                    if not put(record):
+                        return
+                put(_END_OF_STREAM)
+            except BaseException as exc:
+                put(exc)
+
+        producer = threading.Thread(target=produce, name="archcad-dataset-prefetch", daemon=True)
+        producer.start()
+        try:
+            while True:
+                item = buffer.get()
+                if item is _END_OF_STREAM:
+                    return
+                if isinstance(item, BaseException):
+                    raise item
+                yield item
+        finally:
+            stop.set()
+            producer.join(timeout=1)
+
+    def _project(self, record: dict[str, Any]) -> dict[str, Any]:
+        if not self.fields:
+            return record
+        return {field: record.get(field) for field in self.fields}
+
+    def _jsonl_lines(self) -> Iterator[str]:
+        if not self.jsonl_path.exists():
+            raise ArchCADError(
+                "Normalized ArchCAD samples are not available; build the index first",
+                status_code=409,
+                context={"jsonl_path": str(self.jsonl_path)},
+            )
+        with self.jsonl_path.open("r", encoding="utf-8") as handle:
+            for line in handle:
+                if line.strip():
+                    yield line
+
+    def _resolve_worker(self) -> tuple[int, int]:
+        if self.worker_id is not None and self.num_workers is not None:
+            return self.worker_id, self.num_workers
+        return _worker_info()
+
+    def _source_fingerprint(self) -> str:
+        stat = self.jsonl_path.stat()
+        return f"{self.jsonl_path.resolve()}:{stat.st_size}:{stat.st_mtime_ns}"
+
+    def _cache_index_path(self) -> Path:
+        return self.cache_path.with_suffix(".idx.npy")
+
+    def _cache_header_path(self) -> Path:
+        return self.cache_path.with_suffix(".json")
@@ -0,0 +1,178 @@
+from __future__ import annotations
+
+import time
+from typing import Any, Iterable
+
+import numpy as np
+
+from app.core.exceptions import ArchCADNotFoundError
+from app.core.logging import get_logger
+from app.core.settings import Settings
+from app.models.sharded_index_store import open_index_store
+from app.services.archcad_alignment import primitive_endpoints
+from app.utils.minhash import MINHASH_PERMUTATIONS, combine_columns, lsh_candidate_pairs, minhash_signature, string_hash
+from app.utils.planar_graph import connected_labels
+
+logger = get_logger(__name__)
+
+# Estimated Jaccard similarity at which two samples count as near-duplicates.
+DUPLICATE_THRESHOLD = 0.8
+# Shingles quantize offsets to a power-of-two grid near this fraction of the drawing diagonal;
+# rounding the step to a power of two keeps it stable when a few elements come or go.
+SHINGLE_STEPS = 256
+_SHAPE_SHINGLE, _NEIGHBOUR_SHINGLE, _LABEL_SHINGLE = 1, 2, 3
+
+
+def sample_shingles(elements: Iterable[dict[str, Any]]) -> np.ndarray:
+    """Shingle set of one sample, unchanged when the whole plan is moved.
+
+    Every element (reduced to an endpoint pair) contributes its label with its
+    quantized shape, and its label pair and quantized offset to the next
+    element in ``(x, y)`` order; every label contributes one shingle per
+    occurrence, so label counts weigh in too. Dropping or editing an element
+    only changes the few shingles that involve it.
+    """
+    endpoints, semantics = primitive_endpoints(elements)
+    if not len(endpoints):
+        return np.zeros(0, dtype=np.uint64)
+    points = endpoints.reshape(-1, 2)
+    diagonal = float(np.hypot(*(points.max(axis=0) - points.min(axis=0))))
+    step = 2.0 ** np.ceil(np.log2(max(diagonal, 1e-9) / SHINGLE_STEPS))
+    # Orient each pair from its lexicographically smaller endpoint.
+    start_x, start_y, end_x, end_y = endpoints.T
+    swap = (start_x > end_x) | ((start_x == end_x) & (start_y > end_y))
+    endpoints[swap] = endpoints[swap][:, [2, 3, 0, 1]]
+    starts = endpoints[:, :2]
+
+    label_hashes = {label: string_hash(label) for label in set(semantics.tolist())}
+    labels = np.fromiter((label_hashes[label] for label in semantics), dtype=np.int64, count=len(semantics))
+    shapes = np.round((endpoints[:, 2:] - starts) / step).astype(np.int64)
+    order = np.lexsort((starts[:, 1], starts[:, 0]))
+    offsets = np.round((starts[order[1:]] - starts[order[:-1]]) / step).astype(np.int64)
+    _, first, counts = np.unique(labels, return_index=True, return_counts=True)
+    label_order = np.argsort(labels, kind="stable")
+    occurrence = np.arange(len(labels)) - np.repeat(np.cumsum(counts) - counts, counts)
+
+    return np.concatenate(
+        (
+            combine_columns(np.column_stack((np.full(len(labels), _SHAPE_SHINGLE), labels, shapes))),
+            combine_columns(
+                np.column_stack(
+                    (np.full(len(offsets), _NEIGHBOUR_SHINGLE), labels[order[:-1]], labels[order[1:]], offsets)
+                )
+            ),
+            combine_columns(
+                np.column_stack((np.full(len(labels), _LABEL_SHINGLE), labels[label_order], occurrence))
+            ),
+        )
+    )
+
+
+def sample_signature(elements: Iterable[dict[str, Any]]) -> bytes | None:
+    """Packed MinHash signature of a sample, ``None`` when it has no usable geometry."""
+    signature = minhash_signature(sample_shingles(elements))
+    return signature.tobytes() if signature is not None else None
+
+
+class ArchCADDuplicateService:
+    """Cluster near-duplicate samples from their MinHash signatures.
+
+    The indexer stores one signature per sample (``sample_minhash``). LSH
+    banding turns them into candidate pairs without comparing every pair,
+    candidates above ``DUPLICATE_THRESHOLD`` estimated similarity are joined
+    transitively, and the clusters replace ``duplicate_clusters``. Each
+    cluster's smallest sample id is its representative: the one sample of the
+    cluster that ``exclude_duplicates`` keeps.
+    """
+
+    def __init__(self, settings: Settings) -> None:
+        self.settings = settings
+        self.store = open_index_store(settings)
+
+    def detect(self, *, threshold: float = DUPLICATE_THRESHOLD) -> dict[str, Any]:
+        started = time.perf_counter()
+        stored = self.store.minhash_signatures()
+        signatures = np.frombuffer(b"".join(row["signature"] for row in stored), dtype=np.uint32).reshape(
+            len(stored), MINHASH_PERMUTATIONS
+        )
+        left, right = lsh_candidate_pairs(signatures)
+        similarity = (signatures[left] == signatures[right]).mean(axis=1) if len(left) else np.zeros(0)
+        similar = similarity >= threshold
+        labels = connected_labels(len(stored), left[similar], right[similar])
+
+        # A component's label is its smallest index, and stored rows are ordered by
+        # sample id, so each label is also the cluster's representative.
+        sizes = np.bincount(labels, minlength=len(stored))
+        clustered = np.flatnonzero(sizes[labels] > 1)
+        clustered = clustered[np.argsort(labels[clustered], kind="stable")]
+        rows: list[dict[str, Any]] = []
+        cluster_splits: dict[int, set[str | None]] = {}
+        for member, head in zip(clustered.tolist(), labels[clustered].tolist()):
+            cluster_splits.setdefault(head, set()).add(stored[member]["split"])
+            rows.append(
+                {
+                    "sample_id": stored[member]["sample_id"],
+                    "split": stored[member]["split"],
+                    "cluster_id": stored[head]["sample_id"],
+                    "cluster_size": int(sizes[head]),
+                    "similarity": round(float((signatures[member] == signatures[head]).mean()), 4),
+                    "representative": int(member == head),
+                }
+            )
+        cross_split = sum(len(splits) > 1 for splits in cluster_splits.values())
+        self.store.replace_duplicate_clusters(rows)
+        clusters = len(cluster_splits)
+        if cross_split:
+            logger.warning(
+                "ArchCAD near-duplicates span splits",
+                extra={"context": {"clusters": cross_split}},
+            )
+        return {
+            "threshold": threshold,
+            "signatures": len(stored),
+            "candidate_pairs": len(left),
+            "similar_pairs": int(similar.sum()),
+            "clusters": clusters,
+            "duplicate_samples": len(rows) - clusters,
+            "cross_split_clusters": cross_split,
+            "seconds": round(time.perf_counter() - started, 3),
+        }
+
+    def list_clusters(self, *, offset: int, limit: int, cross_split: bool = False) -> dict[str, Any]:
+        clusters = self._group(self.store.duplicate_rows())
+        if cross_split:
+            clusters = [cluster for cluster in clusters if len(cluster["splits"]) > 1]
+        return {
+            "items": clusters[offset : offset + limit],
+            "pagination": {"offset": offset, "limit": limit, "total": len(clusters)},
+            "filters": {"cross_split": cross_split},
+        }
+
+    def get_sample_duplicates(self, sample_id: str) -> dict[str, Any]:
+        if not self.store.get_sample(sample_id):
+            raise ArchCADNotFoundError("Sample not found", context={"sample_id": sample_id})
+        membership = self.store.get_duplicate(sample_id)
+        if membership is None:
+            return {"sample_id": sample_id, "cluster": None}
+        clusters = self._group(self.store.duplicate_rows(membership["cluster_id"]))
+        return {"sample_id": sample_id, "cluster": clusters[0] if clusters else None}
+
+    @staticmethod
+    def _group(rows: list[dict[str, Any]]) -> list[dict[str, Any]]:
+        clusters: dict[str, dict[str, Any]] = {}
+        for row in rows:
+            cluster = clusters.setdefault(
+                row["cluster_id"],
+                {"cluster_id": row["cluster_id"], "size": row["cluster_size"], "splits": [], "members": []},
+            )
+            if row["split"] not in cluster["splits"]:
+                cluster["splits"].append(row["split"])
+            cluster["members"].append(
+                {
+                    "sample_id": row["sample_id"],
+                    "split": row["split"],
+                    "similarity": row["similarity"],
+                    "representative": row["representative"],
+                }
+            )
+        return list(clusters.values())
@@ -0,0 +1,282 @@
+from __future__ import annotations
+
+import io
+import os
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+
+from app.core.exceptions import ArchCADError, ArchCADNotFoundError
+from app.core.logging import get_logger
+from app.core.settings import Settings
+from app.models.sharded_index_store import open_index_store
+from app.services.archcad_images import require_pillow
+from app.utils.file_refs import file_ref_fingerprint, read_bytes, read_json_if_exists, write_json
+
+logger = get_logger(__name__)
+
+TENSOR_CHANNELS = 3
+# Drawings are black on white; letterbox padding and alpha are flattened onto white.
+TENSOR_FILL = 255
+_TENSOR_VERSION = 1
+
+
+def decode_image(source: bytes, size: int) -> tuple[np.ndarray, int, int]:
+    """Decode, flatten and letterbox one image into a ``(size, size, 3)`` uint8 array."""
+    image_module = require_pillow()
+    with image_module.open(io.BytesIO(source)) as opened:
+        opened.load()
+        width, height = opened.size
+        if "A" in opened.getbands() or opened.mode == "P":
+            rgba = opened.convert("RGBA")
+            image = image_module.new("RGB", rgba.size, (TENSOR_FILL,) * TENSOR_CHANNELS)
+            image.paste(rgba, mask=rgba.getchannel("A"))
+        else:
+            image = opened.convert("RGB")
+
+    scale = size / max(width, height)
+    resized = image.resize(
+        (max(1, round(width * scale)), max(1, round(height * scale))),
+        image_module.Resampling.BILINEAR,
+    )
+    canvas = np.full((size, size, TENSOR_CHANNELS), TENSOR_FILL, dtype=np.uint8)
+    pad_x = (size - resized.width) // 2
+    pad_y = (size - resized.height) // 2
+    canvas[pad_y : pad_y + resized.height, pad_x : pad_x + resized.width] = np.asarray(resized, dtype=np.uint8)
+    return canvas, width, height
+
+
+def _decode_job(job: tuple[str, int, int, list[tuple[int, str]]]) -> dict[str, Any]:
+    data_path, row_count, size, items = job
+    # Each worker maps the preallocated file and writes its rows in place.
+    tensors = np.memmap(data_path, dtype=np.uint8, mode="r+", shape=(row_count, size, size, TENSOR_CHANNELS))
+    decoded: list[dict[str, Any]] = []
+    failures: list[dict[str, str]] = []
+    for row_index, file_ref in items:
+        try:
+            tensors[row_index], width, height = decode_image(read_bytes(file_ref), size)
+            decoded.append(
+                {
+                    "row_index": row_index,
+                    "fingerprint": file_ref_fingerprint(file_ref),
+                    "width": width,
+                    "height": height,
+                }
+            )
+        except Exception as exc:
+            tensors[row_index] = TENSOR_FILL
+            failures.append(
+                {
+                    "row_index": row_index,
+                    "file_ref": file_ref,
+                    "fingerprint": _fingerprint(file_ref),
+                    "error": str(exc),
+                }
+            )
+    tensors.flush()
+    return {"decoded": decoded, "failures": failures}
+
+
+def _fingerprint(file_ref: str) -> str | None:
+    """Source fingerprint, or ``None`` when the source itself cannot be found."""
+    try:
+        return file_ref_fingerprint(file_ref)
+    except Exception:
+        return None
+
+
+class ArchCADImageTensorCache:
+    """Pre-decoded, fixed-stride uint8 image tensors for training loaders.
+
+    Images are decoded once, letterboxed to ``size x size`` RGB and written row
+    by row into ``images-<size>.u8``; row ``i`` starts at byte ``i * stride``.
+    The ``sample_id -> row`` mapping lives in the index's ``image_rows`` table,
+    so loaders memory-map the file and slice rows without decoding or copying.
+    Images that fail to decode are recorded in the header with their source
+    fingerprint, so an unchanged dataset is not redecoded on every build.
+    """
+
+    def __init__(self, settings: Settings, *, size: int | None = None) -> None:
+        self.settings = settings
+        self.size = size or settings.archcad_image_tensor_size
+        self.store = open_index_store(settings)
+        self._tensors: np.ndarray | None = None
+        self._rows: dict[str, dict[str, Any]] | None = None
+
+    @property
+    def data_path(self) -> Path:
+        return self.settings.archcad_image_tensor_dir / f"images-{self.size}.u8"
+
+    @property
+    def header_path(self) -> Path:
+        return self.data_path.with_suffix(".json")
+
+    @property
+    def stride(self) -> int:
+        return self.size * self.size * TENSOR_CHANNELS
+
+    def build(self, *, split: str | None = None, workers: int | None = None, force: bool = False) -> dict[str, Any]:
+        refs = self.store.image_refs(split=split)
+        if not refs:
+            raise ArchCADError(
+                "No indexed samples have an image modality",
+                status_code=409,
+                context={"split": split},
+            )
+        if not force and self._up_to_date(refs):
+            return {**self._summary(), "rebuilt": False}
+
+        self.data_path.parent.mkdir(parents=True, exist_ok=True)
+        temp_path = self.data_path.with_name(f"{self.data_path.name}.tmp")
+        row_count = len(refs)
+        with temp_path.open("wb") as handle:
+            handle.truncate(row_count * self.stride)
+
+        worker_count = workers or os.cpu_count() or 1
+        chunk_size = max(1, min(256, -(-row_count // worker_count)))
+        jobs = [
+            (
+                str(temp_path),
+                row_count,
+                self.size,
+                [(row_index, refs[row_index]["file_ref"]) for row_index in range(start, min(start + chunk_size, row_count))],
+            )
+            for start in range(0, row_count, chunk_size)
+        ]
+        try:
+            with ProcessPoolExecutor(max_workers=worker_count) as executor:
+                results = list(executor.map(_decode_job, jobs))
+            os.replace(temp_path, self.data_path)
+        finally:
+            temp_path.unlink(missing_ok=True)
+
+        failures = [
+            {
+                "sample_id": refs[failure["row_index"]]["sample_id"],
+                "file_ref": failure["file_ref"],
+                "fingerprint": failure["fingerprint"],
+                "error": failure["error"],
+            }
+            for result in results
+            for failure in result["failures"]
+        ]
+        rows = []
+        for result in results:
+            for decoded in result["decoded"]:
+                ref = refs[decoded["row_index"]]
+                rows.append(
+                    {
+                        **decoded,
+                        "sample_id": ref["sample_id"],
+                        "split": ref["split"],
+                        "byte_offset": decoded["row_index"] * self.stride,
+                    }
+                )
+        self.store.replace_image_rows(self.size, rows)
+        write_json(
+            self.header_path,
+            {
+                "version": _TENSOR_VERSION,
+                "size": self.size,
+                "channels": TENSOR_CHANNELS,
+                "dtype": "uint8",
+                "row_count": row_count,
+                "stride": self.stride,
+                "split": split,
+                "generated_at": datetime.now(timezone.utc).isoformat(),
+                "failures": [
+                    {"sample_id": failure["sample_id"], "fingerprint": failure["fingerprint"]} for failure in failures
+                ],
+            },
+        )
+        self._tensors = None
+        self._rows = None
+
+        if failures:
+            logger.warning(
+                "ArchCAD image tensor cache skipped images",
+                extra={"context": {"failed": len(failures), "first_failure": failures[0]}},
+            )
+        return {**self._summary(), "rebuilt": True, "failed_images": len(failures), "failures": failures[:100]}
+
+    def tensors(self) -> np.ndarray:
+        """Read-only ``(rows, size, size, 3)`` memory map over the tensor file."""
+        if self._tensors is None:
+            header = read_json_if_exists(self.header_path)
+            if not header or header.get("version") != _TENSOR_VERSION or not self.data_path.exists():
+                raise ArchCADError(
+                    "Decoded image tensors are not available; run the image tensor build first",
+                    status_code=409,
+                    context={"data_path": str(self.data_path)},
+                )
+            self._tensors = np.memmap(
+                self.data_path,
+                dtype=np.uint8,
+                mode="r",
+                shape=(header["row_count"], self.size, self.size, TENSOR_CHANNELS),
+            )
+        return self._tensors
+
+    def rows(self) -> dict[str, dict[str, Any]]:
+        if self._rows is None:
+            self._rows = self.store.image_rows(self.size)
+        return self._rows
+
+    def get(self, sample_id: str) -> np.ndarray:
+        """Zero-copy ``(size, size, 3)`` view of one sample's decoded image."""
+        tensors = self.tensors()
+        row = self.rows().get(sample_id)
+        if row is None:
+            raise ArchCADNotFoundError(
+                "Sample has no decoded image tensor",
+                context={"sample_id": sample_id, "size": self.size},
+            )
+        return tensors[row["row_index"]]
+
+    def batch(self, sample_ids: list[str]) -> np.ndarray:
+        """Gather rows for a batch; sorted row order keeps reads sequential."""
+        tensors = self.tensors()
+        rows = self.rows()
+        missing = [sample_id for sample_id in sample_ids if sample_id not in rows]
+        if missing:
+            raise ArchCADNotFoundError(
+                "Samples have no decoded image tensor",
+                context={"sample_ids": missing[:20], "size": self.size},
+            )
+        indices = np.fromiter((rows[sample_id]["row_index"] for sample_id in sample_ids), dtype=np.int64)
+        order = np.argsort(indices, kind="stable")
+        batch = np.empty((len(indices), self.size, self.size, TENSOR_CHANNELS), dtype=np.uint8)
+        batch[order] = tensors[indices[order]]
+        return batch
+
+    def _up_to_date(self, refs: list[dict[str, Any]]) -> bool:
+        header = read_json_if_exists(self.header_path)
+        if not self.data_path.exists() or header is None:
+            return False
+        rows = self.store.image_rows(self.size)
+        failed = {failure["sample_id"]: failure["fingerprint"] for failure in header.get("failures", [])}
+        if len(rows) + len(failed) != len(refs):
+            return False
+        for ref in refs:
+            sample_id = ref["sample_id"]
+            if sample_id in rows:
+                expected = rows[sample_id]["fingerprint"]
+            elif sample_id in failed:
+                expected = failed[sample_id]
+            else:
+                return False
+            if expected != _fingerprint(ref["file_ref"]):
+                return False
+        return True
+
+    def _summary(self) -> dict[str, Any]:
+        return {
+            "data_path": str(self.data_path),
+            "size": self.size,
+            "row_count": int(self.data_path.stat().st_size // self.stride),
+            "stride": self.stride,
+            "byte_size": self.data_path.stat().st_size,
+        }
@@ -0,0 +1,182 @@
+from __future__ import annotations
+
+import io
+import os
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Any, Iterable
+
+from app.core.exceptions import ArchCADError, ArchCADNotFoundError
+from app.core.logging import get_logger
+from app.core.settings import Settings
+from app.models.sharded_index_store import open_index_store
+from app.utils.disk_cache import cache_key, shared_disk_cache
+from app.utils.file_refs import file_ref_fingerprint, read_bytes
+
+logger = get_logger(__name__)
+
+THUMBNAIL_SIZES = (128, 512, 2048)
+THUMBNAIL_FORMATS = {"webp": "image/webp", "png": "image/png"}
+
+
+def require_pillow() -> Any:
+    try:
+        from PIL import Image
+    except ImportError as exc:
+        raise ArchCADError(
+            "Pillow is not installed. Install requirements.txt to render image thumbnails.",
+            status_code=501,
+        ) from exc
+    return Image
+
+
+def thumbnail_key(fingerprint: str, size: int, fmt: str) -> str:
+    return cache_key("image", fingerprint, size, fmt)
+
+
+def render_thumbnails(source: bytes, sizes: Iterable[int], fmt: str) -> dict[int, bytes]:
+    """Render thumbnails largest-first so each level is resized from the previous one."""
+    image_module = require_pillow()
+    with image_module.open(io.BytesIO(source)) as opened:
+        opened.load()
+        image = opened.convert("RGBA" if "A" in opened.getbands() or opened.mode == "P" else "RGB")
+
+    rendered: dict[int, bytes] = {}
+    for size in sorted(set(sizes), reverse=True):
+        if max(image.size) > size:
+            image = image.copy()
+            image.thumbnail((size, size), image_module.Resampling.LANCZOS)
+        buffer = io.BytesIO()
+        if fmt == "webp":
+            image.save(buffer, format="WEBP", quality=85, method=4)
+        else:
+            image.save(buffer, format="PNG", optimize=True)
+        rendered[size] = buffer.getvalue()
+    return rendered
+
+
+def _pregenerate_job(job: tuple[str, str, int, list[int], str]) -> dict[str, Any]:
+    cache_root, file_ref, max_bytes, sizes, fmt = job
+    cache = shared_disk_cache(Path(cache_root), max_bytes=max_bytes)
+    try:
+        fingerprint = file_ref_fingerprint(file_ref)
+        missing = [
+            size
+            for size in sizes
+            if not cache.path_for(thumbnail_key(fingerprint, size, fmt), f".{fmt}").exists()
+        ]
+        if not missing:
+            return {"file_ref": file_ref, "generated": 0, "skipped": len(sizes)}
+        for size, payload in render_thumbnails(read_bytes(file_ref), missing, fmt).items():
+            cache.put(thumbnail_key(fingerprint, size, fmt), payload, f".{fmt}")
+        return {"file_ref": file_ref, "generated": len(missing), "skipped": len(sizes) - len(missing)}
+    except Exception as exc:
+        return {"file_ref": file_ref, "error": str(exc)}
+
+
+class ArchCADImageService:
+    """Lazily render and cache multi-resolution thumbnails for the image modality."""
+
+    def __init__(self, settings: Settings) -> None:
+        self.settings = settings
+        self.store = open_index_store(settings)
+        self.cache = shared_disk_cache(
+            settings.archcad_image_cache_dir,
+            max_bytes=settings.archcad_image_cache_max_mb * 1024 * 1024,
+        )
+
+    def get_thumbnail(
+        self,
+        sample_id: str,
+        *,
+        size: int,
+        fmt: str = "webp",
+        if_none_match: str | None = None,
+    ) -> dict[str, Any]:
+        """Return a cached thumbnail; ``payload`` is ``None`` when ``if_none_match`` still matches."""
+        self._validate(size, fmt)
+        file_ref = self._image_ref(sample_id)
+        key = thumbnail_key(file_ref_fingerprint(file_ref), size, fmt)
+        etag = f'"{key[:32]}"'
+        result: dict[str, Any] = {
+            "sample_id": sample_id,
+            "size": size,
+            "format": fmt,
+            "media_type": THUMBNAIL_FORMATS[fmt],
+            "etag": etag,
+            "payload": None,
+        }
+        if if_none_match and etag in {tag.strip() for tag in if_none_match.split(",")}:
+            return result
+
+        payload = self.cache.get(key, f".{fmt}")
+        if payload is None:
+            payload = render_thumbnails(read_bytes(file_ref), [size], fmt)[size]
+            self.cache.put(key, payload, f".{fmt}")
+        result["payload"] = payload
+        return result
+
+    def pregenerate(
+        self,
+        file_refs: Iterable[str],
+        *,
+        sizes: Iterable[int] = THUMBNAIL_SIZES,
+        fmt: str = "webp",
+        workers: int | None = None,
+    ) -> dict[str, Any]:
+        size_list = sorted(set(sizes))
+        for size in size_list:
+            self._validate(size, fmt)
+        require_pillow()
+
+        jobs = [
+            (str(self.cache.root), file_ref, self.cache.max_bytes, size_list, fmt)
+            for file_ref in file_refs
+        ]
+        generated = 0
+        skipped = 0
+        failures: list[dict[str, str]] = []
+        if jobs:
+            with ProcessPoolExecutor(max_workers=workers or os.cpu_count() or 1) as executor:
+                for result in executor.map(_pregenerate_job, jobs, chunksize=16):
+                    if "error" in result:
+                        failures.append(result)
+                        continue
+                    generated += result["generated"]
+                    skipped += result["skipped"]
+
+        if failures:
+            logger.warning(
+                "ArchCAD thumbnail pre-generation had failures",
+                extra={"context": {"failed": len(failures), "first_failure": failures[0]}},
+            )
+        return {
+            "images": len(jobs),
+            "sizes": size_list,
+            "format": fmt,
+            "generated": generated,
+            "skipped": skipped,
+            "failed": len(failures),
+            "failures": failures[:100],
+        }
+
+    def _image_ref(self, sample_id: str) -> str:
+        sample = self.store.get_sample(sample_id)
+        if not sample:
+            raise ArchCADNotFoundError("Sample not found", context={"sample_id": sample_id})
+        file_ref = (sample.get("modalities") or {}).get("image")
+        if not file_ref:
+            raise ArchCADNotFoundError("Sample has no image modality", context={"sample_id": sample_id})
+        return file_ref
+
+    def _validate(self, size: int, fmt: str) -> None:
+        if size not in THUMBNAIL_SIZES:
+            raise ArchCADError(
+                "Invalid thumbnail size",
+                context={"size": size, "allowed": list(THUMBNAIL_SIZES)},
+            )
+        if fmt not in THUMBNAIL_FORMATS:
+            raise ArchCADError(
+                "Invalid thumbnail format",
+                context={"format": fmt, "allowed": sorted(THUMBNAIL_FORMATS)},
+            )
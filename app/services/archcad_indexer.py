@@ -1,17 +1,26 @@
 from __future__ import annotations
 
-from collections import Counter, defaultdict
+import json
+import os
+import time
 from datetime import datetime, timezone
-from typing import Any
+from pathlib import Path
+from typing import Any, TextIO
 
 from app.core.exceptions import ArchCADIndexError
 from app.core.logging import get_logger
+from app.core.metrics import INDEXER_LAST_DURATION, INDEXER_RUNNING, INDEXER_SAMPLES, INDEXER_THROUGHPUT
 from app.core.settings import Settings
-from app.models.index_store import ArchCADIndexStore
+from app.models.posting_index import build_posting_index
+from app.models.sharded_index_store import open_index_store
 from app.schemas.archcad import ArchCADDatasetManifest, ArchCADManifestRecord
+from app.services.archcad_alignment import element_dicts
+from app.services.archcad_duplicates import ArchCADDuplicateService, sample_signature
+from app.services.archcad_images import ArchCADImageService
 from app.services.archcad_inspector import ArchCADInspector
 from app.services.archcad_normalizer import ArchCADNormalizer
 from app.utils.file_refs import write_json
+from app.utils.profiling import MemorySampler, SlowestTracker, StageProfiler, max_rss_mb, profile_call
 
 logger = get_logger(__name__)
 
@@ -23,75 +32,228 @@ class ArchCADIndexer:
         self.settings = settings
         self.inspector = ArchCADInspector(settings)
         self.normalizer = ArchCADNormalizer()
-        self.store = ArchCADIndexStore(settings.archcad_db_path)
+        self.store = open_index_store(settings)
 
-    def build_index(self, *, force_reindex: bool = False, limit: int | None = None) -> dict[str, Any]:
-        manifest_payload = self.inspector.inspect()
-        manifest = ArchCADDatasetManifest.model_validate(manifest_payload)
-        records: list[ArchCADManifestRecord] = manifest.samples[:limit] if limit else manifest.samples
+    def build_index(
+        self,
+        *,
+        force_reindex: bool = False,
+        limit: int | None = None,
+        generate_thumbnails: bool = False,
+        split: str | None = None,
+        profile_memory: bool = False,
+        profile_slowest: int = 0,
+    ) -> dict[str, Any]:
+        """Index the dataset, or only ``split`` while leaving other splits in place.
+
+        Per-stage timings are always collected. ``profile_memory`` adds
+        ``tracemalloc`` checkpoints and ``profile_slowest`` re-runs that many of
+        the slowest samples under cProfile, dumping pstats files.
+        """
+        profiler = StageProfiler()
+        self.normalizer.profiler = profiler
+        with profiler.stage("manifest"):
+            manifest_payload = self.inspector.inspect()
+            manifest = ArchCADDatasetManifest.model_validate(manifest_payload)
+        records: list[ArchCADManifestRecord] = manifest.samples
+        if split:
+            records = [record for record in records if record.split == split]
+        if limit:
+            records = records[:limit]
         if not records:
-            raise ArchCADIndexError("No ArchCAD samples were discovered to index")
+            raise ArchCADIndexError("No ArchCAD samples were discovered to index", context={"split": split})
 
-        self.store.initialize(reset=force_reindex)
+        self.store.initialize(reset=force_reindex and not split)
+        if split and force_reindex:
+            self.store.delete_split(split)
+        started = time.perf_counter()
+        INDEXER_RUNNING.set(1)
         processed_samples = 0
         failed_samples = 0
         element_total = 0
         qa_total = 0
-        semantic_counts: Counter[str] = Counter()
-        semantic_index: defaultdict[str, list[str]] = defaultdict(list)
         failures: list[dict[str, str]] = []
+        image_refs: list[str] = []
+        minhash_rows: list[dict[str, Any]] = []
+        slowest = SlowestTracker(profile_slowest)
+        memory = MemorySampler(every=self.settings.archcad_index_memory_sample_every) if profile_memory else None
+        if memory:
+            memory.start()
+
+        jsonl_path = self.settings.archcad_jsonl_path
+        temp_jsonl_path = jsonl_path.with_name(f"{jsonl_path.name}.tmp")
+        try:
+            with temp_jsonl_path.open("w", encoding="utf-8") as jsonl_handle:
+                if split:
+                    self._copy_other_splits(jsonl_path, jsonl_handle, split)
+                for record in records:
+                    sample_started = time.perf_counter()
+                    try:
+                        with profiler.stage("normalize"):
+                            sample = self.normalizer.normalize_sample(record)
+                        with profiler.stage("sqlite"):
+                            self.store.upsert_sample(sample)
+                        with profiler.stage("minhash"):
+                            signature = sample_signature(element_dicts(sample.elements))
+                            if signature is not None:
+                                minhash_rows.append(
+                                    {"sample_id": sample.sample_id, "split": sample.split, "signature": signature}
+                                )
+                        with profiler.stage("serialize"):
+                            line = sample.model_dump_json(by_alias=True)
+                        with profiler.stage("jsonl_write"):
+                            jsonl_handle.write(line)
+                            jsonl_handle.write("\n")
+
+                        processed_samples += 1
+                        element_total += sample.stats.element_count
+                        qa_total += sample.stats.qa_count
+                        if sample.modalities.image:
+                            image_refs.append(sample.modalities.image)
+                        INDEXER_SAMPLES.inc(result="indexed")
+                    except Exception as exc:
+                        failed_samples += 1
+                        failures.append({"sample_id": record.sample_id, "error": str(exc)})
+                        INDEXER_SAMPLES.inc(result="failed")
+                        logger.warning(
+                            "ArchCAD sample normalization failed",
+                            extra={"context": {"sample_id": record.sample_id, "error": str(exc)}},
+                        )
+                    slowest.observe(time.perf_counter() - sample_started, record.sample_id)
+                    seen_samples = processed_samples + failed_samples
+                    if memory:
+                        memory.maybe_sample(seen_samples)
+                    if seen_samples % 100 == 0:
+                        INDEXER_THROUGHPUT.set(processed_samples / max(time.perf_counter() - started, 1e-9))
+            os.replace(temp_jsonl_path, jsonl_path)
+        finally:
+            elapsed = time.perf_counter() - started
+            memory_profile = memory.stop(processed_samples + failed_samples) if memory else None
+            INDEXER_RUNNING.set(0)
+            INDEXER_LAST_DURATION.set(elapsed)
+            INDEXER_THROUGHPUT.set(processed_samples / max(elapsed, 1e-9))
+
+        with profiler.stage("geometry_gc"):
+            # Replaced samples can leave blobs that nothing references any more.
+            self.store.prune_geometry_blobs()
+            geometry_dedup = self.store.geometry_stats()
 
-        with self.settings.archcad_jsonl_path.open("w", encoding="utf-8") as jsonl_handle:
-            for record in records:
-                try:
-                    sample = self.normalizer.normalize_sample(record)
-                    self.store.upsert_sample(sample)
-                    jsonl_handle.write(sample.model_dump_json(by_alias=True))
-                    jsonl_handle.write("\n")
-
-                    processed_samples += 1
-                    element_total += sample.stats.element_count
-                    qa_total += sample.stats.qa_count
-                    for semantic, count in sample.stats.semantic_counts.items():
-                        semantic_counts[semantic] += count
-                        semantic_index[semantic].append(sample.sample_id)
-                except Exception as exc:
-                    failed_samples += 1
-                    failures.append({"sample_id": record.sample_id, "error": str(exc)})
-                    logger.warning(
-                        "ArchCAD sample normalization failed",
-                        extra={"context": {"sample_id": record.sample_id, "error": str(exc)}},
-                    )
+        with profiler.stage("payload_compress"):
+            # Covers builds smaller than the dictionary sample and rows from older builds.
+            if self.settings.archcad_payload_codec != "json":
+                self.store.compress_payloads()
+            payload_storage = self.store.payload_storage_stats()
 
+        with profiler.stage("posting_index"):
+            posting_rows = self.store.posting_rows()
+            posting_index = build_posting_index(
+                self.settings.archcad_posting_lists_path,
+                self.settings.archcad_posting_directory_path,
+                self.store,
+                rows=posting_rows,
+            )
+
+        with profiler.stage("near_duplicates"):
+            # Clusters are recomputed over every split, so a one-split rebuild still
+            # catches duplicates of the splits it left in place.
+            self.store.upsert_minhash(minhash_rows)
+            near_duplicates = ArchCADDuplicateService(self.settings).detect()
+
+        profile = {
+            "loop_seconds": round(elapsed, 3),
+            "samples_per_second": round(processed_samples / max(elapsed, 1e-9), 2),
+            "stages": profiler.summary(),
+            "max_rss_mb": max_rss_mb(),
+            "memory": memory_profile,
+            "slowest_samples": self._profile_slowest(records, slowest.slowest()),
+        }
+
+        # Both files describe the whole store, so a one-split build rebuilds them
+        # from every split rather than writing only the split it indexed.
+        summary = self.store.summary()
         write_json(
             self.settings.archcad_semantic_index_path,
-            {semantic: sorted(set(sample_ids)) for semantic, sample_ids in semantic_index.items()},
+            {semantic: sorted(sample_ids) for semantic, sample_ids in posting_rows["postings"]["semantic"].items()},
         )
         write_json(
             self.settings.archcad_stats_path,
             {
                 "dataset_id": self.settings.archcad_dataset_id,
                 "generated_at": datetime.now(timezone.utc).isoformat(),
+                "split": split,
                 "processed_samples": processed_samples,
                 "failed_samples": failed_samples,
-                "element_total": element_total,
-                "qa_total": qa_total,
-                "semantic_counts": dict(semantic_counts),
+                "sample_total": summary["sample_count"],
+                "element_total": summary["element_count"],
+                "qa_total": summary["qa_count"],
+                "semantic_counts": {row["semantic"]: row["element_count"] for row in self.store.semantic_stats()},
                 "failures": failures[:100],
+                "geometry_dedup": geometry_dedup,
+                "payload_storage": payload_storage,
+                "near_duplicates": near_duplicates,
+                "profile": profile,
             },
         )
 
-        summary = self.store.summary()
+        thumbnails = ArchCADImageService(self.settings).pregenerate(image_refs) if generate_thumbnails else None
+
         return {
             "dataset_id": self.settings.archcad_dataset_id,
             "indexed_at": datetime.now(timezone.utc).isoformat(),
+            "split": split,
             "processed_samples": processed_samples,
             "failed_samples": failed_samples,
             "element_total": element_total,
             "qa_total": qa_total,
             "manifest_path": str(self.settings.archcad_manifest_path),
             "jsonl_path": str(self.settings.archcad_jsonl_path),
-            "sqlite_path": str(self.settings.archcad_db_path),
+            "sqlite_path": str(
+                self.settings.archcad_shard_dir if self.settings.archcad_shard_by_split else self.settings.archcad_db_path
+            ),
             "semantic_index_path": str(self.settings.archcad_semantic_index_path),
+            "posting_index": posting_index,
+            "thumbnails": thumbnails,
             "summary": summary,
+            "geometry_dedup": geometry_dedup,
+            "payload_storage": payload_storage,
+            "near_duplicates": near_duplicates,
+            "profile": profile,
         }
+
+    def _profile_slowest(
+        self,
+        records: list[ArchCADManifestRecord],
+        slowest: list[tuple[float, str]],
+    ) -> list[dict[str, Any]]:
+        """Re-normalize the slowest samples under cProfile, one pstats file each."""
+        if not slowest:
+            return []
+        by_id = {record.sample_id: record for record in records}
+        # Keep the re-runs out of the build's stage totals.
+        self.normalizer.profiler = StageProfiler()
+        stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S")
+        results = []
+        for rank, (seconds, sample_id) in enumerate(slowest, start=1):
+            record = by_id[sample_id]
+            output_path = self.settings.archcad_profile_dir / f"{stamp}-{rank:02d}-{sample_id.replace('/', '__')}.prof"
+            try:
+                profile_call(lambda: self.normalizer.normalize_sample(record).model_dump_json(by_alias=True), output_path)
+            except Exception:
+                # The sample already failed during the build; its timing is still useful.
+                output_path = None
+            results.append(
+                {
+                    "sample_id": sample_id,
+                    "seconds": round(seconds, 6),
+                    "profile_path": str(output_path) if output_path else None,
+                }
+            )
+        return results
+
+    def _copy_other_splits(self, jsonl_path: Path, handle: TextIO, split: str) -> None:
+        if not jsonl_path.exists():
+            return
+        with jsonl_path.open("r", encoding="utf-8") as existing:
+            for line in existing:
+                if line.strip() and json.loads(line).get("split") != split:
+                    handle.write(line if line.endswith("\n") else f"{line}\n")
@@ -0,0 +1,367 @@
+from __future__ import annotations
+
+import io
+import os
+import re
+import struct
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Iterable
+
+import numpy as np
+
+from app.core.exceptions import ArchCADError, ArchCADNotFoundError
+from app.core.logging import get_logger
+from app.core.settings import Settings
+from app.models.sharded_index_store import open_index_store
+from app.schemas.api import DEFAULT_MASK_RESOLUTION, MASK_RESOLUTION_RANGE
+from app.utils.disk_cache import cache_key, shared_disk_cache
+from app.utils.file_refs import file_ref_fingerprint, read_prefix
+
+logger = get_logger(__name__)
+
+BACKGROUND_LABEL = "__background__"
+# Chords per full turn when flattening circles and arcs.
+ARC_SEGMENTS_PER_TURN = 64
+
+_PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+_SVG_VIEWBOX = re.compile(r"""viewBox\s*=\s*["']([^"']+)["']""")
+_SVG_SIZE = re.compile(r"""\b(width|height)\s*=\s*["']\s*([0-9.eE+-]+)""")
+
+
+def _xy(point: Any) -> tuple[float, float] | None:
+    if isinstance(point, dict) and point.get("x") is not None and point.get("y") is not None:
+        return float(point["x"]), float(point["y"])
+    if isinstance(point, (list, tuple)) and len(point) >= 2:
+        return float(point[0]), float(point[1])
+    return None
+
+
+def _arc_points(center: tuple[float, float], radius: float, start: float, sweep: float) -> np.ndarray:
+    chords = max(2, int(np.ceil(abs(sweep) / (2 * np.pi) * ARC_SEGMENTS_PER_TURN)))
+    angles = start + np.linspace(0.0, sweep, chords + 1)
+    return np.column_stack((center[0] + radius * np.cos(angles), center[1] + radius * np.sin(angles)))
+
+
+def element_polylines(element: dict[str, Any]) -> list[np.ndarray]:
+    """Flatten one normalized element into ``(K, 2)`` vertex chains."""
+    geometry = element.get("geometry") or {}
+    element_type = str(element.get("type") or "").upper()
+
+    if element_type == "LINE" or ("start" in geometry and "end" in geometry and "points" not in geometry):
+        start, end = _xy(geometry.get("start")), _xy(geometry.get("end"))
+        return [np.array([start, end], dtype=np.float64)] if start and end else []
+
+    if element_type in {"CIRCLE", "ARC"}:
+        center = _xy(geometry.get("center"))
+        if center is None or geometry.get("radius") is None:
+            return []
+        radius = float(geometry["radius"])
+        if element_type == "CIRCLE" or geometry.get("start_angle") is None or geometry.get("end_angle") is None:
+            return [_arc_points(center, radius, 0.0, 2 * np.pi)]
+        # DXF convention: degrees, counter-clockwise from start to end.
+        start = np.deg2rad(float(geometry["start_angle"]))
+        sweep = (np.deg2rad(float(geometry["end_angle"])) - start) % (2 * np.pi) or 2 * np.pi
+        return [_arc_points(center, radius, start, sweep)]
+
+    if element_type == "RECT" and geometry.get("width") is not None:
+        x, y = float(geometry.get("x") or 0.0), float(geometry.get("y") or 0.0)
+        width, height = float(geometry["width"]), float(geometry["height"])
+        return [np.array([(x, y), (x + width, y), (x + width, y + height), (x, y + height), (x, y)])]
+
+    raw_points = geometry.get("points") or geometry.get("vertices") or []
+    points = [point for point in (_xy(item) for item in raw_points) if point is not None]
+    if len(points) < 2:
+        return []
+    if element_type == "POLYGON" and points[0] != points[-1]:
+        points.append(points[0])
+    return [np.asarray(points, dtype=np.float64)]
+
+
+def element_segments(
+    elements: Iterable[dict[str, Any]],
+    label_ids: dict[str, int],
+) -> tuple[np.ndarray, np.ndarray]:
+    """Return ``(segments (M, 4), labels (M,))`` for all labelled elements."""
+    chains: list[np.ndarray] = []
+    chain_labels: list[int] = []
+    for element in elements:
+        label = label_ids.get(element.get("semantic") or "")
+        if not label:
+            continue
+        for chain in element_polylines(element):
+            chains.append(np.hstack((chain[:-1], chain[1:])))
+            chain_labels.append(label)
+    if not chains:
+        return np.zeros((0, 4), dtype=np.float64), np.zeros(0, dtype=np.int64)
+    counts = np.fromiter((len(chain) for chain in chains), dtype=np.int64, count=len(chains))
+    return np.vstack(chains), np.repeat(np.asarray(chain_labels, dtype=np.int64), counts)
+
+
+def _clip_segments(segments: np.ndarray, width: int, height: int) -> tuple[np.ndarray, np.ndarray]:
+    """Liang-Barsky clip of pixel-space segments to the canvas, vectorized."""
+    x0, y0, x1, y1 = segments.T
+    dx, dy = x1 - x0, y1 - y0
+    p = np.stack((-dx, dx, -dy, dy))
+    q = np.stack((x0, width - 1 - x0, y0, height - 1 - y0))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        ratios = q / p
+    t0 = np.max(np.where(p < 0, ratios, 0.0), axis=0)
+    t1 = np.min(np.where(p > 0, ratios, 1.0), axis=0)
+    keep = (t0 <= t1) & ~np.any((p == 0) & (q < 0), axis=0)
+    clipped = np.column_stack((x0 + t0 * dx, y0 + t0 * dy, x0 + t1 * dx, y0 + t1 * dy))
+    return clipped[keep], keep
+
+
+def rasterize_segments(
+    segments: np.ndarray,
+    labels: np.ndarray,
+    *,
+    transform: tuple[float, float, float],
+    width: int,
+    height: int,
+    thickness: int = 1,
+) -> np.ndarray:
+    """Burn labelled segments into a ``(height, width)`` label map.
+
+    ``transform`` is ``(scale, offset_x, offset_y)`` mapping drawing units to
+    pixels. Each segment is sampled at one point per pixel step along its major
+    axis, so every segment is processed in a handful of array operations
+    regardless of count. Where strokes overlap, later elements win.
+    """
+    dtype = np.uint8 if int(labels.max(initial=0)) <= np.iinfo(np.uint8).max else np.uint16
+    mask = np.zeros((height, width), dtype=dtype)
+    if not len(segments):
+        return mask
+
+    scale, offset_x, offset_y = transform
+    pixels = segments * scale + np.array([offset_x, offset_y, offset_x, offset_y])
+    pixels, keep = _clip_segments(pixels, width, height)
+    labels = labels[keep]
+    if not len(pixels):
+        return mask
+
+    dx = pixels[:, 2] - pixels[:, 0]
+    dy = pixels[:, 3] - pixels[:, 1]
+    steps = np.ceil(np.maximum(np.abs(dx), np.abs(dy))).astype(np.int64) + 1
+    owner = np.repeat(np.arange(len(pixels)), steps)
+    position = np.arange(int(steps.sum())) - np.repeat(np.cumsum(steps) - steps, steps)
+    t = position / np.maximum(steps - 1, 1)[owner]
+    xs = np.rint(pixels[owner, 0] + t * dx[owner]).astype(np.int64)
+    ys = np.rint(pixels[owner, 1] + t * dy[owner]).astype(np.int64)
+    values = labels[owner].astype(dtype)
+
+    radius = max(0, thickness - 1) // 2
+    for shift_y in range(-radius, radius + 1):
+        for shift_x in range(-radius, radius + 1):
+            px = np.clip(xs + shift_x, 0, width - 1)
+            py = np.clip(ys + shift_y, 0, height - 1)
+            mask[py, px] = values
+    return mask
+
+
+def png_size(file_ref: str) -> tuple[int, int] | None:
+    """Read ``(width, height)`` from a PNG header without decoding the image."""
+    header = read_prefix(file_ref, 24)
+    if len(header) < 24 or not header.startswith(_PNG_SIGNATURE):
+        return None
+    return struct.unpack(">II", header[16:24])
+
+
+def svg_extent(file_ref: str) -> tuple[float, float, float, float] | None:
+    """Return the SVG drawing extent ``(min_x, min_y, width, height)`` from its root attributes."""
+    head = read_prefix(file_ref, 4096).decode("utf-8", errors="ignore")
+    root = head[head.find("<svg") :] if "<svg" in head else ""
+    root = root[: root.find(">") + 1]
+    match = _SVG_VIEWBOX.search(root)
+    if match:
+        values = [float(value) for value in re.split(r"[\s,]+", match.group(1).strip()) if value]
+        if len(values) == 4 and values[2] > 0 and values[3] > 0:
+            return values[0], values[1], values[2], values[3]
+    sizes = {name: float(value) for name, value in _SVG_SIZE.findall(root)}
+    if sizes.get("width", 0) > 0 and sizes.get("height", 0) > 0:
+        return 0.0, 0.0, sizes["width"], sizes["height"]
+    return None
+
+
+def elements_extent(elements: Iterable[dict[str, Any]]) -> tuple[float, float, float, float] | None:
+    """Union of the element bounding boxes as ``(min_x, min_y, width, height)``."""
+    boxes = np.array(
+        [
+            [box["min_x"], box["min_y"], box["max_x"], box["max_y"]]
+            for box in (element.get("bounding_box") for element in elements)
+            if box
+        ],
+        dtype=np.float64,
+    )
+    if not len(boxes):
+        return None
+    min_x, min_y = boxes[:, 0].min(), boxes[:, 1].min()
+    return float(min_x), float(min_y), max(float(boxes[:, 2].max() - min_x), 1e-9), max(
+        float(boxes[:, 3].max() - min_y), 1e-9
+    )
+
+
+def _rasterize_job(job: tuple[Settings, int, int, list[str]]) -> dict[str, Any]:
+    settings, resolution, thickness, sample_ids = job
+    service = ArchCADMaskService(settings)
+    cached = 0
+    failures: list[dict[str, str]] = []
+    for sample_id in sample_ids:
+        try:
+            cached += int(service.get_mask(sample_id, resolution=resolution, thickness=thickness)["cached"])
+        except Exception as exc:
+            failures.append({"sample_id": sample_id, "error": str(exc)})
+    return {"processed": len(sample_ids), "cached": cached, "failures": failures}
+
+
+class ArchCADMaskService:
+    """Rasterize normalized elements into semantic label maps aligned to the image modality.
+
+    The drawing extent comes from the SVG ``viewBox`` (the image modality is
+    rendered from it) and falls back to the union of element bounding boxes.
+    The canvas takes the PNG's aspect ratio when an image is present and is
+    scaled so its longest side equals ``resolution``; the extent is fitted
+    into it like SVG's default ``xMidYMid meet``. Label ``0`` is background and
+    labels ``1..N`` follow the sorted semantic vocabulary of the index.
+    """
+
+    def __init__(self, settings: Settings) -> None:
+        self.settings = settings
+        self.store = open_index_store(settings)
+        self.cache = shared_disk_cache(
+            settings.archcad_mask_cache_dir,
+            max_bytes=settings.archcad_mask_cache_max_mb * 1024 * 1024,
+        )
+        self._vocabulary: list[str] | None = None
+
+    def vocabulary(self) -> list[str]:
+        if self._vocabulary is None:
+            self._vocabulary = [BACKGROUND_LABEL] + sorted(row["semantic"] for row in self.store.semantic_stats())
+        return self._vocabulary
+
+    def get_mask(
+        self,
+        sample_id: str,
+        *,
+        resolution: int = DEFAULT_MASK_RESOLUTION,
+        thickness: int = 1,
+    ) -> dict[str, Any]:
+        low, high = MASK_RESOLUTION_RANGE
+        if not low <= resolution <= high:
+            raise ArchCADError(
+                "Invalid mask resolution",
+                context={"resolution": resolution, "allowed": [low, high]},
+            )
+        if thickness < 1:
+            raise ArchCADError("Invalid mask stroke thickness", context={"thickness": thickness})
+
+        sample = self.store.get_sample(sample_id)
+        if not sample:
+            raise ArchCADNotFoundError("Sample not found", context={"sample_id": sample_id})
+        modalities = sample.get("modalities") or {}
+        vocabulary = self.vocabulary()
+        key = cache_key(
+            "mask",
+            sample_id,
+            *(file_ref_fingerprint(modalities[name]) for name in ("json", "svg", "image") if modalities.get(name)),
+            resolution,
+            thickness,
+            cache_key(*vocabulary),
+        )
+
+        payload = self.cache.get(key, ".npz")
+        cached = payload is not None
+        if payload is None:
+            payload = self._render(sample, vocabulary, resolution, thickness)
+            self.cache.put(key, payload, ".npz")
+
+        with np.load(io.BytesIO(payload)) as archive:
+            mask = archive["mask"]
+            extent = [float(value) for value in archive["extent"]]
+            labels = [str(label) for label in archive["labels"]]
+        return {
+            "sample_id": sample_id,
+            "resolution": resolution,
+            "width": int(mask.shape[1]),
+            "height": int(mask.shape[0]),
+            "extent": extent,
+            "labels": labels,
+            "mask": mask,
+            "payload": payload,
+            "cached": cached,
+        }
+
+    def rasterize_samples(
+        self,
+        *,
+        sample_ids: list[str] | None = None,
+        split: str | None = None,
+        resolution: int = DEFAULT_MASK_RESOLUTION,
+        thickness: int = 1,
+        workers: int | None = None,
+        chunk_size: int = 64,
+    ) -> dict[str, Any]:
+        """Populate the mask cache for many samples on a process pool."""
+        targets = sample_ids if sample_ids is not None else self.store.sample_ids(split=split)
+        jobs = [
+            (self.settings, resolution, thickness, targets[start : start + chunk_size])
+            for start in range(0, len(targets), chunk_size)
+        ]
+        with ProcessPoolExecutor(max_workers=workers or os.cpu_count() or 1) as executor:
+            results = list(executor.map(_rasterize_job, jobs))
+
+        failures = [failure for result in results for failure in result["failures"]]
+        if failures:
+            logger.warning(
+                "ArchCAD mask rasterization skipped samples",
+                extra={"context": {"failed": len(failures), "first_failure": failures[0]}},
+            )
+        return {
+            "resolution": resolution,
+            "sample_count": len(targets),
+            "cached_count": sum(result["cached"] for result in results),
+            "failed_samples": len(failures),
+            "failures": failures[:100],
+            "cache_dir": str(self.cache.root),
+            "cache_bytes": self.cache.size_bytes(),
+        }
+
+    def _render(self, sample: dict[str, Any], vocabulary: list[str], resolution: int, thickness: int) -> bytes:
+        modalities = sample.get("modalities") or {}
+        elements = sample.get("elements") or []
+        extent = (svg_extent(modalities["svg"]) if modalities.get("svg") else None) or elements_extent(elements)
+        if extent is None:
+            raise ArchCADError(
+                "Sample has no geometry to rasterize",
+                status_code=409,
+                context={"sample_id": sample.get("sample_id")},
+            )
+        min_x, min_y, extent_width, extent_height = extent
+
+        image_size = png_size(modalities["image"]) if modalities.get("image") else None
+        aspect_width, aspect_height = image_size or (extent_width, extent_height)
+        fit = resolution / max(aspect_width, aspect_height)
+        width = max(1, int(round(aspect_width * fit)))
+        height = max(1, int(round(aspect_height * fit)))
+        scale = min(width / extent_width, height / extent_height)
+        offset_x = (width - extent_width * scale) / 2 - min_x * scale
+        offset_y = (height - extent_height * scale) / 2 - min_y * scale
+
+        label_ids = {label: index for index, label in enumerate(vocabulary) if index}
+        segments, labels = element_segments(elements, label_ids)
+        mask = rasterize_segments(
+            segments,
+            labels,
+            transform=(scale, offset_x, offset_y),
+            width=width,
+            height=height,
+            thickness=thickness,
+        )
+        buffer = io.BytesIO()
+        np.savez_compressed(
+            buffer,
+            mask=mask,
+            extent=np.array(extent, dtype=np.float64),
+            labels=np.array(vocabulary),
+        )
+        return buffer.getvalue()
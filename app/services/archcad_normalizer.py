@@ -2,6 +2,7 @@ from __future__ import annotations
 
 import json
 from collections import Counter
+from itertools import islice
 from pathlib import Path
 from typing import Any
 from xml.etree import ElementTree
@@ -17,10 +18,17 @@ from app.schemas.archcad import (
     ArchCADSample,
     ArchCADSampleStats,
 )
-from app.utils.file_refs import load_json, read_bytes, read_text
+from app.utils.file_refs import open_text, read_bytes, read_text
+from app.utils.json_stream import iter_array_items
+from app.utils.profiling import StageProfiler
 
 logger = get_logger(__name__)
 
+# Members of a JSON object that may hold the element array, in order of preference.
+JSON_ELEMENT_KEYS = ("elements", "primitives", "objects")
+# Raw elements decoded before they are normalized, when streaming element files.
+JSON_STREAM_BATCH = 1024
+
 
 def normalize_semantic(value: str | None) -> str | None:
     if value is None:
@@ -36,49 +44,102 @@ def normalize_semantic(value: str | None) -> str | None:
 
 
 class ArchCADNormalizer:
-    """Normalize ArchCAD raw modalities into a unified sample schema."""
+    """Normalize ArchCAD raw modalities into a unified sample schema.
+
+    Reads, parsing and model construction are timed on ``profiler`` stages so
+    the indexer can attribute normalization time.
+    """
+
+    def __init__(self, profiler: StageProfiler | None = None) -> None:
+        self.profiler = profiler or StageProfiler()
 
     def normalize_sample(self, record: ArchCADManifestRecord) -> ArchCADSample:
         modalities = ArchCADModalityRefs(**record.file_paths)
-        elements = self._parse_json_elements(record.file_paths.get("json"))
+        elements = self.parse_json_elements(record.file_paths.get("json"))
         if not elements:
-            elements = self._parse_svg_elements(record.file_paths.get("svg"))
+            with self.profiler.stage("parse_svg"):
+                elements = self.parse_svg_elements(record.file_paths.get("svg"))
 
-        qa_pairs = self._parse_qa_pairs(record.file_paths.get("qa"))
+        with self.profiler.stage("build_qa"):
+            qa_pairs = self._parse_qa_pairs(record.file_paths.get("qa"))
         pointcloud_metadata = self._parse_pointcloud_metadata(record.file_paths.get("pointcloud"))
-        stats = self._build_stats(elements, qa_pairs)
-
-        return ArchCADSample(
-            sample_id=record.sample_id,
-            split=record.split,
-            modalities=modalities,
-            elements=elements,
-            qa_pairs=qa_pairs,
-            stats=stats,
-            validation_flags=record.validation_flags,
-            metadata={
-                "pointcloud": pointcloud_metadata,
-                "source_files": record.file_paths,
-            },
-        )
 
-    def _parse_json_elements(self, file_ref: str | None) -> list[ArchCADElement]:
+        with self.profiler.stage("build_sample"):
+            stats = self._build_stats(elements, qa_pairs)
+            return ArchCADSample(
+                sample_id=record.sample_id,
+                split=record.split,
+                modalities=modalities,
+                elements=elements,
+                qa_pairs=qa_pairs,
+                stats=stats,
+                validation_flags=record.validation_flags,
+                metadata={
+                    "pointcloud": pointcloud_metadata,
+                    "source_files": record.file_paths,
+                },
+            )
+
+    def _read_text(self, file_ref: str) -> str:
+        with self.profiler.stage("read"):
+            return read_text(file_ref)
+
+    def _load_json(self, file_ref: str) -> Any:
+        text = self._read_text(file_ref)
+        with self.profiler.stage("parse_json"):
+            return json.loads(text)
+
+    def parse_json_elements(self, file_ref: str | None) -> list[ArchCADElement]:
         if not file_ref:
             return []
-        payload = load_json(file_ref)
+        try:
+            return self._stream_json_elements(file_ref)
+        except ValueError:
+            # Other encodings and layouts, and malformed files, take the full
+            # parse below, which reads the first two and raises for the last.
+            pass
+        payload = self._load_json(file_ref)
         raw_elements = []
         if isinstance(payload, list):
             raw_elements = payload
         elif isinstance(payload, dict):
-            raw_elements = payload.get("elements") or payload.get("primitives") or payload.get("objects") or []
+            raw_elements = next((payload[key] for key in JSON_ELEMENT_KEYS if payload.get(key)), [])
 
         elements: list[ArchCADElement] = []
-        for raw in raw_elements:
-            if not isinstance(raw, dict):
-                continue
-            elements.append(self._normalize_json_element(raw))
+        with self.profiler.stage("build_elements"):
+            for raw in raw_elements:
+                if not isinstance(raw, dict):
+                    continue
+                elements.append(self._normalize_json_element(raw))
         return elements
 
+    def _stream_json_elements(self, file_ref: str) -> list[ArchCADElement]:
+        """Normalize elements while the file is read, without building its object tree.
+
+        Returns the same elements as the full parse: a top-level array, or the
+        first non-empty element array of an object in ``JSON_ELEMENT_KEYS`` order.
+        """
+        found: dict[str | None, list[ArchCADElement]] = {}
+        with open_text(file_ref) as handle:
+
+            def read(size: int) -> str:
+                with self.profiler.stage("read"):
+                    return handle.read(size)
+
+            items = iter_array_items(read, JSON_ELEMENT_KEYS)
+            # Batches keep memory bounded without paying for a profiler stage per element.
+            while True:
+                with self.profiler.stage("parse_json"):
+                    batch = list(islice(items, JSON_STREAM_BATCH))
+                if not batch:
+                    break
+                with self.profiler.stage("build_elements"):
+                    for key, raw in batch:
+                        elements = found.setdefault(key, [])
+                        if isinstance(raw, dict):
+                            elements.append(self._normalize_json_element(raw))
+        return next((found[key] for key in (None, *JSON_ELEMENT_KEYS) if key in found), [])
+
     def _normalize_json_element(self, raw: dict[str, Any]) -> ArchCADElement:
         element_type = str(raw.get("type") or "UNKNOWN").upper()
         geometry: dict[str, Any]
@@ -97,8 +158,9 @@ class ArchCADNormalizer:
             geometry = {
                 "center": self._point_to_dict(raw.get("center")),
                 "radius": raw.get("radius"),
-                "start_angle": raw.get("start_angle") or raw.get("startAngle"),
-                "end_angle": raw.get("end_angle") or raw.get("endAngle"),
+                # Not ``or``: 0 is a valid angle.
+                "start_angle": raw["start_angle"] if raw.get("start_angle") is not None else raw.get("startAngle"),
+                "end_angle": raw["end_angle"] if raw.get("end_angle") is not None else raw.get("endAngle"),
             }
         elif element_type == "POLYLINE":
             geometry = {
@@ -153,11 +215,11 @@ class ArchCADNormalizer:
             source_modality="json",
         )
 
-    def _parse_svg_elements(self, file_ref: str | None) -> list[ArchCADElement]:
+    def parse_svg_elements(self, file_ref: str | None) -> list[ArchCADElement]:
         if not file_ref:
             return []
         try:
-            root = ElementTree.fromstring(read_text(file_ref))
+            root = ElementTree.fromstring(self._read_text(file_ref))
         except ElementTree.ParseError as exc:
             logger.warning(
                 "Failed to parse SVG modality",
@@ -234,7 +296,7 @@ class ArchCADNormalizer:
         suffix = self._suffix(file_ref)
         if suffix == ".jsonl":
             qa_pairs = []
-            for line in read_text(file_ref).splitlines():
+            for line in self._read_text(file_ref).splitlines():
                 if not line.strip():
                     continue
                 item = load_json_from_line(line)
@@ -257,7 +319,7 @@ class ArchCADNormalizer:
             return qa_pairs
 
         if suffix == ".json":
-            payload = load_json(file_ref)
+            payload = self._load_json(file_ref)
             if isinstance(payload, dict):
                 candidates = payload.get("qa_pairs") or payload.get("qas") or payload.get("items") or []
             else:
@@ -284,7 +346,7 @@ class ArchCADNormalizer:
                 )
             return qa_pairs
 
-        text = read_text(file_ref).replace("\\n", "\n")
+        text = self._read_text(file_ref).replace("\\n", "\n")
         qa_pairs: list[ArchCADQA] = []
         current_question: str | None = None
         for raw_line in text.splitlines():
@@ -311,7 +373,7 @@ class ArchCADNormalizer:
         payload = {"file_ref": file_ref, "format": suffix.lstrip(".")}
 
         if suffix == ".json":
-            raw = load_json(file_ref)
+            raw = self._load_json(file_ref)
             if isinstance(raw, dict):
                 payload["keys"] = sorted(raw.keys())
                 points = raw.get("points")
@@ -320,12 +382,12 @@ class ArchCADNormalizer:
             elif isinstance(raw, list):
                 payload["point_count"] = len(raw)
         elif suffix in {".txt", ".csv", ".pts"}:
-            point_lines = [line for line in read_text(file_ref).splitlines() if line.strip()]
+            point_lines = [line for line in self._read_text(file_ref).splitlines() if line.strip()]
             payload["point_count"] = len(point_lines)
         else:
-            payload["byte_size"] = len(read_bytes(file_ref))
+            with self.profiler.stage("read"):
+                payload["byte_size"] = len(read_bytes(file_ref))
 
-        # TODO: Add native numpy/ply point loading for training and embedding pipelines.
         return payload
 
     def _build_stats(
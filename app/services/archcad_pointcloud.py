@@ -0,0 +1,321 @@
+from __future__ import annotations
+
+import io
+import json
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+
+from app.core.exceptions import ArchCADError, ArchCADNotFoundError
+from app.core.logging import get_logger
+from app.core.settings import Settings
+from app.models.sharded_index_store import open_index_store
+from app.schemas.api import POINTCLOUD_LOD_GRID, POINTCLOUD_MAX_LOD
+from app.utils.disk_cache import cache_key, shared_disk_cache
+from app.utils.file_refs import file_ref_fingerprint, read_bytes
+
+logger = get_logger(__name__)
+
+POINTCLOUD_ENCODINGS = {"int16", "float16"}
+
+_INT16_LEVELS = 65535
+_INT16_BIAS = 32768
+_PLY_TYPES = {
+    "char": "i1",
+    "int8": "i1",
+    "uchar": "u1",
+    "uint8": "u1",
+    "short": "i2",
+    "int16": "i2",
+    "ushort": "u2",
+    "uint16": "u2",
+    "int": "i4",
+    "int32": "i4",
+    "uint": "u4",
+    "uint32": "u4",
+    "float": "f4",
+    "float32": "f4",
+    "double": "f8",
+    "float64": "f8",
+}
+
+
+def load_points(file_ref: str) -> np.ndarray:
+    """Load a point cloud modality into an ``(N, 3)`` float64 array."""
+    suffix = _suffix(file_ref)
+    raw = read_bytes(file_ref)
+
+    if suffix == ".npy":
+        points = np.load(io.BytesIO(raw), allow_pickle=False)
+    elif suffix == ".npz":
+        with np.load(io.BytesIO(raw), allow_pickle=False) as archive:
+            key = next((name for name in ("points", "xyz", "coords") if name in archive.files), None)
+            if key is None and not archive.files:
+                raise ArchCADError("Point cloud archive is empty", context={"file_ref": file_ref})
+            points = archive[key or archive.files[0]]
+    elif suffix == ".json":
+        payload = json.loads(raw.decode("utf-8-sig"))
+        if isinstance(payload, dict):
+            payload = payload.get("points") or []
+        points = np.asarray(
+            [
+                [point.get("x", 0.0), point.get("y", 0.0), point.get("z", 0.0)]
+                if isinstance(point, dict)
+                else point
+                for point in payload
+            ],
+            dtype=np.float64,
+        )
+    elif suffix == ".ply":
+        points = _parse_ply(raw)
+    elif suffix in {".txt", ".csv", ".pts", ".xyz"}:
+        text = raw.decode("utf-8-sig", errors="replace").replace(",", " ")
+        rows = [line for line in text.splitlines() if line.strip() and not line.lstrip().startswith("#")]
+        # .pts files may start with a bare point count line.
+        if rows and len(rows[0].split()) == 1:
+            rows = rows[1:]
+        points = np.loadtxt(rows, dtype=np.float64, ndmin=2) if rows else np.empty((0, 3))
+    else:
+        raise ArchCADError(
+            "Unsupported point cloud format",
+            context={"file_ref": file_ref, "format": suffix.lstrip(".")},
+        )
+
+    points = np.asarray(points, dtype=np.float64)
+    if points.ndim != 2 or points.shape[1] < 2:
+        raise ArchCADError(
+            "Point cloud must be an (N, 2+) array",
+            context={"file_ref": file_ref, "shape": list(points.shape)},
+        )
+    if points.shape[1] == 2:
+        points = np.column_stack([points, np.zeros(len(points))])
+    points = points[:, :3]
+    return points[np.isfinite(points).all(axis=1)]
+
+
+def voxel_downsample(points: np.ndarray, voxel_size: np.ndarray | float, origin: np.ndarray) -> np.ndarray:
+    """Replace all points falling in the same voxel by their centroid."""
+    if len(points) == 0:
+        return points
+    cells = np.floor((points - origin) / voxel_size).astype(np.int64)
+    cells -= cells.min(axis=0)
+    dims = cells.max(axis=0) + 1
+    linear = np.ravel_multi_index(cells.T, dims)
+    _, inverse, counts = np.unique(linear, return_inverse=True, return_counts=True)
+    centroids = np.empty((len(counts), 3), dtype=np.float64)
+    for axis in range(3):
+        centroids[:, axis] = np.bincount(inverse, weights=points[:, axis]) / counts
+    return centroids
+
+
+def quantize_int16(points: np.ndarray, origin: np.ndarray, extent: np.ndarray) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Quantize points to int16 so that ``value * scale + offset`` restores them."""
+    scale = np.where(extent > 0, extent / _INT16_LEVELS, 1.0)
+    offset = origin + _INT16_BIAS * scale
+    quantized = np.rint((points - origin) / scale) - _INT16_BIAS
+    return np.clip(quantized, -_INT16_BIAS, _INT16_BIAS - 1).astype(np.int16), scale, offset
+
+
+class ArchCADPointCloudService:
+    """Serve voxel-downsampled point cloud levels of detail from a disk cache."""
+
+    def __init__(self, settings: Settings) -> None:
+        self.settings = settings
+        self.store = open_index_store(settings)
+        self.cache = shared_disk_cache(
+            settings.archcad_pointcloud_cache_dir,
+            max_bytes=settings.archcad_pointcloud_cache_max_mb * 1024 * 1024,
+        )
+
+    def get_level(
+        self,
+        sample_id: str,
+        *,
+        lod: int,
+        bbox: tuple[float, ...] | None = None,
+        encoding: str = "int16",
+    ) -> dict[str, Any]:
+        if not 0 <= lod <= POINTCLOUD_MAX_LOD:
+            raise ArchCADError(
+                "Invalid point cloud level of detail",
+                context={"lod": lod, "allowed": [0, POINTCLOUD_MAX_LOD]},
+            )
+        if encoding not in POINTCLOUD_ENCODINGS:
+            raise ArchCADError(
+                "Invalid point cloud encoding",
+                context={"encoding": encoding, "allowed": sorted(POINTCLOUD_ENCODINGS)},
+            )
+
+        file_ref = self._pointcloud_ref(sample_id)
+        level = self._load_level(file_ref, lod)
+        quantized: np.ndarray = level["points"]
+        scale: np.ndarray = level["scale"]
+        offset: np.ndarray = level["offset"]
+
+        if bbox is not None:
+            quantized = quantized[self._bbox_mask(quantized, bbox, scale, offset)]
+
+        if encoding == "int16":
+            payload = np.ascontiguousarray(quantized, dtype="<i2").tobytes()
+            response_scale, response_offset = scale, offset
+        else:
+            # float16 tops out at 65504, so values are normalized to [0, 1] over the cloud extent.
+            origin = offset - _INT16_BIAS * scale
+            extent = level["bounds"][3:] - level["bounds"][:3]
+            response_scale = np.where(extent > 0, extent, 1.0)
+            normalized = (quantized.astype(np.float64) + _INT16_BIAS) * scale / response_scale
+            payload = np.ascontiguousarray(normalized, dtype="<f2").tobytes()
+            response_offset = origin
+
+        return {
+            "sample_id": sample_id,
+            "lod": lod,
+            "max_lod": POINTCLOUD_MAX_LOD,
+            "encoding": encoding,
+            "point_count": int(len(quantized)),
+            "source_point_count": int(level["source_point_count"]),
+            "scale": [float(value) for value in response_scale],
+            "offset": [float(value) for value in response_offset],
+            "bounds": [float(value) for value in level["bounds"]],
+            "payload": payload,
+        }
+
+    def _pointcloud_ref(self, sample_id: str) -> str:
+        sample = self.store.get_sample(sample_id)
+        if not sample:
+            raise ArchCADNotFoundError("Sample not found", context={"sample_id": sample_id})
+        file_ref = (sample.get("modalities") or {}).get("pointcloud")
+        if not file_ref:
+            raise ArchCADNotFoundError(
+                "Sample has no point cloud modality",
+                context={"sample_id": sample_id},
+            )
+        return file_ref
+
+    def _load_level(self, file_ref: str, lod: int) -> dict[str, Any]:
+        fingerprint = file_ref_fingerprint(file_ref)
+        cached = self.cache.get(cache_key("pointcloud", fingerprint, lod), ".npz")
+        if cached is not None:
+            return self._decode_level(cached)
+
+        levels = self._build_pyramid(file_ref)
+        for level_index, level in enumerate(levels):
+            buffer = io.BytesIO()
+            np.savez(buffer, **level)
+            self.cache.put(cache_key("pointcloud", fingerprint, level_index), buffer.getvalue(), ".npz")
+        return levels[lod]
+
+    def _build_pyramid(self, file_ref: str) -> list[dict[str, np.ndarray]]:
+        points = load_points(file_ref)
+        if len(points):
+            origin = points.min(axis=0)
+            extent = points.max(axis=0) - origin
+        else:
+            origin = np.zeros(3)
+            extent = np.zeros(3)
+        bounds = np.concatenate([origin, origin + extent])
+        longest_axis = float(extent.max()) if len(points) else 0.0
+
+        levels: list[dict[str, np.ndarray]] = []
+        for lod in range(POINTCLOUD_MAX_LOD + 1):
+            if lod < POINTCLOUD_MAX_LOD and longest_axis > 0:
+                level_points = voxel_downsample(points, longest_axis / POINTCLOUD_LOD_GRID[lod], origin)
+            else:
+                level_points = points
+            quantized, scale, offset = quantize_int16(level_points, origin, extent)
+            levels.append(
+                {
+                    "points": quantized,
+                    "scale": scale,
+                    "offset": offset,
+                    "bounds": bounds,
+                    "source_point_count": np.asarray(len(points)),
+                }
+            )
+
+        logger.info(
+            "Point cloud pyramid built",
+            extra={
+                "context": {
+                    "file_ref": file_ref,
+                    "source_point_count": len(points),
+                    "level_point_counts": [len(level["points"]) for level in levels],
+                }
+            },
+        )
+        return levels
+
+    def _decode_level(self, payload: bytes) -> dict[str, Any]:
+        with np.load(io.BytesIO(payload), allow_pickle=False) as archive:
+            return {name: archive[name] for name in archive.files}
+
+    def _bbox_mask(
+        self,
+        quantized: np.ndarray,
+        bbox: tuple[float, ...],
+        scale: np.ndarray,
+        offset: np.ndarray,
+    ) -> np.ndarray:
+        if len(bbox) == 4:
+            min_corner = np.array([bbox[0], bbox[1], -np.inf])
+            max_corner = np.array([bbox[2], bbox[3], np.inf])
+        elif len(bbox) == 6:
+            min_corner = np.array(bbox[:3], dtype=np.float64)
+            max_corner = np.array(bbox[3:], dtype=np.float64)
+        else:
+            raise ArchCADError(
+                "Bounding box must have 4 (2D) or 6 (3D) values",
+                context={"bbox": list(bbox)},
+            )
+        # Compare in the quantized domain so the int16 buffer is never expanded.
+        with np.errstate(invalid="ignore"):
+            low = np.ceil((min_corner - offset) / scale)
+            high = np.floor((max_corner - offset) / scale)
+        return np.all((quantized >= low) & (quantized <= high), axis=1)
+
+
+def _parse_ply(raw: bytes) -> np.ndarray:
+    header_end = raw.find(b"end_header")
+    if header_end < 0:
+        raise ArchCADError("Invalid PLY point cloud: missing end_header")
+    body_start = raw.index(b"\n", header_end) + 1
+    header = raw[:header_end].decode("ascii", errors="replace").splitlines()
+
+    fmt = "ascii"
+    vertex_count = 0
+    properties: list[tuple[str, str]] = []
+    current_element: str | None = None
+    for line in header:
+        tokens = line.split()
+        if not tokens:
+            continue
+        if tokens[0] == "format":
+            fmt = tokens[1]
+        elif tokens[0] == "element":
+            current_element = tokens[1]
+            if current_element == "vertex":
+                vertex_count = int(tokens[2])
+        elif tokens[0] == "property" and current_element == "vertex" and tokens[1] != "list":
+            properties.append((tokens[2], _PLY_TYPES.get(tokens[1], "f4")))
+
+    names = [name for name, _ in properties]
+    if not {"x", "y"}.issubset(names):
+        raise ArchCADError("Invalid PLY point cloud: vertex x/y properties are missing")
+    columns = [name for name in ("x", "y", "z") if name in names]
+
+    if fmt == "ascii":
+        rows = raw[body_start:].decode("ascii", errors="replace").splitlines()[:vertex_count]
+        table = np.loadtxt(rows, dtype=np.float64, ndmin=2)
+        return table[:, [names.index(name) for name in columns]]
+
+    byte_order = "<" if fmt == "binary_little_endian" else ">"
+    dtype = np.dtype([(name, f"{byte_order}{code}") for name, code in properties])
+    vertices = np.frombuffer(raw, dtype=dtype, count=vertex_count, offset=body_start)
+    return np.column_stack([vertices[name].astype(np.float64) for name in columns])
+
+
+def _suffix(file_ref: str) -> str:
+    if file_ref.startswith("zip://") and "::" in file_ref:
+        return Path(file_ref.split("::", 1)[1]).suffix.lower()
+    return Path(file_ref).suffix.lower()
@@ -0,0 +1,133 @@
+from __future__ import annotations
+
+from typing import Any
+
+import numpy as np
+
+from app.core.exceptions import ArchCADError
+from app.core.settings import Settings
+from app.models.posting_index import ArchCADPostingIndex, current_posting_index, popcount
+from app.models.sharded_index_store import open_index_store
+
+SAMPLING_STRATA = ("split", "semantic")
+
+
+class ArchCADSamplingService:
+    """Draw reproducible random batches of samples from the posting lists.
+
+    The posting index already holds every split and semantic label as a set of
+    dense sample ordinals, so a population is a few bitmap operations away and
+    a draw picks ``n`` ordinals from it with a seeded ``numpy`` generator,
+    without sorting or paging through the ``samples`` table. Stratified draws
+    split ``n`` evenly across the strata, handing the share a small stratum
+    cannot fill to the others; a sample drawn for one semantic stratum is not
+    drawn again for another.
+    """
+
+    def __init__(self, settings: Settings) -> None:
+        self.settings = settings
+        self.store = open_index_store(settings)
+
+    def sample(
+        self,
+        *,
+        n: int,
+        seed: int | None = None,
+        split: str | None = None,
+        semantic: str | None = None,
+        stratify: str | None = None,
+        min_alignment: float | None = None,
+        exclude_duplicates: bool = False,
+    ) -> dict[str, Any]:
+        if stratify is not None and stratify not in SAMPLING_STRATA:
+            raise ArchCADError(
+                "Invalid stratification field",
+                context={"stratify": stratify, "allowed": list(SAMPLING_STRATA)},
+            )
+        if seed is None:
+            # Report a fresh seed so that an unseeded draw can still be replayed.
+            seed = int(np.random.SeedSequence().generate_state(1)[0])
+        index = current_posting_index(
+            self.settings.archcad_posting_lists_path,
+            self.settings.archcad_posting_directory_path,
+            self.store,
+        )
+        semantic_labels = [label.strip() for label in (semantic or "").split(",") if label.strip()]
+
+        population = index.universe()
+        if split:
+            population &= index.bitmap("split", split)
+        if min_alignment is not None:
+            population &= index.subset(self.store.aligned_sample_ids(min_alignment))
+        if exclude_duplicates:
+            population &= index.complement(index.subset(self.store.duplicate_sample_ids()))
+        if stratify == "semantic":
+            strata = {
+                label: population & index.bitmap("semantic", label)
+                for label in semantic_labels or index.labels("semantic")
+            }
+        else:
+            if semantic_labels:
+                population &= index.combine("semantic", semantic_labels, "or")
+            if stratify == "split":
+                strata = {label: population & index.bitmap("split", label) for label in index.labels("split")}
+            else:
+                strata = {None: population}
+
+        rng = np.random.default_rng(seed)
+        drawn, counts = _draw(index, strata, n, rng)
+        order = rng.permutation(len(drawn))
+        items = self.store.get_sample_summaries([index.sample_ids[drawn[position][0]] for position in order])
+        labels = {index.sample_ids[ordinal]: label for ordinal, label in drawn}
+        if stratify is not None:
+            for item in items:
+                item["stratum"] = labels[item["sample_id"]]
+        return {
+            "items": items,
+            "seed": seed,
+            "requested": n,
+            "drawn": len(items),
+            "population": popcount(np.bitwise_or.reduce(list(strata.values()))) if strata else 0,
+            "strata": [
+                {"stratum": label, "population": popcount(bitmap), "drawn": counts[label]}
+                for label, bitmap in strata.items()
+                if label is not None
+            ],
+            "filters": {
+                "split": split,
+                "semantic": semantic,
+                "stratify": stratify,
+                "min_alignment": min_alignment,
+                "exclude_duplicates": exclude_duplicates,
+            },
+        }
+
+
+def _draw(
+    index: ArchCADPostingIndex,
+    strata: dict[str | None, np.ndarray],
+    n: int,
+    rng: np.random.Generator,
+) -> tuple[list[tuple[int, str | None]], dict[str | None, int]]:
+    """Draw up to ``n`` distinct ordinals spread evenly over ``strata``.
+
+    Strata are visited smallest first and each takes an equal share of what is
+    still owed, so a stratum that runs short leaves its remainder to the larger
+    ones. Drawn ordinals are cleared from the strata not yet visited.
+    """
+    remaining = {label: bitmap.copy() for label, bitmap in strata.items()}
+    visiting = sorted(remaining, key=lambda label: (popcount(remaining[label]), label or ""))
+    drawn: list[tuple[int, str | None]] = []
+    counts: dict[str | None, int] = {}
+    owed = n
+    for position, label in enumerate(visiting):
+        candidates = index.ordinals(remaining.pop(label))
+        share = min(-(-owed // (len(visiting) - position)), len(candidates))
+        # Generator.choice picks a small share in O(share) rather than permuting every candidate.
+        picked = candidates[rng.choice(len(candidates), size=share, replace=False)] if share else candidates[:0]
+        counts[label] = share
+        owed -= share
+        drawn.extend((int(ordinal), label) for ordinal in picked)
+        for bitmap in remaining.values():
+            np.bitwise_and.at(bitmap, picked >> 3, ~np.right_shift(0x80, picked & 7).astype(np.uint8))
+    return drawn, counts
@@ -2,9 +2,11 @@ from __future__ import annotations
 
 from typing import Any
 
-from app.core.exceptions import ArchCADNotFoundError
+from app.core.exceptions import ArchCADError, ArchCADNotFoundError
 from app.core.settings import Settings
-from app.models.index_store import ArchCADIndexStore
+from app.models.index_store import MIGRATE_COMMAND, SCHEMA_VERSION
+from app.models.query_log import SLOW_QUERY_LOG
+from app.models.sharded_index_store import open_index_store
 from app.utils.file_refs import read_json_if_exists
 
 
@@ -13,14 +15,25 @@ class ArchCADSearchService:
 
     def __init__(self, settings: Settings) -> None:
         self.settings = settings
-        self.store = ArchCADIndexStore(settings.archcad_db_path)
+        self.store = open_index_store(settings)
 
     def status(self) -> dict[str, Any]:
         download_manifest = read_json_if_exists(self.settings.archcad_download_manifest_path)
         dataset_manifest = read_json_if_exists(self.settings.archcad_manifest_path)
         stats_cache = read_json_if_exists(self.settings.archcad_stats_path)
-        sqlite_available = self.settings.archcad_db_path.exists()
-        summary = self.store.summary() if sqlite_available else {"sample_count": 0, "element_count": 0, "qa_count": 0}
+        sqlite_available = self.store.exists()
+        summary = {"sample_count": 0, "element_count": 0, "qa_count": 0}
+        schema_version: int | None = SCHEMA_VERSION if sqlite_available else None
+        needs_migration = False
+        if sqlite_available:
+            # /status stays up on an index that every other endpoint rejects with 409.
+            try:
+                summary = self.store.summary()
+            except ArchCADError as exc:
+                if exc.status_code != 409 or "schema_version" not in exc.context:
+                    raise
+                schema_version = exc.context["schema_version"]
+                needs_migration = exc.context.get("fix") == MIGRATE_COMMAND
         return {
             "dataset_id": self.settings.archcad_dataset_id,
             "directories": {
@@ -36,14 +49,22 @@ class ArchCADSearchService:
                 "sample_count": dataset_manifest.get("sample_count", 0) if dataset_manifest else 0,
             },
             "index": {
-                "sqlite_path": str(self.settings.archcad_db_path),
+                "sqlite_path": str(
+                    self.settings.archcad_shard_dir if self.settings.archcad_shard_by_split else self.settings.archcad_db_path
+                ),
                 "sqlite_available": sqlite_available,
+                "sharded_by_split": self.settings.archcad_shard_by_split,
                 "jsonl_path": str(self.settings.archcad_jsonl_path),
                 "jsonl_available": self.settings.archcad_jsonl_path.exists(),
                 "semantic_index_path": str(self.settings.archcad_semantic_index_path),
                 "semantic_index_available": self.settings.archcad_semantic_index_path.exists(),
+                "posting_index_available": self.settings.archcad_posting_directory_path.exists(),
                 "stats_cache": stats_cache,
                 "summary": summary,
+                "schema_version": schema_version,
+                "required_schema_version": SCHEMA_VERSION,
+                "needs_migration": needs_migration,
+                "migrate_command": MIGRATE_COMMAND if needs_migration else None,
             },
         }
 
@@ -91,6 +112,8 @@ class ArchCADSearchService:
         limit: int,
         semantic: str | None = None,
         instance: str | None = None,
+        lod: int | None = None,
+        tolerance: float | None = None,
     ) -> dict[str, Any]:
         self._ensure_sample(sample_id)
         result = self.store.get_elements(
@@ -99,12 +122,73 @@ class ArchCADSearchService:
             limit=limit,
             semantic=semantic,
             instance=instance,
+            lod=lod,
+            tolerance=tolerance,
         )
         return {
             "sample_id": sample_id,
             "items": result["items"],
             "pagination": {"offset": offset, "limit": limit, "total": result["total"]},
-            "filters": {"semantic": semantic, "instance": instance},
+            "filters": {"semantic": semantic, "instance": instance, "lod": lod, "tolerance": tolerance},
+        }
+
+    def get_instances(
+        self,
+        *,
+        sample_id: str,
+        offset: int,
+        limit: int,
+        semantic: str | None = None,
+        bbox: tuple[float, ...] | None = None,
+    ) -> dict[str, Any]:
+        self._ensure_sample(sample_id)
+        result = self.store.search_instances(
+            offset=offset,
+            limit=limit,
+            sample_id=sample_id,
+            semantic=semantic,
+            bbox=_instance_bbox(bbox),
+        )
+        return {
+            "sample_id": sample_id,
+            "items": result["items"],
+            "pagination": {"offset": offset, "limit": limit, "total": result["total"]},
+            "filters": {"semantic": semantic, "bbox": list(bbox) if bbox else None},
+        }
+
+    def search_instances(
+        self,
+        *,
+        offset: int,
+        limit: int,
+        semantic: str | None = None,
+        instance: str | None = None,
+        split: str | None = None,
+        bbox: tuple[float, ...] | None = None,
+        min_elements: int | None = None,
+        max_elements: int | None = None,
+    ) -> dict[str, Any]:
+        result = self.store.search_instances(
+            offset=offset,
+            limit=limit,
+            semantic=semantic,
+            instance=instance,
+            split=split,
+            bbox=_instance_bbox(bbox),
+            min_elements=min_elements,
+            max_elements=max_elements,
+        )
+        return {
+            "items": result["items"],
+            "pagination": {"offset": offset, "limit": limit, "total": result["total"]},
+            "filters": {
+                "semantic": semantic,
+                "instance": instance,
+                "split": split,
+                "bbox": list(bbox) if bbox else None,
+                "min_elements": min_elements,
+                "max_elements": max_elements,
+            },
         }
 
     def get_qa(self, *, sample_id: str, offset: int, limit: int) -> dict[str, Any]:
@@ -127,17 +211,42 @@ class ArchCADSearchService:
         max_count: int | None,
         offset: int,
         limit: int,
+        op: str | None = None,
+        min_alignment: float | None = None,
+        exclude_duplicates: bool = False,
     ) -> dict[str, Any]:
-        result = self.store.search(
-            semantic=semantic,
-            instance=instance,
-            modalities=modalities,
-            split=split,
-            min_count=min_count,
-            max_count=max_count,
-            offset=offset,
-            limit=limit,
-        )
+        semantic_labels = _split_labels(semantic)
+        instance_labels = _split_labels(instance)
+        if op or len(semantic_labels) > 1 or len(instance_labels) > 1:
+            if min_count is not None or max_count is not None:
+                raise ArchCADError(
+                    "min_count/max_count are only supported for single-label searches",
+                    context={"semantic": semantic_labels, "instance": instance_labels, "op": op},
+                )
+            result = self._posting_search(
+                semantic_labels=semantic_labels,
+                instance_labels=instance_labels,
+                op=op or "and",
+                modalities=modalities or [],
+                split=split,
+                offset=offset,
+                limit=limit,
+                min_alignment=min_alignment,
+                exclude_duplicates=exclude_duplicates,
+            )
+        else:
+            result = self.store.search(
+                semantic=semantic,
+                instance=instance,
+                modalities=modalities,
+                split=split,
+                min_count=min_count,
+                max_count=max_count,
+                offset=offset,
+                limit=limit,
+                min_alignment=min_alignment,
+                exclude_duplicates=exclude_duplicates,
+            )
         return {
             "items": result["items"],
             "pagination": {"offset": offset, "limit": limit, "total": result["total"]},
@@ -148,6 +257,9 @@ class ArchCADSearchService:
                 "split": split,
                 "min_count": min_count,
                 "max_count": max_count,
+                "op": op,
+                "min_alignment": min_alignment,
+                "exclude_duplicates": exclude_duplicates,
             },
             # TODO: Extend this search service to use embeddings/vector DB retrieval for CAD RAG.
         }
@@ -162,6 +274,86 @@ class ArchCADSearchService:
             },
         }
 
+    def slow_queries(self, *, limit: int | None = None) -> dict[str, Any]:
+        return {
+            "enabled": SLOW_QUERY_LOG.enabled,
+            "threshold_ms": SLOW_QUERY_LOG.threshold_ms,
+            "items": SLOW_QUERY_LOG.top(limit),
+        }
+
+    def reset_slow_queries(self) -> dict[str, Any]:
+        SLOW_QUERY_LOG.reset()
+        return self.slow_queries()
+
+    def _posting_search(
+        self,
+        *,
+        semantic_labels: list[str],
+        instance_labels: list[str],
+        op: str,
+        modalities: list[str],
+        split: str | None,
+        offset: int,
+        limit: int,
+        min_alignment: float | None,
+        exclude_duplicates: bool,
+    ) -> dict[str, Any]:
+        # numpy-backed; loaded on the first boolean search (or by the startup warm-up).
+        from app.models.posting_index import POSTING_OPS, current_posting_index, popcount
+
+        if op not in POSTING_OPS:
+            raise ArchCADError("Invalid boolean operator", context={"op": op, "allowed": sorted(POSTING_OPS)})
+        index = current_posting_index(
+            self.settings.archcad_posting_lists_path,
+            self.settings.archcad_posting_directory_path,
+            self.store,
+        )
+        bitmap = index.universe()
+        if semantic_labels:
+            bitmap &= index.combine("semantic", semantic_labels, op)
+        if instance_labels:
+            bitmap &= index.combine("instance", instance_labels, op)
+        if split:
+            bitmap &= index.bitmap("split", split)
+        for modality in modalities:
+            bitmap &= index.bitmap("modality", modality)
+        if min_alignment is not None:
+            bitmap &= index.subset(self.store.aligned_sample_ids(min_alignment))
+        if exclude_duplicates:
+            bitmap &= index.complement(index.subset(self.store.duplicate_sample_ids()))
+
+        page = index.ordinals(bitmap)[offset : offset + limit]
+        items = self.store.get_sample_summaries([index.sample_ids[ordinal] for ordinal in page])
+        for item in items:
+            if op == "not":
+                # Matches hold none of the labels.
+                item["match_count"] = 0
+                continue
+            semantic_counts = item["stats"].get("semantic_counts", {})
+            instance_counts = item["stats"].get("instance_counts", {})
+            item["match_count"] = sum(semantic_counts.get(label, 0) for label in semantic_labels) + sum(
+                instance_counts.get(label, 0) for label in instance_labels
+            )
+        return {"items": items, "total": popcount(bitmap)}
+
     def _ensure_sample(self, sample_id: str) -> None:
         if not self.store.get_sample(sample_id):
             raise ArchCADNotFoundError("Sample not found", context={"sample_id": sample_id})
+
+
+def _split_labels(raw_labels: str | None) -> list[str]:
+    if not raw_labels:
+        return []
+    return [label.strip() for label in raw_labels.split(",") if label.strip()]
+
+
+def _instance_bbox(bbox: tuple[float, ...] | None) -> tuple[float, float, float, float] | None:
+    if bbox is None:
+        return None
+    if len(bbox) != 4 or bbox[0] > bbox[2] or bbox[1] > bbox[3]:
+        raise ArchCADError(
+            "Invalid instance bbox filter",
+            context={"bbox": list(bbox), "expected": "min_x,min_y,max_x,max_y"},
+        )
+    min_x, min_y, max_x, max_y = bbox
+    return min_x, min_y, max_x, max_y
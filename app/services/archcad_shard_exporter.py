@@ -0,0 +1,202 @@
+from __future__ import annotations
+
+import io
+import json
+import os
+import re
+import tarfile
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any
+
+from app.core.exceptions import ArchCADIndexError
+from app.core.logging import get_logger
+from app.core.settings import Settings
+from app.models.sharded_index_store import open_index_store
+from app.schemas.archcad import ArchCADDatasetManifest, ArchCADManifestRecord
+from app.services.archcad_inspector import ArchCADInspector
+from app.utils.file_refs import parse_file_ref, read_json_if_exists, write_json
+
+logger = get_logger(__name__)
+
+SHARD_INDEX_NAME = "shards.json"
+SHARD_NAME_PATTERN = re.compile(r".+-\d{6}\.tar")
+# WebDataset-style field prefixes; everything after the first dot is the field
+# name, so modalities whose file suffix is ambiguous get a prefix.
+MODALITY_FIELD_PREFIXES = {"json": "cad", "qa": "qa", "pointcloud": "pointcloud"}
+
+
+def shard_key(sample_id: str) -> str:
+    """Sample key used as the tar member basename (dots would split the key)."""
+    return sample_id.replace(".", "_")
+
+
+def member_extension(modality: str, suffix: str) -> str:
+    prefix = MODALITY_FIELD_PREFIXES.get(modality)
+    return f"{prefix}{suffix}" if prefix else suffix.lstrip(".")
+
+
+def select_shards(index: dict[str, Any], *, split: str | None = None, semantic: str | None = None) -> list[str]:
+    """Return shard paths from a shard index that may contain ``split`` / ``semantic`` samples."""
+    return [
+        shard["path"]
+        for shard in index.get("shards", [])
+        if (split is None or shard["split"] == split) and (semantic is None or semantic in shard["semantics"])
+    ]
+
+
+class _ArchiveReader:
+    """Keep zip archives open for the lifetime of one shard write."""
+
+    def __init__(self) -> None:
+        self._archives: dict[Path, zipfile.ZipFile] = {}
+
+    def read(self, file_ref: str) -> bytes:
+        path, member = parse_file_ref(file_ref)
+        if not member:
+            return path.read_bytes()
+        archive = self._archives.get(path)
+        if archive is None:
+            archive = self._archives[path] = zipfile.ZipFile(path)
+        return archive.read(member)
+
+    def close(self) -> None:
+        for archive in self._archives.values():
+            archive.close()
+        self._archives.clear()
+
+
+def _add_member(handle: tarfile.TarFile, name: str, payload: bytes) -> None:
+    info = tarfile.TarInfo(name)
+    info.size = len(payload)
+    info.mode = 0o644
+    handle.addfile(info, io.BytesIO(payload))
+
+
+def _write_shard(job: tuple[Settings, str, str, list[dict[str, Any]]]) -> dict[str, Any]:
+    settings, shard_path, split, records = job
+    store = open_index_store(settings)
+    reader = _ArchiveReader()
+    temp_path = Path(f"{shard_path}.tmp")
+    sample_ids: list[str] = []
+    semantics: set[str] = set()
+    failures: list[dict[str, str]] = []
+    try:
+        with tarfile.open(temp_path, "w") as handle:
+            for record in records:
+                sample_id = record["sample_id"]
+                try:
+                    normalized = store.get_sample(sample_id)
+                    if normalized is None:
+                        raise ArchCADIndexError("Sample is not indexed", context={"sample_id": sample_id})
+                    members = []
+                    for modality, file_ref in sorted(record["file_paths"].items()):
+                        suffix = Path(parse_file_ref(file_ref)[1] or file_ref).suffix.lower()
+                        members.append((member_extension(modality, suffix), reader.read(file_ref)))
+                    members.append(("normalized.json", json.dumps(normalized, ensure_ascii=False).encode("utf-8")))
+                except Exception as exc:
+                    failures.append({"sample_id": sample_id, "error": str(exc)})
+                    continue
+
+                key = shard_key(sample_id)
+                for extension, payload in members:
+                    _add_member(handle, f"{key}.{extension}", payload)
+                sample_ids.append(sample_id)
+                semantics.update((normalized.get("stats") or {}).get("semantic_counts", {}))
+        os.replace(temp_path, shard_path)
+    finally:
+        reader.close()
+        temp_path.unlink(missing_ok=True)
+
+    return {
+        "path": shard_path,
+        "split": split,
+        "sample_count": len(sample_ids),
+        "byte_size": Path(shard_path).stat().st_size,
+        "sample_ids": sample_ids,
+        "semantics": sorted(semantics),
+        "failures": failures,
+    }
+
+
+class ArchCADShardExporter:
+    """Repack aligned ArchCAD samples into fixed-size WebDataset-style tar shards."""
+
+    def __init__(self, settings: Settings) -> None:
+        self.settings = settings
+
+    def export(
+        self,
+        *,
+        output_dir: Path | None = None,
+        samples_per_shard: int = 1000,
+        workers: int | None = None,
+        split: str | None = None,
+        aligned_only: bool = True,
+    ) -> dict[str, Any]:
+        target_dir = output_dir or self.settings.archcad_shard_export_dir
+        target_dir.mkdir(parents=True, exist_ok=True)
+        records = self._records(split=split, aligned_only=aligned_only)
+        if not records:
+            raise ArchCADIndexError(
+                "No ArchCAD samples are eligible for shard export",
+                context={"split": split, "aligned_only": aligned_only},
+            )
+
+        by_split: dict[str, list[dict[str, Any]]] = {}
+        for record in records:
+            by_split.setdefault(record.split or "unsplit", []).append(record.model_dump(mode="json"))
+
+        jobs: list[tuple[Settings, str, str, list[dict[str, Any]]]] = []
+        for split_name, split_records in sorted(by_split.items()):
+            for shard_index, start in enumerate(range(0, len(split_records), samples_per_shard)):
+                shard_path = target_dir / f"{split_name}-{shard_index:06d}.tar"
+                shard_records = split_records[start : start + samples_per_shard]
+                jobs.append((self.settings, str(shard_path), split_name, shard_records))
+
+        with ProcessPoolExecutor(max_workers=workers or os.cpu_count() or 1) as executor:
+            shards = list(executor.map(_write_shard, jobs))
+
+        failures = [failure for shard in shards for failure in shard.pop("failures")]
+        for shard in shards:
+            shard["path"] = Path(shard["path"]).name
+        # Shards from an earlier, larger export would still match loaders that glob the directory.
+        written = {shard["path"] for shard in shards}
+        for stale in target_dir.glob("*.tar"):
+            if SHARD_NAME_PATTERN.fullmatch(stale.name) and stale.name not in written:
+                stale.unlink()
+        index = {
+            "dataset_id": self.settings.archcad_dataset_id,
+            "generated_at": datetime.now(timezone.utc).isoformat(),
+            "samples_per_shard": samples_per_shard,
+            "aligned_only": aligned_only,
+            "sample_count": sum(shard["sample_count"] for shard in shards),
+            "shards": shards,
+        }
+        write_json(target_dir / SHARD_INDEX_NAME, index)
+        if failures:
+            logger.warning(
+                "ArchCAD shard export skipped samples",
+                extra={"context": {"failed": len(failures), "first_failure": failures[0]}},
+            )
+        return {
+            "output_dir": str(target_dir),
+            "index_path": str(target_dir / SHARD_INDEX_NAME),
+            "shard_count": len(shards),
+            "sample_count": index["sample_count"],
+            "byte_size": sum(shard["byte_size"] for shard in shards),
+            "failed_samples": len(failures),
+            "failures": failures[:100],
+        }
+
+    def _records(self, *, split: str | None, aligned_only: bool) -> list[ArchCADManifestRecord]:
+        payload = read_json_if_exists(self.settings.archcad_manifest_path) or ArchCADInspector(self.settings).inspect()
+        manifest = ArchCADDatasetManifest.model_validate(payload)
+        return [
+            record
+            for record in manifest.samples
+            if (split is None or record.split == split)
+            and (not aligned_only or record.validation_flags.get("is_fully_aligned"))
+        ]
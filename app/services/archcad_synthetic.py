@@ -0,0 +1,381 @@
+from __future__ import annotations
+
+import io
+import json
+import os
+import struct
+import zipfile
+import zlib
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Iterator
+
+import numpy as np
+
+from app.core.exceptions import ArchCADError
+from app.core.logging import get_logger
+from app.services.archcad_masks import element_polylines, rasterize_segments
+from app.utils.file_refs import write_json
+
+logger = get_logger(__name__)
+
+DEFAULT_SPLITS = {"train": 0.8, "val": 0.1, "test": 0.1}
+DEFAULT_SEMANTICS = {
+    "wall": 0.45,
+    "window": 0.12,
+    "single_door": 0.1,
+    "double_door": 0.03,
+    "column": 0.08,
+    "stair": 0.05,
+    "elevator": 0.02,
+    "toilet": 0.05,
+    "furniture": 0.1,
+}
+# Modality -> (archive name, member suffix, zip compression).
+SYNTHETIC_ARCHIVES = {
+    "image": ("png.zip", ".png", zipfile.ZIP_STORED),
+    "svg": ("svg.zip", ".svg", zipfile.ZIP_DEFLATED),
+    "json": ("json.zip", ".json", zipfile.ZIP_DEFLATED),
+    "qa": ("caption.zip", ".txt", zipfile.ZIP_DEFLATED),
+    "pointcloud": ("point.zip", ".npy", zipfile.ZIP_STORED),
+}
+# Written under assets/, which the inspector skips.
+TRUTH_PATH = Path("assets") / "synthetic_truth.jsonl"
+DRAWING_EXTENT = 1000.0
+_INSTANCE_SIZE = 4
+# Near-duplicates: the source plan moved by up to this share of the extent, with this share of elements dropped.
+_DUPLICATE_SHIFT = 0.05
+_DUPLICATE_DROP_RATE = 0.03
+
+
+def parse_weights(raw: str | None, default: dict[str, float]) -> dict[str, float]:
+    """Parse ``name=weight,name=weight`` into normalized weights."""
+    if not raw:
+        weights = dict(default)
+    else:
+        weights = {}
+        for item in raw.split(","):
+            name, _, value = item.partition("=")
+            try:
+                weights[name.strip()] = float(value)
+            except ValueError as exc:
+                raise ArchCADError("Invalid weight specification", context={"item": item}) from exc
+    total = sum(weights.values())
+    if total <= 0 or any(value < 0 for value in weights.values()):
+        raise ArchCADError("Weights must be non-negative and sum to a positive value", context={"weights": weights})
+    return {name: value / total for name, value in weights.items()}
+
+
+def encode_png(pixels: np.ndarray) -> bytes:
+    """Encode a ``(H, W)`` uint8 grayscale array as PNG without Pillow."""
+    height, width = pixels.shape
+    rows = np.hstack((np.zeros((height, 1), dtype=np.uint8), pixels.astype(np.uint8)))
+
+    def chunk(kind: bytes, data: bytes) -> bytes:
+        return struct.pack(">I", len(data)) + kind + data + struct.pack(">I", zlib.crc32(kind + data) & 0xFFFFFFFF)
+
+    header = struct.pack(">IIBBBBB", width, height, 8, 0, 0, 0, 0)
+    return (
+        b"\x89PNG\r\n\x1a\n"
+        + chunk(b"IHDR", header)
+        + chunk(b"IDAT", zlib.compress(rows.tobytes(), 6))
+        + chunk(b"IEND", b"")
+    )
+
+
+class ArchCADSyntheticGenerator:
+    """Write a synthetic ArchCAD-shaped dataset for offline scale testing.
+
+    Produces ``data/{png,svg,json,caption,point}.zip`` with ``<split>/<id>``
+    members that the inspector, normalizer and indexer consume unchanged.
+    Every sample is derived from ``(seed, index)`` alone, so output is
+    reproducible regardless of worker count. Deliberate defects — missing
+    modalities, SVG geometry offset from the JSON, relabelled SVG semantics
+    and near-duplicate copies of earlier plans (in any split) — are drawn per
+    sample and recorded in ``assets/synthetic_truth.jsonl``.
+    """
+
+    def __init__(
+        self,
+        output_dir: Path,
+        *,
+        samples: int,
+        splits: dict[str, float] | None = None,
+        semantics: dict[str, float] | None = None,
+        elements_min: int = 20,
+        elements_max: int = 200,
+        qa_density: float = 2.0,
+        point_count: int = 2048,
+        image_size: int = 256,
+        missing_rate: float = 0.02,
+        offset_rate: float = 0.02,
+        label_noise_rate: float = 0.01,
+        duplicate_rate: float = 0.01,
+        seed: int = 0,
+    ) -> None:
+        if samples < 1 or elements_min < 1 or elements_max < elements_min:
+            raise ArchCADError(
+                "Invalid synthetic dataset size",
+                context={"samples": samples, "elements_min": elements_min, "elements_max": elements_max},
+            )
+        self.output_dir = output_dir
+        self.samples = samples
+        self.splits = splits or dict(DEFAULT_SPLITS)
+        self.semantics = semantics or dict(DEFAULT_SEMANTICS)
+        self.elements_min = elements_min
+        self.elements_max = elements_max
+        self.qa_density = qa_density
+        self.point_count = point_count
+        self.image_size = image_size
+        self.missing_rate = missing_rate
+        self.offset_rate = offset_rate
+        self.label_noise_rate = label_noise_rate
+        self.duplicate_rate = duplicate_rate
+        self.seed = seed
+
+    def generate(self, *, workers: int | None = None, chunk_size: int = 256) -> dict[str, Any]:
+        data_dir = self.output_dir / "data"
+        data_dir.mkdir(parents=True, exist_ok=True)
+        truth_path = self.output_dir / TRUTH_PATH
+        truth_path.parent.mkdir(parents=True, exist_ok=True)
+        archives = {
+            modality: zipfile.ZipFile(data_dir / name, "w", compression=compression)
+            for modality, (name, _, compression) in SYNTHETIC_ARCHIVES.items()
+        }
+        counts = {modality: 0 for modality in SYNTHETIC_ARCHIVES}
+        defects = {"missing": 0, "offset": 0, "label_noise": 0, "duplicate": 0}
+        try:
+            with truth_path.open("w", encoding="utf-8") as truth_handle:
+                for sample in self._generated(workers=workers, chunk_size=chunk_size):
+                    for modality, payload in sample.pop("members").items():
+                        archives[modality].writestr(sample["member"] + SYNTHETIC_ARCHIVES[modality][1], payload)
+                        counts[modality] += 1
+                    defects["missing"] += int(bool(sample["missing_modalities"]))
+                    defects["offset"] += int(sample["svg_offset"] is not None)
+                    defects["label_noise"] += int(bool(sample["relabelled_elements"]))
+                    defects["duplicate"] += int(sample["duplicate_of"] is not None)
+                    truth_handle.write(json.dumps(sample) + "\n")
+        finally:
+            for archive in archives.values():
+                archive.close()
+
+        summary = {
+            "output_dir": str(self.output_dir),
+            "generated_at": datetime.now(timezone.utc).isoformat(),
+            "sample_count": self.samples,
+            "seed": self.seed,
+            "modality_counts": counts,
+            "defect_counts": defects,
+            "byte_size": sum((data_dir / name).stat().st_size for name, _, _ in SYNTHETIC_ARCHIVES.values()),
+            "truth_path": str(truth_path),
+        }
+        write_json(self.output_dir / "assets" / "synthetic_summary.json", summary)
+        logger.info("Synthetic ArchCAD dataset generated", extra={"context": summary})
+        return summary
+
+    def _generated(self, *, workers: int | None, chunk_size: int) -> Iterator[dict[str, Any]]:
+        chunks = [(self, start, min(start + chunk_size, self.samples)) for start in range(0, self.samples, chunk_size)]
+        if workers == 1:
+            for chunk in chunks:
+                yield from _generate_chunk(chunk)
+            return
+        worker_count = workers or os.cpu_count() or 1
+        # Bound in-flight chunks so memory stays flat while the zips are written in order.
+        with ProcessPoolExecutor(max_workers=worker_count) as executor:
+            pending: deque[Future[list[dict[str, Any]]]] = deque()
+            for chunk in chunks:
+                pending.append(executor.submit(_generate_chunk, chunk))
+                if len(pending) >= worker_count * 2:
+                    yield from pending.popleft().result()
+            while pending:
+                yield from pending.popleft().result()
+
+    def sample(self, index: int) -> dict[str, Any]:
+        rng = np.random.default_rng([self.seed, index])
+        split = str(rng.choice(list(self.splits), p=list(self.splits.values())))
+        sample_name = f"synthetic-{index:07d}"
+        elements = self._elements(rng)
+        source = self._duplicate_source(index)
+        duplicate_of = None
+        if source is not None:
+            duplicate_of, elements = self._near_copy(source, np.random.default_rng([self.seed, index, 1]))
+
+        offset = None
+        if rng.random() < self.offset_rate:
+            offset = [float(value) for value in rng.uniform(-40, 40, size=2)]
+        relabelled = []
+        svg_semantics = [element["semantic"] for element in elements]
+        if self.label_noise_rate > 0:
+            noisy = np.flatnonzero(rng.random(len(elements)) < self.label_noise_rate)
+            labels = list(self.semantics)
+            for element_index in noisy:
+                svg_semantics[element_index] = str(rng.choice(labels))
+                relabelled.append(int(element_index))
+
+        # Flatten once; the SVG, raster and point cloud all derive from the same chains.
+        chains = [element_polylines(self._normalized(element))[0] for element in elements]
+        segments = np.vstack([np.hstack((chain[:-1], chain[1:])) for chain in chains])
+        members = {
+            "json": json.dumps({"elements": elements}).encode("utf-8"),
+            "svg": self._svg(elements, chains, svg_semantics, offset).encode("utf-8"),
+            "image": self._png(segments),
+            "qa": self._captions(rng, elements).encode("utf-8"),
+            "pointcloud": self._points(rng, segments),
+        }
+        missing = [modality for modality in members if rng.random() < self.missing_rate]
+        for modality in missing:
+            del members[modality]
+
+        return {
+            "sample_id": f"{split}/{sample_name}",
+            "member": f"{split}/{sample_name}",
+            "element_count": len(elements),
+            "missing_modalities": missing,
+            "svg_offset": offset,
+            "relabelled_elements": relabelled,
+            "duplicate_of": duplicate_of,
+            "members": members,
+        }
+
+    def _duplicate_source(self, index: int) -> int | None:
+        """Index of the original plan ``index`` copies, following copies of copies; ``None`` if original."""
+        source = None
+        while index > 0:
+            # A separate stream, so the decision is known for any index without generating it.
+            rng = np.random.default_rng([self.seed, index, 0])
+            if rng.random() >= self.duplicate_rate:
+                break
+            source = index = int(rng.integers(0, index))
+        return source
+
+    def _near_copy(self, source: int, rng: np.random.Generator) -> tuple[str, list[dict[str, Any]]]:
+        """The source sample's elements, moved as a whole and with a few dropped."""
+        source_rng = np.random.default_rng([self.seed, source])
+        split = str(source_rng.choice(list(self.splits), p=list(self.splits.values())))
+        elements = self._elements(source_rng)
+        keep = rng.random(len(elements)) >= _DUPLICATE_DROP_RATE
+        keep[0] = True
+        shift_x, shift_y = np.round(rng.uniform(-1, 1, size=2) * DRAWING_EXTENT * _DUPLICATE_SHIFT, 2).tolist()
+        copied = []
+        for element, kept in zip(elements, keep.tolist()):
+            if not kept:
+                continue
+            for key in ("center", "start", "end"):
+                if key in element:
+                    element[key] = [round(element[key][0] + shift_x, 2), round(element[key][1] + shift_y, 2)]
+            if "points" in element:
+                element["points"] = [[round(x + shift_x, 2), round(y + shift_y, 2)] for x, y in element["points"]]
+            copied.append(element)
+        return f"{split}/synthetic-{source:07d}", copied
+
+    def _elements(self, rng: np.random.Generator) -> list[dict[str, Any]]:
+        count = int(rng.integers(self.elements_min, self.elements_max + 1))
+        semantics = rng.choice(list(self.semantics), size=count, p=list(self.semantics.values()))
+        anchors = np.round(rng.uniform(0, DRAWING_EXTENT * 0.9, size=(count, 2)), 2)
+        spans = np.round(rng.uniform(10, DRAWING_EXTENT * 0.1, size=(count, 2)), 2)
+        instance_counters: dict[str, int] = {}
+        elements = []
+        for position, semantic in enumerate(semantics.tolist()):
+            x, y = anchors[position].tolist()
+            width, height = spans[position].tolist()
+            instance_index = instance_counters.get(semantic, 0)
+            instance_counters[semantic] = instance_index + 1
+            element: dict[str, Any] = {
+                "id": f"e{position}",
+                "semantic": semantic,
+                "instance": f"{semantic}_{instance_index // _INSTANCE_SIZE}",
+                "layer": semantic.upper(),
+            }
+            if semantic in {"single_door", "double_door"}:
+                start_angle = float(rng.choice([0, 90, 180, 270]))
+                element.update(
+                    type="ARC",
+                    center=[x, y],
+                    radius=round(width / 2, 2),
+                    start_angle=start_angle,
+                    end_angle=start_angle + 90,
+                )
+            elif semantic in {"column", "toilet"}:
+                element.update(type="CIRCLE", center=[x, y], radius=round(min(width, height) / 4, 2))
+            elif semantic in {"window", "stair", "elevator", "furniture"}:
+                element.update(
+                    type="POLYLINE",
+                    points=[[x, y], [x + width, y], [x + width, y + height], [x, y + height], [x, y]],
+                )
+            elif rng.random() < 0.5:
+                element.update(type="LINE", start=[x, y], end=[x + width * 3, y])
+            else:
+                element.update(type="LINE", start=[x, y], end=[x, y + height * 3])
+            elements.append(element)
+        return elements
+
+    def _svg(
+        self,
+        elements: list[dict[str, Any]],
+        chains: list[np.ndarray],
+        semantics: list[str],
+        offset: list[float] | None,
+    ) -> str:
+        dx, dy = offset or (0.0, 0.0)
+        nodes = []
+        for element, chain, semantic in zip(elements, chains, semantics):
+            attributes = f'class="{semantic}" data-instance="{element["instance"]}" id="{element["id"]}"'
+            if element["type"] == "LINE":
+                (x1, y1), (x2, y2) = element["start"], element["end"]
+                nodes.append(f'<line x1="{x1 + dx}" y1="{y1 + dy}" x2="{x2 + dx}" y2="{y2 + dy}" {attributes}/>')
+            elif element["type"] == "CIRCLE":
+                cx, cy = element["center"]
+                nodes.append(f'<circle cx="{cx + dx}" cy="{cy + dy}" r="{element["radius"]}" {attributes}/>')
+            else:
+                points = " ".join(f"{round(x + dx, 2)},{round(y + dy, 2)}" for x, y in chain.tolist())
+                nodes.append(f'<polyline points="{points}" {attributes}/>')
+        return (
+            f'<svg xmlns="http://www.w3.org/2000/svg" viewBox="0 0 {DRAWING_EXTENT:g} {DRAWING_EXTENT:g}">'
+            + "".join(nodes)
+            + "</svg>"
+        )
+
+    def _png(self, segments: np.ndarray) -> bytes:
+        mask = rasterize_segments(
+            segments,
+            np.ones(len(segments), dtype=np.int64),
+            transform=(self.image_size / DRAWING_EXTENT, 0.0, 0.0),
+            width=self.image_size,
+            height=self.image_size,
+        )
+        return encode_png(np.where(mask > 0, 0, 255).astype(np.uint8))
+
+    def _captions(self, rng: np.random.Generator, elements: list[dict[str, Any]]) -> str:
+        counts: dict[str, int] = {}
+        for element in elements:
+            counts[element["semantic"]] = counts.get(element["semantic"], 0) + 1
+        labels = sorted(counts)
+        lines = []
+        for _ in range(int(rng.poisson(self.qa_density))):
+            semantic = str(rng.choice(labels))
+            label = semantic.replace("_", " ")
+            lines.append(f"Question: How many {label} elements are in this drawing?")
+            lines.append(f"Answer: {counts[semantic]}")
+        return "\n".join(lines)
+
+    def _points(self, rng: np.random.Generator, segments: np.ndarray) -> bytes:
+        picks = rng.integers(0, len(segments), size=self.point_count)
+        t = rng.random(self.point_count)[:, None]
+        xy = segments[picks, :2] + t * (segments[picks, 2:] - segments[picks, :2])
+        z = rng.uniform(0, 3000, size=(self.point_count, 1))
+        buffer = io.BytesIO()
+        np.save(buffer, np.hstack((xy, z)).astype(np.float32))
+        return buffer.getvalue()
+
+    def _normalized(self, element: dict[str, Any]) -> dict[str, Any]:
+        geometry = {key: element[key] for key in ("start", "end", "center", "radius", "points") if key in element}
+        if element["type"] == "ARC":
+            geometry.update(start_angle=element["start_angle"], end_angle=element["end_angle"])
+        return {"type": element["type"], "geometry": geometry}
+
+
+def _generate_chunk(job: tuple[ArchCADSyntheticGenerator, int, int]) -> list[dict[str, Any]]:
+    generator, start, stop = job
+    return [generator.sample(index) for index in range(start, stop)]
@@ -0,0 +1,313 @@
+from __future__ import annotations
+
+import struct
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any
+
+import numpy as np
+
+from app.core.exceptions import ArchCADError, ArchCADNotFoundError
+from app.core.settings import Settings
+from app.models.sharded_index_store import open_index_store
+from app.services.archcad_masks import elements_extent, element_polylines, svg_extent
+from app.utils.disk_cache import cache_key, shared_disk_cache
+from app.utils.file_refs import file_ref_fingerprint
+
+# Integer grid per tile side, and the margin kept outside it so strokes that
+# cross a tile edge join up seamlessly with the neighbouring tile.
+TILE_EXTENT = 4096
+TILE_BUFFER = 64
+TILE_MAX_ZOOM = 10
+TILE_MEDIA_TYPE = "application/vnd.archcad.tile"
+TILE_FORMAT_VERSION = 1
+
+_MAGIC = b"ACVT"
+# magic, version, flags, extent, buffer, label count, feature count, vertex count,
+# then the tile's drawing-unit min_x, min_y and side length
+_HEADER = struct.Struct("<4sBBHHHIIddd")
+_FEATURE_DTYPE = np.dtype([("element", "<u4"), ("label", "<u2"), ("vertices", "<u4")])
+# Flattened samples kept in memory, so consecutive tiles of one sample skip the payload decode.
+_PREPARED_CACHE_SIZE = 32
+
+
+@dataclass(frozen=True)
+class _PreparedSample:
+    """A sample's elements flattened into one segment array, plus its tile root."""
+
+    segments: np.ndarray  # (M, 4) x0, y0, x1, y1 in drawing units
+    chains: np.ndarray  # (M,) chain id; pieces never join across chains
+    elements: np.ndarray  # (M,) element index in the sample payload
+    semantics: np.ndarray  # (M,) index into ``labels``
+    labels: list[str]
+    origin: tuple[float, float]
+    size: float
+
+
+_PREPARED: OrderedDict[str, _PreparedSample] = OrderedDict()
+_PREPARED_LOCK = threading.Lock()
+
+
+def _prepare(sample: dict[str, Any]) -> _PreparedSample:
+    modalities = sample.get("modalities") or {}
+    elements = sample.get("elements") or []
+    extent = (svg_extent(modalities["svg"]) if modalities.get("svg") else None) or elements_extent(elements)
+    if extent is None:
+        raise ArchCADError(
+            "Sample has no geometry to tile",
+            status_code=409,
+            context={"sample_id": sample.get("sample_id")},
+        )
+    labels: dict[str, int] = {}
+    chains: list[np.ndarray] = []
+    owners: list[tuple[int, int]] = []
+    for index, element in enumerate(elements):
+        label = labels.setdefault(element.get("semantic") or "", len(labels))
+        for chain in element_polylines(element):
+            chains.append(np.hstack((chain[:-1], chain[1:])))
+            owners.append((index, label))
+    counts = np.fromiter((len(chain) for chain in chains), dtype=np.int64, count=len(chains))
+    owner_array = np.asarray(owners, dtype=np.int64).reshape(-1, 2)
+    min_x, min_y, width, height = extent
+    return _PreparedSample(
+        segments=np.vstack(chains) if chains else np.zeros((0, 4)),
+        chains=np.repeat(np.arange(len(chains)), counts),
+        elements=np.repeat(owner_array[:, 0], counts),
+        semantics=np.repeat(owner_array[:, 1], counts),
+        labels=list(labels),
+        origin=(float(min_x), float(min_y)),
+        # Square root tile over the drawing extent, anchored at its top-left corner.
+        size=float(max(width, height)),
+    )
+
+
+def tile_bounds(origin: tuple[float, float], size: float, z: int, x: int, y: int) -> tuple[float, float, float, float]:
+    """Drawing-unit ``(min_x, min_y, max_x, max_y)`` of tile ``z/x/y``; y grows downward like SVG."""
+    tile_size = size / (1 << z)
+    min_x, min_y = origin[0] + x * tile_size, origin[1] + y * tile_size
+    return min_x, min_y, min_x + tile_size, min_y + tile_size
+
+
+def clip_segments(segments: np.ndarray, box: tuple[float, float, float, float]) -> tuple[np.ndarray, np.ndarray]:
+    """Liang-Barsky clip to ``box``; returns ``(t, keep)`` with ``t`` the (M, 2) kept parameter range."""
+    x0, y0, x1, y1 = segments.T
+    dx, dy = x1 - x0, y1 - y0
+    p = np.stack((-dx, dx, -dy, dy))
+    q = np.stack((x0 - box[0], box[2] - x0, y0 - box[1], box[3] - y0))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        ratios = q / p
+    t0 = np.max(np.where(p < 0, ratios, 0.0), axis=0)
+    t1 = np.min(np.where(p > 0, ratios, 1.0), axis=0)
+    keep = (t0 <= t1) & ~np.any((p == 0) & (q < 0), axis=0)
+    return np.column_stack((t0, t1)), keep
+
+
+def encode_tile(prepared: _PreparedSample, z: int, x: int, y: int) -> bytes:
+    """Clip, quantize and delta-encode the segments that touch tile ``z/x/y``.
+
+    Layout (little-endian): header (including the tile's drawing-unit origin
+    and side, to map tile coordinates back), label table (u8 length + UTF-8 each),
+    feature table (u32 element index, u16 label, u32 vertex count) and int16
+    vertex pairs. The first vertex of each feature is absolute, the rest are
+    deltas from the previous vertex. Tile coordinates run 0..``TILE_EXTENT``
+    with y downward; strokes continue ``TILE_BUFFER`` units past each edge.
+    """
+    min_x, min_y, max_x, max_y = tile_bounds(prepared.origin, prepared.size, z, x, y)
+    scale = TILE_EXTENT / (max_x - min_x)
+    margin = TILE_BUFFER / scale
+    box = (min_x - margin, min_y - margin, max_x + margin, max_y + margin)
+
+    segments = prepared.segments
+    candidates = np.flatnonzero(
+        (np.minimum(segments[:, 0], segments[:, 2]) <= box[2])
+        & (np.maximum(segments[:, 0], segments[:, 2]) >= box[0])
+        & (np.minimum(segments[:, 1], segments[:, 3]) <= box[3])
+        & (np.maximum(segments[:, 1], segments[:, 3]) >= box[1])
+    )
+    t, keep = clip_segments(segments[candidates], box)
+    kept, t = candidates[keep], t[keep]
+    labels: list[str] = []
+    features = np.zeros(0, dtype=_FEATURE_DTYPE)
+    coords = np.zeros((0, 2), dtype=np.int16)
+    if len(kept):
+        start, delta = segments[kept, :2], segments[kept, 2:] - segments[kept, :2]
+        origin = np.array([min_x, min_y])
+        q_start = np.rint((start + t[:, :1] * delta - origin) * scale).astype(np.int64)
+        q_end = np.rint((start + t[:, 1:] * delta - origin) * scale).astype(np.int64)
+
+        # A piece continues while segments are consecutive in one chain and unclipped at the joint.
+        new_piece = np.ones(len(kept), dtype=bool)
+        new_piece[1:] = (
+            (np.diff(kept) != 1)
+            | (np.diff(prepared.chains[kept]) != 0)
+            | (t[:-1, 1] < 1.0)
+            | (t[1:, 0] > 0.0)
+        )
+        piece_of_segment = np.cumsum(new_piece) - 1
+        # Each segment contributes its end vertex; a piece's first segment also its start.
+        per_segment = 1 + new_piece.astype(np.int64)
+        segment_of_vertex = np.repeat(np.arange(len(kept)), per_segment)
+        is_start = np.zeros(len(segment_of_vertex), dtype=bool)
+        is_start[np.cumsum(per_segment)[new_piece] - 2] = True
+        vertices = np.where(is_start[:, None], q_start[segment_of_vertex], q_end[segment_of_vertex])
+        piece_of_vertex = piece_of_segment[segment_of_vertex]
+
+        # Drop vertices that quantize onto their predecessor, then pieces left with one vertex.
+        repeated = np.zeros(len(vertices), dtype=bool)
+        repeated[1:] = (piece_of_vertex[1:] == piece_of_vertex[:-1]) & np.all(vertices[1:] == vertices[:-1], axis=1)
+        vertices, piece_of_vertex = vertices[~repeated], piece_of_vertex[~repeated]
+        piece_sizes = np.bincount(piece_of_vertex, minlength=int(piece_of_segment[-1]) + 1)
+        solid = piece_sizes[piece_of_vertex] >= 2
+        vertices, piece_of_vertex = vertices[solid], piece_of_vertex[solid]
+        pieces = np.flatnonzero(piece_sizes >= 2)
+
+        first_segment = np.flatnonzero(new_piece)[pieces]
+        used_labels, label_index = np.unique(prepared.semantics[kept[first_segment]], return_inverse=True)
+        labels = [prepared.labels[label] for label in used_labels.tolist()]
+        features = np.zeros(len(pieces), dtype=_FEATURE_DTYPE)
+        features["element"] = prepared.elements[kept[first_segment]]
+        features["label"] = label_index
+        features["vertices"] = piece_sizes[pieces]
+
+        deltas = vertices.copy()
+        continues = np.zeros(len(vertices), dtype=bool)
+        continues[1:] = piece_of_vertex[1:] == piece_of_vertex[:-1]
+        deltas[continues] -= vertices[np.flatnonzero(continues) - 1]
+        coords = deltas.astype(np.int16)
+
+    encoded_labels = b"".join(
+        struct.pack("<B", len(raw)) + raw for raw in (label.encode("utf-8")[:255] for label in labels)
+    )
+    header = _HEADER.pack(
+        _MAGIC,
+        TILE_FORMAT_VERSION,
+        0,
+        TILE_EXTENT,
+        TILE_BUFFER,
+        len(labels),
+        len(features),
+        len(coords),
+        min_x,
+        min_y,
+        max_x - min_x,
+    )
+    return header + encoded_labels + features.tobytes() + coords.tobytes()
+
+
+def decode_tile(payload: bytes) -> dict[str, Any]:
+    """Inverse of ``encode_tile``: features with absolute tile coordinates."""
+    header = tile_header(payload)
+    if header["magic"] != _MAGIC or header["version"] != TILE_FORMAT_VERSION:
+        raise ArchCADError("Unsupported tile format", context={"magic": header["magic"].hex(), "version": header["version"]})
+    offset = _HEADER.size
+    labels = []
+    for _ in range(header["label_count"]):
+        length = payload[offset]
+        labels.append(payload[offset + 1 : offset + 1 + length].decode("utf-8"))
+        offset += 1 + length
+    features = np.frombuffer(payload, dtype=_FEATURE_DTYPE, count=header["feature_count"], offset=offset)
+    offset += features.nbytes
+    deltas = np.frombuffer(payload, dtype="<i2", count=header["vertex_count"] * 2, offset=offset).reshape(-1, 2).astype(np.int64)
+    items = []
+    position = 0
+    for feature in features.tolist():
+        element, label, count = feature
+        items.append(
+            {
+                "element_index": element,
+                "semantic": labels[label] or None,
+                "coordinates": np.cumsum(deltas[position : position + count], axis=0).tolist(),
+            }
+        )
+        position += count
+    return {**header, "features": items}
+
+
+def tile_header(payload: bytes) -> dict[str, Any]:
+    """Fixed-size tile header fields, without decoding the features."""
+    fields = _HEADER.unpack_from(payload)
+    names = ("magic", "version", "flags", "extent", "buffer", "label_count", "feature_count", "vertex_count")
+    header = dict(zip(names, fields[:8]))
+    min_x, min_y, size = fields[8:]
+    header["bounds"] = [min_x, min_y, min_x + size, min_y + size]
+    return header
+
+
+class ArchCADTileService:
+    """Serve a sample's elements as a quadtree of clipped, quantized vector tiles.
+
+    Tile ``0/0/0`` covers the drawing extent used for masks and thumbnails (the
+    SVG ``viewBox``, else the element bounding boxes), squared from its top-left
+    corner; zoom ``z`` splits it into ``2**z`` by ``2**z`` tiles. Tiles are cut on
+    first request and kept in a size-bounded LRU disk cache.
+    """
+
+    def __init__(self, settings: Settings) -> None:
+        self.settings = settings
+        self.store = open_index_store(settings)
+        self.cache = shared_disk_cache(
+            settings.archcad_tile_cache_dir,
+            max_bytes=settings.archcad_tile_cache_max_mb * 1024 * 1024,
+        )
+
+    def get_tile(
+        self,
+        sample_id: str,
+        z: int,
+        x: int,
+        y: int,
+        *,
+        if_none_match: str | None = None,
+    ) -> dict[str, Any]:
+        """Return one tile; ``payload`` is ``None`` when ``if_none_match`` still matches."""
+        if not 0 <= z <= TILE_MAX_ZOOM or not (0 <= x < 1 << z and 0 <= y < 1 << z):
+            raise ArchCADError(
+                "Invalid tile address",
+                context={"z": z, "x": x, "y": y, "max_zoom": TILE_MAX_ZOOM},
+            )
+        summaries = self.store.get_sample_summaries([sample_id])
+        if not summaries:
+            raise ArchCADNotFoundError("Sample not found", context={"sample_id": sample_id})
+        modalities = summaries[0].get("modalities") or {}
+        sample_key = cache_key(
+            "tiles",
+            TILE_FORMAT_VERSION,
+            sample_id,
+            *(file_ref_fingerprint(modalities[name]) for name in ("json", "svg") if modalities.get(name)),
+        )
+        key = cache_key(sample_key, z, x, y)
+        etag = f'"{key[:32]}"'
+        result: dict[str, Any] = {"sample_id": sample_id, "z": z, "x": x, "y": y, "etag": etag, "payload": None}
+        if if_none_match and etag in {tag.strip() for tag in if_none_match.split(",")}:
+            return result
+
+        payload = self.cache.get(key, ".tile")
+        result["cached"] = payload is not None
+        if payload is None:
+            payload = encode_tile(self._prepared(sample_id, sample_key), z, x, y)
+            self.cache.put(key, payload, ".tile")
+        header = tile_header(payload)
+        result.update(
+            payload=payload,
+            bounds=header["bounds"],
+            feature_count=header["feature_count"],
+            vertex_count=header["vertex_count"],
+        )
+        return result
+
+    def _prepared(self, sample_id: str, sample_key: str) -> _PreparedSample:
+        with _PREPARED_LOCK:
+            prepared = _PREPARED.get(sample_key)
+            if prepared is not None:
+                _PREPARED.move_to_end(sample_key)
+                return prepared
+        sample = self.store.get_sample(sample_id)
+        if not sample:
+            raise ArchCADNotFoundError("Sample not found", context={"sample_id": sample_id})
+        prepared = _prepare(sample)
+        with _PREPARED_LOCK:
+            _PREPARED[sample_key] = prepared
+            while len(_PREPARED) > _PREPARED_CACHE_SIZE:
+                _PREPARED.popitem(last=False)
+        return prepared
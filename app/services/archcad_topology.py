@@ -0,0 +1,110 @@
+from __future__ import annotations
+
+from typing import Any
+
+import numpy as np
+
+from app.core.exceptions import ArchCADError, ArchCADNotFoundError
+from app.core.settings import Settings
+from app.models.sharded_index_store import open_index_store
+from app.services.archcad_masks import element_polylines, elements_extent
+from app.utils.disk_cache import cache_key
+from app.utils.planar_graph import PlanarGraph, build_planar_graph
+from app.utils.profiling import StageProfiler
+
+# Endpoint snapping distance as a fraction of the drawing diagonal.
+TOPOLOGY_SNAP = 1e-3
+_TOPOLOGY_VERSION = 1
+# Curves are not walls; leaving them out keeps door swings from closing rooms.
+_SKIPPED_TYPES = {"CIRCLE", "ARC"}
+
+
+def line_segments(elements: list[dict[str, Any]], semantic: str | None = None) -> np.ndarray:
+    """Straight line work of a sample as an ``(n, 4)`` segment array, optionally one semantic only."""
+    chains = [
+        chain
+        for element in elements
+        if str(element.get("type") or "").upper() not in _SKIPPED_TYPES
+        and (semantic is None or element.get("semantic") == semantic)
+        for chain in element_polylines(element)
+    ]
+    if not chains:
+        return np.zeros((0, 4), dtype=np.float64)
+    return np.vstack([np.hstack((chain[:-1], chain[1:])) for chain in chains])
+
+
+def topology_summary(graph: PlanarGraph, segment_count: int) -> dict[str, Any]:
+    degree = np.bincount(graph.edges.reshape(-1), minlength=len(graph.nodes))
+    component_sizes = np.bincount(graph.edge_components) if len(graph.edges) else np.zeros(0, dtype=np.int64)
+    return {
+        "segments": segment_count,
+        "intersections": graph.intersection_count,
+        "nodes": len(graph.nodes),
+        "edges": len(graph.edges),
+        "components": len(component_sizes),
+        "largest_component_edges": int(component_sizes.max()) if len(component_sizes) else 0,
+        "faces": len(graph.faces),
+        "dangling_nodes": int((degree == 1).sum()),
+    }
+
+
+def topology_graph(graph: PlanarGraph) -> dict[str, Any]:
+    return {
+        "nodes": np.round(graph.nodes, 6).tolist(),
+        "edges": graph.edges.tolist(),
+        "edge_components": graph.edge_components.tolist(),
+        "faces": [
+            {"area": round(float(area), 6), "nodes": face.tolist()} for face, area in zip(graph.faces, graph.face_areas)
+        ],
+    }
+
+
+class ArchCADTopologyService:
+    """Extract the wall graph of a sample: noded line work, its components and closed faces.
+
+    Line primitives are split where they cross (sweep line), their endpoints
+    snapped through a uniform grid hash, and the bounded faces of the
+    resulting planar graph traced - closed rooms when the filter is the wall
+    semantic. Graphs are computed on first request and stored in the index
+    (``sample_topology``) until the sample is reindexed.
+    """
+
+    def __init__(self, settings: Settings) -> None:
+        self.settings = settings
+        self.store = open_index_store(settings)
+
+    def get_topology(
+        self,
+        sample_id: str,
+        *,
+        semantic: str | None = None,
+        snap: float = TOPOLOGY_SNAP,
+    ) -> dict[str, Any]:
+        if not 0 < snap < 1:
+            raise ArchCADError("Invalid topology snap distance", context={"snap": snap})
+        key = semantic or ""
+        fingerprint = cache_key("topology", _TOPOLOGY_VERSION, snap)
+        result: dict[str, Any] = {"sample_id": sample_id, "semantic": semantic, "snap": snap}
+        stored = self.store.get_topology(sample_id, key)
+        if stored and stored["fingerprint"] == fingerprint:
+            return {**result, "cached": True, "summary": stored["summary"], **stored["graph"]}
+
+        sample = self.store.get_sample(sample_id)
+        if not sample:
+            raise ArchCADNotFoundError("Sample not found", context={"sample_id": sample_id})
+        elements = sample.get("elements") or []
+        extent = elements_extent(elements)
+        diagonal = float(np.hypot(extent[2], extent[3])) if extent else 0.0
+        tolerance = snap * diagonal or snap
+
+        profiler = StageProfiler()
+        segments = line_segments(elements, semantic)
+        graph = build_planar_graph(segments, tolerance, profiler=profiler)
+        summary = {
+            **topology_summary(graph, len(segments)),
+            "tolerance": tolerance,
+            "stages": {name: stage["seconds"] for name, stage in profiler.summary().items()},
+        }
+        graph_json = topology_graph(graph)
+        self.store.upsert_topology(sample_id, key, fingerprint, summary, graph_json)
+        return {**result, "cached": False, "summary": summary, **graph_json}
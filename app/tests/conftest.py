@@ -0,0 +1,43 @@
+from __future__ import annotations
+
+from pathlib import Path
+from typing import Any, Callable
+
+import pytest
+
+from app.core.settings import Settings
+from app.models.index_store import ArchCADIndexStore
+from app.services.archcad_indexer import ArchCADIndexer
+from app.services.archcad_synthetic import ArchCADSyntheticGenerator
+
+
+@pytest.fixture()
+def archcad_settings(tmp_path: Path) -> Settings:
+    """Settings with raw and processed directories under ``tmp_path``."""
+    settings = Settings(ARCHCAD_LOCAL_DIR=tmp_path / "raw", ARCHCAD_PROCESSED_DIR=tmp_path / "processed")
+    settings.ensure_directories()
+    return settings
+
+
+@pytest.fixture()
+def index_store(archcad_settings: Settings) -> ArchCADIndexStore:
+    """An initialized, empty index at ``archcad_settings.archcad_db_path``."""
+    store = ArchCADIndexStore(archcad_settings.archcad_db_path)
+    store.initialize()
+    return store
+
+
+@pytest.fixture()
+def synthetic_index(archcad_settings: Settings) -> Callable[..., tuple[dict[str, Any], dict[str, Any]]]:
+    """Generate a synthetic dataset into the raw directory and index it.
+
+    Keyword arguments override the generator defaults; returns the generator
+    summary and the ``build_index`` result.
+    """
+
+    def build(**options: Any) -> tuple[dict[str, Any], dict[str, Any]]:
+        generator_options = {"elements_min": 10, "elements_max": 20, "point_count": 16, "image_size": 32, **options}
+        summary = ArchCADSyntheticGenerator(archcad_settings.archcad_local_dir, **generator_options).generate(workers=1)
+        return summary, ArchCADIndexer(archcad_settings).build_index(force_reindex=True)
+
+    return build
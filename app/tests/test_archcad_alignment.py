@@ -0,0 +1,75 @@
+from __future__ import annotations
+
+import json
+from pathlib import Path
+from typing import Any, Callable
+
+import numpy as np
+import pytest
+
+from app.core.exceptions import ArchCADNotFoundError
+from app.core.settings import Settings
+from app.services.archcad_alignment import (
+    ALIGNMENT_TOLERANCE,
+    ArchCADAlignmentService,
+    alignment_metrics,
+    match_endpoints,
+)
+from app.services.archcad_search import ArchCADSearchService
+
+
+def test_endpoints_match_in_either_orientation_and_from_any_start_vertex() -> None:
+    json_endpoints = np.array([[0.0, 0.0, 10.0, 0.0], [5.0, 5.0, 5.0, 9.0]])
+    svg_endpoints = np.array([[10.0, 0.05, 0.0, 0.0], [50.0, 50.0, 60.0, 50.0]])
+    json_index, svg_index, errors = match_endpoints(json_endpoints, svg_endpoints, 0.1)
+    assert (json_index.tolist(), svg_index.tolist()) == ([0], [0])
+    assert np.allclose(errors, [0.05])
+
+    square = [{"x": 0, "y": 0}, {"x": 4, "y": 0}, {"x": 4, "y": 4}, {"x": 0, "y": 4}, {"x": 0, "y": 0}]
+    metrics = alignment_metrics(
+        [{"type": "POLYLINE", "semantic": "column", "geometry": {"points": square}}],
+        [{"type": "RECT", "semantic": "wall", "geometry": {"x": 0, "y": 0, "width": 4, "height": 4}}],
+    )
+    assert (metrics["score"], metrics["semantic_pairs"], metrics["semantic_agreed"]) == (1.0, 1, 0)
+
+
+def test_alignment_job_flags_synthetic_defects_and_filters_search(
+    archcad_settings: Settings, synthetic_index: Callable[..., tuple[dict[str, Any], dict[str, Any]]]
+) -> None:
+    summary, _ = synthetic_index(
+        samples=16, point_count=32, missing_rate=0.0, offset_rate=0.3, label_noise_rate=0.1, seed=5
+    )
+    truth = {
+        sample["sample_id"]: sample for sample in map(json.loads, Path(summary["truth_path"]).read_text().splitlines())
+    }
+    service = ArchCADAlignmentService(archcad_settings)
+
+    result = service.check_samples(workers=1)
+    assert (result["checked_count"], result["failed_samples"]) == (16, 0)
+    clean = set()
+    disagreements = 0
+    for sample_id, sample in truth.items():
+        alignment = service.get_alignment(sample_id)
+        assert alignment["tolerance"] == ALIGNMENT_TOLERANCE and alignment["radius"] > alignment["tolerance"]
+        if sample["svg_offset"] is not None:
+            assert alignment["score"] < 0.5
+            continue
+        clean.add(sample_id)
+        assert alignment["score"] == 1.0
+        # A relabelled element may draw its original label again.
+        relabelled = alignment["semantic_pairs"] - alignment["semantic_agreed"]
+        assert relabelled <= len(sample["relabelled_elements"])
+        disagreements += relabelled
+    assert 0 < len(clean) < 16 and disagreements > 0
+
+    assert service.check_samples(workers=1)["up_to_date_count"] == 16
+    with pytest.raises(ArchCADNotFoundError):
+        service.get_alignment("train/missing")
+
+    search = ArchCADSearchService(archcad_settings)
+    common = {"instance": None, "modalities": None, "split": None, "min_count": None, "max_count": None}
+    page = search.search(semantic=None, offset=0, limit=50, min_alignment=0.99, **common)
+    assert {item["sample_id"] for item in page["items"]} == clean
+    labels = ",".join(row["semantic"] for row in search.semantic_stats()["items"])
+    posting = search.search(semantic=labels, op="or", offset=0, limit=50, min_alignment=0.99, **common)
+    assert posting["pagination"]["total"] == len(clean)
@@ -0,0 +1,61 @@
+from __future__ import annotations
+
+import json
+from pathlib import Path
+
+from app.services.archcad_dataset import ArchCADIterableDataset
+
+
+def _write_jsonl(path: Path, count: int) -> None:
+    with path.open("w", encoding="utf-8") as handle:
+        for index in range(count):
+            handle.write(json.dumps({"sample_id": f"s{index:03d}", "split": "train", "elements": [index]}))
+            handle.write("\n")
+
+
+def test_dataset_shards_shuffles_and_caches_deterministically(tmp_path: Path) -> None:
+    jsonl_path = tmp_path / "normalized_samples.jsonl"
+    _write_jsonl(jsonl_path, 50)
+
+    shards = [
+        [
+            record["sample_id"]
+            for record in ArchCADIterableDataset(
+                jsonl_path,
+                fields=["sample_id"],
+                rank=rank,
+                world_size=2,
+                worker_id=worker_id,
+                num_workers=2,
+            )
+        ]
+        for rank in range(2)
+        for worker_id in range(2)
+    ]
+    assert sorted(sample_id for shard in shards for sample_id in shard) == [f"s{index:03d}" for index in range(50)]
+    assert all(len(shard) in {12, 13} for shard in shards)
+
+    dataset = ArchCADIterableDataset(
+        jsonl_path,
+        fields=["sample_id", "elements"],
+        shuffle_buffer=8,
+        seed=3,
+        prefetch=4,
+        cache_path=tmp_path / "cache" / "samples.bin",
+    )
+    first_epoch = list(dataset)
+    assert list(dataset) == first_epoch
+    assert [record["sample_id"] for record in first_epoch] != [f"s{index:03d}" for index in range(50)]
+    assert set(first_epoch[0]) == {"sample_id", "elements"}
+
+    assert not dataset.cache_valid()
+    assert dataset.build_cache()["record_count"] == 50
+    assert dataset.cache_valid()
+    assert list(dataset) == first_epoch
+
+    dataset.set_epoch(1)
+    assert list(dataset) != first_epoch
+    reordered = ArchCADIterableDataset(
+        jsonl_path, fields=["elements", "sample_id"], cache_path=tmp_path / "cache" / "samples.bin"
+    )
+    assert reordered.fields == dataset.fields and reordered.cache_valid()
@@ -0,0 +1,77 @@
+from __future__ import annotations
+
+import json
+from pathlib import Path
+from typing import Any, Callable
+
+import numpy as np
+
+from app.core.settings import Settings
+from app.services.archcad_duplicates import ArchCADDuplicateService, sample_shingles
+from app.services.archcad_search import ArchCADSearchService
+from app.utils.minhash import lsh_candidate_pairs, minhash_signature
+
+
+def _line(x0: float, y0: float, x1: float, y1: float, semantic: str = "wall") -> dict[str, object]:
+    return {"type": "LINE", "semantic": semantic, "geometry": {"start": [x0, y0], "end": [x1, y1]}}
+
+
+def test_shingles_survive_moves_and_signatures_estimate_similarity() -> None:
+    rng = np.random.default_rng(1)
+    plan = [_line(*rng.uniform(0, 1000, 4).tolist(), semantic=str(rng.choice(["wall", "window"]))) for _ in range(60)]
+    moved = [
+        _line(*(np.add(element["geometry"]["start"] + element["geometry"]["end"], 37.5)).tolist(), element["semantic"])
+        for element in plan
+    ]
+    assert set(sample_shingles(plan).tolist()) == set(sample_shingles(moved).tolist())
+
+    shingles = sample_shingles(plan)
+    edited = sample_shingles(plan[:-3])
+    other = sample_shingles([_line(*rng.uniform(0, 1000, 4).tolist()) for _ in range(60)])
+    exact = len(np.intersect1d(shingles, edited)) / len(np.union1d(shingles, edited))
+    signatures = np.array([minhash_signature(values) for values in (shingles, edited, other)])
+    assert abs((signatures[0] == signatures[1]).mean() - exact) < 0.1
+    # Unrelated plans still share label-count shingles ("the 12th wall").
+    assert (signatures[0] == signatures[2]).mean() < 0.3
+    left, right = lsh_candidate_pairs(signatures)
+    assert (left.tolist(), right.tolist()) == ([0], [1])
+    assert minhash_signature(np.zeros(0, dtype=np.uint64)) is None
+
+
+def test_indexer_clusters_synthetic_duplicates_and_search_excludes_them(
+    archcad_settings: Settings, synthetic_index: Callable[..., tuple[dict[str, Any], dict[str, Any]]]
+) -> None:
+    summary, result = synthetic_index(
+        samples=60, elements_min=20, elements_max=40, missing_rate=0.0, duplicate_rate=0.15, seed=11
+    )
+    truth = [json.loads(line) for line in Path(summary["truth_path"]).read_text().splitlines()]
+    expected = {sample["sample_id"]: sample["duplicate_of"] for sample in truth if sample["duplicate_of"]}
+    assert expected
+
+    detected = result["near_duplicates"]
+    assert detected["duplicate_samples"] == len(expected)
+    service = ArchCADDuplicateService(archcad_settings)
+    for sample_id, source in expected.items():
+        cluster = service.get_sample_duplicates(sample_id)["cluster"]
+        members = {member["sample_id"] for member in cluster["members"]}
+        assert source in members and cluster["cluster_id"] == min(members)
+    unique = next(sample["sample_id"] for sample in truth if sample["sample_id"] not in {*expected, *expected.values()})
+    assert service.get_sample_duplicates(unique)["cluster"] is None
+    clusters = service.list_clusters(offset=0, limit=100)
+    assert clusters["pagination"]["total"] == detected["clusters"]
+    cross_split = service.list_clusters(offset=0, limit=100, cross_split=True)["items"]
+    assert all(len(cluster["splits"]) > 1 for cluster in cross_split)
+
+    search = ArchCADSearchService(archcad_settings)
+    common = {"instance": None, "modalities": None, "split": None, "min_count": None, "max_count": None}
+    kept = search.search(semantic=None, offset=0, limit=100, exclude_duplicates=True, **common)
+    assert kept["pagination"]["total"] == 60 - len(expected)
+    assert not {item["sample_id"] for item in kept["items"]} & {
+        member["sample_id"]
+        for cluster in clusters["items"]
+        for member in cluster["members"]
+        if not member["representative"]
+    }
+    labels = ",".join(row["semantic"] for row in search.semantic_stats()["items"])
+    posting = search.search(semantic=labels, op="or", offset=0, limit=100, exclude_duplicates=True, **common)
+    assert posting["pagination"]["total"] == 60 - len(expected)
@@ -0,0 +1,99 @@
+from __future__ import annotations
+
+import json
+import sqlite3
+from pathlib import Path
+
+import pytest
+
+from app.core.exceptions import ArchCADError
+from app.core.settings import Settings
+from app.models.index_store import _SCHEMA_CHECKED, MIGRATE_COMMAND, ArchCADIndexStore
+from app.schemas.archcad import ArchCADElement, ArchCADSample
+from app.services.archcad_search import ArchCADSearchService
+from app.utils.geometry_hash import canonical_geometry, geometry_hash
+
+
+def _line(x1: float, y1: float, x2: float, y2: float, semantic: str = "wall") -> ArchCADElement:
+    return ArchCADElement(
+        type="LINE",
+        semantic=semantic,
+        geometry={"start": {"x": x1, "y": y1}, "end": {"x": x2, "y": y2}},
+    )
+
+
+def test_canonical_geometry_ignores_float_noise_and_line_direction() -> None:
+    forward = canonical_geometry("LINE", {"start": {"x": 0.0, "y": 1.0000000001}, "end": {"x": 5, "y": 1}})
+    backward = canonical_geometry("LINE", {"end": {"x": 0, "y": 1}, "start": {"x": 5.0, "y": -0.0 + 1}})
+    assert forward == backward
+    polyline = {"points": [{"x": 0, "y": 0}, {"x": 1, "y": 0}]}
+    reversed_polyline = {"points": polyline["points"][::-1]}
+    assert geometry_hash(canonical_geometry("POLYLINE", polyline)) != geometry_hash(
+        canonical_geometry("POLYLINE", reversed_polyline)
+    )
+
+
+def test_store_collapses_duplicates_and_shares_blobs(tmp_path: Path) -> None:
+    store = ArchCADIndexStore(tmp_path / "index.sqlite3")
+    store.initialize()
+    store.upsert_sample(
+        ArchCADSample(sample_id="a", elements=[_line(0, 0, 5, 0), _line(5, 0, 0, 0), _line(0, 0, 0, 5, "door")])
+    )
+    store.upsert_sample(ArchCADSample(sample_id="b", elements=[_line(0, 0, 5, 0)]))
+
+    elements = store.get_elements("a", offset=0, limit=10)["items"]
+    assert [(item["semantic"], item["multiplicity"]) for item in elements] == [("wall", 2), ("door", 1)]
+    assert store.semantic_stats()[0] == {"semantic": "wall", "element_count": 3, "sample_count": 2}
+    stats = store.geometry_stats()
+    assert (stats["element_count"], stats["element_rows"], stats["geometry_blobs"]) == (4, 3, 2)
+    assert stats["geometry_bytes_saved"] > 0
+
+    store.upsert_sample(ArchCADSample(sample_id="b", elements=[_line(9, 9, 8, 8)]))
+    assert store.prune_geometry_blobs() == 0
+    store.upsert_sample(ArchCADSample(sample_id="a", elements=[]))
+    assert store.prune_geometry_blobs() == 2
+
+
+def test_initialize_migrates_inline_geometry(tmp_path: Path) -> None:
+    db_path = tmp_path / "legacy.sqlite3"
+    with sqlite3.connect(db_path) as connection:
+        connection.execute(
+            """
+            CREATE TABLE elements (
+                id INTEGER PRIMARY KEY AUTOINCREMENT, sample_id TEXT NOT NULL, element_id TEXT,
+                element_type TEXT NOT NULL, semantic TEXT, instance TEXT, source_modality TEXT NOT NULL,
+                geometry_json TEXT NOT NULL, style_json TEXT NOT NULL, bbox_json TEXT
+            )
+            """
+        )
+        connection.execute(
+            "INSERT INTO elements (sample_id, element_type, semantic, source_modality, geometry_json, style_json)"
+            " VALUES ('a', 'CIRCLE', 'column', 'json', ?, '{}')",
+            (json.dumps({"center": {"x": 1.0, "y": 2.0}, "radius": 3.5}),),
+        )
+
+    store = ArchCADIndexStore(db_path)
+    # Reads never migrate; they refuse the stale schema until initialize runs.
+    with pytest.raises(ArchCADError) as stale:
+        store.get_elements("a", offset=0, limit=10)
+    assert stale.value.status_code == 409
+    store.initialize()
+
+    item = store.get_elements("a", offset=0, limit=10)["items"][0]
+    assert item["geometry"] == {"center": {"x": 1, "y": 2}, "radius": 3.5}
+    assert item["multiplicity"] == 1
+
+
+def test_status_reports_an_index_awaiting_migration(archcad_settings: Settings, index_store: ArchCADIndexStore) -> None:
+    index_store.upsert_sample(ArchCADSample(sample_id="a", elements=[_line(0, 0, 1, 1)]))
+    with index_store._connect() as connection:
+        connection.execute("PRAGMA user_version = 1")
+    # A fresh process has not checked this database yet.
+    _SCHEMA_CHECKED.discard(index_store._db_key)
+
+    index = ArchCADSearchService(archcad_settings).status()["index"]
+    assert (index["schema_version"], index["needs_migration"]) == (1, True)
+    assert index["migrate_command"] == MIGRATE_COMMAND
+    index_store.initialize()
+    index = ArchCADSearchService(archcad_settings).status()["index"]
+    assert (index["needs_migration"], index["summary"]["sample_count"]) == (False, 1)
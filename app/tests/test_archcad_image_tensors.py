@@ -0,0 +1,86 @@
+from __future__ import annotations
+
+import io
+import zipfile
+from pathlib import Path
+
+import pytest
+
+from app.core.exceptions import ArchCADError
+from app.core.settings import Settings
+from app.models.index_store import _SCHEMA_CHECKED, ArchCADIndexStore
+from app.schemas.archcad import ArchCADModalityRefs, ArchCADSample
+from app.services.archcad_image_tensors import ArchCADImageTensorCache
+from app.utils.file_refs import make_file_ref
+
+Image = pytest.importorskip("PIL.Image")
+
+
+def test_image_tensor_cache_maps_sample_rows(tmp_path: Path) -> None:
+    png_zip = tmp_path / "raw" / "png.zip"
+    png_zip.parent.mkdir(parents=True)
+    colors = {"sample-001": (200, 30, 30), "sample-002": (30, 200, 30)}
+    with zipfile.ZipFile(png_zip, "w") as archive:
+        for sample_id, color in colors.items():
+            buffer = io.BytesIO()
+            Image.new("RGB", (64, 32), color=color).save(buffer, format="PNG")
+            archive.writestr(f"{sample_id}.png", buffer.getvalue())
+
+    settings = Settings(ARCHCAD_LOCAL_DIR=tmp_path / "raw", ARCHCAD_PROCESSED_DIR=tmp_path / "processed")
+    settings.ensure_directories()
+    store = ArchCADIndexStore(settings.archcad_db_path)
+    store.initialize()
+    for sample_id in colors:
+        store.upsert_sample(
+            ArchCADSample(
+                sample_id=sample_id,
+                modalities=ArchCADModalityRefs(image=make_file_ref(png_zip, f"{sample_id}.png")),
+            )
+        )
+
+    cache = ArchCADImageTensorCache(settings, size=16)
+    result = cache.build(workers=1)
+    assert result["rebuilt"] and result["row_count"] == 2
+    assert result["byte_size"] == 2 * 16 * 16 * 3
+    assert not cache.build(workers=1)["rebuilt"]
+
+    image = cache.get("sample-002")
+    assert image.shape == (16, 16, 3)
+    assert tuple(image[8, 8]) == (30, 200, 30)
+    assert tuple(image[0, 0]) == (255, 255, 255)
+    assert store.image_rows(16)["sample-002"]["width"] == 64
+
+    batch = cache.batch(["sample-002", "sample-001"])
+    assert tuple(batch[1, 8, 8]) == (200, 30, 30)
+
+
+def test_failed_images_are_remembered_and_builds_do_not_migrate(
+    archcad_settings: Settings, index_store: ArchCADIndexStore
+) -> None:
+    png_zip = archcad_settings.archcad_local_dir / "png.zip"
+    with zipfile.ZipFile(png_zip, "w") as archive:
+        buffer = io.BytesIO()
+        Image.new("RGB", (16, 16), color=(10, 10, 10)).save(buffer, format="PNG")
+        archive.writestr("good.png", buffer.getvalue())
+        archive.writestr("broken.png", b"not a png")
+    for sample_id in ("good", "broken"):
+        index_store.upsert_sample(
+            ArchCADSample(
+                sample_id=sample_id,
+                modalities=ArchCADModalityRefs(image=make_file_ref(png_zip, f"{sample_id}.png")),
+            )
+        )
+
+    cache = ArchCADImageTensorCache(archcad_settings, size=8)
+    first = cache.build(workers=1)
+    assert first["rebuilt"] and first["failed_images"] == 1
+    assert first["failures"][0]["sample_id"] == "broken"
+    assert not cache.build(workers=1)["rebuilt"]
+
+    with index_store._connect() as connection:
+        connection.execute("PRAGMA user_version = 1")
+    # A fresh process has not checked this database yet.
+    _SCHEMA_CHECKED.discard(index_store._db_key)
+    with pytest.raises(ArchCADError) as error:
+        ArchCADImageTensorCache(archcad_settings, size=8).build(workers=1, force=True)
+    assert error.value.status_code == 409
@@ -0,0 +1,44 @@
+from __future__ import annotations
+
+import io
+import zipfile
+from pathlib import Path
+
+import pytest
+
+from app.core.settings import Settings
+from app.models.index_store import ArchCADIndexStore
+from app.schemas.archcad import ArchCADModalityRefs, ArchCADSample
+from app.services.archcad_images import ArchCADImageService
+from app.utils.file_refs import make_file_ref
+
+Image = pytest.importorskip("PIL.Image")
+
+
+def test_image_service_caches_thumbnails_and_honours_etags(tmp_path: Path) -> None:
+    buffer = io.BytesIO()
+    Image.new("RGB", (1024, 768), color=(200, 30, 30)).save(buffer, format="PNG")
+    png_zip = tmp_path / "raw" / "png.zip"
+    png_zip.parent.mkdir(parents=True)
+    with zipfile.ZipFile(png_zip, "w") as archive:
+        archive.writestr("sample-001.png", buffer.getvalue())
+
+    settings = Settings(ARCHCAD_LOCAL_DIR=tmp_path / "raw", ARCHCAD_PROCESSED_DIR=tmp_path / "processed")
+    settings.ensure_directories()
+    store = ArchCADIndexStore(settings.archcad_db_path)
+    store.initialize()
+    store.upsert_sample(
+        ArchCADSample(
+            sample_id="sample-001",
+            modalities=ArchCADModalityRefs(image=make_file_ref(png_zip, "sample-001.png")),
+        )
+    )
+
+    service = ArchCADImageService(settings)
+    thumbnail = service.get_thumbnail("sample-001", size=128, fmt="png")
+    with Image.open(io.BytesIO(thumbnail["payload"])) as rendered:
+        assert rendered.size == (128, 96)
+    assert service.cache.size_bytes() == len(thumbnail["payload"])
+
+    not_modified = service.get_thumbnail("sample-001", size=128, fmt="png", if_none_match=thumbnail["etag"])
+    assert not_modified["payload"] is None
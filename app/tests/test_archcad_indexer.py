@@ -0,0 +1,62 @@
+from __future__ import annotations
+
+import json
+import pstats
+from pathlib import Path
+
+from app.core.settings import Settings
+from app.services.archcad_indexer import ArchCADIndexer
+from app.services.archcad_synthetic import ArchCADSyntheticGenerator
+from app.utils.profiling import StageProfiler
+
+
+def test_stage_profiler_charges_nested_time_once() -> None:
+    profiler = StageProfiler()
+    with profiler.stage("outer"):
+        with profiler.stage("inner"):
+            sum(range(10000))
+    summary = profiler.summary()
+    assert summary["inner"]["calls"] == 1
+    assert abs(profiler.elapsed() - sum(stage["seconds"] for stage in summary.values())) < 1e-5
+
+
+def test_build_index_reports_stage_profile(tmp_path: Path) -> None:
+    ArchCADSyntheticGenerator(
+        tmp_path / "raw", samples=6, elements_min=5, elements_max=10, point_count=32, image_size=32, seed=1
+    ).generate(workers=1)
+    settings = Settings(
+        ARCHCAD_LOCAL_DIR=tmp_path / "raw",
+        ARCHCAD_PROCESSED_DIR=tmp_path / "processed",
+        ARCHCAD_INDEX_MEMORY_SAMPLE_EVERY=4,
+    )
+
+    result = ArchCADIndexer(settings).build_index(force_reindex=True, profile_memory=True, profile_slowest=2)
+
+    profile = result["profile"]
+    assert {"read", "parse_json", "build_elements", "sqlite", "serialize", "jsonl_write"} <= set(profile["stages"])
+    assert profile["stages"]["sqlite"]["calls"] == result["processed_samples"]
+    assert [checkpoint["samples"] for checkpoint in profile["memory"]["checkpoints"]] == [4, 6]
+    assert len(profile["slowest_samples"]) == 2
+    pstats.Stats(profile["slowest_samples"][0]["profile_path"])
+    assert json.loads(settings.archcad_stats_path.read_text())["profile"]["stages"].keys() == profile["stages"].keys()
+
+
+def test_split_build_keeps_other_splits_in_semantic_index_and_stats(tmp_path: Path) -> None:
+    ArchCADSyntheticGenerator(
+        tmp_path / "raw", samples=12, elements_min=5, elements_max=10, point_count=8, image_size=16, seed=2
+    ).generate(workers=1)
+    settings = Settings(ARCHCAD_LOCAL_DIR=tmp_path / "raw", ARCHCAD_PROCESSED_DIR=tmp_path / "processed")
+    indexer = ArchCADIndexer(settings)
+    indexer.build_index(force_reindex=True)
+    semantic_index = json.loads(settings.archcad_semantic_index_path.read_text())
+    stats = json.loads(settings.archcad_stats_path.read_text())
+
+    result = indexer.build_index(force_reindex=True, split="val")
+
+    assert 0 < result["processed_samples"] < stats["processed_samples"]
+    assert json.loads(settings.archcad_semantic_index_path.read_text()) == semantic_index
+    rebuilt = json.loads(settings.archcad_stats_path.read_text())
+    assert rebuilt["processed_samples"] == result["processed_samples"]
+    for key in ("sample_total", "element_total", "qa_total", "semantic_counts"):
+        assert rebuilt[key] == stats[key]
+    assert stats["sample_total"] == 12
@@ -0,0 +1,106 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+import pytest
+
+from app.core.exceptions import ArchCADError
+from app.core.settings import Settings
+from app.models.index_store import ArchCADIndexStore
+from app.models.sharded_index_store import ArchCADShardedIndexStore
+from app.schemas.archcad import ArchCADBoundingBox, ArchCADElement, ArchCADSample
+from app.services.archcad_search import ArchCADSearchService
+
+
+def _element(semantic: str, instance: str | None, box: tuple[float, float, float, float] | None) -> ArchCADElement:
+    return ArchCADElement(
+        type="LINE",
+        semantic=semantic,
+        instance=instance,
+        # Stored rows dedupe on geometry, so each box gets a line of its own.
+        geometry={"start": {"x": box[0], "y": box[1]}, "end": {"x": box[2], "y": box[3]}} if box else {},
+        bounding_box=ArchCADBoundingBox(min_x=box[0], min_y=box[1], max_x=box[2], max_y=box[3]) if box else None,
+    )
+
+
+def _sample(sample_id: str, split: str, offset: float = 0.0) -> ArchCADSample:
+    return ArchCADSample(
+        sample_id=sample_id,
+        split=split,
+        elements=[
+            _element("wall", "wall_0", (offset, 0, offset + 10, 2)),
+            _element("wall", "wall_0", (offset + 8, 0, offset + 10, 20)),
+            _element("window", "wall_0", (offset + 2, 0, offset + 4, 2)),
+            _element("door", "door_0", None),
+            _element("column", None, (0, 0, 1, 1)),
+        ],
+    )
+
+
+def test_indexing_aggregates_instances_and_rtree_filters_by_bbox(index_store: ArchCADIndexStore) -> None:
+    index_store.upsert_sample(_sample("train/a", "train"))
+    index_store.upsert_sample(_sample("train/b", "train", offset=100))
+
+    instances = index_store.search_instances(offset=0, limit=10, sample_id="train/a")
+    assert [(item["instance"], item["semantic"], item["element_count"]) for item in instances["items"]] == [
+        ("door_0", "door", 1),
+        ("wall_0", "wall", 3),
+    ]
+    door, wall = instances["items"]
+    assert door["bounding_box"] is None and door["centroid"] is None
+    assert wall["bounding_box"] == {"min_x": 0, "min_y": 0, "max_x": 10, "max_y": 20}
+    assert wall["centroid"] == pytest.approx({"x": 17 / 3, "y": 4.0})
+
+    hits = index_store.search_instances(offset=0, limit=10, bbox=(95, 5, 105, 6))
+    assert [(item["sample_id"], item["instance"]) for item in hits["items"]] == [("train/b", "wall_0")]
+    # Stored extents, not the rounded R-tree boxes, decide edge contact.
+    assert index_store.search_instances(offset=0, limit=10, bbox=(10.000001, 0, 50, 50))["total"] == 0
+    assert index_store.search_instances(offset=0, limit=10, min_elements=2)["total"] == 2
+
+    # Reindexing a sample replaces its instances, and deleting a split clears the R-tree.
+    index_store.upsert_sample(_sample("train/a", "train", offset=50))
+    assert index_store.search_instances(offset=0, limit=10, bbox=(0, 0, 20, 20))["total"] == 0
+    index_store.delete_split("train")
+    with index_store._connect() as connection:
+        assert connection.execute("SELECT COUNT(*) FROM instances_rtree").fetchone()[0] == 0
+
+
+def test_migration_backfills_instances_from_stored_elements(index_store: ArchCADIndexStore) -> None:
+    sample = _sample("train/a", "train")
+    # A repeated element collapses into one row with multiplicity 2 and still counts twice.
+    sample.elements.append(sample.elements[0].model_copy())
+    index_store.upsert_sample(sample)
+    index_store.upsert_sample(_sample("train/b", "train", offset=100))
+    expected = index_store.search_instances(offset=0, limit=10)
+    assert expected["items"][1]["element_count"] == 4
+
+    with index_store._connect() as connection:
+        connection.execute("DELETE FROM instances_rtree")
+        connection.execute("DELETE FROM instances")
+        connection.execute("PRAGMA user_version = 2")
+    index_store.initialize()
+
+    assert index_store.search_instances(offset=0, limit=10) == expected
+    hits = index_store.search_instances(offset=0, limit=10, bbox=(95, 5, 105, 6))
+    assert [(item["sample_id"], item["instance"]) for item in hits["items"]] == [("train/b", "wall_0")]
+
+
+def test_instance_search_spans_shards_and_checks_sample_and_bbox(tmp_path: Path) -> None:
+    settings = Settings(ARCHCAD_PROCESSED_DIR=tmp_path, ARCHCAD_SHARD_BY_SPLIT=True)
+    store = ArchCADShardedIndexStore(settings.archcad_shard_dir)
+    store.initialize()
+    for sample_id, split in (("train/a", "train"), ("test/b", "test"), ("val/c", "val")):
+        store.upsert_sample(_sample(sample_id, split))
+    service = ArchCADSearchService(settings)
+
+    walls = service.search_instances(offset=1, limit=5, semantic="wall")
+    assert [item["sample_id"] for item in walls["items"]] == ["train/a", "val/c"]
+    assert walls["pagination"]["total"] == 3
+    in_split = service.search_instances(offset=0, limit=5, split="test", bbox=(0, 0, 1, 1))
+    assert [(item["split"], item["instance"]) for item in in_split["items"]] == [("test", "wall_0")]
+    assert service.get_instances(sample_id="val/c", offset=0, limit=5)["pagination"]["total"] == 2
+
+    with pytest.raises(ArchCADError):
+        service.search_instances(offset=0, limit=5, bbox=(5, 0, 1, 1))
+    with pytest.raises(ArchCADError):
+        service.get_instances(sample_id="train/missing", offset=0, limit=5)
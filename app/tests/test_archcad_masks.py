@@ -0,0 +1,96 @@
+from __future__ import annotations
+
+import zipfile
+from pathlib import Path
+
+import numpy as np
+
+from app.core.settings import Settings
+from app.models.index_store import ArchCADIndexStore
+from app.schemas.archcad import (
+    ArchCADBoundingBox,
+    ArchCADElement,
+    ArchCADModalityRefs,
+    ArchCADSample,
+    ArchCADSampleStats,
+)
+from app.services.archcad_masks import ArchCADMaskService, rasterize_segments
+from app.utils.file_refs import make_file_ref
+
+
+def test_rasterize_segments_draws_connected_clipped_lines() -> None:
+    segments = np.array([[0.0, 0.0, 9.0, 9.0], [-50.0, 5.0, 50.0, 5.0]])
+    mask = rasterize_segments(segments, np.array([1, 2]), transform=(1.0, 0.0, 0.0), width=10, height=10)
+    assert all(mask[index, index] == 1 for index in range(10) if index != 5)
+    assert (mask[5] == 2).all()
+
+
+def test_mask_service_aligns_to_svg_extent_and_caches(tmp_path: Path) -> None:
+    svg_zip = tmp_path / "raw" / "svg.zip"
+    svg_zip.parent.mkdir(parents=True)
+    with zipfile.ZipFile(svg_zip, "w") as archive:
+        archive.writestr("sample-001.svg", '<svg xmlns="http://www.w3.org/2000/svg" viewBox="0 0 200 100"></svg>')
+
+    settings = Settings(ARCHCAD_LOCAL_DIR=tmp_path / "raw", ARCHCAD_PROCESSED_DIR=tmp_path / "processed")
+    settings.ensure_directories()
+    store = ArchCADIndexStore(settings.archcad_db_path)
+    store.initialize()
+    store.upsert_sample(
+        ArchCADSample(
+            sample_id="sample-001",
+            modalities=ArchCADModalityRefs(svg=make_file_ref(svg_zip, "sample-001.svg")),
+            elements=[
+                ArchCADElement(
+                    type="LINE",
+                    semantic="wall",
+                    geometry={"start": {"x": 0, "y": 50}, "end": {"x": 200, "y": 50}},
+                ),
+                ArchCADElement(
+                    type="CIRCLE",
+                    semantic="column",
+                    geometry={"center": {"x": 100, "y": 50}, "radius": 20},
+                ),
+            ],
+            stats=ArchCADSampleStats(element_count=2, semantic_counts={"wall": 1, "column": 1}),
+        )
+    )
+
+    service = ArchCADMaskService(settings)
+    first = service.get_mask("sample-001", resolution=64)
+    assert (first["width"], first["height"]) == (64, 32)
+    assert first["labels"] == ["__background__", "column", "wall"]
+    assert not first["cached"]
+    assert (first["mask"][16, :10] == 2).all()
+    assert (first["mask"][16 - 6, 32] == 1) or (first["mask"][16 - 7, 32] == 1)
+
+    second = service.get_mask("sample-001", resolution=64)
+    assert second["cached"]
+    assert np.array_equal(first["mask"], second["mask"])
+
+
+def test_mask_cache_is_keyed_by_sample(tmp_path: Path) -> None:
+    settings = Settings(ARCHCAD_LOCAL_DIR=tmp_path / "raw", ARCHCAD_PROCESSED_DIR=tmp_path / "processed")
+    settings.ensure_directories()
+    store = ArchCADIndexStore(settings.archcad_db_path)
+    store.initialize()
+    # Neither sample has modality refs, so their fingerprints are identical.
+    for sample_id, y in (("sample-a", 0), ("sample-b", 100)):
+        store.upsert_sample(
+            ArchCADSample(
+                sample_id=sample_id,
+                elements=[
+                    ArchCADElement(
+                        type="LINE",
+                        semantic="wall",
+                        geometry={"start": {"x": 0, "y": y}, "end": {"x": 100, "y": 100 - y}},
+                        bounding_box=ArchCADBoundingBox(min_x=0, min_y=0, max_x=100, max_y=100),
+                    )
+                ],
+            )
+        )
+
+    service = ArchCADMaskService(settings)
+    first = service.get_mask("sample-a", resolution=32)
+    second = service.get_mask("sample-b", resolution=32)
+    assert not second["cached"]
+    assert not np.array_equal(first["mask"], second["mask"])
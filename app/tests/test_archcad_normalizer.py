@@ -1,8 +1,11 @@
 from __future__ import annotations
 
+import json
 import zipfile
 from pathlib import Path
 
+import pytest
+
 from app.schemas.archcad import ArchCADManifestRecord
 from app.services.archcad_normalizer import ArchCADNormalizer
 from app.utils.file_refs import make_file_ref
@@ -49,3 +52,40 @@ def test_normalizer_builds_stats_from_json_and_qa(tmp_path: Path) -> None:
     assert sample.stats.semantic_counts["single_door"] == 1
     assert sample.stats.semantic_counts["column"] == 1
     assert sample.stats.qa_count == 1
+
+
+def test_normalizer_keeps_zero_arc_angles(tmp_path: Path) -> None:
+    json_zip = tmp_path / "json.zip"
+    _write_zip(
+        json_zip,
+        {"sample-001.json": '[{"type":"ARC","center":[0,0],"radius":1,"start_angle":0,"endAngle":90}]'},
+    )
+    geometry = ArchCADNormalizer().parse_json_elements(make_file_ref(json_zip, "sample-001.json"))[0].geometry
+    assert (geometry["start_angle"], geometry["end_angle"]) == (0, 90)
+
+
+def test_normalizer_streams_element_arrays_and_falls_back_to_full_parse(tmp_path: Path) -> None:
+    line = {"type": "LINE", "start": [0, 0], "end": [1.5e3, 2], "semantic": "wall"}
+    json_zip = tmp_path / "json.zip"
+    members = {
+        # Empty preferred keys are skipped, as with the full parse.
+        "object.json": json.dumps({"meta": {"scale": [1, 2]}, "elements": [], "primitives": [line] * 3, "n": 7}),
+        "latin1.json": '[{"type":"LINE","semantic":"caf\xe9"}]',
+        "scalar.json": '"not elements"',
+    }
+    with zipfile.ZipFile(json_zip, "w") as archive:
+        for name, content in members.items():
+            archive.writestr(name, content.encode("latin-1"))
+
+    normalizer = ArchCADNormalizer()
+    streamed = normalizer.parse_json_elements(make_file_ref(json_zip, "object.json"))
+    assert [element.geometry["end"] for element in streamed] == [{"x": 1500.0, "y": 2.0, "z": None}] * 3
+    # Streamed: read until an empty chunk rather than in one call.
+    assert normalizer.profiler.summary()["read"]["calls"] > 1
+    # Non-UTF-8 text and documents without an element array take the full parse.
+    assert normalizer.parse_json_elements(make_file_ref(json_zip, "latin1.json"))[0].semantic == "caf\xe9"
+    assert normalizer.parse_json_elements(make_file_ref(json_zip, "scalar.json")) == []
+    broken = tmp_path / "broken.json"
+    broken.write_text('{"elements": [{"type": "LINE"},')
+    with pytest.raises(json.JSONDecodeError):
+        normalizer.parse_json_elements(str(broken))
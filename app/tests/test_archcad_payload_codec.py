@@ -0,0 +1,66 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+import pytest
+
+from app.models import index_store
+from app.models.index_store import ArchCADIndexStore
+from app.schemas.archcad import ArchCADElement, ArchCADSample
+
+
+def _sample(index: int) -> ArchCADSample:
+    return ArchCADSample(
+        sample_id=f"train/{index:04d}",
+        split="train",
+        elements=[
+            ArchCADElement(type="LINE", semantic="wall", geometry={"start": {"x": i, "y": index}, "end": {"x": i + 1, "y": index}})
+            for i in range(20)
+        ],
+    )
+
+
+def test_zlib_payloads_train_a_dictionary_and_round_trip(tmp_path: Path) -> None:
+    store = ArchCADIndexStore(tmp_path / "index.sqlite3", payload_codec="zlib", dict_samples=3)
+    store.initialize()
+    for index in range(5):
+        store.upsert_sample(_sample(index))
+
+    storage = store.payload_storage_stats()
+    assert storage["dictionaries"] == 1
+    assert set(storage["by_codec"]) == {"zlib"}
+    expected = _sample(1).model_dump(mode="json", by_alias=True)
+    assert ArchCADIndexStore(store.db_path).get_sample("train/0001") == expected
+
+
+def test_compress_payloads_migrates_plain_rows_both_ways(tmp_path: Path) -> None:
+    plain = ArchCADIndexStore(tmp_path / "index.sqlite3")
+    plain.initialize()
+    for index in range(4):
+        plain.upsert_sample(_sample(index))
+    plain_bytes = plain.payload_storage_stats()["stored_bytes"]
+
+    compressed = ArchCADIndexStore(plain.db_path, payload_codec="zlib")
+    result = compressed.compress_payloads()
+    assert result["rewritten"] == 4
+    assert result["bytes_after"] < plain_bytes
+    assert compressed.compress_payloads()["rewritten"] == 0
+
+    assert plain.compress_payloads()["rewritten"] == 4
+    storage = plain.payload_storage_stats()
+    assert (storage["stored_bytes"], storage["dictionaries"]) == (plain_bytes, 0)
+    assert plain.get_sample("train/0003")["sample_id"] == "train/0003"
+
+
+def test_empty_dictionary_is_stored_instead_of_retrained(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    trained: list[int] = []
+    monkeypatch.setattr(index_store, "train_dictionary", lambda codec, samples, size: trained.append(len(samples)) or b"")
+    store = ArchCADIndexStore(tmp_path / "index.sqlite3", payload_codec="zlib", dict_samples=2)
+    store.initialize()
+    for index in range(6):
+        store.upsert_sample(_sample(index))
+
+    assert trained == [2]
+    assert store.compress_payloads()["rewritten"] == 0
+    assert store.payload_storage_stats()["dictionaries"] == 0
+    assert ArchCADIndexStore(store.db_path).get_sample("train/0005")["sample_id"] == "train/0005"
@@ -0,0 +1,83 @@
+from __future__ import annotations
+
+import io
+import zipfile
+from pathlib import Path
+
+import numpy as np
+
+from app.core.settings import Settings
+from app.models.index_store import ArchCADIndexStore
+from app.schemas.archcad import ArchCADModalityRefs, ArchCADSample
+from app.services.archcad_pointcloud import POINTCLOUD_MAX_LOD, ArchCADPointCloudService, voxel_downsample
+from app.utils.file_refs import make_file_ref
+
+
+def test_voxel_downsample_merges_points_per_cell() -> None:
+    points = np.array([[0.1, 0.1, 0.0], [0.2, 0.3, 0.0], [1.5, 1.5, 0.0]])
+    reduced = voxel_downsample(points, 1.0, np.zeros(3))
+    assert len(reduced) == 2
+    assert np.allclose(sorted(reduced[:, 0]), [0.15, 1.5])
+
+
+def test_pointcloud_service_serves_cached_quantized_levels(tmp_path: Path) -> None:
+    rng = np.random.default_rng(7)
+    cloud = rng.uniform(0, 100, size=(5000, 3))
+    buffer = io.BytesIO()
+    np.save(buffer, cloud)
+    point_zip = tmp_path / "raw" / "point.zip"
+    point_zip.parent.mkdir(parents=True)
+    with zipfile.ZipFile(point_zip, "w") as archive:
+        archive.writestr("sample-001.npy", buffer.getvalue())
+
+    settings = Settings(ARCHCAD_LOCAL_DIR=tmp_path / "raw", ARCHCAD_PROCESSED_DIR=tmp_path / "processed")
+    settings.ensure_directories()
+    store = ArchCADIndexStore(settings.archcad_db_path)
+    store.initialize()
+    store.upsert_sample(
+        ArchCADSample(
+            sample_id="sample-001",
+            modalities=ArchCADModalityRefs(pointcloud=make_file_ref(point_zip, "sample-001.npy")),
+        )
+    )
+
+    service = ArchCADPointCloudService(settings)
+    coarse = service.get_level("sample-001", lod=0)
+    full = service.get_level("sample-001", lod=POINTCLOUD_MAX_LOD)
+    assert coarse["point_count"] < full["point_count"] == 5000
+    assert service.cache.size_bytes() > 0
+
+    restored = np.frombuffer(full["payload"], dtype="<i2").reshape(-1, 3) * full["scale"] + full["offset"]
+    assert np.abs(np.sort(restored[:, 0]) - np.sort(cloud[:, 0])).max() < 0.01
+
+    clipped = service.get_level("sample-001", lod=POINTCLOUD_MAX_LOD, bbox=(0, 0, 50, 50))
+    clipped_points = np.frombuffer(clipped["payload"], dtype="<i2").reshape(-1, 3) * clipped["scale"] + clipped["offset"]
+    assert 0 < clipped["point_count"] < 5000
+    assert clipped_points[:, :2].max() <= 50.001
+
+
+def test_float16_levels_stay_finite_for_large_extents(
+    archcad_settings: Settings, index_store: ArchCADIndexStore
+) -> None:
+    # Millimetre drawings easily span more than float16's 65504 maximum.
+    rng = np.random.default_rng(3)
+    cloud = np.column_stack([rng.uniform(0, 250_000, 2000), rng.uniform(-1e5, 1e5, 2000), np.zeros(2000)])
+    buffer = io.BytesIO()
+    np.save(buffer, cloud)
+    point_zip = archcad_settings.archcad_local_dir / "point.zip"
+    with zipfile.ZipFile(point_zip, "w") as archive:
+        archive.writestr("sample-001.npy", buffer.getvalue())
+    index_store.upsert_sample(
+        ArchCADSample(
+            sample_id="sample-001",
+            modalities=ArchCADModalityRefs(pointcloud=make_file_ref(point_zip, "sample-001.npy")),
+        )
+    )
+
+    service = ArchCADPointCloudService(archcad_settings)
+    level = service.get_level("sample-001", lod=POINTCLOUD_MAX_LOD, encoding="float16")
+    values = np.frombuffer(level["payload"], dtype="<f2").reshape(-1, 3).astype(np.float64)
+    assert np.isfinite(values).all() and values.min() >= 0 and values.max() <= 1
+    restored = values * level["scale"] + level["offset"]
+    extent = cloud.max(axis=0) - cloud.min(axis=0)
+    assert (np.abs(np.sort(restored, axis=0) - np.sort(cloud, axis=0)).max(axis=0) <= extent * 1e-3 + 1e-9).all()
@@ -0,0 +1,75 @@
+from __future__ import annotations
+
+import math
+
+import numpy as np
+
+from app.models.index_store import ArchCADIndexStore
+from app.schemas.archcad import ArchCADElement, ArchCADSample
+from app.utils.polyline_lod import POLYLINE_MAX_LOD, douglas_peucker
+
+
+def test_douglas_peucker_keeps_corners_and_drops_collinear_points() -> None:
+    side = np.linspace(0, 10, 11)
+    square = np.concatenate(
+        [
+            np.column_stack([side, np.zeros(11)]),
+            np.column_stack([np.full(10, 10.0), side[1:]]),
+            np.column_stack([side[::-1][1:], np.full(10, 10.0)]),
+            np.column_stack([np.zeros(10), side[::-1][1:]]),
+        ]
+    )
+    kept = douglas_peucker(square, 0.01)
+    assert square[kept].tolist() == [[0, 0], [10, 0], [10, 10], [0, 10], [0, 0]]
+
+
+def _circle_sample(sample_id: str, vertices: int = 720) -> ArchCADSample:
+    points = [
+        {"x": 100 + 50 * math.cos(2 * math.pi * i / vertices), "y": 100 + 50 * math.sin(2 * math.pi * i / vertices)}
+        for i in range(vertices + 1)
+    ]
+    return ArchCADSample(
+        sample_id=sample_id,
+        split="train",
+        elements=[
+            ArchCADElement(type="POLYLINE", semantic="stair", geometry={"points": points}),
+            ArchCADElement(type="LINE", semantic="wall", geometry={"start": {"x": 0, "y": 0}, "end": {"x": 1, "y": 0}}),
+        ],
+    )
+
+
+def test_elements_are_served_at_the_requested_level(index_store: ArchCADIndexStore) -> None:
+    index_store.upsert_sample(_circle_sample("train/0001"))
+    index_store.upsert_sample(_circle_sample("train/0002"))
+
+    def polyline(**level: float) -> dict:
+        return index_store.get_elements("train/0001", offset=0, limit=10, **level)["items"][0]
+
+    full = polyline()
+    counts = [len(polyline(lod=lod)["geometry"]["points"]) for lod in range(POLYLINE_MAX_LOD + 1)]
+    assert (full["lod"], counts[0]) == (0, 721)
+    assert counts == sorted(counts, reverse=True) and counts[-1] < 40
+    assert polyline(tolerance=1e-6)["lod"] == 0
+    assert polyline(tolerance=1000)["lod"] == POLYLINE_MAX_LOD
+    assert index_store.get_elements("train/0001", offset=0, limit=10, lod=2)["items"][1]["lod"] == 0
+
+    stats = index_store.geometry_stats()
+    assert (stats["lod_polylines"], stats["lod_rows"]) == (1, POLYLINE_MAX_LOD)
+    index_store.delete_split("train")
+    assert index_store.geometry_stats()["lod_rows"] == 0
+
+
+def test_blobs_stored_without_levels_get_them(index_store: ArchCADIndexStore) -> None:
+    index_store.upsert_sample(_circle_sample("train/0001"))
+    with index_store._connect() as connection:
+        connection.execute("DELETE FROM geometry_lods")
+    # A later sample re-referencing the stored blob fills in its levels.
+    index_store.upsert_sample(_circle_sample("train/0002"))
+    assert index_store.geometry_stats()["lod_rows"] == POLYLINE_MAX_LOD
+
+    # Databases written before geometry_lods existed are backfilled by initialize.
+    with index_store._connect() as connection:
+        connection.execute("DELETE FROM geometry_lods")
+    index_store.initialize()
+    assert index_store.geometry_stats()["lod_rows"] == POLYLINE_MAX_LOD
+    assert index_store.get_elements("train/0001", offset=0, limit=10, lod=POLYLINE_MAX_LOD)["items"][0]["lod"] > 0
@@ -0,0 +1,102 @@
+from __future__ import annotations
+
+from collections import Counter
+from pathlib import Path
+
+from app.core.settings import Settings
+from app.models.index_store import ArchCADIndexStore
+from app.models.posting_index import ArchCADPostingIndex, build_posting_index, current_posting_index, popcount
+from app.schemas.archcad import ArchCADElement, ArchCADSample, ArchCADSampleStats
+from app.services.archcad_search import ArchCADSearchService
+
+
+def _sample(sample_id: str, split: str, semantics: list[str]) -> ArchCADSample:
+    return ArchCADSample(
+        sample_id=sample_id,
+        split=split,
+        elements=[ArchCADElement(type="LINE", semantic=semantic) for semantic in semantics],
+        stats=ArchCADSampleStats(element_count=len(semantics), semantic_counts=dict(Counter(semantics))),
+    )
+
+
+def test_posting_lists_answer_boolean_label_queries(tmp_path: Path) -> None:
+    settings = Settings(ARCHCAD_LOCAL_DIR=tmp_path / "raw", ARCHCAD_PROCESSED_DIR=tmp_path / "processed")
+    settings.ensure_directories()
+    store = ArchCADIndexStore(settings.archcad_db_path)
+    store.initialize()
+    store.upsert_sample(_sample("train/a", "train", ["door", "window"]))
+    store.upsert_sample(_sample("train/b", "train", ["door"]))
+    store.upsert_sample(_sample("test/c", "test", ["window", "wall"]))
+    for index in range(300):
+        store.upsert_sample(_sample(f"train/z{index:03d}", "train", ["wall"]))
+
+    rows = store.posting_rows()
+    postings = ArchCADPostingIndex(settings.archcad_posting_lists_path, settings.archcad_posting_directory_path)
+    summary = postings.build(rows["sample_ids"], rows["postings"])
+    assert summary["encoded_bytes"] < summary["uncompressed_bytes"]
+
+    assert popcount(postings.combine("semantic", ["door", "window"], "and")) == 1
+    assert popcount(postings.combine("semantic", ["door", "window"], "or")) == 3
+    assert popcount(postings.combine("semantic", ["door", "window"], "not")) == 300
+
+    search = ArchCADSearchService(settings)
+    result = search.search(
+        semantic="door,window",
+        instance=None,
+        modalities=None,
+        split="train",
+        min_count=None,
+        max_count=None,
+        offset=0,
+        limit=10,
+        op="or",
+    )
+    assert result["pagination"]["total"] == 2
+    assert [item["sample_id"] for item in result["items"]] == ["train/a", "train/b"]
+    assert result["items"][0]["match_count"] == 2
+
+
+def test_stale_posting_lists_are_served_until_the_indexer_rebuilds_them(
+    archcad_settings: Settings, index_store: ArchCADIndexStore
+) -> None:
+    index_store.upsert_sample(_sample("train/a", "train", ["door"]))
+    index_store.upsert_sample(_sample("train/b", "train", ["door", "window"]))
+    paths = (archcad_settings.archcad_posting_lists_path, archcad_settings.archcad_posting_directory_path)
+    build_posting_index(*paths, index_store)
+    search = ArchCADSearchService(archcad_settings)
+
+    def door_ids(op: str | None) -> list[str]:
+        result = search.search(
+            semantic="door" if op is None else "door,door",
+            instance=None,
+            modalities=None,
+            split=None,
+            min_count=None,
+            max_count=None,
+            offset=0,
+            limit=10,
+            op=op,
+        )
+        return [item["sample_id"] for item in result["items"]]
+
+    assert door_ids("or") == door_ids(None) == ["train/a", "train/b"]
+    index_store.upsert_sample(_sample("train/b", "train", ["wall"]))
+    index_store.upsert_sample(_sample("test/c", "test", ["door"]))
+    # Queries never rebuild; the old lists answer until the next index build.
+    assert door_ids("or") == ["train/a", "train/b"]
+    assert current_posting_index(*paths, index_store).generation != index_store.generation()
+    build_posting_index(*paths, index_store)
+    assert door_ids("or") == door_ids(None) == ["test/c", "train/a"]
+
+    excluded = search.search(
+        semantic="door",
+        instance=None,
+        modalities=None,
+        split=None,
+        min_count=None,
+        max_count=None,
+        offset=0,
+        limit=10,
+        op="not",
+    )
+    assert [(item["sample_id"], item["match_count"]) for item in excluded["items"]] == [("train/b", 0)]
@@ -0,0 +1,55 @@
+from __future__ import annotations
+
+from typing import Any, Callable
+
+import pytest
+
+from app.core.exceptions import ArchCADError
+from app.core.settings import Settings
+from app.services.archcad_sampling import ArchCADSamplingService
+
+
+@pytest.fixture()
+def sampling_service(
+    archcad_settings: Settings, synthetic_index: Callable[..., tuple[dict[str, Any], dict[str, Any]]]
+) -> ArchCADSamplingService:
+    synthetic_index(samples=80, seed=5)
+    return ArchCADSamplingService(archcad_settings)
+
+
+def _ids(result: dict[str, object]) -> list[str]:
+    return [item["sample_id"] for item in result["items"]]
+
+
+def test_sample_is_deterministic_per_seed_and_respects_filters(sampling_service: ArchCADSamplingService) -> None:
+    first = sampling_service.sample(n=12, seed=7)
+    assert _ids(first) == _ids(sampling_service.sample(n=12, seed=7))
+    assert _ids(first) != _ids(sampling_service.sample(n=12, seed=8))
+    assert len(set(_ids(first))) == 12 and first["population"] == 80
+
+    unseeded = sampling_service.sample(n=5, split="val")
+    assert _ids(unseeded) == _ids(sampling_service.sample(n=5, split="val", seed=unseeded["seed"]))
+    everything = sampling_service.sample(n=500, seed=1, split="val")
+    assert everything["drawn"] == everything["population"] < 500
+    assert {item["split"] for item in everything["items"]} == {"val"}
+
+    with pytest.raises(ArchCADError):
+        sampling_service.sample(n=5, stratify="modality")
+
+
+def test_stratified_sample_balances_strata_without_repeats(sampling_service: ArchCADSamplingService) -> None:
+    by_split = sampling_service.sample(n=30, seed=3, stratify="split")
+    strata = {row["stratum"]: row for row in by_split["strata"]}
+    assert by_split["drawn"] == 30 and len(set(_ids(by_split))) == 30
+    # Small splits are drawn out first and leave the rest of their share to train.
+    for split in ("val", "test"):
+        assert strata[split]["drawn"] == min(10, strata[split]["population"])
+    assert sum(row["drawn"] for row in strata.values()) == 30
+    assert all(item["stratum"] == item["split"] for item in by_split["items"])
+
+    by_semantic = sampling_service.sample(n=20, seed=3, stratify="semantic", semantic="wall,window")
+    assert [row["stratum"] for row in by_semantic["strata"]] == ["wall", "window"]
+    assert [row["drawn"] for row in by_semantic["strata"]] == [10, 10]
+    assert len(set(_ids(by_semantic))) == 20
+    for item in by_semantic["items"]:
+        assert item["stats"]["semantic_counts"].get(item["stratum"], 0) > 0
@@ -0,0 +1,87 @@
+from __future__ import annotations
+
+import json
+import math
+import tarfile
+from pathlib import Path
+
+from app.core.settings import Settings
+from app.services.archcad_indexer import ArchCADIndexer
+from app.services.archcad_shard_exporter import ArchCADShardExporter, member_extension, select_shards, shard_key
+from app.services.archcad_synthetic import ArchCADSyntheticGenerator
+from app.utils.file_refs import parse_file_ref
+
+
+def test_export_writes_per_split_shards_and_a_matching_index(tmp_path: Path) -> None:
+    ArchCADSyntheticGenerator(
+        tmp_path / "raw",
+        samples=30,
+        elements_min=5,
+        elements_max=10,
+        point_count=8,
+        image_size=16,
+        missing_rate=0.1,
+        seed=3,
+    ).generate(workers=1)
+    settings = Settings(ARCHCAD_LOCAL_DIR=tmp_path / "raw", ARCHCAD_PROCESSED_DIR=tmp_path / "processed")
+    ArchCADIndexer(settings).build_index(force_reindex=True)
+    manifest = json.loads(settings.archcad_manifest_path.read_text())
+    aligned = {
+        record["sample_id"]: record
+        for record in manifest["samples"]
+        if record["validation_flags"].get("is_fully_aligned")
+    }
+    assert 0 < len(aligned) < len(manifest["samples"])
+
+    result = ArchCADShardExporter(settings).export(samples_per_shard=4, workers=1)
+    output_dir = Path(result["output_dir"])
+    index = json.loads((output_dir / "shards.json").read_text())
+    assert result["sample_count"] == index["sample_count"] == len(aligned)
+    assert result["shard_count"] == len(index["shards"]) == len(list(output_dir.glob("*.tar")))
+
+    exported: dict[str, dict[str, object]] = {}
+    for shard in index["shards"]:
+        assert 1 <= shard["sample_count"] == len(shard["sample_ids"]) <= 4
+        assert shard["path"].startswith(f"{shard['split']}-")
+        expected = set()
+        semantics: set[str] = set()
+        with tarfile.open(output_dir / shard["path"]) as handle:
+            names = set(handle.getnames())
+            for sample_id in shard["sample_ids"]:
+                record = aligned[sample_id]
+                assert record["split"] == shard["split"]
+                expected.add(f"{shard_key(sample_id)}.normalized.json")
+                for modality, file_ref in record["file_paths"].items():
+                    suffix = Path(parse_file_ref(file_ref)[1] or file_ref).suffix.lower()
+                    expected.add(f"{shard_key(sample_id)}.{member_extension(modality, suffix)}")
+                normalized = json.load(handle.extractfile(f"{shard_key(sample_id)}.normalized.json"))
+                semantics.update(normalized["stats"]["semantic_counts"])
+                exported[sample_id] = shard
+        assert names == expected
+        assert shard["semantics"] == sorted(semantics)
+    assert set(exported) == set(aligned)
+    first = next(iter(sorted(aligned)))
+    with tarfile.open(output_dir / exported[first]["path"]) as handle:
+        assert {f"{first}.png", f"{first}.svg", f"{first}.cad.json", f"{first}.qa.txt"} <= set(handle.getnames())
+
+    # Only the last shard of each split may be partly filled.
+    splits = {record["split"] for record in aligned.values()}
+    for split in splits:
+        split_count = sum(record["split"] == split for record in aligned.values())
+        paths = select_shards(index, split=split)
+        assert len(paths) == math.ceil(split_count / 4)
+        assert paths == [shard["path"] for shard in index["shards"] if shard["split"] == split]
+    semantic = index["shards"][0]["semantics"][0]
+    assert select_shards(index, semantic=semantic) == [
+        shard["path"] for shard in index["shards"] if semantic in shard["semantics"]
+    ]
+    assert select_shards(index, split=sorted(splits)[0], semantic="no_such_label") == []
+
+    # A re-export with larger shards leaves no stale shards behind for glob-based loaders.
+    (output_dir / "notes.tar").write_bytes(b"")
+    rerun = ArchCADShardExporter(settings).export(samples_per_shard=100, workers=1)
+    assert rerun["shard_count"] == len(splits)
+    assert sorted(path.name for path in output_dir.glob("*-*.tar")) == sorted(
+        shard["path"] for shard in json.loads((output_dir / "shards.json").read_text())["shards"]
+    )
+    assert (output_dir / "notes.tar").exists()
@@ -0,0 +1,67 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+from app.models.sharded_index_store import ArchCADShardedIndexStore
+from app.schemas.archcad import ArchCADElement, ArchCADSample
+
+
+def _sample(sample_id: str, split: str, semantics: list[str]) -> ArchCADSample:
+    return ArchCADSample(
+        sample_id=sample_id,
+        split=split,
+        elements=[ArchCADElement(type="LINE", semantic=semantic) for semantic in semantics],
+    )
+
+
+def test_sharded_store_fans_out_and_resets_one_split(tmp_path: Path) -> None:
+    store = ArchCADShardedIndexStore(tmp_path / "shards")
+    store.initialize()
+    store.upsert_sample(_sample("train/a", "train", ["door", "door"]))
+    store.upsert_sample(_sample("train/b", "train", ["window"]))
+    store.upsert_sample(_sample("test/c", "test", ["door", "door", "door"]))
+
+    assert sorted(store.shards()) == ["test", "train"]
+    listed = store.list_samples(offset=1, limit=5)
+    assert [item["sample_id"] for item in listed["items"]] == ["train/a", "train/b"]
+    assert listed["total"] == 3
+
+    matches = store.search(
+        semantic="door",
+        instance=None,
+        modalities=None,
+        split=None,
+        min_count=None,
+        max_count=None,
+        offset=0,
+        limit=10,
+    )
+    assert [(item["sample_id"], item["match_count"]) for item in matches["items"]] == [("test/c", 3), ("train/a", 2)]
+    # Identical elements collapse into one row with a multiplicity.
+    elements = store.get_elements("test/c", offset=0, limit=10)
+    assert elements["total"] == 1
+    assert elements["items"][0]["multiplicity"] == 3
+
+    store.delete_split("train")
+    assert store.summary()["sample_count"] == 1
+    assert store.get_sample("test/c") is not None
+
+
+def test_reads_of_unknown_splits_create_no_shard_and_reuse_one_pool(tmp_path: Path) -> None:
+    store = ArchCADShardedIndexStore(tmp_path / "shards")
+    store.initialize()
+    store.upsert_sample(_sample("train/a", "train", ["door"]))
+    store.upsert_sample(_sample("test/b", "test", ["wall"]))
+    generation = store.generation()
+
+    assert store.list_samples(offset=0, limit=5, split="bogus") == {"items": [], "total": 0}
+    assert store.sample_ids(split="bogus") == []
+    assert store.search_instances(offset=0, limit=5, split="bogus") == {"items": [], "total": 0}
+    assert sorted(store.shards()) == ["test", "train"]
+    assert store.generation() == generation
+    assert not store.has_sample("bogus/a")
+
+    store.summary()
+    executor = store._executor
+    store.semantic_stats()
+    assert executor is not None and store._executor is executor
@@ -0,0 +1,61 @@
+from __future__ import annotations
+
+import zipfile
+
+import pytest
+
+from app.core.settings import Settings
+from app.models.index_store import ArchCADIndexStore
+from app.schemas.archcad import ArchCADElement, ArchCADModalityRefs, ArchCADSample
+from app.services.archcad_tiles import TILE_EXTENT, ArchCADTileService, decode_tile
+from app.utils.file_refs import make_file_ref
+
+
+@pytest.fixture()
+def tile_service(archcad_settings: Settings, index_store: ArchCADIndexStore) -> ArchCADTileService:
+    svg_zip = archcad_settings.archcad_local_dir / "svg.zip"
+    with zipfile.ZipFile(svg_zip, "w") as archive:
+        archive.writestr("sample-001.svg", '<svg xmlns="http://www.w3.org/2000/svg" viewBox="0 0 200 100"></svg>')
+    index_store.upsert_sample(
+        ArchCADSample(
+            sample_id="sample-001",
+            modalities=ArchCADModalityRefs(svg=make_file_ref(svg_zip, "sample-001.svg")),
+            elements=[
+                ArchCADElement(
+                    type="POLYLINE",
+                    semantic="wall",
+                    geometry={"points": [{"x": 10, "y": 50}, {"x": 150, "y": 50}, {"x": 150, "y": 90}]},
+                ),
+                ArchCADElement(type="CIRCLE", semantic="column", geometry={"center": {"x": 20, "y": 20}, "radius": 5}),
+            ],
+        )
+    )
+    return ArchCADTileService(archcad_settings)
+
+
+def test_tiles_clip_quantize_and_round_trip(tile_service: ArchCADTileService) -> None:
+
+    root = tile_service.get_tile("sample-001", 0, 0, 0)
+    assert root["bounds"] == [0.0, 0.0, 200.0, 200.0]
+    features = decode_tile(root["payload"])["features"]
+    wall = next(feature for feature in features if feature["semantic"] == "wall")
+    scale = TILE_EXTENT / 200
+    assert wall["coordinates"] == [[round(10 * scale), round(50 * scale)], [round(150 * scale), 1024], [3072, 1843]]
+
+    # Zoom 1: the wall leaves tile (0, 0) through its right edge and is clipped at the buffer.
+    left = decode_tile(tile_service.get_tile("sample-001", 1, 0, 0)["payload"])
+    assert {feature["semantic"] for feature in left["features"]} == {"wall", "column"}
+    clipped = next(feature for feature in left["features"] if feature["semantic"] == "wall")
+    assert clipped["coordinates"] == [[410, 2048], [TILE_EXTENT + left["buffer"], 2048]]
+    right = decode_tile(tile_service.get_tile("sample-001", 1, 1, 0)["payload"])
+    assert [feature["element_index"] for feature in right["features"]] == [0]
+    assert right["features"][0]["coordinates"][-1] == [2048, 3686]
+    assert decode_tile(tile_service.get_tile("sample-001", 1, 1, 1)["payload"])["features"] == []
+
+
+def test_tiles_are_cached_and_revalidated(tile_service: ArchCADTileService) -> None:
+    first = tile_service.get_tile("sample-001", 2, 1, 1)
+    second = tile_service.get_tile("sample-001", 2, 1, 1)
+    assert (first["cached"], second["cached"]) == (False, True)
+    assert second["payload"] == first["payload"]
+    assert tile_service.get_tile("sample-001", 2, 1, 1, if_none_match=first["etag"])["payload"] is None
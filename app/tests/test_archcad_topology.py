@@ -0,0 +1,68 @@
+from __future__ import annotations
+
+import numpy as np
+
+from app.core.settings import Settings
+from app.models.index_store import ArchCADIndexStore
+from app.schemas.archcad import ArchCADElement, ArchCADSample
+from app.services.archcad_topology import ArchCADTopologyService
+from app.utils.planar_graph import build_planar_graph
+
+
+def test_planar_graph_splits_snaps_and_traces_faces() -> None:
+    segments = np.array(
+        [
+            # A 10 x 10 room drawn with an overshoot and an undershoot corner.
+            [0, 0, 10.0004, 0],
+            [10, 0, 10, 10],
+            [10, 10, 0, 10],
+            [0, 10, 0, 0.0003],
+            # A partition T-joined to both walls (one end short by less than the snap distance) ...
+            [4, 0.0005, 4, 10],
+            # ... a wall drawn twice, half overlapping, and a stray line.
+            [0, 10, 6, 10],
+            [20, 20, 25, 20],
+        ]
+    )
+    graph = build_planar_graph(segments, 1e-3)
+    assert sorted(graph.face_areas.round(2).tolist()) == [40.0, 60.0]
+    # Four corners, the partition ends, the end of the overlap at (6, 10) and the stray line.
+    assert len(graph.nodes) == 9
+    assert len(np.unique(graph.edge_components)) == 2
+    # Every face is a counter-clockwise cycle over existing edges.
+    edges = {tuple(sorted(edge)) for edge in graph.edges.tolist()}
+    for face in graph.faces:
+        assert all(tuple(sorted(pair)) in edges for pair in zip(face.tolist(), np.roll(face, -1).tolist()))
+
+    lattice = [[i, 0, i, 3] for i in range(4)] + [[0, i, 3, i] for i in range(4)]
+    graph = build_planar_graph(np.array(lattice, dtype=np.float64), 1e-3)
+    assert (len(graph.nodes), len(graph.edges), len(graph.faces)) == (16, 24, 9)
+
+
+def test_topology_service_filters_by_semantic_and_stores_the_graph(
+    archcad_settings: Settings, index_store: ArchCADIndexStore
+) -> None:
+    room = [{"x": 0, "y": 0}, {"x": 100, "y": 0}, {"x": 100, "y": 80}, {"x": 0, "y": 80}, {"x": 0, "y": 0}]
+    sample = ArchCADSample(
+        sample_id="sample-001",
+        elements=[
+            ArchCADElement(type="POLYLINE", semantic="wall", geometry={"points": room}),
+            ArchCADElement(type="LINE", semantic="wall", geometry={"start": [40, 0], "end": [40, 80]}),
+            ArchCADElement(type="LINE", semantic="door", geometry={"start": [0, 40], "end": [40, 40]}),
+            ArchCADElement(type="ARC", semantic="door", geometry={"center": [40, 40], "radius": 10}),
+        ],
+    )
+    index_store.upsert_sample(sample)
+    service = ArchCADTopologyService(archcad_settings)
+
+    walls = service.get_topology("sample-001", semantic="wall")
+    summary = walls["summary"]
+    assert (walls["cached"], summary["faces"], summary["components"], summary["dangling_nodes"]) == (False, 2, 1, 0)
+    assert sorted(face["area"] for face in walls["faces"]) == [3200.0, 4800.0]
+    everything = service.get_topology("sample-001")
+    assert (everything["summary"]["segments"], everything["summary"]["faces"]) == (6, 3)
+    assert service.get_topology("sample-001", semantic="wall")["cached"] is True
+
+    # Reindexing the sample drops its stored graphs.
+    index_store.upsert_sample(sample)
+    assert service.get_topology("sample-001", semantic="wall")["cached"] is False
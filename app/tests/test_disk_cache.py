@@ -0,0 +1,21 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+from app.utils.disk_cache import cache_key, shared_disk_cache
+
+
+def test_shared_cache_is_reused_and_counts_overwrites_once(tmp_path: Path) -> None:
+    cache = shared_disk_cache(tmp_path / "cache", max_bytes=150)
+    assert shared_disk_cache(tmp_path / "cache", max_bytes=150) is cache
+
+    first, second = cache_key("first"), cache_key("second")
+    cache.put(first, b"a" * 60)
+    for _ in range(3):
+        cache.put(second, b"b" * 60)
+    # Overwrites replace the entry's size rather than adding to it, so nothing is evicted.
+    assert cache.get(first) == b"a" * 60
+    assert cache.size_bytes() == 120
+
+    cache.put(cache_key("third"), b"c" * 60)
+    assert cache.get(second) is None and cache.size_bytes() == 120
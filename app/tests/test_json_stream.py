@@ -0,0 +1,34 @@
+from __future__ import annotations
+
+import io
+import json
+
+import pytest
+
+from app.utils import json_stream
+from app.utils.json_stream import JSONStreamError, iter_array_items
+
+KEYS = ("elements", "primitives")
+
+
+def _items(text: str) -> list[tuple[str | None, object]]:
+    return list(iter_array_items(io.StringIO(text).read, KEYS))
+
+
+def test_items_survive_every_chunk_boundary(monkeypatch: pytest.MonkeyPatch) -> None:
+    items = [{"start": [1.5e-3, -12345678901234567890], "label": 'café "\\u2603"'}, 7, None, [1.25, True]]
+    document = json.dumps({"meta": {"scale": 0.5}, "elements": items, "primitives": [], "count": 1e300}, indent=2)
+    for chunk in (1, 2, 3, 5, 64):
+        monkeypatch.setattr(json_stream, "STREAM_CHUNK_CHARS", chunk)
+        assert _items(document) == [("elements", item) for item in items]
+        assert _items(json.dumps(items)) == [(None, item) for item in items]
+
+
+def test_unsupported_layouts_and_malformed_documents_raise() -> None:
+    for document in ('"text"', '{"elements": {"a": 1}}', '{"elements": [1], "elements": [2]}'):
+        with pytest.raises(JSONStreamError):
+            _items(document)
+    for document in ("[1, 2", "[1,]", '{"elements": [1]} extra', '{"a" 1}'):
+        with pytest.raises(json.JSONDecodeError):
+            _items(document)
+    assert _items("{}") == [] and _items(" [ ] ") == []
@@ -0,0 +1,48 @@
+from __future__ import annotations
+
+import io
+import json
+import logging
+
+from app.core.logging import ArchCADQueueHandler, JsonLogFormatter, RateLimitFilter
+from app.core.metrics import LOG_RECORDS_DROPPED
+
+
+def _record(message: str, level: int = logging.WARNING, **extra: object) -> logging.LogRecord:
+    record = logging.LogRecord("test.rate", level, __file__, 1, message, None, None)
+    record.__dict__.update(extra)
+    return record
+
+
+def test_rate_limit_filter_throttles_per_message_and_reports_suppressed() -> None:
+    rate_filter = RateLimitFilter(rate=0.001, burst=2)
+    dropped_before = LOG_RECORDS_DROPPED.value(logger="test.rate", reason="rate_limited")
+
+    passed = [rate_filter.filter(_record("sample failed", context={"i": i})) for i in range(5)]
+    assert passed == [True, True, False, False, False]
+    assert rate_filter.filter(_record("other message"))
+    assert rate_filter.filter(_record("sample failed", level=logging.ERROR))
+    assert LOG_RECORDS_DROPPED.value(logger="test.rate", reason="rate_limited") == dropped_before + 3
+
+    rate_filter._buckets[("test.rate", "sample failed")][0] = 1.0
+    recovered = _record("sample failed", context={"i": 9})
+    assert rate_filter.filter(recovered)
+    assert recovered.context == {"i": 9, "suppressed": 3}
+
+
+def test_queue_handler_formats_on_listener_and_drops_when_full() -> None:
+    stream = io.StringIO()
+    target = logging.StreamHandler(stream)
+    target.setFormatter(JsonLogFormatter())
+    handler = ArchCADQueueHandler(queue_size=1, target=target)
+    handler.listener.stop()
+    dropped_before = LOG_RECORDS_DROPPED.value(logger="test.rate", reason="queue_full")
+
+    handler.handle(_record("kept %s"))
+    handler.handle(_record("dropped"))
+    assert LOG_RECORDS_DROPPED.value(logger="test.rate", reason="queue_full") == dropped_before + 1
+
+    handler.listener.start()
+    handler.stop()
+    lines = stream.getvalue().splitlines()
+    assert [json.loads(line)["message"] for line in lines] == ["kept %s"]
@@ -0,0 +1,31 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+from fastapi.testclient import TestClient
+
+from app.core.metrics import Histogram
+from app.main import create_app
+from app.models.index_store import ArchCADIndexStore
+
+
+def test_histogram_renders_cumulative_buckets() -> None:
+    histogram = Histogram("demo_seconds", "Demo.", ("route",), buckets=(0.1, 1.0))
+    histogram.observe(0.05, route="/a")
+    histogram.observe(0.5, route="/a")
+    rendered = "\n".join(histogram.render())
+    assert 'demo_seconds_bucket{route="/a",le="0.1"} 1' in rendered
+    assert 'demo_seconds_bucket{route="/a",le="+Inf"} 2' in rendered
+    assert 'demo_seconds_count{route="/a"} 2' in rendered
+
+
+def test_metrics_endpoint_reports_route_templates_and_queries(tmp_path: Path) -> None:
+    ArchCADIndexStore(tmp_path / "index.sqlite3").initialize()
+    client = TestClient(create_app())
+    assert client.get("/health").status_code == 200
+    assert client.get("/datasets/archcad/samples/sample-001/pointcloud?lod=99").status_code == 422
+
+    body = client.get("/metrics").text
+    assert 'route="/health",status="200"' in body
+    assert 'route="/datasets/archcad/samples/{sample_id:path}/pointcloud",status="422"' in body
+    assert 'archcad_sqlite_queries_total{operation="SCRIPT"}' in body
@@ -0,0 +1,33 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+from app.models.index_store import ArchCADIndexStore
+from app.models.query_log import SLOW_QUERY_LOG, normalize_sql
+from app.schemas.archcad import ArchCADSample
+
+
+def test_normalize_sql_collapses_literals_and_in_lists() -> None:
+    assert normalize_sql("SELECT *  FROM t WHERE a IN (?, ?, ?) AND b = 'x' LIMIT 5") == (
+        "SELECT * FROM t WHERE a IN (...) AND b = ? LIMIT ?"
+    )
+
+
+def test_slow_query_log_captures_plans_by_fingerprint(tmp_path: Path) -> None:
+    store = ArchCADIndexStore(tmp_path / "index.sqlite3")
+    store.initialize()
+    store.upsert_sample(ArchCADSample(sample_id="sample-001", split="train"))
+
+    SLOW_QUERY_LOG.reset()
+    SLOW_QUERY_LOG.configure(threshold_ms=1e-9, top_n=5)
+    try:
+        store.list_samples(offset=0, limit=10, split="train")
+        store.list_samples(offset=0, limit=10, split="test")
+        top = SLOW_QUERY_LOG.top()
+    finally:
+        SLOW_QUERY_LOG.configure(threshold_ms=None, top_n=20)
+        SLOW_QUERY_LOG.reset()
+
+    page_query = next(entry for entry in top if "ORDER BY s.sample_id" in entry["sql"])
+    assert page_query["count"] == 2
+    assert any("samples" in line for line in page_query["plan"])
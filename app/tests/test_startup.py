@@ -0,0 +1,62 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import subprocess
+import sys
+import threading
+from pathlib import Path
+
+from app.core.settings import Settings, get_settings
+from app.main import create_app
+from app.models.index_store import ArchCADIndexStore
+from app.services.archcad_indexer import ArchCADIndexer
+from app.services.archcad_synthetic import ArchCADSyntheticGenerator
+from app.services.archcad_warmup import warm_up
+
+
+def test_app_import_leaves_optional_services_unloaded() -> None:
+    lazy = ["huggingface_hub", "PIL", "numpy", "app.services.archcad_indexer", "app.services.archcad_masks"]
+    completed = subprocess.run(
+        [sys.executable, "-c", f"import json, sys, app.main; print(json.dumps([m for m in {lazy!r} if m in sys.modules]))"],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    assert json.loads(completed.stdout.strip().splitlines()[-1]) == []
+
+
+def test_store_reuses_one_connection_per_thread_until_reset(tmp_path: Path) -> None:
+    store = ArchCADIndexStore(tmp_path / "index.sqlite3")
+    store.initialize()
+    connection = store._connect()
+    assert ArchCADIndexStore(tmp_path / "index.sqlite3")._connect() is connection
+
+    other: list[object] = []
+    thread = threading.Thread(target=lambda: other.append(store._connect()))
+    thread.start()
+    thread.join()
+    assert other[0] is not connection
+
+    store.initialize(reset=True)
+    assert store._connect() is not connection
+    assert store.summary()["sample_count"] == 0
+
+
+def test_warm_up_serves_every_read_route(tmp_path: Path) -> None:
+    ArchCADSyntheticGenerator(
+        tmp_path / "raw", samples=4, elements_min=5, elements_max=10, point_count=32, image_size=32, seed=3
+    ).generate(workers=1)
+    settings = Settings(
+        ARCHCAD_LOCAL_DIR=tmp_path / "raw",
+        ARCHCAD_PROCESSED_DIR=tmp_path / "processed",
+        ARCHCAD_WARMUP=True,
+    )
+    ArchCADIndexer(settings).build_index(force_reindex=True)
+    application = create_app()
+    application.dependency_overrides[get_settings] = lambda: settings
+
+    timings = asyncio.run(warm_up(application, settings))
+
+    assert {"health", "samples", "sample", "elements", "search", "search_posting", "stats_semantics"} <= set(timings)
+    assert {timing["status"] for timing in timings.values()} == {200}
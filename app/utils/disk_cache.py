@@ -0,0 +1,122 @@
+from __future__ import annotations
+
+import hashlib
+import os
+import threading
+from pathlib import Path
+
+from app.core.metrics import record_cache
+
+_SHARED: dict[Path, DiskCache] = {}
+_SHARED_LOCK = threading.Lock()
+
+
+def cache_key(*parts: object) -> str:
+    """Build a stable content key from arbitrary key parts."""
+    digest = hashlib.sha256()
+    for part in parts:
+        digest.update(str(part).encode("utf-8"))
+        digest.update(b"\x00")
+    return digest.hexdigest()
+
+
+class DiskCache:
+    """Size-bounded on-disk blob cache with least-recently-used eviction.
+
+    Entries are addressed by hex keys and fanned out into two-character
+    subdirectories. Reads refresh the file mtime, which doubles as the LRU clock.
+    """
+
+    def __init__(self, root: Path, *, max_bytes: int) -> None:
+        self.root = root
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._approx_bytes: int | None = None
+
+    def path_for(self, key: str, suffix: str = ".bin") -> Path:
+        return self.root / key[:2] / f"{key}{suffix}"
+
+    def get(self, key: str, suffix: str = ".bin") -> bytes | None:
+        path = self.path_for(key, suffix)
+        try:
+            payload = path.read_bytes()
+        except FileNotFoundError:
+            record_cache(self.root.name, False)
+            return None
+        record_cache(self.root.name, True)
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return payload
+
+    def put(self, key: str, payload: bytes, suffix: str = ".bin") -> Path:
+        path = self.path_for(key, suffix)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        temp_path = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        temp_path.write_bytes(payload)
+        try:
+            replaced = path.stat().st_size
+        except FileNotFoundError:
+            replaced = 0
+        os.replace(temp_path, path)
+
+        with self._lock:
+            if self._approx_bytes is None:
+                self._approx_bytes = self._scan_size()
+            else:
+                self._approx_bytes += len(payload) - replaced
+            if self._approx_bytes > self.max_bytes:
+                self._approx_bytes = self._evict()
+        return path
+
+    def size_bytes(self) -> int:
+        return self._scan_size()
+
+    def clear(self) -> None:
+        for path in self._entries():
+            path.unlink(missing_ok=True)
+        with self._lock:
+            self._approx_bytes = 0
+
+    def _entries(self) -> list[Path]:
+        if not self.root.exists():
+            return []
+        return [path for path in self.root.glob("*/*") if path.is_file() and not path.name.endswith(".tmp")]
+
+    def _scan_size(self) -> int:
+        total = 0
+        for path in self._entries():
+            try:
+                total += path.stat().st_size
+            except FileNotFoundError:
+                continue
+        return total
+
+    def _evict(self) -> int:
+        entries: list[tuple[float, int, Path]] = []
+        for path in self._entries():
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries, key=lambda entry: entry[0]):
+            if total <= self.max_bytes:
+                break
+            path.unlink(missing_ok=True)
+            total -= size
+        return total
+
+
+def shared_disk_cache(root: Path, *, max_bytes: int) -> DiskCache:
+    """Return the process-wide cache for ``root``, so its size estimate and lock outlive a request."""
+    key = root.resolve()
+    with _SHARED_LOCK:
+        cache = _SHARED.get(key)
+        if cache is None:
+            cache = _SHARED[key] = DiskCache(root, max_bytes=max_bytes)
+        cache.max_bytes = max_bytes
+        return cache
@@ -1,13 +1,26 @@
 from __future__ import annotations
 
+import io
 import json
+import os
 import shutil
+import threading
 import zipfile
+from collections import OrderedDict
+from contextlib import contextmanager
 from pathlib import Path
-from typing import Any, Iterator
+from typing import Any, Iterator, TextIO
+
+from app.core.metrics import record_cache
 
 ZIP_PREFIX = "zip://"
 REF_SEPARATOR = "::"
+# Open archives kept per process; parsing a large central directory dominates small reads.
+ZIP_HANDLE_CACHE_SIZE = 16
+
+_zip_handles: OrderedDict[tuple[str, int, int], zipfile.ZipFile] = OrderedDict()
+_zip_handles_lock = threading.Lock()
+_zip_handles_pid = os.getpid()
 
 
 def make_file_ref(path: Path, member: str | None = None) -> str:
@@ -24,14 +37,61 @@ def parse_file_ref(file_ref: str) -> tuple[Path, str | None]:
     return Path(file_ref), None
 
 
+def open_archive(path: Path) -> zipfile.ZipFile:
+    """Return a shared read-only handle for ``path``, reopened when the file changes.
+
+    Handles are cached per process (forked workers start empty) and evicted
+    least-recently-used; evicted handles close once their last reader drops them.
+    """
+    global _zip_handles_pid
+    stat = path.stat()
+    key = (str(path), stat.st_mtime_ns, stat.st_size)
+    with _zip_handles_lock:
+        if _zip_handles_pid != os.getpid():
+            _zip_handles.clear()
+            _zip_handles_pid = os.getpid()
+        archive = _zip_handles.get(key)
+        if archive is not None:
+            _zip_handles.move_to_end(key)
+            record_cache("zip_handles", True)
+            return archive
+        archive = zipfile.ZipFile(path)
+        _zip_handles[key] = archive
+        while len(_zip_handles) > ZIP_HANDLE_CACHE_SIZE:
+            _zip_handles.popitem(last=False)
+    record_cache("zip_handles", False)
+    return archive
+
+
 def read_bytes(file_ref: str) -> bytes:
     path, member = parse_file_ref(file_ref)
     if member:
-        with zipfile.ZipFile(path) as archive:
-            return archive.read(member)
+        return open_archive(path).read(member)
     return path.read_bytes()
 
 
+def read_prefix(file_ref: str, size: int) -> bytes:
+    """Read only the first ``size`` bytes, e.g. to sniff image headers."""
+    path, member = parse_file_ref(file_ref)
+    if member:
+        with open_archive(path).open(member) as handle:
+            return handle.read(size)
+    with path.open("rb") as handle:
+        return handle.read(size)
+
+
+@contextmanager
+def open_text(file_ref: str, encoding: str = "utf-8") -> Iterator[TextIO]:
+    """Open ``file_ref`` for incremental reads; zip members are inflated as they are read.
+
+    Decoding is strict, unlike ``read_text``, and newlines are left untranslated.
+    """
+    path, member = parse_file_ref(file_ref)
+    handle = open_archive(path).open(member) if member else path.open("rb")
+    with io.TextIOWrapper(handle, encoding=encoding, newline="") as text:
+        yield text
+
+
 def read_text(file_ref: str, encoding: str = "utf-8") -> str:
     raw = read_bytes(file_ref)
     for candidate in (encoding, "utf-8-sig", "latin-1"):
@@ -42,6 +102,16 @@ def read_text(file_ref: str, encoding: str = "utf-8") -> str:
     return raw.decode(encoding, errors="replace")
 
 
+def file_ref_fingerprint(file_ref: str) -> str:
+    """Return a cheap identity for the referenced content without reading it."""
+    path, member = parse_file_ref(file_ref)
+    if member:
+        info = open_archive(path).getinfo(member)
+        return f"{path.resolve()}::{member}:{info.CRC:08x}:{info.file_size}"
+    stat = path.stat()
+    return f"{path.resolve()}:{stat.st_size}:{stat.st_mtime_ns}"
+
+
 def load_json(file_ref: str) -> Any:
     return json.loads(read_text(file_ref))
 
@@ -0,0 +1,43 @@
+from __future__ import annotations
+
+import hashlib
+import json
+from typing import Any
+
+# Decimal places kept when canonicalizing coordinates; CAD float noise below
+# this collapses onto the same geometry blob.
+GEOMETRY_PRECISION = 6
+
+
+def _canonical_value(value: Any) -> Any:
+    if isinstance(value, float):
+        rounded = round(value, GEOMETRY_PRECISION)
+        # Fold -0.0 into 0.0 and integral floats into ints so 1 and 1.0 agree.
+        return int(rounded) if rounded.is_integer() else rounded
+    if isinstance(value, dict):
+        return {str(key): _canonical_value(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_canonical_value(item) for item in value]
+    return value
+
+
+def canonical_geometry(element_type: str, geometry: dict[str, Any]) -> str:
+    """Stable JSON text for ``geometry``: rounded numbers, sorted keys, no whitespace.
+
+    Lines are undirected, so their endpoints are ordered; every other type keeps
+    its point order (arcs and polylines are direction-sensitive).
+    """
+    canonical = _canonical_value(geometry)
+    if element_type.upper() == "LINE" and isinstance(canonical, dict):
+        start, end = canonical.get("start"), canonical.get("end")
+        if isinstance(start, dict) and isinstance(end, dict):
+            start_key = (start.get("x") or 0, start.get("y") or 0)
+            end_key = (end.get("x") or 0, end.get("y") or 0)
+            if end_key < start_key:
+                canonical["start"], canonical["end"] = end, start
+    return json.dumps(canonical, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+
+
+def geometry_hash(canonical_json: str) -> str:
+    """Content address of a canonical geometry blob."""
+    return hashlib.blake2b(canonical_json.encode("utf-8"), digest_size=16).hexdigest()
@@ -0,0 +1,44 @@
+from __future__ import annotations
+
+import numpy as np
+
+# The 3x3 block of cells around a probe holds every point within one cell width of it.
+_NEIGHBOUR_CELLS = [(dx, dy) for dx in (-1, 0, 1) for dy in (-1, 0, 1)]
+
+
+def _cell_keys(cells: np.ndarray) -> np.ndarray:
+    return (cells[:, 0] << 32) + (cells[:, 1] & 0xFFFFFFFF)
+
+
+def grid_candidates(queries: np.ndarray, points: np.ndarray, cell: float) -> tuple[np.ndarray, np.ndarray]:
+    """Return ``(query index, point index)`` pairs in neighbouring cells of a uniform grid.
+
+    ``points`` (n x 2) are bucketed by sorted cell key and each query (m x 2)
+    probes the 3x3 cells around it, so every pair closer than ``cell`` is
+    included; callers filter the candidates by exact distance. Work is
+    proportional to the number of candidates rather than ``m * n``.
+    """
+    empty = np.zeros(0, dtype=np.int64)
+    if not len(queries) or not len(points):
+        return empty, empty
+    keys = _cell_keys(np.floor(points / cell).astype(np.int64))
+    order = np.argsort(keys, kind="stable")
+    sorted_keys = keys[order]
+
+    cells = np.floor(queries / cell).astype(np.int64)
+    query_parts: list[np.ndarray] = []
+    point_parts: list[np.ndarray] = []
+    for offset in _NEIGHBOUR_CELLS:
+        probes = _cell_keys(cells + offset)
+        low = np.searchsorted(sorted_keys, probes, side="left")
+        counts = np.searchsorted(sorted_keys, probes, side="right") - low
+        total = int(counts.sum())
+        if not total:
+            continue
+        # Expand every probe's [low, low + count) run of hash entries into pairs.
+        run_starts = np.repeat(low - (np.cumsum(counts) - counts), counts)
+        query_parts.append(np.repeat(np.arange(len(queries)), counts))
+        point_parts.append(order[np.arange(total) + run_starts])
+    if not query_parts:
+        return empty, empty
+    return np.concatenate(query_parts), np.concatenate(point_parts)
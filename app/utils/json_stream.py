@@ -0,0 +1,128 @@
+from __future__ import annotations
+
+import json
+import re
+from typing import Any, Callable, Iterator
+
+# Characters requested per read; a value longer than the buffer doubles the next read.
+STREAM_CHUNK_CHARS = 1 << 16
+
+_DECODER = json.JSONDecoder()
+_WHITESPACE = re.compile(r"[ \t\n\r]*")
+_NUMBER_TAIL = re.compile(r"[0-9.eE+\-]*")
+
+
+class JSONStreamError(ValueError):
+    """The document has a layout the streaming reader does not handle."""
+
+
+def iter_array_items(read: Callable[[int], str], keys: tuple[str, ...]) -> Iterator[tuple[str | None, Any]]:
+    """Yield ``(key, item)`` for every item of a document's element arrays.
+
+    ``read(size)`` returns up to ``size`` more characters, ``""`` at the end.
+    A top-level array yields its items under key ``None``; a top-level object
+    yields the items of each array member named in ``keys`` under that name
+    and decodes and drops its other members. Only the pending text and the
+    current item are held, never the whole document.
+
+    Malformed JSON raises ``json.JSONDecodeError``. Other layouts raise
+    ``JSONStreamError``: a scalar document, a listed member that is not an
+    array, or a listed member that appears twice.
+    """
+    return _Reader(read).items(keys)
+
+
+class _Reader:
+    def __init__(self, read: Callable[[int], str]) -> None:
+        self._read = read
+        self._buffer = ""
+        self._pos = 0
+        self._eof = False
+
+    def items(self, keys: tuple[str, ...]) -> Iterator[tuple[str | None, Any]]:
+        first = self._peek()
+        if first == "[":
+            yield from self._array(None)
+        elif first == "{":
+            yield from self._members(keys)
+        else:
+            raise JSONStreamError("Document is neither an array nor an object")
+        if self._peek():
+            raise json.JSONDecodeError("Extra data", self._buffer, self._pos)
+
+    def _members(self, keys: tuple[str, ...]) -> Iterator[tuple[str | None, Any]]:
+        self._pos += 1
+        if self._peek() == "}":
+            self._pos += 1
+            return
+        seen: set[str] = set()
+        while True:
+            if self._peek() != '"':
+                raise json.JSONDecodeError("Expecting property name enclosed in double quotes", self._buffer, self._pos)
+            key = self._value()
+            self._expect(":")
+            if key not in keys:
+                self._value()
+            elif key in seen or self._peek() != "[":
+                raise JSONStreamError(f"Member {key!r} is repeated or not an array")
+            else:
+                seen.add(key)
+                yield from self._array(key)
+            if self._peek() == ",":
+                self._pos += 1
+                continue
+            self._expect("}")
+            return
+
+    def _array(self, key: str | None) -> Iterator[tuple[str | None, Any]]:
+        self._pos += 1
+        if self._peek() == "]":
+            self._pos += 1
+            return
+        while True:
+            yield key, self._value()
+            if self._peek() == ",":
+                self._pos += 1
+                continue
+            self._expect("]")
+            return
+
+    def _value(self) -> Any:
+        self._peek()
+        while True:
+            try:
+                value, end = _DECODER.raw_decode(self._buffer, self._pos)
+            except json.JSONDecodeError:
+                if not self._fill(max(STREAM_CHUNK_CHARS, len(self._buffer) - self._pos)):
+                    raise
+                continue
+            # A number cut by the buffer end ("1." or "12") may go on in the next chunk.
+            complete = _NUMBER_TAIL.match(self._buffer, end).end() < len(self._buffer)
+            if complete or not self._fill(STREAM_CHUNK_CHARS):
+                self._pos = end
+                return value
+
+    def _expect(self, char: str) -> None:
+        if self._peek() != char:
+            raise json.JSONDecodeError(f"Expecting {char!r} delimiter", self._buffer, self._pos)
+        self._pos += 1
+
+    def _peek(self) -> str:
+        """Skip whitespace and return the next character, ``""`` at the end."""
+        while True:
+            self._pos = _WHITESPACE.match(self._buffer, self._pos).end()
+            if self._pos < len(self._buffer):
+                return self._buffer[self._pos]
+            if not self._fill(STREAM_CHUNK_CHARS):
+                return ""
+
+    def _fill(self, size: int) -> bool:
+        if self._eof:
+            return False
+        chunk = self._read(size)
+        if not chunk:
+            self._eof = True
+            return False
+        self._buffer = self._buffer[self._pos :] + chunk
+        self._pos = 0
+        return True
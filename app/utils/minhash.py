@@ -0,0 +1,95 @@
+from __future__ import annotations
+
+import hashlib
+
+import numpy as np
+
+MINHASH_PERMUTATIONS = 128
+# 16 bands of 8 rows: pairs collide in some band with probability 1 - (1 - J**8)**16,
+# about 0.5 at Jaccard 0.7 and above 0.99 from 0.85.
+LSH_BANDS = 16
+# Buckets larger than this are linked to their first member instead of pairwise.
+LSH_MAX_BUCKET_PAIRS = 64
+
+_MASK64 = np.uint64(0xFFFFFFFFFFFFFFFF)
+
+
+def mix64(values: np.ndarray) -> np.ndarray:
+    """SplitMix64 finalizer: a cheap, well-spread bijection on uint64 (wraps on overflow)."""
+    values = values.astype(np.uint64, copy=True)
+    with np.errstate(over="ignore"):
+        values ^= values >> np.uint64(30)
+        values *= np.uint64(0xBF58476D1CE4E5B9)
+        values ^= values >> np.uint64(27)
+        values *= np.uint64(0x94D049BB133111EB)
+        values ^= values >> np.uint64(31)
+    return values & _MASK64
+
+
+# One seed per permutation; fixed so signatures stay comparable across builds.
+_SEEDS = mix64(np.arange(1, MINHASH_PERMUTATIONS + 1, dtype=np.uint64))
+
+
+def combine_columns(columns: np.ndarray) -> np.ndarray:
+    """Hash every row of an ``(n, k)`` integer array to one uint64."""
+    columns = np.asarray(columns).astype(np.int64).view(np.uint64).reshape(len(columns), -1)
+    hashed = np.full(len(columns), 0x9E3779B97F4A7C15, dtype=np.uint64)
+    for column in columns.T:
+        hashed = mix64(hashed ^ column)
+    return hashed
+
+
+def string_hash(value: str) -> int:
+    """Process-independent 63-bit hash of a string (``hash()`` is salted per process)."""
+    return int.from_bytes(hashlib.blake2b(value.encode("utf-8"), digest_size=8).digest(), "little") >> 1
+
+
+def minhash_signature(shingles: np.ndarray) -> np.ndarray | None:
+    """MinHash of a set of uint64 shingles: one uint32 minimum per permutation.
+
+    Each permutation is ``mix64(shingle ^ seed)``; the share of equal entries
+    between two signatures estimates the Jaccard similarity of the sets.
+    Returns ``None`` for an empty set.
+    """
+    shingles = np.unique(np.asarray(shingles, dtype=np.uint64))
+    if not len(shingles):
+        return None
+    hashed = mix64(shingles[:, None] ^ _SEEDS[None, :])
+    return (hashed.min(axis=0) >> np.uint64(32)).astype(np.uint32)
+
+
+def lsh_candidate_pairs(signatures: np.ndarray, *, bands: int = LSH_BANDS) -> tuple[np.ndarray, np.ndarray]:
+    """Candidate ``(left, right)`` row pairs of an ``(n, permutations)`` signature matrix.
+
+    Rows sharing all values of any band land in the same bucket. Buckets are
+    found by sorting band hashes, so the cost is ``O(n log n)`` per band plus
+    the pairs produced; buckets over ``LSH_MAX_BUCKET_PAIRS`` members are
+    chained to their first member rather than expanded pairwise.
+    """
+    count, permutations = signatures.shape
+    rows = permutations // bands
+    left_parts: list[np.ndarray] = []
+    right_parts: list[np.ndarray] = []
+    for band in range(bands):
+        keys = combine_columns(signatures[:, band * rows : (band + 1) * rows])
+        order = np.argsort(keys, kind="stable")
+        sorted_keys = keys[order]
+        starts = np.flatnonzero(np.r_[True, sorted_keys[1:] != sorted_keys[:-1]])
+        sizes = np.diff(np.r_[starts, count])
+        bucket_start = np.repeat(starts, sizes)
+        bucket_size = np.repeat(sizes, sizes)
+        position = np.arange(count)
+        # Small buckets: every sorted position pairs with the positions after it in its bucket.
+        following = np.where(bucket_size <= LSH_MAX_BUCKET_PAIRS, bucket_start + bucket_size - position - 1, 0)
+        total = int(following.sum())
+        offsets = np.arange(total) - np.repeat(np.cumsum(following) - following, following)
+        heads = np.repeat(position, following)
+        left_parts.append(order[heads])
+        right_parts.append(order[heads + 1 + offsets])
+        # Large buckets: chain every member to the first one.
+        chained = (bucket_size > LSH_MAX_BUCKET_PAIRS) & (position != bucket_start)
+        left_parts.append(order[bucket_start[chained]])
+        right_parts.append(order[chained])
+    left, right = np.concatenate(left_parts), np.concatenate(right_parts)
+    pairs = np.unique(np.minimum(left, right).astype(np.int64) * count + np.maximum(left, right))
+    return np.divmod(pairs, count)
@@ -0,0 +1,271 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+
+import numpy as np
+
+from app.utils.grid_hash import grid_candidates
+from app.utils.profiling import StageProfiler
+
+# Sweep candidates are expanded in blocks of about this many pairs to bound memory.
+SWEEP_BLOCK_PAIRS = 1 << 21
+
+
+@dataclass
+class PlanarGraph:
+    """Noded line work: snapped nodes, undirected edges, their components and bounded faces.
+
+    ``faces`` holds the node cycles of bounded faces, counter-clockwise;
+    faces that contain other components do not have them subtracted.
+    """
+
+    nodes: np.ndarray
+    edges: np.ndarray
+    edge_components: np.ndarray
+    faces: list[np.ndarray]
+    face_areas: np.ndarray
+    intersection_count: int
+
+
+def connected_labels(count: int, left: np.ndarray, right: np.ndarray) -> np.ndarray:
+    """Label ``count`` vertices by connected component of the edges ``left[i] - right[i]``.
+
+    Union-find without a Python loop per edge: every round hooks each root to
+    the smallest label across its edges, then pointer jumping flattens the
+    trees. A component's label is its smallest vertex index.
+    """
+    labels = np.arange(count)
+    while True:
+        lowest = np.minimum(labels[left], labels[right])
+        hooked = labels.copy()
+        np.minimum.at(hooked, labels[left], lowest)
+        np.minimum.at(hooked, labels[right], lowest)
+        while True:
+            jumped = hooked[hooked]
+            if np.array_equal(jumped, hooked):
+                break
+            hooked = jumped
+        if np.array_equal(hooked, labels):
+            return labels
+        labels = hooked
+
+
+def snap_points(points: np.ndarray, tolerance: float) -> tuple[np.ndarray, np.ndarray]:
+    """Merge points closer than ``tolerance``; returns ``(node index per point, node coordinates)``.
+
+    Close pairs come from a uniform grid hash and are merged transitively
+    (single linkage); a node sits at the mean of its points.
+    """
+    first, second = grid_candidates(points, points, tolerance)
+    close = (first < second) & (np.hypot(*(points[first] - points[second]).T) <= tolerance)
+    labels = connected_labels(len(points), first[close], second[close])
+    _, labels = np.unique(labels, return_inverse=True)
+    counts = np.bincount(labels)
+    nodes = np.column_stack(
+        (np.bincount(labels, weights=points[:, 0]) / counts, np.bincount(labels, weights=points[:, 1]) / counts)
+    )
+    return labels, nodes
+
+
+def _cross(first: np.ndarray, second: np.ndarray) -> np.ndarray:
+    return first[:, 0] * second[:, 1] - first[:, 1] * second[:, 0]
+
+
+def _split_parameters(
+    segments: np.ndarray,
+    first: np.ndarray,
+    second: np.ndarray,
+    tolerance: float,
+) -> tuple[np.ndarray, np.ndarray, int]:
+    """Exact intersection test of candidate pairs; returns ``(segment, t)`` split points and the hit count."""
+    start, direction = segments[first, :2], segments[first, 2:] - segments[first, :2]
+    other_start, other_direction = segments[second, :2], segments[second, 2:] - segments[second, :2]
+    length = np.hypot(*direction.T)
+    other_length = np.hypot(*other_direction.T)
+    # Segments are extended by the snap tolerance so near-miss T-junctions still meet.
+    reach, other_reach = tolerance / length, tolerance / other_length
+    offset = other_start - start
+    denominator = _cross(direction, other_direction)
+    parallel = np.abs(denominator) <= 1e-12 * length * other_length
+    with np.errstate(divide="ignore", invalid="ignore"):
+        t = _cross(offset, other_direction) / denominator
+        u = _cross(offset, direction) / denominator
+    crossing = ~parallel & (t >= -reach) & (t <= 1 + reach) & (u >= -other_reach) & (u <= 1 + other_reach)
+
+    # Collinear overlaps: split each segment at the other's endpoints that fall inside it.
+    collinear = parallel & (np.abs(_cross(offset, direction)) <= tolerance * length)
+    along = np.einsum("ij,ij->i", offset, direction) / length**2
+    along_end = np.einsum("ij,ij->i", offset + other_direction, direction) / length**2
+    back = np.einsum("ij,ij->i", -offset, other_direction) / other_length**2
+    back_end = np.einsum("ij,ij->i", direction - offset, other_direction) / other_length**2
+
+    segment_ids = np.concatenate(
+        (first[crossing], second[crossing], first[collinear], first[collinear], second[collinear], second[collinear])
+    )
+    parameters = np.concatenate(
+        (t[crossing], u[crossing], along[collinear], along_end[collinear], back[collinear], back_end[collinear])
+    )
+    margins = np.concatenate(
+        (
+            reach[crossing],
+            other_reach[crossing],
+            reach[collinear],
+            reach[collinear],
+            other_reach[collinear],
+            other_reach[collinear],
+        )
+    )
+    # Splits within snapping distance of an endpoint are left to the snapping pass.
+    interior = (parameters > margins) & (parameters < 1 - margins)
+    return segment_ids[interior], parameters[interior], int(crossing.sum() + collinear.sum())
+
+
+def segment_intersections(segments: np.ndarray, tolerance: float) -> tuple[np.ndarray, np.ndarray, int]:
+    """Find where segments (n x 4) cross, touch or overlap; returns ``(segment, t)`` interior splits.
+
+    Sweep line over the axis along which segments are shortest in total:
+    segments are sorted by their interval start on it, and each one is paired
+    only with the segments that start before it ends (``searchsorted``). The
+    pairs are expanded in blocks, pruned on the other axis and then tested
+    exactly, all vectorized. The third value counts intersecting pairs.
+    """
+    empty = np.zeros(0, dtype=np.int64)
+    count = len(segments)
+    if count < 2:
+        return empty, np.zeros(0, dtype=np.float64), 0
+    spans = np.abs(segments[:, 2:] - segments[:, :2]).sum(axis=0)
+    axis = int(np.argmin(spans))
+    other = 1 - axis
+    low = np.minimum(segments[:, axis], segments[:, axis + 2])
+    high = np.maximum(segments[:, axis], segments[:, axis + 2])
+    cross_low = np.minimum(segments[:, other], segments[:, other + 2])
+    cross_high = np.maximum(segments[:, other], segments[:, other + 2])
+
+    order = np.argsort(low, kind="stable")
+    sorted_low = low[order]
+    ends = np.searchsorted(sorted_low, high[order] + tolerance, side="right")
+    counts = np.maximum(ends - np.arange(count) - 1, 0)
+    cumulative = np.cumsum(counts)
+
+    segment_parts: list[np.ndarray] = []
+    parameter_parts: list[np.ndarray] = []
+    hits = 0
+    row = 0
+    while row < count:
+        # Rows [row, stop) expand to roughly SWEEP_BLOCK_PAIRS candidates (at least one row).
+        base = cumulative[row - 1] if row else 0
+        stop = max(row + 1, int(np.searchsorted(cumulative, base + SWEEP_BLOCK_PAIRS, side="right")))
+        block_counts = counts[row:stop]
+        total = int(block_counts.sum())
+        if total:
+            rows = np.repeat(np.arange(row, stop), block_counts)
+            steps = np.arange(total) - np.repeat(np.cumsum(block_counts) - block_counts, block_counts)
+            first, second = order[rows], order[rows + 1 + steps]
+            overlapping = (cross_low[first] <= cross_high[second] + tolerance) & (
+                cross_low[second] <= cross_high[first] + tolerance
+            )
+            segment_ids, parameters, block_hits = _split_parameters(
+                segments, first[overlapping], second[overlapping], tolerance
+            )
+            segment_parts.append(segment_ids)
+            parameter_parts.append(parameters)
+            hits += block_hits
+        row = stop
+    if not segment_parts:
+        return empty, np.zeros(0, dtype=np.float64), 0
+    return np.concatenate(segment_parts), np.concatenate(parameter_parts), hits
+
+
+def planar_faces(nodes: np.ndarray, edges: np.ndarray, *, min_area: float = 0.0) -> tuple[list[np.ndarray], np.ndarray]:
+    """Bounded faces of a planar graph as counter-clockwise node cycles, with their areas.
+
+    Half-edges are sorted by angle around their origin; the successor of
+    ``u -> v`` is the half-edge after ``v -> u`` clockwise around ``v``, so each
+    cycle of the successor permutation bounds one face on its left. Cycles
+    are labelled by pointer doubling and measured with the shoelace formula;
+    bounded faces come out with positive area, the outer boundary of each
+    component with negative area.
+    """
+    edge_count = len(edges)
+    if not edge_count:
+        return [], np.zeros(0, dtype=np.float64)
+    origins = np.concatenate((edges[:, 0], edges[:, 1]))
+    targets = np.concatenate((edges[:, 1], edges[:, 0]))
+    vectors = nodes[targets] - nodes[origins]
+    angles = np.arctan2(vectors[:, 1], vectors[:, 0])
+
+    order = np.lexsort((angles, origins))
+    position = np.empty_like(order)
+    position[order] = np.arange(len(order))
+    degree = np.bincount(origins, minlength=len(nodes))
+    ring_start = np.concatenate(([0], np.cumsum(degree)[:-1]))
+
+    twins = np.concatenate((np.arange(edge_count, 2 * edge_count), np.arange(edge_count)))
+    twin_slot = position[twins] - ring_start[targets]
+    successors = order[ring_start[targets] + (twin_slot - 1) % degree[targets]]
+
+    labels = np.arange(len(successors))
+    jumps = successors.copy()
+    span = 1
+    while span < len(successors):
+        labels = np.minimum(labels, labels[jumps])
+        jumps = jumps[jumps]
+        span *= 2
+    _, face_ids = np.unique(labels, return_inverse=True)
+    twice_area = np.bincount(face_ids, weights=_cross(nodes[origins], nodes[targets]))
+    areas = twice_area / 2
+
+    faces: list[np.ndarray] = []
+    kept_areas: list[float] = []
+    heads = np.unique(labels)
+    for face_id in np.flatnonzero(areas > min_area):
+        cycle = []
+        half_edge = start = int(heads[face_id])
+        while True:
+            cycle.append(origins[half_edge])
+            half_edge = int(successors[half_edge])
+            if half_edge == start:
+                break
+        faces.append(np.asarray(cycle, dtype=np.int64))
+        kept_areas.append(float(areas[face_id]))
+    return faces, np.asarray(kept_areas, dtype=np.float64)
+
+
+def build_planar_graph(
+    segments: np.ndarray,
+    tolerance: float,
+    *,
+    profiler: StageProfiler | None = None,
+) -> PlanarGraph:
+    """Node segments (n x 4) into a planar graph: split at intersections, snap, and find faces."""
+    profiler = profiler or StageProfiler()
+    with profiler.stage("prepare"):
+        segments = np.asarray(segments, dtype=np.float64).reshape(-1, 4)
+        segments = segments[np.hypot(*(segments[:, 2:] - segments[:, :2]).T) > tolerance]
+    with profiler.stage("intersect"):
+        split_segments, split_parameters, intersection_count = segment_intersections(segments, tolerance)
+    with profiler.stage("split"):
+        count = len(segments)
+        owner = np.concatenate((np.arange(count), np.arange(count), split_segments))
+        parameter = np.concatenate((np.zeros(count), np.ones(count), split_parameters))
+        order = np.lexsort((parameter, owner))
+        owner, parameter = owner[order], parameter[order]
+        points = segments[owner, :2] + parameter[:, None] * (segments[owner, 2:] - segments[owner, :2])
+        consecutive = np.flatnonzero(owner[1:] == owner[:-1])
+    with profiler.stage("snap"):
+        point_nodes, nodes = snap_points(points, tolerance)
+        edges = np.column_stack((point_nodes[consecutive], point_nodes[consecutive + 1]))
+        edges = np.unique(np.sort(edges[edges[:, 0] != edges[:, 1]], axis=1), axis=0)
+    with profiler.stage("components"):
+        node_labels = connected_labels(len(nodes), edges[:, 0], edges[:, 1])
+        _, edge_components = np.unique(node_labels[edges[:, 0]], return_inverse=True)
+    with profiler.stage("faces"):
+        faces, face_areas = planar_faces(nodes, edges, min_area=tolerance * tolerance)
+    return PlanarGraph(
+        nodes=nodes,
+        edges=edges,
+        edge_components=edge_components.reshape(-1),
+        faces=faces,
+        face_areas=face_areas,
+        intersection_count=intersection_count,
+    )
@@ -0,0 +1,91 @@
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Any
+
+if TYPE_CHECKING:
+    import numpy as np
+
+# Douglas-Peucker tolerance for LOD 1, 2, 3, as a fraction of the polyline's own
+# bounding-box diagonal; LOD 0 is the stored geometry.
+POLYLINE_LOD_TOLERANCES = (0.002, 0.01, 0.05)
+POLYLINE_MAX_LOD = len(POLYLINE_LOD_TOLERANCES)
+# Shorter polylines are always served in full.
+POLYLINE_LOD_MIN_POINTS = 16
+
+
+def douglas_peucker(points: np.ndarray, tolerance: float) -> np.ndarray:
+    """Return the indices of ``points`` (n x 2) kept at ``tolerance``.
+
+    Breadth-first Douglas-Peucker: every open span is split in the same
+    vectorized pass, so the Python loop runs once per recursion depth rather
+    than once per span. The endpoints are always kept, so closed polylines
+    stay closed.
+    """
+    # Imported here so the read path, and app startup, stay free of numpy.
+    import numpy as np
+
+    count = len(points)
+    keep = np.zeros(count, dtype=bool)
+    keep[[0, count - 1]] = True
+    firsts, lasts = np.array([0]), np.array([count - 1])
+    while True:
+        open_spans = lasts - firsts > 1
+        firsts, lasts = firsts[open_spans], lasts[open_spans]
+        if not len(firsts):
+            break
+        lengths = lasts - firsts - 1
+        span = np.repeat(np.arange(len(firsts)), lengths)
+        bounds = np.concatenate(([0], np.cumsum(lengths)[:-1]))
+        interior = np.arange(len(span)) - bounds[span] + firsts[span] + 1
+
+        start, chord = points[firsts][span], (points[lasts] - points[firsts])[span]
+        offset = points[interior] - start
+        length_sq = np.einsum("ij,ij->i", chord, chord)
+        along = np.einsum("ij,ij->i", offset, chord) / np.where(length_sq == 0.0, 1.0, length_sq)
+        along = np.minimum(np.maximum(along, 0.0), 1.0)
+        distances = np.hypot(*(offset - along[:, None] * chord).T)
+
+        # Farthest interior point of each span: first position holding the span maximum.
+        span_max = np.maximum.reduceat(distances, bounds)
+        candidates = np.flatnonzero(distances == span_max[span])
+        spans_hit, first_hit = np.unique(span[candidates], return_index=True)
+        splits = interior[candidates[first_hit]]
+        split_spans = span_max[spans_hit] > tolerance
+        spans_hit, splits = spans_hit[split_spans], splits[split_spans]
+        keep[splits] = True
+        firsts = np.concatenate((firsts[spans_hit], splits))
+        lasts = np.concatenate((splits, lasts[spans_hit]))
+    return np.flatnonzero(keep)
+
+
+def polyline_lods(geometry: dict[str, Any]) -> list[tuple[int, float, dict[str, Any]]]:
+    """Simplified versions of a POLYLINE geometry as ``(lod, tolerance, geometry)``.
+
+    Each level simplifies the previous one, so ``tolerance`` (drawing units) is
+    the accumulated bound on its distance from the full polyline. Levels that
+    would not drop any further vertices are omitted; readers fall back to the
+    next finer level.
+    """
+    import numpy as np
+
+    points = geometry.get("points") or []
+    if len(points) < POLYLINE_LOD_MIN_POINTS:
+        return []
+    try:
+        coordinates = np.array([[float(point["x"]), float(point["y"])] for point in points])
+    except (KeyError, TypeError, ValueError):
+        return []
+    diagonal = float(np.hypot(*(coordinates.max(axis=0) - coordinates.min(axis=0))))
+    if diagonal == 0.0:
+        return []
+
+    levels = []
+    kept = np.arange(len(points))
+    tolerance = 0.0
+    for lod, fraction in enumerate(POLYLINE_LOD_TOLERANCES, start=1):
+        tolerance += diagonal * fraction
+        coarser = kept[douglas_peucker(coordinates[kept], diagonal * fraction)]
+        if len(coarser) < len(kept):
+            levels.append((lod, tolerance, {**geometry, "points": [points[index] for index in coarser.tolist()]}))
+            kept = coarser
+    return levels
@@ -0,0 +1,140 @@
+from __future__ import annotations
+
+import cProfile
+import heapq
+import sys
+import time
+import tracemalloc
+from collections import defaultdict
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Callable, Iterator
+
+try:
+    import resource
+except ImportError:  # pragma: no cover - Windows
+    resource = None  # type: ignore[assignment]
+
+
+class StageProfiler:
+    """Accumulate exclusive wall time per named stage.
+
+    Stages nest: time spent in an inner stage is charged to the inner stage
+    only, so the per-stage totals add up to the instrumented wall time.
+    """
+
+    def __init__(self) -> None:
+        self._totals: defaultdict[str, float] = defaultdict(float)
+        self._counts: defaultdict[str, int] = defaultdict(int)
+        # Child time accumulated by each open stage.
+        self._open: list[float] = []
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        started = time.perf_counter()
+        self._open.append(0.0)
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - started
+            self._totals[name] += elapsed - self._open.pop()
+            self._counts[name] += 1
+            if self._open:
+                self._open[-1] += elapsed
+
+    def elapsed(self) -> float:
+        return sum(self._totals.values())
+
+    def summary(self) -> dict[str, dict[str, float]]:
+        total = self.elapsed() or 1e-9
+        return {
+            name: {
+                "seconds": round(seconds, 6),
+                "calls": self._counts[name],
+                "share": round(seconds / total, 4),
+            }
+            for name, seconds in sorted(self._totals.items(), key=lambda item: -item[1])
+        }
+
+
+class MemorySampler:
+    """Opt-in ``tracemalloc`` peaks, checkpointed every ``every`` samples.
+
+    Each checkpoint records the traced current/peak bytes since the previous
+    checkpoint; tracing costs noticeable CPU so it stays off by default.
+    """
+
+    def __init__(self, *, every: int = 100) -> None:
+        self.every = max(1, every)
+        self.checkpoints: list[dict[str, Any]] = []
+        self.peak_bytes = 0
+        self._started_here = False
+
+    def start(self) -> None:
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_here = True
+        tracemalloc.reset_peak()
+
+    def maybe_sample(self, sample_count: int) -> None:
+        if sample_count % self.every == 0:
+            self._checkpoint(sample_count)
+
+    def stop(self, sample_count: int) -> dict[str, Any]:
+        if not self.checkpoints or self.checkpoints[-1]["samples"] != sample_count:
+            self._checkpoint(sample_count)
+        if self._started_here:
+            tracemalloc.stop()
+        return {
+            "every": self.every,
+            "peak_mb": _megabytes(self.peak_bytes),
+            "checkpoints": self.checkpoints,
+        }
+
+    def _checkpoint(self, sample_count: int) -> None:
+        current, peak = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        self.peak_bytes = max(self.peak_bytes, peak)
+        self.checkpoints.append(
+            {"samples": sample_count, "current_mb": _megabytes(current), "peak_mb": _megabytes(peak)}
+        )
+
+
+class SlowestTracker:
+    """Keep the ``limit`` slowest ``(seconds, key)`` observations."""
+
+    def __init__(self, limit: int) -> None:
+        self.limit = limit
+        self._heap: list[tuple[float, str]] = []
+
+    def observe(self, seconds: float, key: str) -> None:
+        if self.limit <= 0:
+            return
+        if len(self._heap) < self.limit:
+            heapq.heappush(self._heap, (seconds, key))
+        elif seconds > self._heap[0][0]:
+            heapq.heapreplace(self._heap, (seconds, key))
+
+    def slowest(self) -> list[tuple[float, str]]:
+        return sorted(self._heap, reverse=True)
+
+
+def profile_call(function: Callable[[], Any], output_path: Path) -> None:
+    """Run ``function`` under cProfile and dump pstats to ``output_path``."""
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    profiler = cProfile.Profile()
+    profiler.runcall(function)
+    profiler.dump_stats(str(output_path))
+
+
+def max_rss_mb() -> float | None:
+    """Peak resident set size of this process, where the platform reports it."""
+    if resource is None:
+        return None
+    usage = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes.
+    return round(usage / (1024 * 1024) if sys.platform == "darwin" else usage / 1024, 2)
+
+
+def _megabytes(value: int) -> float:
+    return round(value / (1024 * 1024), 3)
@@ -0,0 +1,28 @@
+from __future__ import annotations
+
+import argparse
+
+from app.core.settings import get_settings
+from app.services.archcad_image_tensors import ArchCADImageTensorCache
+
+
+def main() -> None:
+    """CLI helper to pre-decode ArchCAD images into a memory-mapped tensor file."""
+    parser = argparse.ArgumentParser(description=main.__doc__)
+    parser.add_argument("--size", type=int, default=None)
+    parser.add_argument("--split", default=None)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--force", action="store_true")
+    args = parser.parse_args()
+
+    settings = get_settings()
+    result = ArchCADImageTensorCache(settings, size=args.size).build(
+        split=args.split,
+        workers=args.workers,
+        force=args.force,
+    )
+    print(result)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,34 @@
+from __future__ import annotations
+
+import argparse
+
+from app.core.settings import get_settings
+from app.services.archcad_alignment import ALIGNMENT_TOLERANCE, ArchCADAlignmentService
+
+
+def main() -> None:
+    """CLI helper to check JSON/SVG alignment of indexed ArchCAD samples and store the metrics."""
+    parser = argparse.ArgumentParser(description=main.__doc__)
+    parser.add_argument("--split", default=None)
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=ALIGNMENT_TOLERANCE,
+        help="Endpoint match radius as a fraction of the drawing diagonal",
+    )
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--force", action="store_true", help="Recheck samples whose modalities are unchanged")
+    args = parser.parse_args()
+
+    settings = get_settings()
+    result = ArchCADAlignmentService(settings).check_samples(
+        split=args.split,
+        tolerance=args.tolerance,
+        workers=args.workers,
+        force=args.force,
+    )
+    print(result)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,29 @@
+from __future__ import annotations
+
+import argparse
+
+from app.core.settings import get_settings
+from app.models.sharded_index_store import open_index_store
+
+
+def main() -> None:
+    """CLI helper to migrate stored ArchCAD payloads to the configured codec."""
+    parser = argparse.ArgumentParser(description=main.__doc__)
+    parser.add_argument("--codec", choices=("json", "zlib", "zstd"), default=None, help="Overrides ARCHCAD_PAYLOAD_CODEC")
+    parser.add_argument("--retrain", action="store_true", help="Train a fresh dictionary even if one exists")
+    parser.add_argument("--vacuum", action="store_true", help="VACUUM afterwards so the file actually shrinks")
+    args = parser.parse_args()
+
+    settings = get_settings()
+    if args.codec:
+        settings = settings.model_copy(update={"archcad_payload_codec": args.codec})
+    store = open_index_store(settings)
+    store.initialize()
+    result = store.compress_payloads(retrain=args.retrain)
+    if args.vacuum:
+        store.vacuum()
+    print({**result, "storage": store.payload_storage_stats()})
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,32 @@
+from __future__ import annotations
+
+import argparse
+from pathlib import Path
+
+from app.core.settings import get_settings
+from app.services.archcad_shard_exporter import ArchCADShardExporter
+
+
+def main() -> None:
+    """CLI helper to export aligned ArchCAD samples into tar shards."""
+    parser = argparse.ArgumentParser(description=main.__doc__)
+    parser.add_argument("--output-dir", type=Path, default=None)
+    parser.add_argument("--samples-per-shard", type=int, default=1000)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--split", default=None)
+    parser.add_argument("--include-unaligned", action="store_true")
+    args = parser.parse_args()
+
+    settings = get_settings()
+    result = ArchCADShardExporter(settings).export(
+        output_dir=args.output_dir,
+        samples_per_shard=args.samples_per_shard,
+        workers=args.workers,
+        split=args.split,
+        aligned_only=not args.include_unaligned,
+    )
+    print(result)
+
+
+if __name__ == "__main__":
+    main()
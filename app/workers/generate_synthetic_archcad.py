@@ -0,0 +1,54 @@
+from __future__ import annotations
+
+import argparse
+from pathlib import Path
+
+from app.services.archcad_synthetic import (
+    DEFAULT_SEMANTICS,
+    DEFAULT_SPLITS,
+    ArchCADSyntheticGenerator,
+    parse_weights,
+)
+
+
+def main() -> None:
+    """CLI helper to write a synthetic ArchCAD dataset for offline scale testing."""
+    parser = argparse.ArgumentParser(description=main.__doc__)
+    parser.add_argument("output_dir", type=Path, help="Dataset root, e.g. the ARCHCAD_LOCAL_DIR to benchmark")
+    parser.add_argument("--samples", type=int, default=1000)
+    parser.add_argument("--splits", default=None, help="e.g. train=0.8,val=0.1,test=0.1")
+    parser.add_argument("--semantics", default=None, help="e.g. wall=0.5,window=0.2,column=0.3")
+    parser.add_argument("--elements-min", type=int, default=20)
+    parser.add_argument("--elements-max", type=int, default=200)
+    parser.add_argument("--qa-density", type=float, default=2.0, help="Mean QA pairs per sample")
+    parser.add_argument("--point-count", type=int, default=2048)
+    parser.add_argument("--image-size", type=int, default=256)
+    parser.add_argument("--missing-rate", type=float, default=0.02, help="Per-modality drop probability")
+    parser.add_argument("--offset-rate", type=float, default=0.02, help="Share of samples with shifted SVG")
+    parser.add_argument("--label-noise-rate", type=float, default=0.01, help="Per-element SVG relabel probability")
+    parser.add_argument("--duplicate-rate", type=float, default=0.01, help="Share of samples copying an earlier plan")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workers", type=int, default=None)
+    args = parser.parse_args()
+
+    generator = ArchCADSyntheticGenerator(
+        args.output_dir,
+        samples=args.samples,
+        splits=parse_weights(args.splits, DEFAULT_SPLITS),
+        semantics=parse_weights(args.semantics, DEFAULT_SEMANTICS),
+        elements_min=args.elements_min,
+        elements_max=args.elements_max,
+        qa_density=args.qa_density,
+        point_count=args.point_count,
+        image_size=args.image_size,
+        missing_rate=args.missing_rate,
+        offset_rate=args.offset_rate,
+        label_noise_rate=args.label_noise_rate,
+        duplicate_rate=args.duplicate_rate,
+        seed=args.seed,
+    )
+    print(generator.generate(workers=args.workers))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,24 @@
+from __future__ import annotations
+
+import argparse
+
+from app.core.settings import get_settings
+from app.models.index_store import SCHEMA_VERSION
+from app.models.sharded_index_store import open_index_store
+
+
+def main() -> None:
+    """CLI helper to bring an existing ArchCAD index up to the current schema."""
+    parser = argparse.ArgumentParser(description=main.__doc__)
+    parser.parse_args()
+
+    settings = get_settings()
+    store = open_index_store(settings)
+    if not store.exists():
+        parser.error("No ArchCAD index to migrate; build one with python -m app.workers.reindex_archcad")
+    store.initialize()
+    print({"schema_version": SCHEMA_VERSION, "summary": store.summary()})
+
+
+if __name__ == "__main__":
+    main()
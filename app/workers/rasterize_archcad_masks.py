@@ -0,0 +1,29 @@
+from __future__ import annotations
+
+import argparse
+
+from app.core.settings import get_settings
+from app.services.archcad_masks import DEFAULT_MASK_RESOLUTION, ArchCADMaskService
+
+
+def main() -> None:
+    """CLI helper to pre-rasterize ArchCAD semantic masks into the mask cache."""
+    parser = argparse.ArgumentParser(description=main.__doc__)
+    parser.add_argument("--resolution", type=int, default=DEFAULT_MASK_RESOLUTION)
+    parser.add_argument("--thickness", type=int, default=1)
+    parser.add_argument("--split", default=None)
+    parser.add_argument("--workers", type=int, default=None)
+    args = parser.parse_args()
+
+    settings = get_settings()
+    result = ArchCADMaskService(settings).rasterize_samples(
+        split=args.split,
+        resolution=args.resolution,
+        thickness=args.thickness,
+        workers=args.workers,
+    )
+    print(result)
+
+
+if __name__ == "__main__":
+    main()
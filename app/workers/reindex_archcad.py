@@ -1,13 +1,26 @@
 from __future__ import annotations
 
+import argparse
+
 from app.core.settings import get_settings
 from app.services.archcad_indexer import ArchCADIndexer
 
 
 def main() -> None:
     """CLI helper to rebuild the ArchCAD index."""
+    parser = argparse.ArgumentParser(description=main.__doc__)
+    parser.add_argument("--split", default=None, help="Reindex only this split (e.g. one shard)")
+    parser.add_argument("--profile-memory", action="store_true", help="Track tracemalloc peaks while indexing")
+    parser.add_argument("--profile-slowest", type=int, default=0, help="cProfile this many of the slowest samples")
+    args = parser.parse_args()
+
     settings = get_settings()
-    result = ArchCADIndexer(settings).build_index(force_reindex=True)
+    result = ArchCADIndexer(settings).build_index(
+        force_reindex=True,
+        split=args.split,
+        profile_memory=args.profile_memory,
+        profile_slowest=args.profile_slowest,
+    )
     print(result)
 
 